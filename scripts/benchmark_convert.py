@@ -0,0 +1,242 @@
+"""Benchmark offline del motore di conversione (FfmpegEngine.convert / convert_batch).
+
+Genera fixture sintetiche con FFmpeg (lavfi: sine/noise in WAV, FLAC, MP3 e MP4 con
+traccia video; durate short/medium/long), misura file/s, secondi di audio/s e picco RSS
+e confronta con una baseline JSON: exit code 1 se un caso peggiora oltre la soglia.
+
+Uso:
+    python scripts/benchmark_convert.py                   # confronta con la baseline
+    python scripts/benchmark_convert.py --update-baseline # registra la baseline
+    python scripts/benchmark_convert.py --quick           # durate ridotte (smoke)
+
+La baseline dipende dalla macchina (CPU, disco, build FFmpeg): va registrata e
+confrontata sullo stesso host. Ogni caso gira in un processo separato, così il picco
+RSS (processo Python e processi FFmpeg figli) è del solo caso.
+"""
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+
+_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(_ROOT / "src"))
+
+from downconv.engines.ffmpeg_engine import FfmpegEngine  # noqa: E402
+from downconv.utils.probe_cache import ProbeCache  # noqa: E402
+
+try:
+    import resource
+except ImportError:  # Windows: niente getrusage, RSS non misurato
+    resource = None
+
+DEFAULT_BASELINE = _ROOT / ".benchmarks" / "convert_baseline.json"
+DEFAULT_FIXTURES = Path(tempfile.gettempdir()) / "downconv_bench_fixtures"
+# Peggioramento tollerato (frazione) prima di considerare un caso una regressione
+DEFAULT_THRESHOLD = 0.15
+
+DURATIONS = {"short": 5, "medium": 60, "long": 300}
+QUICK_DURATIONS = {"short": 2, "medium": 10, "long": 30}
+WORKER_COUNTS = (1, 2, 4)
+# Formato di uscita → qualità usata nel benchmark
+TARGETS = {"flac": "lossless", "m4a": "lossless", "mp3": "320k"}
+
+# Sorgente → (estensione, argomenti lavfi, argomenti codec)
+_SOURCES: dict[str, tuple[str, list[str], list[str]]] = {
+    "wav": (".wav", ["-f", "lavfi", "-i", "sine=frequency=440:sample_rate=44100"], []),
+    "flac": (
+        ".flac",
+        ["-f", "lavfi", "-i", "anoisesrc=color=pink:sample_rate=44100:amplitude=0.3"],
+        ["-c:a", "flac"],
+    ),
+    "mp3": (
+        ".mp3",
+        ["-f", "lavfi", "-i", "sine=frequency=1000:sample_rate=44100"],
+        ["-c:a", "libmp3lame", "-b:a", "192k"],
+    ),
+    "video": (
+        ".mp4",
+        [
+            "-f", "lavfi", "-i", "testsrc=size=320x240:rate=25",
+            "-f", "lavfi", "-i", "sine=frequency=440:sample_rate=48000",
+        ],
+        ["-c:v", "mpeg4", "-q:v", "10", "-c:a", "aac", "-b:a", "128k"],
+    ),
+}  # fmt: skip
+
+# Metriche: True = più alto è meglio
+METRICS = {"files_per_sec": True, "audio_sec_per_sec": True, "peak_rss_mb": False}
+
+
+def generate_fixtures(
+    ffmpeg: str, fixtures_dir: Path, durations: dict[str, int]
+) -> dict[Path, float]:
+    """Crea (se mancano) le fixture sintetiche. Ritorna path → durata in secondi."""
+    fixtures_dir.mkdir(parents=True, exist_ok=True)
+    fixtures: dict[Path, float] = {}
+    for source, (ext, inputs, codec) in _SOURCES.items():
+        for label, seconds in durations.items():
+            path = fixtures_dir / f"{source}_{label}_{seconds}s{ext}"
+            if not path.exists():
+                tmp = path.with_name(f".tmp_{path.name}")
+                cmd = [ffmpeg, "-hide_banner", "-loglevel", "error", "-y", *inputs]
+                cmd.extend(["-t", str(seconds), "-ac", "2", *codec, str(tmp)])
+                subprocess.run(cmd, check=True, stdin=subprocess.DEVNULL)
+                tmp.replace(path)
+            fixtures[path] = float(seconds)
+    return fixtures
+
+
+def _peak_rss_mb() -> float | None:
+    """Picco RSS (MB) di questo processo e dei figli terminati (FFmpeg), il maggiore.
+
+    Su Linux il maxrss di un figlio parte da quello del padre al fork: i due valori non
+    si separano in modo affidabile, si registra il massimo.
+    """
+    if resource is None:
+        return None
+    peak = max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    )
+    # Linux: KB, macOS: byte
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def run_case(
+    ffmpeg: str,
+    kind: str,
+    files: list[tuple[str, float]],
+    fmt: str,
+    workers: int,
+    repeat: int,
+) -> dict:
+    """Esegue un caso (nel processo figlio). Tempo = migliore delle ripetizioni."""
+    best = None
+    with tempfile.TemporaryDirectory(prefix="downconv_bench_") as tmp:
+        tmp_dir = Path(tmp)
+        engine = FfmpegEngine(ffmpeg, probe_cache=ProbeCache(tmp_dir / "probe.sqlite3"))
+        paths = [Path(p) for p, _ in files]
+        for i in range(repeat):
+            out_dir = tmp_dir / f"out{i}"
+            out_dir.mkdir()
+            start = time.perf_counter()
+            if kind == "convert":
+                ok, err = engine.convert(paths[0], out_dir / paths[0].stem, fmt, TARGETS[fmt])
+                failed = [] if ok else [err]
+            else:
+                results = engine.convert_batch(
+                    paths, out_dir, fmt, TARGETS[fmt], max_workers=workers
+                )
+                failed = [err for _, ok, err in results if not ok]
+            elapsed = time.perf_counter() - start
+            if failed:
+                raise RuntimeError(f"Conversione fallita: {failed[0]}")
+            best = elapsed if best is None else min(best, elapsed)
+    audio_seconds = sum(seconds for _, seconds in files)
+    return {
+        "files": len(files),
+        "audio_seconds": audio_seconds,
+        "wall_sec": round(best, 3),
+        "files_per_sec": round(len(files) / best, 3),
+        "audio_sec_per_sec": round(audio_seconds / best, 1),
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def build_cases(fixtures: dict[Path, float]) -> dict[str, tuple]:
+    """Casi: convert per ogni fixture × formato, convert_batch per formato × worker."""
+    cases: dict[str, tuple] = {}
+    all_files = [(str(p), d) for p, d in sorted(fixtures.items())]
+    for fmt in TARGETS:
+        for path, seconds in sorted(fixtures.items()):
+            cases[f"convert/{path.stem}->{fmt}"] = ("convert", [(str(path), seconds)], fmt, 1)
+        for workers in WORKER_COUNTS:
+            cases[f"batch/{fmt}/w{workers}"] = ("batch", all_files, fmt, workers)
+    return cases
+
+
+def compare_results(
+    baseline: dict[str, dict], current: dict[str, dict], threshold: float
+) -> list[str]:
+    """Regressioni di current rispetto a baseline oltre la soglia (messaggi leggibili)."""
+    regressions = []
+    for name, metrics in current.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        for metric, higher_is_better in METRICS.items():
+            old, new = base.get(metric), metrics.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            worse = -change if higher_is_better else change
+            if worse > threshold:
+                regressions.append(f"{name}: {metric} {old} → {new} ({change:+.0%})")
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--quick", action="store_true", help="durate ridotte")
+    parser.add_argument("--fixtures-dir", type=Path, default=DEFAULT_FIXTURES)
+    parser.add_argument("--filter", default="", help="solo i casi che contengono il testo")
+    parser.add_argument("--ffmpeg", default=None, help="eseguibile FFmpeg da usare")
+    args = parser.parse_args(argv)
+
+    ffmpeg = FfmpegEngine(args.ffmpeg).ffmpeg_path
+    durations = QUICK_DURATIONS if args.quick else DURATIONS
+    print(f"Fixture in {args.fixtures_dir} ...")
+    fixtures = generate_fixtures(ffmpeg, args.fixtures_dir, durations)
+    cases = {k: v for k, v in build_cases(fixtures).items() if args.filter in k}
+
+    results: dict[str, dict] = {}
+    # Processo nuovo per ogni caso (max_tasks_per_child): picco RSS non condiviso
+    ctx = get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=ctx, max_tasks_per_child=1) as ex:
+        for name, (kind, files, fmt, workers) in cases.items():
+            result = ex.submit(run_case, ffmpeg, kind, files, fmt, workers, args.repeat).result()
+            results[name] = result
+            print(
+                f"{name:45s} {result['files_per_sec']:8.2f} file/s "
+                f"{result['audio_sec_per_sec']:9.1f} s audio/s  RSS {result['peak_rss_mb']} MB"
+            )
+
+    if args.update_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        payload = {
+            "machine": {"platform": platform.platform(), "python": platform.python_version()},
+            "quick": args.quick,
+            "results": results,
+        }
+        args.baseline.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+        print(f"Baseline salvata: {args.baseline}")
+        return 0
+    if not args.baseline.exists():
+        print(f"Nessuna baseline in {args.baseline}: eseguire con --update-baseline")
+        return 0
+    baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+    if baseline.get("quick") != args.quick:
+        print("Baseline registrata con durate diverse (--quick): confronto non valido")
+        return 2
+    regressions = compare_results(baseline["results"], results, args.threshold)
+    for line in regressions:
+        print(f"REGRESSIONE {line}")
+    if regressions:
+        return 1
+    print(f"Nessuna regressione oltre {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
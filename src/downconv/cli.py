@@ -0,0 +1,219 @@
+"""CLI headless Down&Conv: conversione, download e job server senza interfaccia grafica.
+
+    downconv convert -f flac -o OUT file_o_cartella...
+    downconv download --audio mp3-320 -o OUT URL...
+    downconv serve [--port 8765]
+
+Su stdout una riga JSON per evento (start, progress, paused, playlist, file, done, error), su
+stderr i log. Codici di uscita: EXIT_OK, EXIT_FAILED (qualche file fallito),
+EXIT_USAGE (argomenti), EXIT_SETUP (FFmpeg mancante, cartella o spazio), EXIT_INTERRUPTED.
+
+Niente PySide6 e yt-dlp importato solo dal sottocomando download: l'avvio di una
+conversione resta nell'ordine di quello dell'interprete (script, cron, NAS).
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+
+from . import __version__
+from .jobs import (
+    AUDIO_CHOICES,
+    CONTAINER_CHOICES,
+    CONVERT_FORMATS,
+    PRIORITY_CHOICES,
+    VIDEO_CHOICES,
+    ConvertSpec,
+    DownloadSpec,
+    EventSink,
+    JobSetupError,
+    run_convert,
+    run_download,
+)
+
+logger = logging.getLogger(__name__)
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+EXIT_SETUP = 3
+EXIT_INTERRUPTED = 130
+
+# Token del job server (alternativa a --token, che resterebbe visibile in ps)
+SERVER_TOKEN_ENV = "DOWNCONV_SERVER_TOKEN"
+
+
+class EventWriter(EventSink):
+    """Eventi come righe JSON su stream (default stdout)."""
+
+    def __init__(self, stream=None, progress: bool = True) -> None:
+        super().__init__(progress)
+        self._stream = stream if stream is not None else sys.stdout
+
+    def _write(self, event: dict) -> None:
+        line = json.dumps(event, ensure_ascii=False)
+        with self._lock:
+            self._stream.write(line + "\n")
+            self._stream.flush()
+
+
+def _cmd_convert(args: argparse.Namespace, events: EventWriter) -> int:
+    spec = ConvertSpec(
+        inputs=args.inputs,
+        format=args.format,
+        quality=args.quality,
+        also=tuple(args.also),
+        output_dir=args.output_dir,
+        jobs=args.jobs,
+        overwrite=not args.no_overwrite,
+        incremental=args.incremental,
+        verify_hash=args.verify_hash,
+        priority=args.priority,
+    )
+    try:
+        spec.targets()
+    except ValueError as e:
+        events.emit("error", message=str(e))
+        return EXIT_USAGE
+    counts = run_convert(spec, events)
+    return EXIT_FAILED if counts["failed"] else EXIT_OK
+
+
+def _cmd_download(args: argparse.Namespace, events: EventWriter) -> int:
+    spec = DownloadSpec(
+        urls=args.urls,
+        output_dir=args.output_dir,
+        audio=args.audio,
+        video=args.video,
+        container=args.container,
+        overwrite=args.overwrite,
+        stream_encode=not args.no_stream_encode,
+        parallel=args.jobs,
+        expand_playlists=not args.no_expand,
+        priority=args.priority,
+    )
+    counts = run_download(spec, events)
+    return EXIT_FAILED if counts["failed"] else EXIT_OK
+
+
+def _cmd_serve(args: argparse.Namespace, events: EventWriter) -> int:
+    from .server import JobServer, warm_up
+
+    token = args.token or os.environ.get(SERVER_TOKEN_ENV)
+    try:
+        server = JobServer(args.host, args.port, token=token)
+    except OSError as e:
+        raise JobSetupError(f"Porta {args.port} non disponibile: {e}") from e
+    warm_up()
+    host, port = server.server_address[:2]
+    events.emit("listening", url=f"http://{host}:{port}", auth=bool(token))
+    try:
+        server.serve()
+    except KeyboardInterrupt:
+        pass  # Ctrl+C: arresto normale (job in corso annullati da serve())
+    return EXIT_OK
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Parser con i sottocomandi convert, download e serve."""
+    parser = argparse.ArgumentParser(
+        prog="downconv",
+        description="Down&Conv senza interfaccia: eventi JSON su stdout, log su stderr.",
+    )
+    parser.add_argument("--version", action="version", version=f"%(prog)s {__version__}")
+    parser.add_argument("-v", "--verbose", action="store_true", help="log dettagliati (stderr)")
+    parser.add_argument(
+        "--no-progress", action="store_true", help="niente eventi progress (solo file e done)"
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    conv = sub.add_parser("convert", help="converte file o cartelle (ricorsive)")
+    conv.add_argument("inputs", nargs="+", help="file o cartelle")
+    conv.add_argument(
+        "-f", "--format", required=True, help="formato: " + ", ".join(CONVERT_FORMATS)
+    )
+    conv.add_argument("-q", "--quality", default="320k", help="bitrate MP3 (default 320k)")
+    conv.add_argument(
+        "--also",
+        action="append",
+        default=[],
+        metavar="FMT[:Q]",
+        help="uscita aggiuntiva dallo stesso decode (es. --also mp3:192k), ripetibile",
+    )
+    conv.add_argument("-o", "--output-dir", help="cartella di output (default: accanto ai file)")
+    conv.add_argument(
+        "-j", "--jobs", type=int, default=None, help="conversioni in parallelo (default adattivo)"
+    )
+    conv.add_argument("--no-overwrite", action="store_true", help="non sovrascrivere le uscite")
+    conv.add_argument(
+        "--incremental", action="store_true", help="salta le uscite già aggiornate (manifest)"
+    )
+    conv.add_argument(
+        "--verify-hash", action="store_true", help="con --incremental confronta il contenuto"
+    )
+    conv.add_argument(
+        "--priority", choices=PRIORITY_CHOICES, default="normal", help="priorità processi FFmpeg"
+    )
+
+    dl = sub.add_parser("download", help="scarica URL con yt-dlp")
+    dl.add_argument("urls", nargs="+", help="URL da scaricare")
+    dl.add_argument("-o", "--output-dir", required=True, help="cartella di output")
+    kind = dl.add_mutually_exclusive_group()
+    kind.add_argument("--audio", choices=AUDIO_CHOICES, default="best", help="formato audio")
+    kind.add_argument("--video", choices=VIDEO_CHOICES, help="qualità video")
+    dl.add_argument(
+        "--container", choices=CONTAINER_CHOICES, default="mp4", help="video: contenitore"
+    )
+    dl.add_argument("-j", "--jobs", type=int, default=4, help="download in parallelo (default 4)")
+    dl.add_argument("--overwrite", action="store_true", help="sovrascrive file esistenti")
+    dl.add_argument(
+        "--no-stream-encode",
+        action="store_true",
+        help="niente codifica durante il download (file intermedio)",
+    )
+    dl.add_argument(
+        "--no-expand",
+        action="store_true",
+        help="playlist e canali non espansi in download separati (li gestisce yt-dlp)",
+    )
+    dl.add_argument(
+        "--priority",
+        choices=PRIORITY_CHOICES,
+        default="normal",
+        help="priorità processi FFmpeg (codifica durante il download)",
+    )
+
+    srv = sub.add_parser("serve", help="job server locale (API JSON su HTTP)")
+    srv.add_argument("--host", default="127.0.0.1", help="indirizzo (default solo locale)")
+    srv.add_argument("--port", type=int, default=8765, help="porta (0 = libera qualsiasi)")
+    srv.add_argument(
+        "--token", help=f"richiede Authorization: Bearer TOKEN (o variabile {SERVER_TOKEN_ENV})"
+    )
+    return parser
+
+
+_COMMANDS = {"convert": _cmd_convert, "download": _cmd_download, "serve": _cmd_serve}
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Entry point console (script downconv)."""
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(
+        stream=sys.stderr,
+        level=logging.INFO if args.verbose else logging.WARNING,
+        format="%(levelname)s %(name)s: %(message)s",
+    )
+    events = EventWriter(progress=not args.no_progress)
+    try:
+        return _COMMANDS[args.command](args, events)
+    except JobSetupError as e:
+        events.emit("error", message=str(e))
+        return EXIT_SETUP
+    except KeyboardInterrupt:
+        return EXIT_INTERRUPTED
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,6 @@
 """Engines per download e conversione."""
 
-from .ffmpeg_engine import FfmpegEngine
+from .ffmpeg_engine import FfmpegEngine, OutputTarget
 from .ytdlp_engine import YtdlpEngine
 
-__all__ = ["YtdlpEngine", "FfmpegEngine"]
+__all__ = ["YtdlpEngine", "FfmpegEngine", "OutputTarget"]
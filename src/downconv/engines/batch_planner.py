@@ -0,0 +1,116 @@
+"""Pianificazione batch conversione: stima costo e dimensione per file, ordinamento LPT."""
+
+import heapq
+import os
+from collections.abc import Callable, Sequence
+from pathlib import Path
+from typing import Any
+
+from ..utils.probe_cache import ProbeInfo
+
+# Secondi di elaborazione per secondo di audio (singolo job, CPU moderna)
+REALTIME_FACTOR: dict[str, float] = {
+    "wav": 0.004,
+    "flac": 0.012,
+    "m4a": 0.015,
+    "alac": 0.015,
+    "mp3": 0.03,
+}
+DEFAULT_REALTIME_FACTOR = 0.03
+# Remux (stream copy): solo I/O
+STREAM_COPY_FACTOR = 0.001
+
+# Durata stimata da dimensione se il probe non è disponibile (~128 kbps; PCM e FLAC
+# per estensione, altrimenti un WAV sembrerebbe 11 volte più lungo)
+_FALLBACK_BYTES_PER_SEC = 16_000
+_FALLBACK_BYTES_PER_SEC_BY_EXT = {
+    ".wav": 176_400,
+    ".w64": 176_400,
+    ".aif": 176_400,
+    ".aiff": 176_400,
+    ".flac": 110_000,
+}
+
+# Stima dimensione uscite: PCM 16 bit (WAV) e lossless compresso come frazione del PCM
+# (musica tipica 0.5-0.7: si usa il valore alto, meglio sovrastimare)
+_DEFAULT_SAMPLE_RATE = 44100
+_DEFAULT_CHANNELS = 2
+LOSSLESS_PCM_RATIO = {"flac": 0.7, "m4a": 0.75, "alac": 0.75}
+# Margine sulle stime (header, metadati, cover, bitrate reali sopra il nominale)
+SIZE_ESTIMATE_MARGIN = 1.1
+
+
+def estimate_duration(path: Path, info: ProbeInfo | None) -> float:
+    """Durata in secondi da probe, altrimenti stimata dalla dimensione del file."""
+    if info is not None and info.duration:
+        return info.duration
+    try:
+        rate = _FALLBACK_BYTES_PER_SEC_BY_EXT.get(path.suffix.lower(), _FALLBACK_BYTES_PER_SEC)
+        return os.stat(path).st_size / rate
+    except OSError:
+        return 0.0
+
+
+def estimate_cost(duration: float, formats: Sequence[str], stream_copy: bool = False) -> float:
+    """Secondi stimati per convertire duration secondi di audio in tutti i formati richiesti.
+
+    Con più formati (un decode, N encoder) i costi degli encoder si sommano.
+    """
+    if stream_copy:
+        return duration * STREAM_COPY_FACTOR
+    return duration * sum(REALTIME_FACTOR.get(f, DEFAULT_REALTIME_FACTOR) for f in formats)
+
+
+def _mp3_kbps(quality: str) -> int:
+    """Bitrate MP3 in kbps per qualità (stessa regola di ffmpeg_engine._mp3_bitrate)."""
+    if quality in ("lossless", "320k"):
+        return 320
+    value = quality[:-1] if quality.endswith("k") else ""
+    return int(value) if value.isdigit() else 192
+
+
+def estimate_output_size(
+    duration: float,
+    fmt: str,
+    quality: str = "lossless",
+    info: ProbeInfo | None = None,
+    input_size: int = 0,
+    stream_copy: bool = False,
+) -> int:
+    """Byte stimati dell'uscita in fmt per duration secondi di audio (con margine).
+
+    MP3 dal bitrate, WAV dal PCM 16 bit con sample rate/canali del probe, FLAC/ALAC come
+    frazione del PCM; remux (stream copy) ≈ dimensione dell'input.
+    """
+    if stream_copy and input_size:
+        return int(input_size * SIZE_ESTIMATE_MARGIN)
+    if fmt == "mp3":
+        size = duration * _mp3_kbps(quality) * 1000 / 8
+    else:
+        rate = (info.sample_rate if info else None) or _DEFAULT_SAMPLE_RATE
+        channels = (info.channels if info else None) or _DEFAULT_CHANNELS
+        size = duration * rate * channels * 2 * LOSSLESS_PCM_RATIO.get(fmt, 1.0)
+    return int(size * SIZE_ESTIMATE_MARGIN)
+
+
+def simulate_makespan(costs: Sequence[float], workers: int) -> float:
+    """Durata totale prevista assegnando i job, nell'ordine dato, al worker libero per primo."""
+    heap = [0.0] * max(1, workers)
+    for cost in costs:
+        heapq.heapreplace(heap, heap[0] + cost)
+    return max(heap)
+
+
+def plan_lpt(
+    items: Sequence[Any], cost: Callable[[Any], float], workers: int
+) -> tuple[list[Any], float]:
+    """Longest Processing Time first: ordina per costo decrescente.
+
+    Un file lungo messo in coda per ultimo lascia gli altri worker fermi; partendo dai
+    più lunghi il carico si bilancia (makespan entro 4/3 dell'ottimo).
+    Ritorna (items ordinati, makespan previsto in secondi).
+    """
+    costs = {id(item): cost(item) for item in items}
+    ordered = sorted(items, key=lambda item: costs[id(item)], reverse=True)
+    makespan = simulate_makespan([costs[id(item)] for item in ordered], workers)
+    return ordered, makespan
@@ -0,0 +1,123 @@
+"""Coda download parallela: limite globale, per host e per sito (famiglia di estrattori).
+
+Le code di download sono limitate dalla latenza (pagina, JSON del player, avvio dello
+stream) più che dalla banda: più URL in parallelo accorciano la coda di diverse volte.
+I limiti per host e per sito evitano di martellare un solo servizio (throttling, 429).
+"""
+
+import threading
+from collections import deque
+from collections.abc import Callable
+from urllib.parse import urlsplit
+
+# Download contemporanei di default (Impostazioni → Download in parallelo)
+DEFAULT_MAX_PARALLEL = 4
+# Download contemporanei verso lo stesso host (es. www.youtube.com)
+DEFAULT_PER_HOST = 3
+# Limiti per sito (site_key) più stretti del globale: servizi che rallentano o rispondono
+# 429 con molte richieste dallo stesso IP. Siti non elencati: solo globale e per host
+SITE_LIMITS: dict[str, int] = {
+    "youtube": 3,
+    "soundcloud": 3,
+    "bandcamp": 2,
+    "vimeo": 2,
+}
+
+# Host alternativi dello stesso sito
+_SITE_ALIASES = {"youtu": "youtube", "youtube-nocookie": "youtube", "ytimg": "youtube"}
+# Secondi livelli dei domini nazionali (es. bbc.co.uk → bbc)
+_SECOND_LEVEL = frozenset({"co", "com", "net", "org", "gov", "ac", "edu"})
+
+
+def host_key(url: str) -> str:
+    """Host dell'URL in minuscolo ("" se non è un URL)."""
+    try:
+        return (urlsplit(url.strip()).hostname or "").lower()
+    except ValueError:
+        return ""
+
+
+def site_key(url: str) -> str:
+    """Sito dell'URL senza sottodomini né TLD: tutti gli host gestiti dallo stesso
+    estrattore condividono il limite (artista.bandcamp.com → bandcamp, youtu.be → youtube)."""
+    labels = host_key(url).split(".")
+    if len(labels) >= 3 and labels[-2] in _SECOND_LEVEL and len(labels[-1]) == 2:
+        labels = labels[:-1]
+    name = labels[-2] if len(labels) >= 2 else labels[0]
+    return _SITE_ALIASES.get(name, name)
+
+
+class DownloadScheduler:
+    """Sceglie i prossimi URL da avviare rispettando i limiti. Thread-safe.
+
+    Ordine di arrivo, ma un URL il cui host o sito è al limite non blocca quelli dietro
+    di lui (verso altri siti): con YouTube al completo partono SoundCloud e Bandcamp.
+    site_of: funzione URL → sito (default site_key; es. nome dell'estrattore yt-dlp).
+    """
+
+    def __init__(
+        self,
+        urls: list[str],
+        max_parallel: int = DEFAULT_MAX_PARALLEL,
+        per_host: int = DEFAULT_PER_HOST,
+        site_limits: dict[str, int] | None = None,
+        site_of: Callable[[str], str] = site_key,
+    ) -> None:
+        self.max_parallel = max(1, max_parallel)
+        self._per_host = max(1, per_host)
+        self._site_limits = SITE_LIMITS if site_limits is None else site_limits
+        self._site_of = site_of
+        self._pending: deque[tuple[str, str, str]] = deque(
+            (u, host_key(u), site_of(u)) for u in urls
+        )
+        self._active: dict[str, tuple[str, str]] = {}
+        self._hosts: dict[str, int] = {}
+        self._sites: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    @property
+    def active(self) -> int:
+        return len(self._active)
+
+    def add(self, urls: list[str]) -> None:
+        """Accoda URL scoperti durante la coda (es. elementi di una playlist)."""
+        items = [(u, host_key(u), self._site_of(u)) for u in urls]
+        with self._lock:
+            self._pending.extend(items)
+
+    def _fits(self, host: str, site: str) -> bool:
+        if self._hosts.get(host, 0) >= self._per_host:
+            return False
+        limit = self._site_limits.get(site)
+        return limit is None or self._sites.get(site, 0) < limit
+
+    def take_ready(self) -> list[str]:
+        """URL avviabili ora (già contati come attivi): riempiono i posti liberi."""
+        started: list[str] = []
+        with self._lock:
+            if len(self._active) >= self.max_parallel:
+                return started
+            skipped: deque[tuple[str, str, str]] = deque()
+            while self._pending and len(self._active) < self.max_parallel:
+                url, host, site = self._pending.popleft()
+                if url in self._active or not self._fits(host, site):
+                    skipped.append((url, host, site))
+                    continue
+                self._active[url] = (host, site)
+                self._hosts[host] = self._hosts.get(host, 0) + 1
+                self._sites[site] = self._sites.get(site, 0) + 1
+                started.append(url)
+            skipped.extend(self._pending)
+            self._pending = skipped
+        return started
+
+    def finish(self, url: str) -> None:
+        """Libera il posto di un URL avviato con take_ready."""
+        with self._lock:
+            host, site = self._active.pop(url)
+            self._hosts[host] -= 1
+            self._sites[site] -= 1
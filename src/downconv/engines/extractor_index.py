@@ -0,0 +1,390 @@
+"""Indice URL → estrattore yt-dlp, costruito una volta per versione di yt-dlp.
+
+yt-dlp riconosce un URL provando suitable() di ogni estrattore (oltre 1700 regex, ~3-4 ms
+per URL). L'indice ricava da ogni _VALID_URL i letterali obbligatori (almeno uno
+compare in ogni URL accettato, es. "youtube.com" o una delle alternative "foo.tv" |
+"bar.com") e li indicizza per n-gramma: per un URL si provano solo gli estrattori
+candidati, nell'ordine di yt-dlp. Gli estrattori senza letterali utili (regex troppo
+generiche) sono sempre candidati. Salvato in JSON nella cartella dati e ricostruito se
+cambia la versione di yt-dlp.
+
+Costi misurati: ~0,1-0,2 ms per URL con l'indice (circa 2 s per 10000 URL), più la
+costruzione al primo uso (~0,7-1 s, una volta per versione di yt-dlp; poi caricato dal
+file). Le regex sono analizzate con il parser interno di CPython (re._parser): se manca,
+nessun indice e scansione completa come yt-dlp.
+"""
+
+import json
+import logging
+import threading
+from collections import Counter
+from functools import lru_cache
+from pathlib import Path
+
+from ..utils.paths import get_data_dir
+
+try:  # Moduli interni di CPython (3.11+): non garantiti tra versioni o implementazioni
+    import re._constants as sre_constants
+    import re._parser as sre_parse
+except ImportError:
+    sre_constants = sre_parse = None
+
+logger = logging.getLogger(__name__)
+
+# Versione del formato del file (cambia se cambia l'algoritmo)
+INDEX_FORMAT = 1
+# Lunghezza delle chiavi: n-grammi dei letterali, cercati in ogni posizione dell'URL
+GRAM_SIZE = 3
+
+# L'indice vale per gli URL con questi prefissi (gli altri: scansione completa). Rami
+# delle regex che non possono iniziare così (es. ID YouTube senza URL) sono ignorati
+URL_PREFIXES = ("http://", "https://")
+_DONE = (-1, 0)  # Prefisso consumato: da qui in poi l'URL può contenere qualsiasi cosa
+_SCHEME = "https://www."
+
+_C = sre_constants
+if _C is not None:
+    _REPEATS = (_C.MAX_REPEAT, _C.MIN_REPEAT, _C.POSSESSIVE_REPEAT)
+    _CHAR_NODES = (_C.LITERAL, _C.NOT_LITERAL, _C.ANY, _C.IN)
+
+
+def get_extractor_index_file() -> Path:
+    """File JSON dell'indice estrattori."""
+    return get_data_dir() / "extractor_index.json"
+
+
+def _accepts(op, av, ch: str) -> bool:
+    """Il nodo-carattere può consumare ch (maiuscolo o minuscolo)? In dubbio True."""
+    variants = {ch.lower(), ch.upper()}
+    if op is _C.LITERAL:
+        return chr(av) in variants
+    if op is _C.NOT_LITERAL:
+        return any(chr(av) != c for c in variants)
+    if op is _C.IN:
+        negate = bool(av) and av[0][0] is _C.NEGATE
+        hit = False
+        for item_op, item_av in av[negate:]:
+            if item_op is _C.LITERAL:
+                hit = chr(item_av) in variants
+            elif item_op is _C.RANGE:
+                hit = any(item_av[0] <= ord(c) <= item_av[1] for c in variants)
+            elif item_op is _C.CATEGORY and item_av is _C.CATEGORY_DIGIT:
+                hit = ch.isdigit()
+            elif item_op is _C.CATEGORY and item_av is _C.CATEGORY_WORD:
+                hit = ch.isalnum() or ch == "_"
+            elif item_op is _C.CATEGORY and item_av is _C.CATEGORY_SPACE:
+                hit = ch.isspace()
+            else:
+                return True
+            if hit:
+                break
+        return hit != negate
+    return True
+
+
+def _step(op, av, states: set) -> set:
+    """Posizioni nei prefissi URL_PREFIXES dopo un nodo regex (per eccesso)."""
+    done = {_DONE} & states
+    if op in _CHAR_NODES:
+        for k, p in states - done:
+            prefix = URL_PREFIXES[k]
+            if _accepts(op, av, prefix[p]):
+                done.add(_DONE if p + 1 == len(prefix) else (k, p + 1))
+        return done
+    if op is _C.AT:
+        # $ prima della fine del prefisso: l'URL continua, nessun match
+        return done if av in (_C.AT_END, _C.AT_END_STRING) else states
+    if op is _C.SUBPATTERN:
+        return _advance(av[-1], states)
+    if op is _C.ATOMIC_GROUP:
+        return _advance(av, states)
+    if op is _C.BRANCH:
+        return set().union(*(_advance(b, states) for b in av[1]))
+    if op in _REPEATS:
+        low, high, sub = av
+        result = set(states) if low == 0 else set()
+        current = states
+        for count in range(1, low + len(_SCHEME) + 2):
+            current = _advance(sub, current)
+            if not current:
+                break
+            if count >= low:
+                if current <= result:
+                    break
+                result |= current
+            if count >= high:
+                break
+        else:
+            result.add(_DONE)
+        return result
+    if op is _C.GROUPREF_EXISTS:
+        _, yes, no = av
+        return _advance(yes, states) | (_advance(no, states) if no else states)
+    if op in (_C.ASSERT, _C.ASSERT_NOT):
+        return states
+    # Riferimenti a gruppi e nodi non gestiti: qualsiasi avanzamento
+    reach = {(k, q) for k, p in states - done for q in range(p, len(URL_PREFIXES[k]))}
+    return states | reach | {_DONE}
+
+
+def _advance(items, states: set) -> set:
+    """Posizioni nei prefissi dopo la sequenza; vuoto = nessun URL http(s) la soddisfa."""
+    for op, av in items:
+        if not states or states == {_DONE}:
+            break
+        states = _step(op, av, states)
+    return states
+
+
+def _char(op, av) -> str | None:
+    """Carattere fisso (minuscolo) di un nodo regex: letterale o classe tipo [yY]."""
+    if op is _C.LITERAL:
+        return chr(av).lower()
+    if op is _C.IN and 1 <= len(av) <= 2:
+        if all(o is _C.LITERAL for o, _ in av):
+            chars = {chr(v).lower() for _, v in av}
+            if len(chars) == 1:
+                return chars.pop()
+    return None
+
+
+def _required_literals(items, states: set | None = None, rest: list = ()) -> set[str] | None:
+    """Letterali (minuscoli) di cui almeno uno compare in ogni URL http(s) accettato.
+
+    Tra le scelte possibili (un letterale obbligatorio, un gruppo, le alternative di un
+    ramo) tiene quella col letterale più corto più lungo. None se non ce ne sono.
+    states: posizioni nei prefissi URL_PREFIXES all'inizio della sequenza e rest il
+    seguito della regex: i rami che non possono iniziare con http(s):// sono scartati.
+    """
+    items = list(items)
+    choices: list[set[str]] = []
+    run: list[str] = []
+
+    def flush() -> None:
+        if run:
+            choices.append({"".join(run)})
+            run.clear()
+
+    for j, (op, av) in enumerate(items):
+        ch = _char(op, av)
+        if ch is not None:
+            run.append(ch)
+        else:
+            flush()
+            after = items[j + 1 :] + list(rest)
+            found = None
+            if op is _C.SUBPATTERN:
+                found = _required_literals(av[-1], states, after)
+            elif op is _C.ATOMIC_GROUP:
+                found = _required_literals(av, states, after)
+            elif op is _C.BRANCH:
+                branches = list(av[1])
+                if states is not None and states != {_DONE}:
+                    branches = [b for b in branches if _advance(list(b) + after, states)]
+                covers = [_required_literals(b, states, after) for b in branches]
+                if covers and all(covers):
+                    found = set().union(*covers)
+            elif op in _REPEATS:
+                low, high, sub = av
+                # Facoltativo ma senza non resta nessun URL http(s): di fatto obbligatorio
+                pruning = states is not None and states != {_DONE}
+                if low >= 1 or (pruning and not _advance(after, states)):
+                    if high == 1 and pruning:
+                        found = _required_literals(sub, states, after)
+                    else:
+                        found = _required_literals(sub)
+            if found:
+                choices.append(found)
+        if states is not None:
+            states = _step(op, av, states)
+    flush()
+    # Schema e "www." sono in quasi ogni URL: non restringono i candidati
+    choices = [c for c in choices if not all(lit in _SCHEME for lit in c)]
+    if not choices:
+        return None
+    return max(choices, key=lambda c: min(map(len, c)))
+
+
+def _extractor_literals(ie) -> set[str] | None:
+    """Letterali obbligatori delle _VALID_URL dell'estrattore per gli URL http(s): vuoto
+    se non ne accetta nessuno, None se va provato su ogni URL."""
+    valid = ie._VALID_URL
+    patterns = [valid] if isinstance(valid, str) else list(valid or ())
+    start = {(k, 0) for k in range(len(URL_PREFIXES))}
+    literals: set[str] = set()
+    for pattern in patterns:
+        try:
+            parsed = sre_parse.parse(pattern)
+            if not _advance(parsed, start):
+                continue
+            found = _required_literals(parsed, start)
+        except Exception:
+            return None
+        if not found or min(map(len, found)) < GRAM_SIZE:
+            return None
+        literals |= found
+    return literals if patterns else None
+
+
+def _grams(text: str) -> list[str]:
+    return [text[i : i + GRAM_SIZE] for i in range(len(text) - GRAM_SIZE + 1)]
+
+
+def _extractor_classes() -> list:
+    """Estrattori yt-dlp nell'ordine di prova, senza il generico."""
+    from yt_dlp.extractor import gen_extractor_classes
+
+    return [ie for ie in gen_extractor_classes() if ie.IE_NAME != "generic"]
+
+
+def _ytdlp_version() -> str:
+    from yt_dlp.version import __version__
+
+    return __version__
+
+
+class ExtractorIndex:
+    """Riconoscimento URL su indice: stesso esito del primo suitable() di yt-dlp
+    (generico escluso). Thread-safe (solo lettura dopo la costruzione)."""
+
+    def __init__(self, extractors: list, grams: dict[str, list[int]], always: list[int]) -> None:
+        """extractors: classi nell'ordine di yt-dlp; grams: n-gramma → indici candidati;
+        always: indici degli estrattori da provare per ogni URL."""
+        self._extractors = extractors
+        self._grams = grams
+        self._always = frozenset(always)
+
+    @property
+    def indexed(self) -> bool:
+        """False se ogni URL prova tutti gli estrattori (parser delle regex non disponibile)."""
+        return len(self._always) < len(self._extractors)
+
+    @classmethod
+    def build(cls, extractors: list) -> "ExtractorIndex":
+        """Indice dalle regex _VALID_URL (~0,7-1 s per tutti gli estrattori). Senza
+        re._parser tutti gli estrattori sono sempre candidati: scansione completa."""
+        if sre_parse is None:
+            logger.warning("re._parser non disponibile: URL riconosciuti senza indice")
+            return cls(extractors, {}, list(range(len(extractors))))
+        literals = [_extractor_literals(ie) for ie in extractors]
+        # Per ogni letterale si indicizza il suo n-gramma più raro: meno candidati per URL
+        freq: Counter[str] = Counter()
+        for found in literals:
+            if found:
+                freq.update({g for lit in found for g in _grams(lit)})
+        grams: dict[str, list[int]] = {}
+        always: list[int] = []
+        for i, found in enumerate(literals):
+            if found is None:
+                always.append(i)
+                continue
+            for key in {min(_grams(lit), key=freq.__getitem__) for lit in found}:
+                grams.setdefault(key, []).append(i)
+        return cls(extractors, grams, always)
+
+    @classmethod
+    def load(cls, path: Path, extractors: list, version: str) -> "ExtractorIndex | None":
+        """Indice salvato per questa versione di yt-dlp e questi estrattori, altrimenti None."""
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if (
+            not isinstance(data, dict)
+            or data.get("format") != INDEX_FORMAT
+            or data.get("yt_dlp") != version
+            or data.get("extractors") != [ie.ie_key() for ie in extractors]
+        ):
+            return None
+        return cls(extractors, data["grams"], data["always"])
+
+    def save(self, path: Path, version: str) -> None:
+        """Salva l'indice (scrittura atomica); errori solo loggati."""
+        data = {
+            "format": INDEX_FORMAT,
+            "yt_dlp": version,
+            "extractors": [ie.ie_key() for ie in self._extractors],
+            "grams": self._grams,
+            "always": sorted(self._always),
+        }
+        tmp = path.with_suffix(".tmp")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp.write_text(json.dumps(data, separators=(",", ":")), encoding="utf-8")
+            tmp.replace(path)
+        except OSError as e:
+            logger.warning("Indice estrattori non salvato: %s", e)
+
+    def match(self, url: str) -> str | None:
+        """Chiave dell'estrattore che gestisce l'URL (es. "Youtube", "BandcampAlbum"),
+        None se solo l'estrattore generico lo accetterebbe."""
+        lower = url.lower()
+        if not lower.startswith(URL_PREFIXES):
+            candidates = range(len(self._extractors))  # Fuori indice: tutti, come yt-dlp
+        else:
+            found = set(self._always)
+            for gram in _grams(lower):
+                found.update(self._grams.get(gram, ()))
+            candidates = sorted(found)
+        for i in candidates:
+            ie = self._extractors[i]
+            if ie.suitable(url):
+                return ie.ie_key()
+        return None
+
+
+_index: ExtractorIndex | None = None
+_index_lock = threading.Lock()
+
+
+def get_extractor_index(cache_file: Path | None = None) -> ExtractorIndex:
+    """Indice condiviso: caricato dal file o costruito (e salvato) al primo uso.
+
+    Da chiamare in background all'avvio (import di yt-dlp e costruzione); chi arriva
+    durante la costruzione attende la stessa istanza.
+    """
+    global _index
+    with _index_lock:
+        if _index is None:
+            path = cache_file or get_extractor_index_file()
+            extractors = _extractor_classes()
+            version = _ytdlp_version()
+            _index = ExtractorIndex.load(path, extractors, version)
+            if _index is None:
+                logger.info("Costruzione indice estrattori yt-dlp %s", version)
+                _index = ExtractorIndex.build(extractors)
+                if _index.indexed:  # Scansione completa: nulla da salvare
+                    _index.save(path, version)
+        return _index
+
+
+def match_extractor(url: str) -> str | None:
+    """Estrattore yt-dlp per l'URL (vedi ExtractorIndex.match)."""
+    return get_extractor_index().match(url)
+
+
+@lru_cache(maxsize=2048)
+def extractor_return_type(ie_key: str) -> str | None:
+    """Cosa restituisce l'estrattore secondo yt-dlp: "video", "playlist", "any" (entrambi)
+    o None se non dichiarato."""
+    from yt_dlp.extractor import get_info_extractor
+
+    try:
+        return get_info_extractor(ie_key)._RETURN_TYPE
+    except Exception:
+        return None
+
+
+def media_key(url: str, ie_key: str | None = None, media_id: str | None = None) -> str:
+    """Chiave di un elemento per il dedupe: "estrattore:id" anche per URL scritti in modi
+    diversi (youtu.be/X e youtube.com/watch?v=X), altrimenti l'URL stesso."""
+    if ie_key is None:
+        ie_key = match_extractor(url)
+    if ie_key and media_id is None:
+        from yt_dlp.extractor import get_info_extractor
+
+        try:
+            media_id = get_info_extractor(ie_key).get_temp_id(url)
+        except Exception:
+            media_id = None
+    return f"{ie_key}:{media_id}" if ie_key and media_id else url
@@ -1,7 +1,9 @@
 """Engine FFmpeg per conversione audio."""
 
 import errno
+import json
 import logging
+import math
 import os
 import re
 import shutil
@@ -9,38 +11,179 @@ import subprocess
 import sys
 import tempfile
 import threading
-from collections.abc import Callable
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import time
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from functools import partial
 from pathlib import Path
+from typing import NamedTuple
 
-from ..utils.disk_check import MSG_DISK_FULL, is_disk_full_error
-from ..utils.ffmpeg_provider import get_ffmpeg_path, get_ffprobe_path
+from ..utils.config import MEDIA_EXTENSIONS
+from ..utils.conversion_manifest import (
+    OUTPUT_FRESH,
+    OUTPUT_STALE,
+    ConversionManifest,
+    get_conversion_manifest,
+)
+from ..utils.disk_check import MSG_DISK_FULL, DiskBudget, is_disk_full_error
+from ..utils.ffmpeg_provider import FFPROBE_BIN, get_ffmpeg_path, get_ffprobe_path
+from ..utils.job_journal import JournalBatch
+from ..utils.probe_cache import ProbeCache, ProbeInfo, get_probe_cache
+from .batch_planner import (
+    estimate_cost,
+    estimate_duration,
+    estimate_output_size,
+    plan_lpt,
+)
+from .process_priority import (
+    PRIORITY_NORMAL,
+    apply_priority,
+    creationflags_for,
+    priority_for_mode,
+    worker_cpu_count,
+)
+from .segment_join import (
+    MP3_FRAME_SAMPLES,
+    MP3_SAMPLE_RATES,
+    flac_bits_per_sample,
+    flac_block_size,
+    join_flac,
+    join_mp3,
+)
+from .telemetry import (
+    PATH_ENCODE,
+    PATH_MULTI,
+    PATH_PIPE,
+    PATH_SEGMENTED,
+    PATH_STREAM_COPY,
+    RSS_SAMPLE_INTERVAL_SEC,
+    BatchTelemetry,
+    JobTelemetry,
+    TrackedPopen,
+    sample_peak_rss,
+)
+from .worker_policy import DEFAULT_CPU_COST, FORMAT_CPU_COST, AdaptiveWorkerPolicy
 
 logger = logging.getLogger(__name__)
 
-# Regex per time=HH:MM:SS.ms nell'output FFmpeg
-_TIME_RE = re.compile(r"time=(\d{2}):(\d{2}):(\d{2})\.(\d{2})")
+# Regex per "Duration: HH:MM:SS.cs" nell'header input FFmpeg (stderr, -loglevel info)
+_DURATION_RE = re.compile(r"Duration:\s*(\d+):(\d{2}):(\d{2}(?:\.\d+)?)")
+
+# Righe stderr conservate per _parse_ffmpeg_error (coda limitata: memoria costante)
+STDERR_TAIL_LINES = 64
 
 # Timeout per singola conversione (evita hang FFmpeg su file corrotti/problema)
 CONVERT_TIMEOUT_SEC = 600  # 10 min
 
+# Ordine di esecuzione batch: lista com'è (fifo) o file più costosi per primi (lpt)
+SCHEDULE_FIFO = "fifo"
+SCHEDULE_LPT = "lpt"
+
+# Annullamento: tempo concesso a FFmpeg per uscire dopo terminate() prima di kill()
+CANCEL_KILL_GRACE_SEC = 0.5
+MSG_CANCELLED = "Conversione annullata"
+
+# Codifica a segmenti paralleli (file singoli lunghi): durata minima del file e di ogni
+# segmento. Confini su multipli del frame dell'encoder; segmenti uniti con stream copy
+# (ALAC in MP4) o riscrivendo header e frame (FLAC, MP3: engines/segment_join.py)
+SEGMENT_MIN_DURATION_SEC = 15 * 60
+SEGMENT_MIN_LEN_SEC = 2 * 60
+_SEGMENT_FORMATS = ("m4a", "alac", "flac", "mp3")
+_ALAC_FRAME_SIZE = 4096
+# MP3: frame codificati in più prima e dopo ogni segmento (LAME a regime sul confine),
+# scartati nell'unione
+MP3_SEGMENT_PREROLL_FRAMES = 8
+# FLAC: sorgenti PCM a 16/24 bit → formato su cui calcolare l'MD5 di STREAMINFO
+_FLAC_SEGMENT_PCM = {
+    "pcm_s16le": "pcm_s16le",
+    "pcm_s16be": "pcm_s16le",
+    "pcm_s24le": "pcm_s24le",
+    "pcm_s24be": "pcm_s24le",
+}
+# Sorgenti con seek esatto al campione (PCM/FLAC, niente video)
+_SEGMENT_SOURCE_FORMATS = ("wav", "w64", "aiff", "flac")
+_SEGMENT_SOURCE_EXTENSIONS = (".wav", ".w64", ".aif", ".aiff", ".flac")
+
+# Messaggio (con ok=True) per le uscite saltate in modalità incrementale
+SKIPPED_UP_TO_DATE = "già aggiornato"
+
+# Versione FFmpeg per eseguibile (chiave del manifest incrementale), letta una volta
+_ffmpeg_versions: dict[str, str] = {}
+_ffmpeg_versions_lock = threading.Lock()
+
+
+class ConversionCancelled(Exception):
+    """Avvio FFmpeg rifiutato: l'engine è stato annullato (FfmpegEngine.cancel)."""
+
 
 def check_ffmpeg_available() -> bool:
     """Verifica se FFmpeg è disponibile (user_data, PATH, percorsi comuni)."""
     return get_ffmpeg_path() is not None
 
 
-def _get_duration_seconds(input_path: Path, ffprobe_path: str | None = None) -> float | None:
-    """Ottiene durata in secondi via ffprobe. Ritorna None se fallisce."""
+def _parse_probe_json(data: dict) -> ProbeInfo | None:
+    """Estrae ProbeInfo dall'output JSON di ffprobe. None se non c'è audio."""
+    streams = data.get("streams") or []
+    fmt = data.get("format") or {}
+    audio = next((st for st in streams if st.get("codec_type") == "audio"), None)
+    if audio is None:
+        return None
+    # Copertine (mp3/flac/m4a) sono stream video con disposition attached_pic: non contano
+    has_video = any(
+        st.get("codec_type") == "video" and not (st.get("disposition") or {}).get("attached_pic")
+        for st in streams
+    )
+
+    def _num(value, cast):
+        try:
+            return cast(value) if value not in (None, "", "N/A") else None
+        except (TypeError, ValueError):
+            return None
+
+    bit_rate = _num(audio.get("bit_rate"), int)
+    if bit_rate is None and not has_video:
+        bit_rate = _num(fmt.get("bit_rate"), int)
+    return ProbeInfo(
+        duration=_num(fmt.get("duration"), float),
+        codec=audio.get("codec_name"),
+        sample_rate=_num(audio.get("sample_rate"), int),
+        channels=_num(audio.get("channels"), int),
+        bit_rate=bit_rate,
+        format_name=fmt.get("format_name"),
+        has_video=has_video,
+    )
+
+
+def probe_media(
+    input_path: Path,
+    ffprobe_path: str | None = None,
+    cache: ProbeCache | None = None,
+) -> ProbeInfo | None:
+    """Metadata audio (durata, codec, sample rate, canali, bitrate) via ffprobe.
+
+    Usa la cache persistente: un file già analizzato e non modificato non avvia ffprobe,
+    nemmeno se l'analisi precedente era fallita.
+    Ritorna None se ffprobe fallisce o il file non ha audio.
+    """
+    cache = cache if cache is not None else get_probe_cache()
+    cached = cache.get(input_path)
+    if cached is not None:
+        return cached
+    if cache.is_known_failure(input_path):
+        return None
+
     ffprobe = ffprobe_path or get_ffprobe_path() or shutil.which("ffprobe") or "ffprobe"
     cmd = [
         ffprobe,
         "-v",
         "error",
         "-show_entries",
-        "format=duration",
+        "format=duration,bit_rate,format_name"
+        ":stream=codec_type,codec_name,sample_rate,channels,bit_rate"
+        ":stream_disposition=attached_pic",
         "-of",
-        "default=noprint_wrappers=1:nokey=1",
+        "json",
         str(input_path),
     ]
     creationflags = subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0
@@ -52,68 +195,179 @@ def _get_duration_seconds(input_path: Path, ffprobe_path: str | None = None) ->
             timeout=10,
             creationflags=creationflags,
         )
-        if result.returncode == 0 and result.stdout.strip():
-            return float(result.stdout.strip())
-    except (subprocess.TimeoutExpired, ValueError, FileNotFoundError):
-        pass
-    return None
+        if result.returncode != 0 or not result.stdout.strip():
+            cache.put_failure(input_path)
+            return None
+        info = _parse_probe_json(json.loads(result.stdout))
+    except ValueError:
+        cache.put_failure(input_path)  # Output non valido: stesso esito al prossimo tentativo
+        return None
+    except (subprocess.TimeoutExpired, FileNotFoundError):
+        return None  # Disco lento o ffprobe assente: non è una proprietà del file
+    if info is None:
+        cache.put_failure(input_path)
+    else:
+        cache.put(input_path, info)
+    return info
+
 
+def _get_duration_seconds(input_path: Path, ffprobe_path: str | None = None) -> float | None:
+    """Ottiene durata in secondi via ffprobe (con cache). Ritorna None se fallisce."""
+    info = probe_media(input_path, ffprobe_path)
+    return info.duration if info else None
 
-def _parse_time_to_seconds(match: re.Match) -> float:
-    """Converte match time=HH:MM:SS.cs in secondi."""
-    h, m, s, cs = (int(x) for x in match.groups())
-    return h * 3600 + m * 60 + s + cs / 100.0
 
+def _parse_duration_line(line: str) -> float | None:
+    """Durata in secondi da riga "Duration: HH:MM:SS.cs", None se assente."""
+    match = _DURATION_RE.search(line)
+    if not match:
+        return None
+    h, m, s = match.groups()
+    return int(h) * 3600 + int(m) * 60 + float(s)
 
-def _run_convert_with_progress(
+
+def _parse_progress_time(key: str, value: str) -> float | None:
+    """Secondi elaborati da una riga -progress (out_time_us / out_time_ms, entrambi in µs)."""
+    if key not in ("out_time_us", "out_time_ms"):
+        return None
+    try:
+        return int(value) / 1_000_000
+    except ValueError:
+        return None  # "N/A" all'avvio
+
+
+def _run_ffmpeg_quiet(
+    cmd: list,
+    creationflags: int,
+    popen: Callable[..., subprocess.Popen] = subprocess.Popen,
+) -> tuple[int, str]:
+    """Esegue FFmpeg senza progress. Ritorna (returncode, stderr).
+
+    popen: factory del processo (FfmpegEngine la usa per registrarlo e poterlo terminare).
+    Su timeout termina il processo e rilancia subprocess.TimeoutExpired.
+    """
+    proc = popen(
+        cmd,
+        stdin=subprocess.DEVNULL,  # Niente prompt "Overwrite? [y/N]" in attesa
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+        creationflags=creationflags,
+    )
+    deadline = time.monotonic() + CONVERT_TIMEOUT_SEC
+    try:
+        while True:
+            # Attesa a intervalli: tra uno e l'altro si campiona il picco RSS (telemetria)
+            remaining = deadline - time.monotonic()
+            try:
+                _, stderr = proc.communicate(timeout=min(RSS_SAMPLE_INTERVAL_SEC, remaining))
+                break
+            except subprocess.TimeoutExpired:
+                if remaining <= RSS_SAMPLE_INTERVAL_SEC:
+                    raise
+                sample_peak_rss(proc)
+    except BaseException:
+        proc.kill()
+        proc.communicate()
+        raise
+    return proc.returncode, stderr or ""
+
+
+def _run_ffmpeg_progress(
     cmd: list,
-    input_path: Path,
-    output_path: Path,
-    final_output: Path,
     progress_callback: Callable[[float], None],
     creationflags: int,
-) -> tuple[bool, str]:
-    """Esegue FFmpeg con Popen, parsando stderr per progress e chiamando callback."""
-    duration = _get_duration_seconds(input_path)
+    duration: float | None = None,
+    popen: Callable[..., subprocess.Popen] = subprocess.Popen,
+    on_duration: Callable[[float], None] | None = None,
+) -> tuple[int, str]:
+    """Esegue FFmpeg con -progress pipe:1: key=value su stdout, durata dall'header su stderr.
+
+    Un solo processo per file (niente ffprobe se la durata non è in cache). Di stderr si
+    tiene solo la coda (STDERR_TAIL_LINES). on_duration riceve la durata letta
+    dall'header. Ritorna (returncode, stderr_tail).
+    Su timeout o errore termina il processo e rilancia l'eccezione.
+    """
     last_pct = -1
 
-    proc = subprocess.Popen(
+    proc = popen(
         cmd,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
         stderr=subprocess.PIPE,
         text=True,
         creationflags=creationflags,
     )
-    stderr_chunks = []
+    stderr_tail: deque[str] = deque(maxlen=STDERR_TAIL_LINES)
+    header_duration: list[float | None] = [None]
+
+    def _drain_stderr() -> None:
+        # Thread separato: stdout e stderr in parallelo evitano deadlock sulle pipe piene
+        for line in proc.stderr:
+            stderr_tail.append(line)
+            if header_duration[0] is None:
+                header_duration[0] = _parse_duration_line(line)
+                if header_duration[0] is not None and on_duration is not None:
+                    on_duration(header_duration[0])
+
+    stderr_thread = threading.Thread(target=_drain_stderr, daemon=True)
+    stderr_thread.start()
     try:
-        if proc.stderr:
-            for line in proc.stderr:
-                stderr_chunks.append(line)
-                if duration and duration > 0:
-                    match = _TIME_RE.search(line)
-                    if match:
-                        current = _parse_time_to_seconds(match)
-                        pct = min(99, int(100 * current / duration))
-                        if pct > last_pct and pct - last_pct >= 2:  # Throttle ogni ~2%
-                            last_pct = pct
-                            progress_callback(float(pct))
+        if proc.stdout:
+            for line in proc.stdout:
+                key, _, value = line.strip().partition("=")
+                if key == "progress":  # Fine di un blocco (~0,5 s)
+                    sample_peak_rss(proc)
+                current = _parse_progress_time(key, value)
+                if current is None:
+                    continue
+                total = duration or header_duration[0]
+                if total and total > 0:
+                    pct = min(99, int(100 * current / total))
+                    if pct > last_pct and pct - last_pct >= 2:  # Throttle ogni ~2%
+                        last_pct = pct
+                        progress_callback(float(pct))
         proc.wait(timeout=CONVERT_TIMEOUT_SEC)
-    except subprocess.TimeoutExpired:
+        stderr_thread.join(timeout=5)
+    except BaseException:
         proc.kill()
         proc.wait()
+        raise
+    return proc.returncode, "".join(stderr_tail)
+
+
+def _run_convert_with_progress(
+    cmd: list,
+    input_path: Path,
+    output_path: Path,
+    final_output: Path,
+    progress_callback: Callable[[float], None],
+    creationflags: int,
+    duration: float | None = None,
+    popen: Callable[..., subprocess.Popen] = subprocess.Popen,
+    on_duration: Callable[[float], None] | None = None,
+) -> tuple[bool, str]:
+    """Conversione singola con progress (_run_ffmpeg_progress) + rename atomico del temp."""
+    try:
+        returncode, stderr_text = _run_ffmpeg_progress(
+            cmd, progress_callback, creationflags, duration, popen, on_duration
+        )
+    except subprocess.TimeoutExpired:
         if output_path != final_output and output_path.exists():
             output_path.unlink(missing_ok=True)
         mins = CONVERT_TIMEOUT_SEC // 60
         return False, f"Timeout: file troppo lungo (oltre {mins} min)"
+    except ConversionCancelled:
+        if output_path != final_output and output_path.exists():
+            output_path.unlink(missing_ok=True)
+        return False, MSG_CANCELLED
     except Exception as e:
-        proc.kill()
-        proc.wait()
         if output_path != final_output and output_path.exists():
             output_path.unlink(missing_ok=True)
         logger.exception("Conversione con progress fallita: %s", e)
         return False, str(e)
 
-    stderr_text = "".join(stderr_chunks)
-    if proc.returncode != 0:
+    if returncode != 0:
         if output_path != final_output and output_path.exists():
             output_path.unlink(missing_ok=True)
         return False, _parse_ffmpeg_error(stderr_text)
@@ -130,6 +384,12 @@ def _run_convert_with_progress(
     return True, ""
 
 
+def _note_duration(job: JobTelemetry | None, seconds: float) -> None:
+    """Durata dall'header FFmpeg per la telemetria del job, se non già dal probe."""
+    if job is not None and job.audio_seconds is None:
+        job.audio_seconds = seconds
+
+
 def _parse_ffmpeg_error(stderr: str) -> str:
     """Estrae messaggio errore da stderr FFmpeg."""
     if not stderr:
@@ -146,11 +406,365 @@ def _parse_ffmpeg_error(stderr: str) -> str:
     return lines[-1] if lines else "Errore FFmpeg"
 
 
+class OutputTarget(NamedTuple):
+    """Formato di uscita per conversioni multi-output (es. FLAC + MP3 320k)."""
+
+    format: str
+    quality: str = "lossless"
+
+
+# Codec sorgente che il formato target contiene già: basta remux (stream copy)
+_STREAM_COPY_CODECS: dict[str, tuple[str, ...]] = {
+    "flac": ("flac",),
+    "m4a": ("alac",),
+    "alac": ("alac",),
+    "mp3": ("mp3",),
+    "wav": ("pcm_s16le",),
+}
+
+# Estensioni input il cui container può contenere il codec di _STREAM_COPY_CODECS:
+# per gli altri (es. .ogg → MP3, .webm → FLAC) il remux è escluso senza ffprobe
+_STREAM_COPY_SOURCE_EXTENSIONS: dict[str, tuple[str, ...]] = {
+    "flac": (".flac", ".ogg", ".oga", ".mka", ".mkv"),
+    "m4a": (".m4a", ".mp4", ".m4v", ".mov", ".caf", ".mka", ".mkv"),
+    "alac": (".m4a", ".mp4", ".m4v", ".mov", ".caf", ".mka", ".mkv"),
+    "mp3": (".mp3", ".mp4", ".m4v", ".mov", ".avi", ".mka", ".mkv"),
+    "wav": (".wav", ".w64", ".mov", ".avi", ".mka", ".mkv"),
+}
+
+# Tolleranza bitrate MP3 sorgente vs richiesto per considerarlo già conforme (±2%)
+_MP3_BITRATE_TOLERANCE = 0.02
+
+
+def _mp3_bitrate(quality: str) -> str:
+    """Bitrate libmp3lame per qualità (lossless → 320k, default 192k)."""
+    if quality in ("lossless", "320k"):
+        return "320k"
+    return quality if quality.endswith("k") else "192k"
+
+
+def _codec_args(fmt: str, quality: str) -> list[str]:
+    """Argomenti FFmpeg per ricodifica nel formato target."""
+    if fmt == "mp3":
+        return ["-c:a", "libmp3lame", "-id3v2_version", "3", "-ab", _mp3_bitrate(quality)]
+    if fmt == "flac":
+        return ["-c:a", "flac"]
+    if fmt in ("m4a", "alac"):
+        return ["-c:a", "alac", "-movflags", "use_metadata_tags"]
+    if fmt == "wav":
+        return ["-c:a", "pcm_s16le"]
+    return ["-c:a", "copy"]
+
+
+def _target_outputs(
+    inp: Path, out_dir: Path, targets: list[OutputTarget]
+) -> list[tuple[Path, OutputTarget]]:
+    """Uscite di un input per i target: stesso formato con qualità diverse (es. MP3 320k +
+    192k) ha la qualità nel nome file."""
+    formats = [t.format for t in targets]
+    outputs = []
+    for t in targets:
+        suffix = f"_{t.quality}" if formats.count(t.format) > 1 else ""
+        outputs.append((out_dir / f"{inp.stem}{suffix}.{t.format}", t))
+    return outputs
+
+
+def _settings_key(target: OutputTarget) -> str:
+    """Impostazioni encoder di un'uscita per il manifest (cambia se cambiano gli argomenti)."""
+    args = " ".join(_codec_args(target.format, target.quality))
+    return f"{target.format}|{target.quality}|{args}"
+
+
+def _output_states(
+    manifest: ConversionManifest,
+    version: str,
+    inp: Path,
+    outputs: list[tuple[Path, OutputTarget]],
+    verify_hash: bool = False,
+) -> dict[Path, str]:
+    """Stato nel manifest (OUTPUT_FRESH, OUTPUT_STALE, ...) di ogni uscita di un input."""
+    return {
+        out: manifest.status(inp, out, _settings_key(t), version, verify_hash) for out, t in outputs
+    }
+
+
+def _stream_copy_args(fmt: str) -> list[str]:
+    """Argomenti FFmpeg per remux senza ricodifica (metadati riscritti dal container)."""
+    args = ["-c:a", "copy"]
+    if fmt == "mp3":
+        args.extend(["-id3v2_version", "3"])
+    elif fmt in ("m4a", "alac"):
+        args.extend(["-movflags", "use_metadata_tags"])
+    return args
+
+
+def _with_format_suffix(output_path: Path, fmt: str) -> Path:
+    """Forza l'estensione coerente col formato (evita che FFmpeg scelga il container)."""
+    out_str = str(output_path).lower()
+    if fmt == "mp3" and not out_str.endswith(".mp3"):
+        return output_path.with_suffix(".mp3")
+    if fmt == "flac" and not out_str.endswith(".flac"):
+        return output_path.with_suffix(".flac")
+    if fmt in ("m4a", "alac") and not out_str.endswith((".m4a", ".alac")):
+        return output_path.with_suffix(".m4a")
+    if fmt == "wav" and not out_str.endswith(".wav"):
+        return output_path.with_suffix(".wav")
+    return output_path
+
+
+def can_stream_copy(info: ProbeInfo | None, fmt: str, quality: str) -> bool:
+    """True se l'audio sorgente è già nel codec (e bitrate, per MP3) del formato target."""
+    if info is None or not info.codec:
+        return False
+    fmt = fmt.lower().strip()
+    if info.codec not in _STREAM_COPY_CODECS.get(fmt, ()):
+        return False
+    if fmt == "mp3":
+        if not info.bit_rate:
+            return False
+        target = int(_mp3_bitrate(quality)[:-1]) * 1000
+        return abs(info.bit_rate - target) <= target * _MP3_BITRATE_TOLERANCE
+    return True
+
+
+def needs_probe(input_path: Path, fmt: str, segment: bool = False) -> bool:
+    """True se il probe può cambiare il piano di convert(): stream copy o segmenti.
+
+    Deciso dall'estensione: un input che non può contenere il codec del formato target
+    (né essere codificato a segmenti) va ricodificato comunque, e la durata arriva
+    dall'header dello stesso processo FFmpeg. Estensioni sconosciute: probe.
+    """
+    suffix = Path(input_path).suffix.lower()
+    fmt = fmt.lower().strip()
+    if suffix not in MEDIA_EXTENSIONS:
+        return True
+    if suffix in _STREAM_COPY_SOURCE_EXTENSIONS.get(fmt, ()):
+        return True
+    return segment and fmt in _SEGMENT_FORMATS and suffix in _SEGMENT_SOURCE_EXTENSIONS
+
+
+def can_segment(info: ProbeInfo | None, fmt: str) -> bool:
+    """True se il file può essere codificato a segmenti paralleli.
+
+    ALAC (M4A) e FLAC: audio identico alla codifica seriale (FLAC da PCM a 16/24 bit: la
+    STREAMINFO riporta l'MD5 dell'audio). MP3: gapless ma non bit-exact (stato di LAME tra
+    i frame, bit reservoir disattivato), solo a 32/44,1/48 kHz senza ricampionamento.
+    """
+    if info is None or fmt not in _SEGMENT_FORMATS:
+        return False
+    if not info.duration or info.duration < SEGMENT_MIN_DURATION_SEC or not info.sample_rate:
+        return False
+    if info.has_video or not info.codec or not info.format_name:
+        return False
+    if info.format_name.split(",")[0] not in _SEGMENT_SOURCE_FORMATS:
+        return False
+    if fmt == "flac":
+        return info.codec in _FLAC_SEGMENT_PCM
+    source_ok = info.codec.startswith("pcm_") or info.codec == "flac"
+    if fmt == "mp3":
+        return source_ok and info.sample_rate in MP3_SAMPLE_RATES and (info.channels or 0) <= 2
+    return source_ok
+
+
+def segment_frame_size(fmt: str, sample_rate: int) -> int:
+    """Campioni per frame dell'encoder: i confini dei segmenti ne sono multipli."""
+    if fmt == "mp3":
+        return MP3_FRAME_SAMPLES
+    if fmt == "flac":
+        return flac_block_size(sample_rate)
+    return _ALAC_FRAME_SIZE
+
+
+def plan_segments(
+    duration: float, sample_rate: int, frame_size: int, workers: int
+) -> list[tuple[int, int | None]]:
+    """Segmenti (primo campione, ultimo campione escluso); None = fino alla fine.
+
+    I confini cadono su multipli di frame_size campioni: ogni segmento produce gli stessi
+    frame dell'encoder della codifica seriale e la concatenazione è identica.
+    """
+    count = min(workers, int(duration // SEGMENT_MIN_LEN_SEC))
+    if count < 2:
+        return []
+    frames = math.ceil(duration * sample_rate / frame_size)
+    seg_samples = math.ceil(frames / count) * frame_size
+    bounds = list(range(0, frames * frame_size, seg_samples))
+    if len(bounds) < 2:
+        return []
+    return [(start, start + seg_samples) for start in bounds[:-1]] + [(bounds[-1], None)]
+
+
+def _concat_entry(path: Path) -> str:
+    """Riga per il demuxer concat (apice nel percorso: chiuso, escapato e riaperto)."""
+    escaped = str(path).replace("'", "'\\''")
+    return f"file '{escaped}'\n"
+
+
+def _normalize_targets(
+    output_format: str, quality: str, targets: list[OutputTarget] | None
+) -> list[OutputTarget]:
+    """Uscite del batch: targets se indicati, altrimenti il singolo formato/qualità."""
+    if not targets:
+        targets = [OutputTarget(output_format, quality)]
+    return [OutputTarget(t.format.strip().lower(), t.quality) for t in targets]
+
+
+def _make_worker_policy(
+    targets: list[OutputTarget], max_workers: int | None, cpu_count: int | None = None
+) -> AdaptiveWorkerPolicy:
+    """Policy worker dimensionata sul formato più costoso tra le uscite."""
+    heaviest = max(targets, key=lambda t: FORMAT_CPU_COST.get(t.format, DEFAULT_CPU_COST))
+    return AdaptiveWorkerPolicy(heaviest.format, cpu_count=cpu_count, fixed_workers=max_workers)
+
+
 class FfmpegEngine:
     """Wrapper FFmpeg per conversione audio. Preserva metadati."""
 
-    def __init__(self, ffmpeg_path: str | None = None) -> None:
+    def __init__(
+        self,
+        ffmpeg_path: str | None = None,
+        probe_cache: ProbeCache | None = None,
+        priority: str = PRIORITY_NORMAL,
+    ) -> None:
+        """priority: PRIORITY_NORMAL, PRIORITY_BACKGROUND (niceness, I/O best-effort basso,
+        un worker in meno per la GUI) o PRIORITY_TURBO, applicata a ogni processo FFmpeg."""
         self.ffmpeg_path = ffmpeg_path or get_ffmpeg_path() or shutil.which("ffmpeg") or "ffmpeg"
+        # ffprobe accanto a ffmpeg se esplicito, altrimenti ricerca standard
+        sibling = Path(self.ffmpeg_path).parent / FFPROBE_BIN
+        self.ffprobe_path = str(sibling) if sibling.exists() else get_ffprobe_path()
+        self.probe_cache = probe_cache if probe_cache is not None else get_probe_cache()
+        self.priority = priority
+        self._priority = priority_for_mode(priority)
+        # Registro processi FFmpeg di conversione avviati (cancel() li termina)
+        self._procs: set[subprocess.Popen] = set()
+        self._procs_lock = threading.Lock()
+        self._cancelled = threading.Event()
+        # Telemetria per thread: job in corso (convert annidati lo riusano) e riepilogo del
+        # batch di cui il thread sta eseguendo un file
+        self._jobs = threading.local()
+
+    @property
+    def cancelled(self) -> bool:
+        """True dopo cancel(): nessuna nuova conversione viene avviata."""
+        return self._cancelled.is_set()
+
+    def cancel(self) -> None:
+        """Annulla le conversioni: termina subito i processi FFmpeg in corso.
+
+        Non blocca il chiamante (thread GUI): i processi ancora vivi dopo
+        CANCEL_KILL_GRACE_SEC vengono uccisi da un timer. Output parziali e temp
+        sono rimossi dai thread di conversione, che ritornano MSG_CANCELLED.
+        """
+        with self._procs_lock:
+            self._cancelled.set()
+            procs = [p for p in self._procs if p.poll() is None]
+        if not procs:
+            return
+        logger.info("Annullamento: termino %d processi FFmpeg", len(procs))
+        for proc in procs:
+            try:
+                proc.terminate()
+            except OSError:
+                pass
+
+        def _kill_survivors() -> None:
+            for proc in procs:
+                if proc.poll() is None:
+                    try:
+                        proc.kill()
+                    except OSError:
+                        pass
+
+        timer = threading.Timer(CANCEL_KILL_GRACE_SEC, _kill_survivors)
+        timer.daemon = True
+        timer.start()
+
+    def _popen(self, cmd: list, job: JobTelemetry | None = None, **kwargs) -> subprocess.Popen:
+        """Avvia FFmpeg e lo registra. ConversionCancelled se l'engine è annullato.
+
+        Il processo è attribuito al job indicato o a quello in corso nel thread (telemetria).
+        """
+        with self._procs_lock:
+            if self._cancelled.is_set():
+                raise ConversionCancelled()
+            # Pulizia lazy dei processi già terminati
+            self._procs = {p for p in self._procs if p.poll() is None}
+            kwargs["creationflags"] = creationflags_for(
+                self._priority, kwargs.get("creationflags", 0)
+            )
+            proc = TrackedPopen(cmd, **kwargs)
+            self._procs.add(proc)
+        if self.priority != PRIORITY_NORMAL:
+            apply_priority(proc.pid, self._priority)
+        job = job or getattr(self._jobs, "current", None)
+        if job is not None:
+            job.attach(proc)
+        return proc
+
+    def _begin_job(
+        self, input_path: Path, outputs: list[Path], formats: list[str]
+    ) -> tuple[JobTelemetry, bool]:
+        """Job di telemetria del thread: (job, True) se nuovo, (job esterno, False) se annidato."""
+        current = getattr(self._jobs, "current", None)
+        if current is not None:
+            return current, False
+        job = JobTelemetry(input_path, outputs, formats)
+        self._jobs.current = job
+        return job, True
+
+    def _end_job(self, job: JobTelemetry, ok: bool, error: str) -> None:
+        """Chiude il job del thread: record JSONL e, in un batch, somma nel riepilogo."""
+        self._jobs.current = None
+        try:
+            record = job.finish(ok, error)
+        except Exception as e:  # La telemetria non deve mai far fallire una conversione
+            logger.debug("Telemetria job fallita per %s: %s", job.input_path.name, e)
+            return
+        batch = getattr(self._jobs, "batch", None)
+        if batch is not None:
+            batch.add(record)
+
+    def _run_in_batch(self, batch: BatchTelemetry, fn: Callable, *args):
+        """Esegue fn nel thread corrente sommando i job nel riepilogo batch (di questa
+        chiamata a iter_convert: più batch in parallelo sullo stesso engine non si mescolano)."""
+        self._jobs.batch = batch
+        try:
+            return fn(*args)
+        finally:
+            self._jobs.batch = None
+
+    def ffmpeg_version(self) -> str:
+        """Prima riga di `ffmpeg -version` (cache per processo). "" se non leggibile."""
+        with _ffmpeg_versions_lock:
+            if self.ffmpeg_path in _ffmpeg_versions:
+                return _ffmpeg_versions[self.ffmpeg_path]
+        creationflags = subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0
+        version = ""
+        try:
+            result = subprocess.run(
+                [self.ffmpeg_path, "-hide_banner", "-version"],
+                capture_output=True,
+                text=True,
+                stdin=subprocess.DEVNULL,
+                timeout=10,
+                creationflags=creationflags,
+            )
+            if result.returncode == 0 and result.stdout:
+                version = result.stdout.splitlines()[0].strip()
+        except (subprocess.TimeoutExpired, OSError, ValueError) as e:
+            logger.debug("ffmpeg -version fallito: %s", e)
+        with _ffmpeg_versions_lock:
+            _ffmpeg_versions[self.ffmpeg_path] = version
+        return version
+
+    def probe(self, input_path: Path) -> ProbeInfo | None:
+        """Metadata del file (da cache se disponibile, altrimenti ffprobe)."""
+        return probe_media(Path(input_path), self.ffprobe_path, self.probe_cache)
+
+    def _cached_duration(self, input_path: Path) -> float | None:
+        """Durata in secondi se già in cache probe (senza avviare ffprobe), altrimenti None."""
+        info = self.probe_cache.get(input_path)
+        return info.duration if info else None
 
     def convert(
         self,
@@ -160,9 +774,461 @@ class FfmpegEngine:
         quality: str = "lossless",
         progress_callback: Callable[[float], None] | None = None,
         overwrite: bool = True,
+        segment_workers: int | None = None,
+    ) -> tuple[bool, str]:
+        """Converte singolo file. Ritorna (success, error_message).
+
+        Se il probe indica che la sorgente è già nel codec target (FLAC→FLAC, ALAC→M4A,
+        MP3 al bitrate richiesto, anche come traccia audio di un video) fa solo remux con
+        stream copy; se il remux fallisce ripiega sulla ricodifica.
+        segment_workers: > 1 = file lunghi codificati a segmenti paralleli (vedi can_segment).
+        Ogni chiamata registra un record di telemetria (risorse, byte, percorso seguito).
+        """
+        input_path = Path(input_path)
+        fmt = output_format.lower().strip()
+        job, owner = self._begin_job(
+            input_path, [_with_format_suffix(Path(output_path), fmt)], [fmt]
+        )
+        ok, err_msg = False, ""
+        try:
+            ok, err_msg = self._convert(
+                job,
+                input_path,
+                output_path,
+                fmt,
+                quality,
+                progress_callback,
+                overwrite,
+                segment_workers,
+            )
+            return ok, err_msg
+        finally:
+            if owner:
+                self._end_job(job, ok, err_msg)
+
+    def _convert(
+        self,
+        job: JobTelemetry,
+        input_path: Path,
+        output_path: Path,
+        output_format: str,
+        quality: str,
+        progress_callback: Callable[[float], None] | None,
+        overwrite: bool,
+        segment_workers: int | None,
+    ) -> tuple[bool, str]:
+        """Corpo di convert(): segmenti paralleli, stream copy o ricodifica, con fallback.
+
+        ffprobe solo se l'input può essere remuxato o segmentato (needs_probe): altrimenti
+        un solo processo FFmpeg per file.
+        """
+        fmt = output_format
+        segment = bool(segment_workers and segment_workers > 1)
+        info = self.probe_cache.get(input_path)
+        if info is None and needs_probe(input_path, fmt, segment):
+            info = self.probe(input_path)
+        if info is not None and job.audio_seconds is None:
+            job.audio_seconds = info.duration
+        if (
+            segment
+            and can_segment(info, fmt)
+            and (overwrite or not _with_format_suffix(Path(output_path), fmt).exists())
+        ):
+            job.path = PATH_SEGMENTED
+            ok, err_msg = self.convert_segmented(
+                input_path, output_path, fmt, info, segment_workers, progress_callback, quality
+            )
+            if ok or self.cancelled:
+                return ok, err_msg
+            logger.info(
+                "Codifica a segmenti fallita per %s (%s): seriale", input_path.name, err_msg
+            )
+            job.fallback(PATH_SEGMENTED, PATH_ENCODE)
+        if can_stream_copy(info, output_format, quality):
+            job.path = PATH_STREAM_COPY
+            existed = Path(output_path).exists()
+            ok, err_msg = self._run_convert(
+                input_path,
+                output_path,
+                output_format,
+                quality,
+                progress_callback,
+                overwrite,
+                stream_copy=True,
+            )
+            if ok or self.cancelled:
+                return ok, err_msg
+            logger.info("Stream copy fallito per %s (%s): ricodifica", input_path.name, err_msg)
+            job.fallback(PATH_STREAM_COPY, PATH_ENCODE)
+            if not existed:
+                Path(output_path).unlink(missing_ok=True)  # Output parziale del remux
+        return self._run_convert(
+            input_path, output_path, output_format, quality, progress_callback, overwrite
+        )
+
+    def convert_segmented(
+        self,
+        input_path: Path,
+        output_path: Path,
+        output_format: str,
+        info: ProbeInfo,
+        workers: int,
+        progress_callback: Callable[[float], None] | None = None,
+        quality: str = "lossless",
     ) -> tuple[bool, str]:
-        """Converte singolo file. Ritorna (success, error_message)."""
+        """Taglia l'input su confini di frame, codifica i segmenti in parallelo, li unisce.
+
+        ALAC: concatenazione MP4 con stream copy. FLAC: frame rinumerati e STREAMINFO
+        riscritta (MD5 dell'audio calcolato in parallelo ai segmenti), stesso file della
+        codifica seriale. MP3: ogni segmento con MP3_SEGMENT_PREROLL_FRAMES frame in più
+        per lato, scartati nell'unione, e un solo header Xing/LAME con ritardo e padding
+        totali. Metadati dall'input. Segmenti in una cartella temporanea accanto
+        all'output, rimossa in ogni caso. Ritorna (success, error_message).
+        """
+        fmt = output_format.lower().strip()
+        final = _with_format_suffix(Path(output_path), fmt)
+        sample_rate = info.sample_rate or 0
+        frame_size = segment_frame_size(fmt, sample_rate)
+        segments = plan_segments(info.duration or 0, sample_rate, frame_size, workers)
+        if not segments:
+            return False, "File troppo corto per la codifica a segmenti"
+        final.parent.mkdir(parents=True, exist_ok=True)
+        creationflags = subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0
+        tmp_dir = Path(tempfile.mkdtemp(prefix=f".{final.stem}_seg_", dir=final.parent))
+        seg_paths = [tmp_dir / f"seg_{i:03d}{final.suffix}" for i in range(len(segments))]
+        # I segmenti girano in altri thread: processi attribuiti al job del chiamante
+        popen = partial(self._popen, job=getattr(self._jobs, "current", None))
+        codec_args = _codec_args(fmt, quality)
+        margin = 0
+        if fmt == "mp3":
+            # Nessun frame deve usare byte di frame scartati (bit reservoir)
+            codec_args = [*codec_args, "-reservoir", "0"]
+            margin = MP3_SEGMENT_PREROLL_FRAMES * frame_size
+        done = 0
+        done_lock = threading.Lock()
+
+        def _encode(index: int, start: int, end: int | None) -> tuple[int, str]:
+            nonlocal done
+            start = max(0, start - margin)
+            end = None if end is None else end + margin
+            # Seek al secondo intero (esatto su PCM/FLAC), poi taglio al campione con atrim
+            seek = start // sample_rate
+            offset = start - seek * sample_rate
+            trim = f"atrim=start_sample={offset}"
+            if end is not None:
+                trim += f":end_sample={offset + end - start}"
+            cmd = [self.ffmpeg_path, "-hide_banner", "-loglevel", "error", "-y"]
+            cmd.extend(["-ss", str(seek), "-i", str(input_path)])
+            cmd.extend(["-map", "0:a:0", "-vn", "-af", trim, *codec_args])
+            cmd.append(str(seg_paths[index]))
+            result = _run_ffmpeg_quiet(cmd, creationflags, popen)
+            with done_lock:
+                done += 1
+                if progress_callback and result[0] == 0:
+                    progress_callback(min(95.0, 95.0 * done / len(segments)))
+            return result
+
+        tasks = [partial(_encode, i, *seg) for i, seg in enumerate(segments)]
+        md5_file = tmp_dir / "audio.md5"
+        pcm = _FLAC_SEGMENT_PCM.get(info.codec or "", "pcm_s16le")
+        if fmt == "flac":
+            # MD5 di STREAMINFO: audio intero nel formato dei campioni FLAC
+            cmd = [self.ffmpeg_path, "-hide_banner", "-loglevel", "error", "-y"]
+            cmd.extend(["-i", str(input_path), "-map", "0:a:0", "-c:a", pcm])
+            cmd.extend(["-f", "md5", str(md5_file)])
+            tasks.append(partial(_run_ffmpeg_quiet, cmd, creationflags, popen))
+        try:
+            with ThreadPoolExecutor(max_workers=len(tasks)) as ex:
+                results = list(ex.map(lambda task: task(), tasks))
+            failed = [err for rc, err in results if rc != 0]
+            if failed or self.cancelled:
+                return False, MSG_CANCELLED if self.cancelled else _parse_ffmpeg_error(failed[0])
+            joined = tmp_dir / f"joined{final.suffix}"
+            stop = self._cancelled.is_set
+            if fmt == "flac":
+                bits = 24 if pcm == "pcm_s24le" else 16
+                if flac_bits_per_sample(seg_paths[0]) != bits:
+                    return False, "Bit per campione FLAC diversi dalla sorgente"
+                md5 = md5_file.read_text(encoding="ascii").strip().partition("=")[2]
+                join_flac(seg_paths, joined, bytes.fromhex(md5), frame_size, stop)
+            elif fmt == "mp3":
+                skip = margin // frame_size
+                keep = [
+                    (skip if start else 0, None if end is None else (end - start) // frame_size)
+                    for start, end in segments
+                ]
+                join_mp3(seg_paths, joined, keep, stop)
+            else:
+                list_file = tmp_dir / "segments.txt"
+                list_file.write_text("".join(map(_concat_entry, seg_paths)), encoding="utf-8")
+                cmd = [self.ffmpeg_path, "-hide_banner", "-loglevel", "error", "-y"]
+                cmd.extend(["-f", "concat", "-safe", "0", "-i", str(list_file)])
+                cmd.extend(["-i", str(input_path), "-map", "0:a", "-map_metadata", "1"])
+                cmd.extend(["-c", "copy", "-movflags", "use_metadata_tags", str(joined)])
+                rc, err = _run_ffmpeg_quiet(cmd, creationflags, self._popen)
+                if rc != 0:
+                    return False, MSG_CANCELLED if self.cancelled else _parse_ffmpeg_error(err)
+            os.replace(joined, final)
+        except (ConversionCancelled, InterruptedError):
+            return False, MSG_CANCELLED
+        except subprocess.TimeoutExpired:
+            mins = CONVERT_TIMEOUT_SEC // 60
+            return False, f"Timeout: file troppo lungo o problematico (oltre {mins} min)"
+        except ValueError as e:
+            return False, f"Unione segmenti non riuscita: {e}"
+        except OSError as e:
+            return False, MSG_DISK_FULL if e.errno == errno.ENOSPC else str(e)
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        logger.info("Codifica a %d segmenti paralleli: %s", len(segments), final.name)
+        if progress_callback:
+            progress_callback(100.0)
+        return True, ""
+
+    def convert_multi(
+        self,
+        input_path: Path,
+        outputs: list[tuple[Path, OutputTarget]],
+        progress_callback: Callable[[float], None] | None = None,
+        overwrite: bool = True,
+        segment_workers: int | None = None,
+    ) -> list[tuple[Path, bool, str]]:
+        """Un solo decode, più uscite: un processo FFmpeg scrive tutti i formati richiesti.
+
+        Ritorna (output_path, ok, error_msg) per ogni uscita. Se il processo unico fallisce,
+        ripete ogni uscita con convert() per avere l'esito (e l'errore) di ciascuna.
+        """
         input_path = Path(input_path)
+        if not overwrite and len(outputs) > 1:
+            # Uscite già esistenti: una per una come convert(), le altre in un solo processo
+            existing = [
+                i
+                for i, (out, t) in enumerate(outputs)
+                if _with_format_suffix(Path(out), t.format.lower().strip()).exists()
+            ]
+            if existing:
+                results: list[tuple[Path, bool, str]] = [(Path(o), False, "") for o, _ in outputs]
+                rest_idx = [i for i in range(len(outputs)) if i not in existing]
+                if rest_idx:
+                    rest = self.convert_multi(
+                        input_path, [outputs[i] for i in rest_idx], progress_callback, overwrite
+                    )
+                    for i, res in zip(rest_idx, rest, strict=True):
+                        results[i] = res
+                for i in existing:
+                    out, t = outputs[i]
+                    ok, err = self.convert(input_path, out, t.format, t.quality, overwrite=False)
+                    results[i] = (Path(out), ok, err)
+                return results
+        if len(outputs) == 1:
+            out, target = outputs[0]
+            ok, err = self.convert(
+                input_path,
+                out,
+                target.format,
+                target.quality,
+                progress_callback,
+                overwrite,
+                segment_workers=segment_workers,
+            )
+            return [(Path(out), ok, err)]
+
+        job, owner = self._begin_job(
+            input_path,
+            [_with_format_suffix(Path(o), t.format.lower().strip()) for o, t in outputs],
+            [t.format.lower().strip() for _, t in outputs],
+        )
+        results: list[tuple[Path, bool, str]] = []
+        try:
+            results = self._convert_multi(job, input_path, outputs, progress_callback, overwrite)
+            return results
+        finally:
+            if owner:
+                errors = [err for _, ok, err in results if not ok]
+                self._end_job(job, bool(results) and not errors, errors[0] if errors else "")
+
+    def _convert_multi(
+        self,
+        job: JobTelemetry,
+        input_path: Path,
+        outputs: list[tuple[Path, OutputTarget]],
+        progress_callback: Callable[[float], None] | None,
+        overwrite: bool,
+    ) -> list[tuple[Path, bool, str]]:
+        """Corpo di convert_multi() con più uscite: processo unico, poi fallback per formato."""
+        info = self.probe(input_path)
+        if info is not None:
+            job.audio_seconds = info.duration
+        job.path = PATH_MULTI
+        use_progress = progress_callback is not None
+        cmd = [self.ffmpeg_path, "-hide_banner", "-loglevel", "info" if use_progress else "error"]
+        if use_progress:
+            cmd.extend(["-nostats", "-progress", "pipe:1"])
+        cmd.extend(["-i", str(input_path)])
+        if overwrite:
+            cmd.append("-y")
+        # (final, scritto): stesso file di input → temp + rename atomico
+        written: list[tuple[Path, Path]] = []
+        for out, target in outputs:
+            fmt = target.format.lower().strip()
+            final = _with_format_suffix(Path(out), fmt)
+            final.parent.mkdir(parents=True, exist_ok=True)
+            actual = final
+            if final.resolve() == input_path.resolve():
+                fd, tmp_path = tempfile.mkstemp(
+                    suffix=final.suffix, dir=final.parent, prefix=f".{final.stem}_"
+                )
+                os.close(fd)
+                actual = Path(tmp_path)
+            codec = (
+                _stream_copy_args(fmt)
+                if can_stream_copy(info, fmt, target.quality)
+                else _codec_args(fmt, target.quality)
+            )
+            cmd.extend(["-map", "0:a:0", "-vn", "-map_metadata", "0", *codec, str(actual)])
+            written.append((final, actual))
+
+        creationflags = subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0
+        existed = {final: final.exists() for final, _ in written}
+        try:
+            if use_progress:
+                returncode, stderr_text = _run_ffmpeg_progress(
+                    cmd,
+                    progress_callback,
+                    creationflags,
+                    self._cached_duration(input_path),
+                    self._popen,
+                )
+            else:
+                returncode, stderr_text = _run_ffmpeg_quiet(cmd, creationflags, self._popen)
+        except (subprocess.TimeoutExpired, OSError, ConversionCancelled) as e:
+            returncode, stderr_text = -1, str(e)
+
+        if returncode == 0:
+            try:
+                for final, actual in written:
+                    if actual != final:
+                        os.replace(actual, final)
+                if progress_callback:
+                    progress_callback(100.0)
+                return [(final, True, "") for final, _ in written]
+            except OSError as e:
+                stderr_text = MSG_DISK_FULL if e.errno == errno.ENOSPC else str(e)
+
+        # Fallimento: rimuove output parziali, poi esito per singola uscita
+        for final, actual in written:
+            if actual != final or not existed[final] or (self.cancelled and overwrite):
+                actual.unlink(missing_ok=True)
+        if self.cancelled:
+            return [(final, False, MSG_CANCELLED) for final, _ in written]
+        logger.info(
+            "Multi-output fallito per %s (%s): conversione per formato",
+            input_path.name,
+            _parse_ffmpeg_error(stderr_text),
+        )
+        job.fallback(PATH_MULTI, PATH_ENCODE)
+        results = []
+        for (final, _), (_, target) in zip(written, outputs, strict=True):
+            ok, err = self.convert(
+                input_path, final, target.format, target.quality, overwrite=overwrite
+            )
+            results.append((final, ok, err))
+        return results
+
+    def encode_stream(
+        self,
+        chunks: Iterable[bytes],
+        output_path: Path,
+        output_format: str,
+        quality: str = "lossless",
+        overwrite: bool = True,
+        duration: float | None = None,
+    ) -> tuple[bool, str]:
+        """Codifica dati che arrivano a blocchi (es. download) scrivendoli su stdin di FFmpeg.
+
+        La codifica procede insieme alla lettura di chunks: nessun file intermedio, su disco
+        finisce solo l'uscita (temp nella stessa cartella, rename atomico a fine codifica).
+        Il container deve essere leggibile senza seek (WebM, Ogg, MP3, MP4 frammentato...).
+        Le eccezioni sollevate da chunks (es. rete) vengono propagate dopo la pulizia.
+        duration: durata nota in secondi (solo telemetria). Ritorna (success, error_message).
+        """
+        fmt = output_format.lower().strip()
+        final = _with_format_suffix(Path(output_path), fmt)
+        if final.exists() and not overwrite:
+            return False, f"File già esistente: {final.name}"
+        final.parent.mkdir(parents=True, exist_ok=True)
+        job, owner = self._begin_job(Path("pipe:0"), [final], [fmt])
+        job.path = PATH_PIPE
+        job.audio_seconds = duration
+        # Cartella temporanea (non mkstemp): il file creato da FFmpeg ha i permessi di default
+        tmp_dir = Path(tempfile.mkdtemp(prefix=f".{final.stem}_pipe_", dir=final.parent))
+        ok, err_msg = False, ""
+        try:
+            ok, err_msg = self._encode_stream(chunks, final, tmp_dir / final.name, fmt, quality)
+            return ok, err_msg
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            if owner:
+                self._end_job(job, ok, err_msg)
+
+    def _encode_stream(
+        self, chunks: Iterable[bytes], final: Path, tmp_path: Path, fmt: str, quality: str
+    ) -> tuple[bool, str]:
+        """Corpo di encode_stream(): FFmpeg con input pipe:0, uscita in tmp_path poi rename."""
+        cmd = [self.ffmpeg_path, "-hide_banner", "-loglevel", "error", "-y", "-i", "pipe:0"]
+        cmd.extend(["-vn", "-map_metadata", "0", *_codec_args(fmt, quality), str(tmp_path)])
+        creationflags = subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0
+        stderr_tail: deque[bytes] = deque(maxlen=STDERR_TAIL_LINES)
+        try:
+            proc = self._popen(
+                cmd,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
+                creationflags=creationflags,
+            )
+        except ConversionCancelled:
+            return False, MSG_CANCELLED
+        except OSError as e:
+            return False, str(e)
+        # stderr in un thread: con la pipe piena FFmpeg si bloccherebbe e stdin con lui
+        drain = threading.Thread(target=lambda: stderr_tail.extend(proc.stderr), daemon=True)
+        drain.start()
+        try:
+            try:
+                for chunk in chunks:
+                    proc.stdin.write(chunk)
+                    sample_peak_rss(proc)
+                proc.stdin.close()
+            except (BrokenPipeError, ValueError):
+                pass  # FFmpeg uscito (errore o cancel): l'esito lo dà il returncode
+            returncode = proc.wait(timeout=CONVERT_TIMEOUT_SEC)
+            drain.join(timeout=5)
+        except BaseException:
+            proc.kill()
+            proc.wait()
+            raise
+        if returncode != 0:
+            if self.cancelled:
+                return False, MSG_CANCELLED
+            return False, _parse_ffmpeg_error(b"".join(stderr_tail).decode("utf-8", "replace"))
+        try:
+            os.replace(tmp_path, final)
+        except OSError as e:
+            return False, MSG_DISK_FULL if e.errno == errno.ENOSPC else str(e)
+        return True, ""
+
+    def _run_convert(
+        self,
+        input_path: Path,
+        output_path: Path,
+        output_format: str,
+        quality: str,
+        progress_callback: Callable[[float], None] | None,
+        overwrite: bool,
+        stream_copy: bool = False,
+    ) -> tuple[bool, str]:
+        """Esegue una singola invocazione FFmpeg (ricodifica o stream copy)."""
         output_path = Path(output_path)
         output_path.parent.mkdir(parents=True, exist_ok=True)
 
@@ -184,43 +1250,18 @@ class FfmpegEngine:
 
         # Codec e qualità per formato (espliciti per evitare format wrong)
         fmt = output_format.lower().strip()
-        if fmt == "mp3":
-            cmd.extend(["-c:a", "libmp3lame", "-id3v2_version", "3"])
-            if quality == "lossless":
-                cmd.extend(["-ab", "320k"])
-            elif quality == "320k":
-                cmd.extend(["-ab", "320k"])
-            else:
-                cmd.extend(["-ab", quality if quality.endswith("k") else "192k"])
-        elif fmt == "flac":
-            cmd.extend(["-c:a", "flac"])
-        elif fmt in ("m4a", "alac"):
-            cmd.extend(["-c:a", "alac", "-movflags", "use_metadata_tags"])
-        elif fmt == "wav":
-            cmd.extend(["-c:a", "pcm_s16le"])
-        else:
-            cmd.extend(["-c:a", "copy"])
+        cmd.extend(_stream_copy_args(fmt) if stream_copy else _codec_args(fmt, quality))
 
         # Forza estensione corretta (evita che FFmpeg usi container sbagliato)
-        out_str = str(output_path)
-        if fmt == "mp3" and not out_str.lower().endswith(".mp3"):
-            output_path = output_path.with_suffix(".mp3")
-            out_str = str(output_path)
-        elif fmt == "flac" and not out_str.lower().endswith(".flac"):
-            output_path = output_path.with_suffix(".flac")
-            out_str = str(output_path)
-        elif fmt in ("m4a", "alac") and not out_str.lower().endswith((".m4a", ".alac")):
-            output_path = output_path.with_suffix(".m4a")
-            out_str = str(output_path)
-        elif fmt == "wav" and not out_str.lower().endswith(".wav"):
-            output_path = output_path.with_suffix(".wav")
-            out_str = str(output_path)
-        cmd.append(out_str)
-
-        # Con progress_callback: usa -loglevel info per parsare time= su stderr
+        output_path = _with_format_suffix(output_path, fmt)
+        cmd.append(str(output_path))
+
+        # Con progress_callback: progress strutturato su stdout (-progress pipe:1) e
+        # -loglevel info per leggere "Duration:" dall'header dello stesso processo
         use_progress = progress_callback is not None
         if use_progress:
             cmd[3] = "info"  # cmd[2]=-loglevel, cmd[3]=error → info
+            cmd[4:4] = ["-nostats", "-progress", "pipe:1"]
 
         # Stesso file input/output (es. MP3→MP3 stessa cartella): temp + rename atomico
         final_output = output_path
@@ -236,6 +1277,7 @@ class FfmpegEngine:
             output_path = tmp_path
 
         creationflags = subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0
+        existed = final_output.exists()
         try:
             if use_progress:
                 ok, err_msg = _run_convert_with_progress(
@@ -245,20 +1287,21 @@ class FfmpegEngine:
                     final_output,
                     progress_callback,
                     creationflags,
+                    duration=self._cached_duration(input_path),
+                    popen=self._popen,
+                    # Chiamata dal thread che legge stderr: job catturato qui
+                    on_duration=partial(_note_duration, getattr(self._jobs, "current", None)),
                 )
+                if not ok and self.cancelled:
+                    return self._discard_cancelled(final_output, existed, overwrite)
                 return ok, err_msg
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                check=False,
-                timeout=CONVERT_TIMEOUT_SEC,
-                creationflags=creationflags,
-            )
-            if result.returncode != 0:
+            returncode, stderr_text = _run_ffmpeg_quiet(cmd, creationflags, self._popen)
+            if returncode != 0:
                 if output_path != final_output and output_path.exists():
                     output_path.unlink(missing_ok=True)
-                msg = _parse_ffmpeg_error(result.stderr)
+                if self.cancelled:
+                    return self._discard_cancelled(final_output, existed, overwrite)
+                msg = _parse_ffmpeg_error(stderr_text)
                 return False, msg
             if output_path != final_output:
                 try:
@@ -278,6 +1321,10 @@ class FfmpegEngine:
             )
             mins = CONVERT_TIMEOUT_SEC // 60
             return False, f"Timeout: file troppo lungo o problematico (oltre {mins} min)"
+        except ConversionCancelled:
+            if output_path != final_output and output_path.exists():
+                output_path.unlink(missing_ok=True)
+            return False, MSG_CANCELLED
         except FileNotFoundError:
             if output_path != final_output and output_path.exists():
                 output_path.unlink(missing_ok=True)
@@ -302,82 +1349,409 @@ class FfmpegEngine:
             logger.exception("Conversione fallita: %s", e)
             return False, str(e)
 
+    def _discard_cancelled(
+        self, final_output: Path, existed: bool, overwrite: bool
+    ) -> tuple[bool, str]:
+        """Rimuove l'output parziale di un processo annullato. Ritorna (False, MSG_CANCELLED).
+
+        Un file preesistente si tocca solo con overwrite (FFmpeg l'aveva già troncato).
+        """
+        if not existed or overwrite:
+            final_output.unlink(missing_ok=True)
+        return False, MSG_CANCELLED
+
     def convert_batch(
         self,
         files: list[Path],
         output_dir: Path,
         output_format: str,
         quality: str = "lossless",
-        max_workers: int = 4,
+        max_workers: int | None = None,
         progress_callback: Callable[[int, int, Path], None] | None = None,
         overwrite: bool = True,
         output_dirs: list[Path] | None = None,
         stop_check: Callable[[], bool] | None = None,
+        targets: list[OutputTarget] | None = None,
+        schedule: str = SCHEDULE_FIFO,
+        plan_callback: Callable[[float], None] | None = None,
+        incremental: bool = False,
+        verify_hash: bool = False,
+        manifest: ConversionManifest | None = None,
+        pause_callback: Callable[[str], None] | None = None,
+        journal: JournalBatch | None = None,
     ) -> list[tuple[Path, bool, str]]:
-        """Batch parallelo con ThreadPoolExecutor. Ritorna (path, ok, error_msg)."""
+        """Batch parallelo su lista (iter_convert + conteggio progress). Ritorna (path, ok, err).
+
+        targets: più formati per file (un decode, N uscite via convert_multi); in tal caso
+        c'è una voce per ogni uscita e gli errori sono prefissati dal formato.
+        max_workers: None = adattivo (AdaptiveWorkerPolicy: core, costo codec, CPU e disco
+        osservati); un intero fissa il numero di conversioni in parallelo.
+        schedule: SCHEDULE_LPT = file più costosi (durata × costo formato) per primi, con
+        le durate in cache probe o stimate dalla dimensione (nessun ffprobe); plan_callback
+        riceve la durata totale stimata in secondi prima dell'avvio.
+        incremental: salta le uscite già aggiornate secondo il manifest (ok=True, messaggio
+        SKIPPED_UP_TO_DATE) e rifà quelle prodotte in precedenza con input o impostazioni
+        diversi anche senza overwrite; verify_hash confronta il contenuto se cambia solo mtime.
+        pause_callback: vedi iter_convert (coda in pausa per spazio disco insufficiente).
+        journal: batch del journal in cui registrare lo stato di ogni file (vedi iter_convert).
+        Dopo cancel() (da un altro thread) ritorna subito gli esiti dei file completati: i
+        processi in corso vengono terminati e i file interrotti non compaiono nei risultati.
+        """
         if not files:
             return []
 
-        output_dir = Path(output_dir)
-        output_format = output_format.strip().lower()
         total = len(files)
-
-        # Costruisci task (input, output_path); output_dirs per stesso-folder
+        targets = _normalize_targets(output_format, quality, targets)
         use_output_dirs = output_dirs and len(output_dirs) >= len(files)
-        tasks: list[tuple[Path, Path]] = []
-        for i, inp in enumerate(files):
-            out_dir = Path(output_dirs[i]) if use_output_dirs else output_dir
-            out_dir.mkdir(parents=True, exist_ok=True)
-            stem = Path(inp).stem
-            out_path = out_dir / f"{stem}.{output_format}"
-            tasks.append((inp, out_path))
+        items: list[Path | tuple[Path, Path]] = (
+            [(Path(inp), Path(d)) for inp, d in zip(files, output_dirs, strict=False)]
+            if use_output_dirs
+            else [Path(inp) for inp in files]
+        )
+
+        if schedule == SCHEDULE_LPT and total > 1:
+            workers = _make_worker_policy(
+                targets, max_workers, worker_cpu_count(self.priority)
+            ).workers
+            items, makespan = self._plan_lpt(items, targets, workers)
+            logger.info(
+                "Batch %d file, %d worker: durata stimata %.0f s (LPT)", total, workers, makespan
+            )
+            if plan_callback:
+                plan_callback(makespan)
 
-        results: list[tuple[Path, bool, str]] = []
-        completed_lock = threading.Lock()
         completed_count = 0
 
-        def _single_file_progress(pct: float) -> None:
+        def _on_file_done(inp: Path, ok: bool) -> None:
+            nonlocal completed_count
+            completed_count += 1
             if progress_callback:
-                progress_callback(int(pct), 100, files[0])
+                progress_callback(completed_count, total, inp)
 
-        def _convert_task(inp: Path, out_path: Path) -> tuple[Path, bool, str]:
-            pcb = _single_file_progress if total == 1 else None
-            ok, err_msg = self.convert(
-                inp,
-                out_path,
+        def _single_file_progress(inp: Path, pct: float) -> None:
+            if progress_callback:
+                progress_callback(int(pct), 100, inp)
+
+        return list(
+            self.iter_convert(
+                items,
+                output_dir,
                 output_format,
-                quality,
-                progress_callback=pcb,
+                quality=quality,
+                max_workers=max_workers,
                 overwrite=overwrite,
+                stop_check=stop_check,
+                targets=targets,
+                incremental=incremental,
+                verify_hash=verify_hash,
+                manifest=manifest,
+                file_progress_callback=_single_file_progress if total == 1 else None,
+                on_file_done=_on_file_done,
+                pause_callback=pause_callback,
+                journal=journal,
+                # Un solo file: senza segmenti userebbe un core solo
+                segment_workers=(max_workers or worker_cpu_count(self.priority))
+                if total == 1
+                else None,
             )
-            return (inp, ok, err_msg or "")
+        )
 
-        def _on_done(inp: Path, ok: bool) -> None:
-            nonlocal completed_count
-            with completed_lock:
-                completed_count += 1
-                n = completed_count
-            if progress_callback:
-                progress_callback(n, total, inp)
-
-        workers = min(max_workers, total)
-        with ThreadPoolExecutor(max_workers=workers) as executor:
-            futures = {}
-            for inp, out_path in tasks:
-                if stop_check and stop_check():
-                    break
-                fut = executor.submit(_convert_task, inp, out_path)
-                futures[fut] = inp
-
-            for fut in as_completed(futures):
-                inp = futures[fut]
-                try:
-                    inp, ok, err_msg = fut.result()
-                    results.append((inp, ok, err_msg))
-                    _on_done(inp, ok)
-                except Exception as e:
-                    logger.exception("Errore conversione %s: %s", inp, e)
-                    results.append((inp, False, str(e)))
-                    _on_done(inp, False)
+    def iter_convert(
+        self,
+        inputs: Iterable[Path | tuple[Path, Path]],
+        output_dir: Path,
+        output_format: str,
+        quality: str = "lossless",
+        max_workers: int | None = None,
+        overwrite: bool = True,
+        stop_check: Callable[[], bool] | None = None,
+        targets: list[OutputTarget] | None = None,
+        incremental: bool = False,
+        verify_hash: bool = False,
+        manifest: ConversionManifest | None = None,
+        file_progress_callback: Callable[[Path, float], None] | None = None,
+        on_file_done: Callable[[Path, bool], None] | None = None,
+        segment_workers: int | None = None,
+        disk_budget: DiskBudget | None = None,
+        pause_callback: Callable[[str], None] | None = None,
+        journal: JournalBatch | None = None,
+        poll_interval: float | None = None,
+    ) -> Iterator[tuple[Path, bool, str]]:
+        """Conversione in streaming: genera (path, ok, error_msg) man mano che i file finiscono.
 
-        return results
+        inputs: iterabile (anche generatore) di input oppure (input, cartella output);
+        viene consumato solo quanto serve a riempire la finestra di job in esecuzione,
+        quindi la memoria non dipende dalla dimensione del batch. Le cartelle di output
+        sono create al momento della conversione. Stessi parametri di convert_batch;
+        file_progress_callback riceve (input, percentuale) durante ogni conversione,
+        on_file_done (input, ok) alla fine di ogni file (tutte le uscite).
+        segment_workers: file lunghi a segmenti paralleli (convert_batch lo usa con un solo file).
+        Ammissione su disco: ogni file parte solo se la dimensione stimata delle sue uscite
+        sta nello spazio libero meno quello prenotato dai job in corso (disk_budget, di
+        default uno nuovo per il batch). Altrimenti attende la fine dei job in corso e, se
+        non basta, mette la coda in pausa finché si libera spazio (pause_callback riceve
+        MSG_DISK_PAUSED, poi "" alla ripresa) invece di far fallire i file per disco pieno.
+        journal: ogni file viene segnato running (con le uscite che sta per scrivere, da
+        rimuovere se il processo muore a metà) e poi done/failed: dopo un crash il batch si
+        riprende dai soli file non completati (utils.job_journal).
+        Sorgenti che producono input nel tempo (es. cartella monitorata): un elemento None
+        significa "nessun input pronto per ora" e lascia la finestra com'è; con poll_interval
+        la finestra viene riempita anche ogni poll_interval secondi, non solo quando un job
+        termina. Il batch finisce quando l'iterabile è esaurito e nessun job è in corso.
+        """
+        output_dir = Path(output_dir)
+        budget = disk_budget if disk_budget is not None else DiskBudget()
+        targets = _normalize_targets(output_format, quality, targets)
+        multi = len(targets) > 1
+
+        if incremental:
+            manifest = manifest if manifest is not None else get_conversion_manifest()
+            version = self.ffmpeg_version()
+
+        def _run_outputs(
+            inp: Path, outputs: list[tuple[Path, OutputTarget]], overwrite_outputs: bool
+        ) -> dict[Path, tuple[bool, str]]:
+            if not outputs:
+                return {}
+            pcb = partial(file_progress_callback, inp) if file_progress_callback else None
+            out_results = self.convert_multi(
+                inp,
+                outputs,
+                progress_callback=pcb,
+                overwrite=overwrite_outputs,
+                segment_workers=segment_workers,
+            )
+            return {
+                out: (ok, err) for (out, _), (_, ok, err) in zip(outputs, out_results, strict=True)
+            }
+
+        def _written_outputs(
+            inp: Path, outputs: list[tuple[Path, OutputTarget]], overwrite_outputs: bool = overwrite
+        ) -> list[Path]:
+            """Uscite che il job scriverà sul file finale (parziali se il processo muore).
+
+            Esclusi i file esistenti non sovrascritti e l'input stesso (riscritto via temp).
+            """
+            written = []
+            for out, t in outputs:
+                final = _with_format_suffix(out, t.format)
+                if final.resolve() == inp.resolve():
+                    continue
+                if overwrite_outputs or not final.exists():
+                    written.append(final)
+            return written
+
+        def _convert_task(inp: Path, out_dir: Path) -> list[tuple[Path, bool, str]]:
+            outputs = _target_outputs(inp, out_dir, targets)
+            if incremental:
+                states = _output_states(manifest, version, inp, outputs, verify_hash)
+                # Uscite nostre ma obsolete: si rifanno anche con overwrite disattivato
+                stale = [o for o in outputs if states[o[0]] == OUTPUT_STALE]
+                other = [o for o in outputs if states[o[0]] not in (OUTPUT_FRESH, OUTPUT_STALE)]
+                if stale or other:
+                    out_dir.mkdir(parents=True, exist_ok=True)
+                if journal:
+                    journal.job_started(
+                        str(inp), _written_outputs(inp, stale, True) + _written_outputs(inp, other)
+                    )
+                outcome = _run_outputs(inp, stale, True)
+                outcome.update(_run_outputs(inp, other, overwrite))
+                for out, t in stale + other:
+                    if outcome[out][0]:
+                        manifest.record(inp, out, _settings_key(t), version, verify_hash)
+                for out, _ in outputs:
+                    if states[out] == OUTPUT_FRESH:
+                        outcome[out] = (True, SKIPPED_UP_TO_DATE)
+            else:
+                out_dir.mkdir(parents=True, exist_ok=True)
+                if journal:
+                    journal.job_started(str(inp), _written_outputs(inp, outputs))
+                outcome = _run_outputs(inp, outputs, overwrite)
+            task_results = []
+            for out, t in outputs:
+                ok, err_msg = outcome[out]
+                if multi and not ok:
+                    err_msg = f"{t.format.upper()}: {err_msg}"
+                task_results.append((inp, ok, err_msg or ""))
+            return task_results
+
+        policy = _make_worker_policy(targets, max_workers, worker_cpu_count(self.priority))
+
+        def _input_size(inp: Path) -> int:
+            try:
+                return os.stat(inp).st_size
+            except OSError:
+                return 0
+
+        # Riepilogo telemetria del batch (scritto anche se il generatore viene chiuso prima)
+        batch = BatchTelemetry()
+        try:
+            # Finestra di job in esecuzione dimensionata dalla policy (cambia durante il batch)
+            pending = iter(inputs)
+            with ThreadPoolExecutor(max_workers=policy.max_workers) as executor:
+                futures = {}
+                held = None  # Input estratto ma non ammesso (spazio): riprovato per primo
+
+                def _stopped() -> bool:
+                    return self.cancelled or bool(stop_check and stop_check())
+
+                def _top_up() -> None:
+                    nonlocal held
+                    while len(futures) < policy.workers:
+                        if _stopped():
+                            return
+                        item = held if held is not None else next(pending, None)
+                        held = None
+                        if item is None:
+                            return
+                        inp, out_dir = item if isinstance(item, tuple) else (item, output_dir)
+                        inp, out_dir = Path(inp), Path(out_dir)
+                        # Solo cache probe (ffprobe non blocca il thread che riempie la finestra)
+                        # e manifest senza hash: stima per eccesso se un input è solo toccato
+                        outputs = _target_outputs(inp, out_dir, targets)
+                        states = (
+                            _output_states(manifest, version, inp, outputs) if incremental else None
+                        )
+                        size = self._estimate_job_bytes(
+                            inp, self.probe_cache.get(inp), outputs, overwrite, states
+                        )
+                        if not budget.reserve(out_dir, size):
+                            if futures:
+                                held = item  # Riprova quando un job in corso termina
+                                return
+                            if not budget.wait_reserve(out_dir, size, _stopped, pause_callback):
+                                return
+                        fut = executor.submit(
+                            self._run_in_batch, batch, _convert_task, inp, out_dir
+                        )
+                        futures[fut] = (inp, out_dir, size)
+
+                _top_up()
+                while futures:
+                    done, _ = wait(futures, timeout=poll_interval, return_when=FIRST_COMPLETED)
+                    for fut in done:
+                        inp, out_dir, size = futures.pop(fut)
+                        budget.release(out_dir, size)
+                        try:
+                            task_results = fut.result()
+                        except Exception as e:
+                            logger.exception("Errore conversione %s: %s", inp, e)
+                            # Un esito per uscita, come per le conversioni concluse
+                            task_results = [(inp, False, str(e))] * len(targets)
+                        policy.job_done(_input_size(inp))
+                        file_ok = all(ok for _, ok, _ in task_results)
+                        if self.cancelled and not file_ok:
+                            continue  # Interrotto da cancel(): non è un esito
+                        if on_file_done:
+                            on_file_done(inp, file_ok)
+                        if journal:
+                            errors = [err for _, ok, err in task_results if not ok]
+                            journal.job_finished(str(inp), file_ok, errors[0] if errors else "")
+                        yield from task_results
+                    _top_up()
+        finally:
+            batch.finish()
+
+    def _estimate_job_bytes(
+        self,
+        inp: Path,
+        info: ProbeInfo | None,
+        outputs: list[tuple[Path, OutputTarget]],
+        overwrite: bool,
+        states: dict[Path, str] | None = None,
+    ) -> int:
+        """Byte in più su disco per le uscite di un input (remux ≈ dimensione input).
+
+        Escluse le uscite aggiornate secondo il manifest (states, modalità incrementale) e
+        quelle esistenti che non verranno riscritte; per un file che verrà sovrascritto
+        conta solo la differenza con la dimensione attuale. info None: stima da dimensione.
+        """
+        try:
+            input_size = os.stat(inp).st_size
+        except OSError:
+            input_size = 0
+        duration = estimate_duration(inp, info)
+        total = 0
+        for out, t in outputs:
+            state = states.get(out) if states else None
+            if state == OUTPUT_FRESH:
+                continue
+            final = _with_format_suffix(Path(out), t.format)
+            try:
+                existing = os.stat(final).st_size
+            except OSError:
+                existing = None
+            if existing is not None and not overwrite and state != OUTPUT_STALE:
+                continue  # Non sovrascritta
+            size = estimate_output_size(
+                duration,
+                t.format,
+                t.quality,
+                info,
+                input_size,
+                stream_copy=can_stream_copy(info, t.format, t.quality),
+            )
+            # Uscita = input: temp accanto all'originale fino al rename, serve tutto
+            if existing is not None and final.resolve() != Path(inp).resolve():
+                size = max(0, size - existing)
+            total += size
+        return total
+
+    def estimate_output_bytes(
+        self,
+        files: list[Path],
+        output_dir: Path,
+        output_format: str,
+        quality: str = "lossless",
+        targets: list[OutputTarget] | None = None,
+        output_dirs: list[Path] | None = None,
+        overwrite: bool = True,
+        incremental: bool = False,
+        manifest: ConversionManifest | None = None,
+    ) -> dict[Path, int]:
+        """Byte stimati che il batch scriverà in più, per cartella di output (stessi parametri
+        di convert_batch). Usa solo la cache probe, senza avviare ffprobe: i file non ancora
+        analizzati sono stimati dalla dimensione. Uscite già aggiornate (incremental) o non
+        sovrascritte non contano, quelle sovrascritte solo per la differenza di dimensione."""
+        targets = _normalize_targets(output_format, quality, targets)
+        use_output_dirs = output_dirs and len(output_dirs) >= len(files)
+        if incremental:
+            manifest = manifest if manifest is not None else get_conversion_manifest()
+            version = self.ffmpeg_version()
+        needs: dict[Path, int] = {}
+        for i, inp in enumerate(files):
+            inp = Path(inp)
+            out_dir = Path(output_dirs[i]) if use_output_dirs else Path(output_dir)
+            outputs = _target_outputs(inp, out_dir, targets)
+            states = _output_states(manifest, version, inp, outputs) if incremental else None
+            size = self._estimate_job_bytes(
+                inp, self.probe_cache.get(inp), outputs, overwrite, states
+            )
+            needs[out_dir] = needs.get(out_dir, 0) + size
+        return needs
+
+    def _plan_lpt(
+        self,
+        items: list[Path | tuple[Path, Path]],
+        targets: list[OutputTarget],
+        workers: int,
+    ) -> tuple[list[Path | tuple[Path, Path]], float]:
+        """Ordina gli input LPT per costo stimato. Ritorna (input ordinati, makespan in secondi).
+
+        items: input oppure (input, cartella output), come per iter_convert.
+        Come estimate_output_bytes usa solo la cache probe, senza avviare ffprobe: i file
+        non ancora analizzati sono stimati dalla dimensione (estimate_duration), così la
+        prima conversione parte subito e cancel() non attende la pianificazione.
+        """
+        inputs = [item[0] if isinstance(item, tuple) else item for item in items]
+        infos = {inp: self.probe_cache.get(inp) for inp in inputs}
+        formats = [t.format for t in targets]
+        single = targets[0] if len(targets) == 1 else None
+
+        def _item_cost(item: Path | tuple[Path, Path]) -> float:
+            inp = item[0] if isinstance(item, tuple) else item
+            info = infos[inp]
+            copy = single is not None and can_stream_copy(info, single.format, single.quality)
+            return estimate_cost(estimate_duration(inp, info), formats, stream_copy=copy)
+
+        return plan_lpt(items, _item_cost, workers)
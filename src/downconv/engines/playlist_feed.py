@@ -0,0 +1,141 @@
+"""Espansione di playlist e canali in elementi per la coda download, in un thread.
+
+Gli elenchi sono letti in modo pigro (YtdlpEngine.iter_entries: estrazione flat, una
+pagina alla volta) e avanzano solo finché nella coda ci sono pochi elementi in attesa:
+una playlist da 5000 video non viene letta tutta prima di iniziare, né tenuta in memoria
+come info dict. I primi download partono mentre l'elenco è ancora in lettura; lo stesso
+video in più playlist (o già incollato come URL) viene scaricato una volta sola.
+"""
+
+import logging
+import threading
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from typing import NamedTuple
+
+logger = logging.getLogger(__name__)
+
+# Elementi in attesa nella coda oltre i quali la lettura degli elenchi si ferma
+FEED_AHEAD = 16
+# Intervallo di controllo (secondi) per nuovi elementi e contropressione
+FEED_POLL_SEC = 0.2
+
+MSG_EMPTY_PLAYLIST = "Playlist vuota o senza elementi scaricabili"
+
+
+class FeedEvent(NamedTuple):
+    """Elemento scoperto (url) o fine dell'elenco di source (url None, con count nuovi
+    elementi ed eventuale errore di lettura)."""
+
+    source: str
+    url: str | None
+    count: int = 0
+    error: str = ""
+
+
+class PlaylistFeed:
+    """Legge in un thread gli elementi degli URL di ingresso, con dedupe. Thread-safe.
+
+    enumerate_entries(url, stop_check) genera (url elemento, chiave dedupe): per un URL
+    singolo solo se stesso. backlog(): elementi già in coda non ancora avviati; la
+    lettura si ferma finché backlog() più gli eventi non ritirati arrivano ad ahead.
+    Gli eventi si ritirano con drain() dal thread della coda.
+    """
+
+    def __init__(
+        self,
+        sources: Iterable[str],
+        enumerate_entries: Callable[[str, Callable[[], bool]], Iterator[tuple[str, str]]],
+        backlog: Callable[[], int],
+        ahead: int = FEED_AHEAD,
+        stop_check: Callable[[], bool] | None = None,
+        error_message: Callable[[Exception], str] = str,
+    ) -> None:
+        self._sources = list(sources)
+        self._enumerate = enumerate_entries
+        self._backlog = backlog
+        self._ahead = max(1, ahead)
+        self._stop_check = stop_check
+        self._error_message = error_message
+        self._events: deque[FeedEvent] = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="playlist-feed", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    @property
+    def active(self) -> bool:
+        """Elenchi ancora in lettura o eventi non ritirati."""
+        with self._cond:
+            return self._thread.is_alive() or bool(self._events)
+
+    def drain(self) -> list[FeedEvent]:
+        """Eventi dall'ultima chiamata, in ordine; sblocca la lettura se era in attesa."""
+        with self._cond:
+            events = list(self._events)
+            self._events.clear()
+            self._cond.notify_all()
+        return events
+
+    def wait(self, timeout: float = FEED_POLL_SEC) -> None:
+        """Attende nuovi eventi (o la fine della lettura) al massimo timeout secondi."""
+        with self._cond:
+            if not self._events and self._thread.is_alive():
+                self._cond.wait(timeout)
+
+    def close(self, timeout: float = 1.0) -> None:
+        """Interrompe la lettura (l'elenco in corso si chiude al prossimo elemento). Attende
+        al massimo timeout secondi: una pagina in download non blocca l'annullamento, il
+        thread termina da solo alla risposta."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+
+    def _stopped(self) -> bool:
+        return self._closed or bool(self._stop_check and self._stop_check())
+
+    def _push(self, event: FeedEvent) -> None:
+        with self._cond:
+            self._events.append(event)
+            self._cond.notify_all()
+
+    def _throttle(self) -> None:
+        """Contropressione: attende che la coda consumi gli elementi già scoperti."""
+        with self._cond:
+            while not self._stopped() and len(self._events) + self._backlog() >= self._ahead:
+                self._cond.wait(FEED_POLL_SEC)
+
+    def _run(self) -> None:
+        seen: set[str] = set()
+        for source in self._sources:
+            if self._stopped():
+                break
+            found = count = 0
+            error = ""
+            entries = None
+            try:
+                entries = iter(self._enumerate(source, self._stopped))
+                for url, key in entries:
+                    found += 1
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                    count += 1
+                    self._push(FeedEvent(source, url))
+                    self._throttle()
+                    if self._stopped():
+                        break
+            except Exception as e:
+                logger.warning("Lettura elenco fallita (%s): %s", source[:60], e)
+                error = self._error_message(e)
+            finally:
+                close = getattr(entries, "close", None)  # Generatore: libera la sessione
+                if close is not None:
+                    close()
+            if not found and not error and not self._stopped():
+                error = MSG_EMPTY_PLAYLIST
+            self._push(FeedEvent(source, None, count, error))
@@ -0,0 +1,124 @@
+"""Priorità dei processi FFmpeg: niceness e classe I/O per modalità batch."""
+
+import errno
+import logging
+import os
+import subprocess
+import sys
+import threading
+from typing import NamedTuple
+
+logger = logging.getLogger(__name__)
+
+# Modalità (stessi valori di config.CONVERT_PRIORITY_MODES)
+PRIORITY_NORMAL = "normal"
+PRIORITY_BACKGROUND = "background"  # PC e interfaccia reattivi, conversione più lenta
+PRIORITY_TURBO = "turbo"  # Esecuzioni non presidiate: precedenza alla conversione
+PRIORITY_MODES = (PRIORITY_NORMAL, PRIORITY_BACKGROUND, PRIORITY_TURBO)
+
+# Linux ioprio: classe best-effort (livelli 0 = più alto … 7 = più basso), "who" = processo
+_IOPRIO_CLASS_BE = 2
+_IOPRIO_CLASS_SHIFT = 13
+_IOPRIO_WHO_PROCESS = 1
+# Numero della syscall ioprio_set per architettura (non esposta da os)
+_SYS_IOPRIO_SET = {"x86_64": 251, "amd64": 251, "i686": 289, "i386": 289, "aarch64": 30}
+
+# In background con almeno questi core i worker adattivi ne contano uno in meno: margine
+# per GUI ed event loop (senza affinità: lo scheduler resta libero di usare tutti i core)
+_RESERVE_CORE_MIN_CPUS = 4
+
+# Niceness negativa rifiutata dal sistema (servono privilegi): avviso una volta, poi
+# i processi successivi non ci riprovano
+_raise_denied = threading.Event()
+
+
+class ProcessPriority(NamedTuple):
+    """Impostazioni applicate a ogni processo FFmpeg avviato dall'engine."""
+
+    nice: int  # Incremento niceness (Unix); negativo = richiede privilegi, altrimenti ignorato
+    io_level: int | None  # Livello best-effort Linux 0-7 (None = eredita)
+    windows_class: int  # Flag di priority class per creationflags (Windows)
+
+
+def _windows_flag(name: str) -> int:
+    return getattr(subprocess, name, 0)
+
+
+def priority_for_mode(mode: str) -> ProcessPriority:
+    """Priorità per la modalità indicata (sconosciuta = normale)."""
+    if mode == PRIORITY_BACKGROUND:
+        return ProcessPriority(10, 7, _windows_flag("BELOW_NORMAL_PRIORITY_CLASS"))
+    if mode == PRIORITY_TURBO:
+        return ProcessPriority(-5, 0, _windows_flag("ABOVE_NORMAL_PRIORITY_CLASS"))
+    return ProcessPriority(0, None, 0)
+
+
+def worker_cpu_count(mode: str) -> int:
+    """Core da considerare per il numero di worker adattivo nella modalità indicata."""
+    available = _available_cpus()
+    cpus = len(available) if available else os.cpu_count() or 1
+    if mode == PRIORITY_BACKGROUND and cpus >= _RESERVE_CORE_MIN_CPUS:
+        return cpus - 1
+    return cpus
+
+
+def _available_cpus() -> set[int] | None:
+    if not hasattr(os, "sched_getaffinity"):
+        return None
+    try:
+        return set(os.sched_getaffinity(0))
+    except OSError:
+        return None
+
+
+def creationflags_for(priority: ProcessPriority, creationflags: int = 0) -> int:
+    """creationflags con la priority class di Windows (altrove invariati)."""
+    if sys.platform != "win32":
+        return creationflags
+    return creationflags | priority.windows_class
+
+
+def _ioprio_set(pid: int, level: int) -> bool:
+    """Classe I/O best-effort al livello dato (Linux). False se non supportato."""
+    import ctypes  # Import locale: solo Linux e solo con priorità non normale
+    import platform
+
+    nr = _SYS_IOPRIO_SET.get(platform.machine().lower())
+    if nr is None or not sys.platform.startswith("linux"):
+        return False
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        value = (_IOPRIO_CLASS_BE << _IOPRIO_CLASS_SHIFT) | level
+        return libc.syscall(nr, _IOPRIO_WHO_PROCESS, pid, value) == 0
+    except (OSError, AttributeError):
+        return False
+
+
+def apply_priority(pid: int, priority: ProcessPriority) -> None:
+    """Applica niceness e classe I/O a un processo appena avviato (Unix).
+
+    Ogni impostazione è facoltativa: se il sistema la rifiuta il processo continua con
+    quella ereditata. Niceness negativa senza privilegi: avviso nel log alla prima
+    volta, poi non viene più tentata (Turbo resta con la sola priorità I/O).
+    """
+    if sys.platform == "win32":
+        return  # Windows: priority class già passata in creationflags
+    raise_nice = priority.nice < 0
+    if priority.nice and hasattr(os, "setpriority") and not (raise_nice and _raise_denied.is_set()):
+        try:
+            current = os.getpriority(os.PRIO_PROCESS, pid)
+            os.setpriority(os.PRIO_PROCESS, pid, min(19, current + priority.nice))
+        except OSError as e:
+            if raise_nice and e.errno in (errno.EPERM, errno.EACCES):
+                if not _raise_denied.is_set():
+                    _raise_denied.set()
+                    logger.warning(
+                        "Priorità Turbo: niceness %+d non consentita senza privilegi, "
+                        "FFmpeg a priorità CPU normale (%s)",
+                        priority.nice,
+                        e,
+                    )
+            else:
+                logger.debug("Niceness %+d non applicata a %d: %s", priority.nice, pid, e)
+    if priority.io_level is not None and not _ioprio_set(pid, priority.io_level):
+        logger.debug("Classe I/O non applicata a %d", pid)
@@ -0,0 +1,526 @@
+"""Unione a livello di bitstream dei segmenti FLAC e MP3 codificati in parallelo.
+
+La concatenazione dei container (demuxer concat + stream copy) basta per ALAC in MP4;
+FLAC e MP3 hanno nell'header informazioni sull'intero stream:
+
+- FLAC: ogni frame porta il proprio numero (da 0 in ogni segmento) protetto da CRC-8 e
+  CRC-16, STREAMINFO conta campioni, dimensioni minima/massima dei frame e MD5 dell'audio.
+  join_flac rinumera i frame (CRC-16 aggiornato per linearità, senza rileggere i dati) e
+  riscrive STREAMINFO: con confini su multipli del blocco il file è quello della codifica
+  seriale.
+- MP3: LAME antepone un ritardo (priming) e completa l'ultimo frame (padding); i segmenti
+  dopo il primo sono codificati con qualche frame di pre-roll, scartato qui insieme ai
+  frame oltre la fine del segmento. join_mp3 scrive un solo frame Xing/Info con frame,
+  byte, TOC, ritardo e padding totali e CRC del tag LAME ricalcolati (riproduzione
+  gapless). Il bit reservoir è disattivato nei segmenti: un frame non deve dipendere dai
+  byte dei frame scartati.
+
+Entrambe le funzioni sollevano ValueError se un segmento non ha la struttura attesa
+(il chiamante ripiega sulla codifica seriale).
+"""
+
+import mmap
+import struct
+from collections.abc import Callable, Sequence
+from functools import lru_cache
+from pathlib import Path
+from typing import NamedTuple
+
+# Frame esaminati tra un controllo di annullamento e l'altro
+_STOP_CHECK_FRAMES = 512
+
+
+class _Crc16:
+    """CRC a 16 bit con valore iniziale 0 (FLAC: 0x8005; tag LAME: 0x8005 riflesso).
+
+    Oltre al calcolo su pochi byte, sposta un CRC oltre n byte nulli (e all'indietro):
+    il CRC è lineare, quindi quello di un messaggio con l'header cambiato si ottiene da
+    quello vecchio senza rileggere il resto dei dati.
+    """
+
+    def __init__(self, poly: int, reflected: bool) -> None:
+        self._reflected = reflected
+        table = []
+        for byte in range(256):
+            if reflected:
+                crc = byte
+                for _ in range(8):
+                    crc = (crc >> 1) ^ poly if crc & 1 else crc >> 1
+            else:
+                crc = byte << 8
+                for _ in range(8):
+                    crc = ((crc << 1) ^ poly if crc & 0x8000 else crc << 1) & 0xFFFF
+            table.append(crc)
+        self._table = table
+        base = self._linear_map(self._zero_byte)
+        self._forward = [base]
+        self._backward: list[tuple[list[int], list[int]]] = []
+
+    def compute(self, data: bytes, crc: int = 0) -> int:
+        """CRC di data (pochi KB: ciclo Python) partendo da crc."""
+        table = self._table
+        if self._reflected:
+            for b in data:
+                crc = (crc >> 8) ^ table[(crc ^ b) & 0xFF]
+        else:
+            for b in data:
+                crc = ((crc << 8) & 0xFFFF) ^ table[(crc >> 8) ^ b]
+        return crc
+
+    def _zero_byte(self, crc: int) -> int:
+        if self._reflected:
+            return (crc >> 8) ^ self._table[crc & 0xFF]
+        return ((crc << 8) & 0xFFFF) ^ self._table[crc >> 8]
+
+    @staticmethod
+    def _linear_map(step: Callable[[int], int]) -> tuple[list[int], list[int]]:
+        """Mappa lineare sui 16 bit come due tabelle (byte basso, byte alto)."""
+        return [step(b) for b in range(256)], [step(b << 8) for b in range(256)]
+
+    @staticmethod
+    def _apply(m: tuple[list[int], list[int]], crc: int) -> int:
+        return m[0][crc & 0xFF] ^ m[1][crc >> 8]
+
+    def _shift(self, powers: list, crc: int, n: int) -> int:
+        """Applica la mappa base n volte (potenze di due calcolate al bisogno)."""
+        k = 0
+        while n:
+            if k == len(powers):
+                m = powers[-1]
+                powers.append(self._linear_map(lambda s, m=m: self._apply(m, self._apply(m, s))))
+            if n & 1:
+                crc = self._apply(powers[k], crc)
+            n >>= 1
+            k += 1
+        return crc
+
+    def shift(self, crc: int, n: int) -> int:
+        """Registro dopo n byte nulli: crc(A + B) = shift(crc(A), len(B)) ^ crc(B)."""
+        return self._shift(self._forward, crc, n)
+
+    def unshift(self, crc: int, n: int) -> int:
+        """Inversa di shift (registro prima di n byte nulli)."""
+        if not self._backward:
+            inverse = [0] * 0x10000
+            for s in range(0x10000):
+                inverse[self._zero_byte(s)] = s
+            self._backward.append(self._linear_map(inverse.__getitem__))
+        return self._shift(self._backward, crc, n)
+
+
+@lru_cache(maxsize=1)
+def _flac_crc16() -> _Crc16:
+    return _Crc16(0x8005, reflected=False)
+
+
+@lru_cache(maxsize=1)
+def _lame_crc16() -> _Crc16:
+    return _Crc16(0xA001, reflected=True)
+
+
+def _crc8(data: bytes) -> int:
+    """CRC-8 dell'header di frame FLAC (polinomio 0x07, iniziale 0)."""
+    crc = 0
+    for b in data:
+        crc ^= b
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x07 if crc & 0x80 else crc << 1) & 0xFF
+    return crc
+
+
+def _raise_if_stopped(stop_check: Callable[[], bool] | None) -> None:
+    if stop_check is not None and stop_check():
+        raise InterruptedError("Unione segmenti annullata")
+
+
+# --- FLAC ---------------------------------------------------------------------------
+
+_FLAC_MAGIC = b"fLaC"
+_FLAC_SYNC = b"\xff\xf8"  # Blocco fisso (l'encoder FFmpeg non usa blocchi variabili)
+_FLAC_STREAMINFO = 0
+_FLAC_SEEKTABLE = 3
+# Dimensioni di blocco standard (FLAC: codici 1-5 e 8-15 dell'header di frame)
+_FLAC_BLOCK_SIZES = (
+    *(0, 192, 576, 1152, 2304, 4608, 0, 0),
+    *(256, 512, 1024, 2048, 4096, 8192, 16384, 32768),
+)
+# Durata del blocco scelta dall'encoder FLAC di FFmpeg (compression_level predefinito)
+_FLAC_BLOCK_TIME_MS = 105
+
+
+def flac_block_size(sample_rate: int) -> int:
+    """Campioni per frame dell'encoder FLAC di FFmpeg: la dimensione standard più grande
+    entro 105 ms (4608 a 44,1/48 kHz). I confini dei segmenti devono esserne multipli."""
+    target = sample_rate * _FLAC_BLOCK_TIME_MS // 1000
+    return max((b for b in _FLAC_BLOCK_SIZES if 0 < b <= target), default=192)
+
+
+def _utf8_number(n: int) -> bytes:
+    """Numero di frame FLAC nella codifica "UTF-8" estesa (1-7 byte)."""
+    if n < 0x80:
+        return bytes((n,))
+    length = 2
+    while n >= 1 << (5 * length + 1):
+        length += 1
+    out = [0x80 | ((n >> (6 * i)) & 0x3F) for i in range(length - 1)]
+    first = ((0xFF << (8 - length)) & 0xFF) | (n >> (6 * (length - 1)))
+    return bytes([first, *reversed(out)])
+
+
+class _FlacFrame(NamedTuple):
+    number: int
+    number_len: int  # Byte del numero di frame nell'header
+    header_len: int
+    samples: int
+
+
+def _parse_flac_header(buf, pos: int, template: bytes) -> _FlacFrame | None:
+    """Header di frame in pos se valido e coerente con template (i primi 4 byte del primo
+    frame: frequenza, canali e bit). None = falso sincronismo nei dati compressi: il
+    chiamante accetta solo il numero di frame atteso, con CRC-8 corretto."""
+    if len(buf) - pos < 6 or buf[pos : pos + 2] != _FLAC_SYNC:
+        return None
+    b2, b3 = buf[pos + 2], buf[pos + 3]
+    if (b2 & 0x0F) != (template[2] & 0x0F) or b3 != template[3]:
+        return None
+    code = b2 >> 4  # Diverso dal primo frame solo nell'ultimo (blocco più corto)
+    if code == 0:
+        return None
+    first = buf[pos + 4]
+    length = 0
+    while length < 8 and first & (0x80 >> length):
+        length += 1
+    if length == 1 or length > 7:
+        return None
+    length = max(1, length)
+    end = pos + 4 + length
+    if end > len(buf):
+        return None
+    number = first & (0x7F >> length) if length > 1 else first
+    for b in buf[pos + 5 : end]:
+        if b & 0xC0 != 0x80:
+            return None
+        number = (number << 6) | (b & 0x3F)
+    if code == 6:
+        samples, end = buf[end] + 1, end + 1
+    elif code == 7:
+        samples, end = (buf[end] << 8 | buf[end + 1]) + 1, end + 2
+    else:
+        samples = _FLAC_BLOCK_SIZES[code]
+    rate_code = b2 & 0x0F
+    end += 1 if rate_code == 12 else 2 if rate_code in (13, 14) else 0
+    if end >= len(buf) or _crc8(bytes(buf[pos:end])) != buf[end]:
+        return None
+    return _FlacFrame(number, length, end + 1 - pos, samples)
+
+
+def _flac_metadata(buf) -> tuple[list[tuple[int, bytes]], int]:
+    """Blocchi di metadati (tipo, contenuto) e offset del primo frame."""
+    if buf[:4] != _FLAC_MAGIC:
+        raise ValueError("Segmento FLAC senza intestazione fLaC")
+    blocks = []
+    pos = 4
+    last = False
+    while not last:
+        if pos + 4 > len(buf):
+            raise ValueError("Metadati FLAC troncati")
+        head = buf[pos]
+        size = int.from_bytes(buf[pos + 1 : pos + 4], "big")
+        last = bool(head & 0x80)
+        blocks.append((head & 0x7F, bytes(buf[pos + 4 : pos + 4 + size])))
+        pos += 4 + size
+    if not blocks or blocks[0][0] != _FLAC_STREAMINFO or len(blocks[0][1]) != 34:
+        raise ValueError("Segmento FLAC senza STREAMINFO")
+    return blocks, pos
+
+
+def join_flac(
+    segments: Sequence[Path],
+    output: Path,
+    md5: bytes,
+    block_size: int,
+    stop_check: Callable[[], bool] | None = None,
+) -> int:
+    """Unisce segmenti FLAC (confini su multipli di block_size) in output.
+
+    Frame rinumerati dal primo segmento in poi, STREAMINFO con campioni totali, dimensioni
+    dei frame e md5 (MD5 dell'audio intero, calcolato a parte); metadati del primo
+    segmento (SEEKTABLE omessa: offset non più validi). Ritorna i campioni totali.
+    """
+    crc16 = _flac_crc16()
+    blocks: list[tuple[int, bytes]] = []
+    number = total_samples = 0
+    min_frame = max_frame = 0
+    with open(output, "wb") as out:
+        for index, path in enumerate(segments):
+            with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                seg_blocks, pos = _flac_metadata(buf)
+                streaminfo = seg_blocks[0][1]
+                if struct.unpack(">HH", streaminfo[:4]) != (block_size, block_size):
+                    raise ValueError("Blocco FLAC diverso da quello previsto")
+                if index == 0:
+                    blocks = [b for b in seg_blocks if b[0] != _FLAC_SEEKTABLE]
+                    out.write(_FLAC_MAGIC + _flac_blocks_bytes(blocks))
+                template = bytes(buf[pos : pos + 4])
+                frame = _parse_flac_header(buf, pos, template)
+                local = 0
+                while frame is not None:
+                    if frame.number != local:
+                        raise ValueError("Numerazione frame FLAC inattesa")
+                    if local % _STOP_CHECK_FRAMES == 0:
+                        _raise_if_stopped(stop_check)
+                    # Fine del frame: prossimo header valido con il numero successivo
+                    nxt = None
+                    search = pos + frame.header_len
+                    while True:
+                        search = buf.find(_FLAC_SYNC, search + 1)
+                        if search < 0:
+                            end = len(buf)
+                            break
+                        nxt = _parse_flac_header(buf, search, template)
+                        if nxt is not None and nxt.number == local + 1:
+                            end = search
+                            break
+                        nxt = None
+                    final = nxt is None and index == len(segments) - 1
+                    if frame.samples != block_size and not final:
+                        raise ValueError("Frame FLAC parziale a metà stream")
+                    old_header = bytes(buf[pos : pos + frame.header_len])
+                    body_len = end - 2 - pos - frame.header_len
+                    if body_len < 0:
+                        raise ValueError("Frame FLAC troncato")
+                    if number == local:
+                        header, crc = old_header, buf[end - 2 : end]
+                    else:
+                        fixed = old_header[:4] + _utf8_number(number)
+                        extra = old_header[4 + frame.number_len : -1]
+                        header = fixed + extra
+                        header += bytes((_crc8(header),))
+                        old_crc = int.from_bytes(buf[end - 2 : end], "big")
+                        delta = crc16.compute(old_header) ^ crc16.compute(header)
+                        crc = (old_crc ^ crc16.shift(delta, body_len)).to_bytes(2, "big")
+                    out.write(header)
+                    out.write(buf[pos + frame.header_len : end - 2])
+                    out.write(crc)
+                    size = len(header) + body_len + 2
+                    min_frame = size if not min_frame else min(min_frame, size)
+                    max_frame = max(max_frame, size)
+                    total_samples += frame.samples
+                    number += 1
+                    local += 1
+                    pos, frame = end, nxt
+                if pos != len(buf) or local == 0:
+                    raise ValueError("Dati non riconosciuti in un segmento FLAC")
+        # STREAMINFO definitivo: stessi campi della codifica seriale
+        info = bytearray(blocks[0][1])
+        info[4:7] = min_frame.to_bytes(3, "big")
+        info[7:10] = max_frame.to_bytes(3, "big")
+        packed = int.from_bytes(info[10:18], "big")
+        packed = (packed & ~((1 << 36) - 1)) | total_samples
+        info[10:18] = packed.to_bytes(8, "big")
+        info[18:34] = md5
+        out.seek(len(_FLAC_MAGIC) + 4)
+        out.write(info)
+    return total_samples
+
+
+def _flac_blocks_bytes(blocks: list[tuple[int, bytes]]) -> bytes:
+    parts = []
+    for i, (kind, data) in enumerate(blocks):
+        head = kind | (0x80 if i == len(blocks) - 1 else 0)
+        parts.append(bytes((head,)) + len(data).to_bytes(3, "big") + data)
+    return b"".join(parts)
+
+
+def flac_bits_per_sample(path: Path) -> int:
+    """Bit per campione dalla STREAMINFO di un file FLAC."""
+    with open(path, "rb") as f:
+        head = f.read(4 + 4 + 34)
+    if head[:4] != _FLAC_MAGIC or head[4] & 0x7F != _FLAC_STREAMINFO or len(head) < 42:
+        raise ValueError("Segmento FLAC senza STREAMINFO")
+    return ((int.from_bytes(head[20:22], "big") >> 4) & 0x1F) + 1
+
+
+# --- MP3 ----------------------------------------------------------------------------
+
+MP3_FRAME_SAMPLES = 1152  # MPEG-1 Layer III
+_MP3_BITRATES = (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320)
+_MP3_RATES = (44100, 48000, 32000)  # Indici 0-2 dell'header
+MP3_SAMPLE_RATES = frozenset(_MP3_RATES)
+_XING_TAGS = (b"Xing", b"Info")
+_XING_TOC_SIZE = 100
+
+
+def _mp3_frame_len(buf, pos: int, rate_bits: int | None = None) -> int:
+    """Lunghezza del frame MPEG-1 Layer III in pos, 0 se non è un header valido."""
+    if len(buf) - pos < 4 or buf[pos] != 0xFF or buf[pos + 1] & 0xFE != 0xFA:
+        return 0
+    b2 = buf[pos + 2]
+    bitrate_idx, rate_idx = b2 >> 4, (b2 >> 2) & 0x03
+    if not 0 < bitrate_idx < 15 or rate_idx == 3:
+        return 0
+    if rate_bits is not None and rate_idx != rate_bits:
+        return 0
+    padding = (b2 >> 1) & 1
+    return 144_000 * _MP3_BITRATES[bitrate_idx] // _MP3_RATES[rate_idx] + padding
+
+
+def _side_info_len(buf, pos: int) -> int:
+    mono = buf[pos + 3] >> 6 == 3
+    crc = 0 if buf[pos + 1] & 1 else 2
+    return 4 + crc + (17 if mono else 32)
+
+
+class _Mp3Segment(NamedTuple):
+    """Un segmento MP3: tag ID3v2, frame Xing/Info e frame audio (offset, lunghezza)."""
+
+    id3: bytes
+    xing: bytes
+    xing_pos: int  # Offset della firma Xing/Info nel frame
+    frames: list[tuple[int, int]]
+
+
+def _parse_mp3(buf) -> _Mp3Segment:
+    pos = 0
+    if buf[:3] == b"ID3":
+        size = 0
+        for b in buf[6:10]:
+            size = (size << 7) | (b & 0x7F)
+        pos = 10 + size + (10 if buf[5] & 0x10 else 0)
+    id3 = bytes(buf[:pos])
+    length = _mp3_frame_len(buf, pos)
+    if not length:
+        raise ValueError("Segmento MP3 senza frame iniziale")
+    xing_pos = _side_info_len(buf, pos)
+    xing = bytes(buf[pos : pos + length])
+    if xing[xing_pos : xing_pos + 4] not in _XING_TAGS:
+        raise ValueError("Segmento MP3 senza frame Xing/Info")
+    rate_bits = (buf[pos + 2] >> 2) & 0x03
+    frames = []
+    pos += length
+    while pos < len(buf):
+        length = _mp3_frame_len(buf, pos, rate_bits)
+        if not length or pos + length > len(buf):
+            break  # Fine audio (eventuale tag ID3v1)
+        frames.append((pos, length))
+        pos += length
+    return _Mp3Segment(id3, xing, xing_pos, frames)
+
+
+class _XingFields(NamedTuple):
+    """Posizioni dei campi nel frame Xing/Info (None se il campo manca)."""
+
+    frames: int | None
+    size: int | None
+    toc: int | None
+    lame: int  # Estensione LAME: ritardo/padding a +21, lunghezza a +28, CRC a +32/+34
+
+
+def _xing_fields(xing: bytes, xing_pos: int) -> _XingFields:
+    flags = int.from_bytes(xing[xing_pos + 4 : xing_pos + 8], "big")
+    pos = xing_pos + 8
+    fields = []
+    for flag, size in ((1, 4), (2, 4), (4, _XING_TOC_SIZE)):
+        fields.append(pos if flags & flag else None)
+        pos += size if flags & flag else 0
+    if flags & 8:
+        pos += 4
+    if pos + 36 > len(xing):
+        raise ValueError("Frame Xing senza estensione LAME")
+    return _XingFields(*fields, pos)
+
+
+def join_mp3(
+    segments: Sequence[Path],
+    output: Path,
+    keep: Sequence[tuple[int, int | None]],
+    stop_check: Callable[[], bool] | None = None,
+) -> int:
+    """Unisce segmenti MP3 in output tenendo per ognuno i frame keep[i] = (primo, quanti;
+    None = fino alla fine). Ritorna il numero di frame audio scritti.
+
+    Tag ID3v2 e frame Xing/Info dal primo segmento, con frame, byte, TOC, ritardo
+    dell'encoder e padding finale (dall'ultimo segmento), lunghezza e CRC dell'audio e CRC
+    del tag ricalcolati.
+    """
+    crc16 = _lame_crc16()
+    parsed: list[_Mp3Segment] = []
+    delays = set()
+    offsets: list[int] = []  # Offset di ogni frame scritto dall'inizio dell'audio
+    audio_size = music_crc = 0
+    padding = 0
+    with open(output, "wb") as out:
+        for index, (path, (first, count)) in enumerate(zip(segments, keep, strict=True)):
+            with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                seg = _parse_mp3(buf)
+                fields = _xing_fields(seg.xing, seg.xing_pos)
+                delay_pad = int.from_bytes(seg.xing[fields.lame + 21 : fields.lame + 24], "big")
+                delays.add(delay_pad >> 12)
+                padding = delay_pad & 0xFFF
+                last = first + count if count is not None else len(seg.frames)
+                if first >= last or last > len(seg.frames):
+                    raise ValueError("Segmento MP3 più corto del previsto")
+                kept = seg.frames[first:last]
+                if first and _main_data_begin(buf, kept[0][0]):
+                    raise ValueError("Frame MP3 dipendente dal bit reservoir")
+                if index == 0:
+                    parsed.append(seg)
+                    out.write(seg.id3 + seg.xing)  # Riscritto alla fine
+                # CRC dei frame tenuti: da quello del segmento, tolti pre-roll e coda
+                start, end = kept[0][0], kept[-1][0] + kept[-1][1]
+                audio_start = seg.frames[0][0]
+                audio_end = seg.frames[-1][0] + seg.frames[-1][1]
+                seg_crc = int.from_bytes(seg.xing[fields.lame + 32 : fields.lame + 34], "big")
+                tail_crc = crc16.compute(buf[end:audio_end])
+                crc = crc16.unshift(seg_crc ^ tail_crc, audio_end - end)
+                crc ^= crc16.shift(crc16.compute(buf[audio_start:start]), end - start)
+                music_crc = crc16.shift(music_crc, end - start) ^ crc
+                for n, (pos, length) in enumerate(kept):
+                    if n % _STOP_CHECK_FRAMES == 0:
+                        _raise_if_stopped(stop_check)
+                    offsets.append(audio_size)
+                    audio_size += length
+                out.write(buf[start:end])
+        if len(delays) != 1:
+            raise ValueError("Ritardo dell'encoder diverso tra i segmenti")
+        seg0 = parsed[0]
+        xing = bytearray(seg0.xing)
+        fields = _xing_fields(seg0.xing, seg0.xing_pos)
+        if crc16.compute(seg0.xing[: fields.lame + 34]) != int.from_bytes(
+            seg0.xing[fields.lame + 34 : fields.lame + 36], "big"
+        ):
+            raise ValueError("CRC del tag LAME non riconosciuto")
+        # Convenzioni dell'encoder (frame Xing incluso o no nei conteggi) dal primo segmento
+        seg0_audio = sum(length for _, length in seg0.frames)
+        if fields.frames is not None:
+            stored = int.from_bytes(xing[fields.frames : fields.frames + 4], "big")
+            extra = stored - len(seg0.frames)
+            xing[fields.frames : fields.frames + 4] = (len(offsets) + extra).to_bytes(4, "big")
+        size_extra = 0
+        if fields.size is not None:
+            stored = int.from_bytes(xing[fields.size : fields.size + 4], "big")
+            size_extra = stored - seg0_audio
+            xing[fields.size : fields.size + 4] = (audio_size + size_extra).to_bytes(4, "big")
+        if fields.toc is not None:
+            total = audio_size + size_extra
+            toc = [0]
+            for i in range(1, _XING_TOC_SIZE):
+                point = offsets[i * len(offsets) // _XING_TOC_SIZE] + size_extra
+                toc.append(min(255, 256 * point // total))
+            xing[fields.toc : fields.toc + _XING_TOC_SIZE] = bytes(toc)
+        lame = fields.lame
+        xing[lame + 21 : lame + 24] = ((delays.pop() << 12) | padding).to_bytes(3, "big")
+        stored = int.from_bytes(xing[lame + 28 : lame + 32], "big")
+        length = audio_size + stored - seg0_audio
+        xing[lame + 28 : lame + 32] = length.to_bytes(4, "big")
+        xing[lame + 32 : lame + 34] = music_crc.to_bytes(2, "big")
+        xing[lame + 34 : lame + 36] = crc16.compute(bytes(xing[: lame + 34])).to_bytes(2, "big")
+        out.seek(len(seg0.id3))
+        out.write(xing)
+    return len(offsets)
+
+
+def _main_data_begin(buf, pos: int) -> int:
+    """main_data_begin del frame in pos: byte presi dai frame precedenti (bit reservoir)."""
+    start = pos + (4 if buf[pos + 1] & 1 else 6)
+    return (buf[start] << 1) | (buf[start + 1] >> 7)
@@ -0,0 +1,333 @@
+"""Telemetria conversioni: risorse dei processi FFmpeg per job e riepilogo per batch.
+
+Un record JSON per riga nel log rotante telemetry.jsonl (accanto a downconv.log, vedi
+logging_config): tempo, CPU user/system dei figli, picco RSS, byte letti/scritti,
+fattore realtime e percorso seguito (stream copy, ricodifica, segmenti, fallback).
+"""
+
+import json
+import logging
+import os
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+from ..utils.logging_config import TELEMETRY_LOGGER
+
+logger = logging.getLogger(__name__)
+telemetry_log = logging.getLogger(TELEMETRY_LOGGER)
+
+try:
+    import resource  # Solo Unix
+except ImportError:  # pragma: no cover - Windows
+    resource = None
+
+# Percorsi di conversione
+PATH_ENCODE = "encode"
+PATH_STREAM_COPY = "stream_copy"
+PATH_SEGMENTED = "segmented"
+PATH_MULTI = "multi"
+PATH_PIPE = "pipe"  # Codifica da stdin durante il download
+
+# Intervallo di campionamento del picco RSS (VmHWM) dei processi in corso
+RSS_SAMPLE_INTERVAL_SEC = 0.5
+# File più lenti (per secondo di audio) riportati nel riepilogo batch
+SLOWEST_JOBS = 3
+
+_PROC_STATUS = Path("/proc")
+# Reap con rusage del figlio (Unix); waitid con WNOWAIT attende l'uscita senza raccoglierlo
+_HAS_WAIT4 = hasattr(os, "wait4") and hasattr(os, "waitstatus_to_exitcode")
+_HAS_WAITID = hasattr(os, "waitid") and hasattr(os, "WNOWAIT")
+
+
+def _own_maxrss_bytes() -> int:
+    """Picco RSS di questo processo in byte (0 se non misurabile)."""
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class TrackedPopen(subprocess.Popen):
+    """Popen che conserva CPU user/system e picco RSS del processo figlio.
+
+    Unix: il figlio terminato viene raccolto qui con os.wait4 sul pid (rusage del solo
+    figlio) da wait() e poll(), prima che lo faccia Popen; communicate() passa da wait().
+    Il maxrss di rusage parte da quello del padre al fork, quindi vale solo se lo supera;
+    altrimenti il picco viene da VmHWM campionato mentre il processo gira (Linux).
+    Windows: GetProcessTimes / GetProcessMemoryInfo sull'handle del processo.
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        self.cpu_user: float | None = None
+        self.cpu_system: float | None = None
+        self.peak_rss: int | None = None
+        self._parent_maxrss = _own_maxrss_bytes()
+        self._reap_lock = threading.Lock()
+        super().__init__(*args, **kwargs)
+
+    def sample_rss(self) -> None:
+        """Aggiorna il picco RSS dal kernel (Linux, processo ancora vivo)."""
+        if not sys.platform.startswith("linux"):
+            return
+        try:
+            status = (_PROC_STATUS / str(self.pid) / "status").read_text()
+        except OSError:
+            return
+        for line in status.splitlines():
+            if line.startswith("VmHWM:"):
+                value = int(line.split()[1]) * 1024
+                self.peak_rss = max(self.peak_rss or 0, value)
+                return
+
+    def _reap(self) -> bool:
+        """Raccoglie il figlio se è terminato (os.wait4 non bloccante) e ne registra le
+        risorse. False finché il figlio è vivo; True se terminato o raccolto altrove."""
+        with self._reap_lock:
+            if self.returncode is not None:
+                return True
+            try:
+                pid, status, usage = os.wait4(self.pid, os.WNOHANG)
+            except ChildProcessError:
+                return True  # Già raccolto: esito da Popen, senza rusage
+            if pid != self.pid:
+                return False
+            self.cpu_user = usage.ru_utime
+            self.cpu_system = usage.ru_stime
+            maxrss = usage.ru_maxrss if sys.platform == "darwin" else usage.ru_maxrss * 1024
+            if maxrss > self._parent_maxrss:
+                self.peak_rss = max(self.peak_rss or 0, maxrss)
+            self.returncode = os.waitstatus_to_exitcode(status)
+            return True
+
+    if _HAS_WAIT4:
+
+        def poll(self) -> int | None:
+            if not self._reap():
+                return None  # Vivo: Popen non deve raccoglierlo (perderebbe le risorse)
+            return super().poll()
+
+        def wait(self, timeout: float | None = None) -> int:
+            if self.returncode is None:
+                self._wait_exit(timeout)
+                if not self._reap():
+                    raise subprocess.TimeoutExpired(self.args, timeout)
+            return super().wait(timeout)
+
+    def _wait_exit(self, timeout: float | None) -> None:
+        """Attende l'uscita del figlio senza raccoglierlo (al più timeout secondi)."""
+        if timeout is None and _HAS_WAITID:
+            try:
+                os.waitid(os.P_PID, self.pid, os.WEXITED | os.WNOWAIT)
+            except ChildProcessError:
+                pass
+            return
+        deadline = None if timeout is None else time.monotonic() + timeout
+        delay = 0.0005
+        while not self._reap():
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return
+            delay = min(delay * 2, remaining or 0.05, 0.05)
+            time.sleep(delay)
+
+    def collect(self) -> None:
+        """Legge le risorse a processo terminato (Windows; su Unix già fatto dal reap)."""
+        if sys.platform == "win32" and self.cpu_user is None and self.returncode is not None:
+            usage = _windows_process_usage(int(self._handle))
+            if usage:
+                self.cpu_user, self.cpu_system, self.peak_rss = usage
+
+
+def _windows_process_usage(handle: int) -> tuple[float, float, int] | None:
+    """(user, system, picco working set) di un processo Windows. None se non leggibile."""
+    import ctypes
+    from ctypes import wintypes
+
+    class _ProcessMemoryCounters(ctypes.Structure):
+        _fields_ = [
+            ("cb", wintypes.DWORD),
+            ("PageFaultCount", wintypes.DWORD),
+            ("PeakWorkingSetSize", ctypes.c_size_t),
+            ("WorkingSetSize", ctypes.c_size_t),
+            ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+            ("PagefileUsage", ctypes.c_size_t),
+            ("PeakPagefileUsage", ctypes.c_size_t),
+        ]
+
+    times = [wintypes.FILETIME() for _ in range(4)]
+    counters = _ProcessMemoryCounters()
+    counters.cb = ctypes.sizeof(counters)
+    try:
+        kernel32 = ctypes.windll.kernel32
+        if not kernel32.GetProcessTimes(wintypes.HANDLE(handle), *map(ctypes.byref, times)):
+            return None
+        if not kernel32.K32GetProcessMemoryInfo(
+            wintypes.HANDLE(handle), ctypes.byref(counters), counters.cb
+        ):
+            return None
+    except (AttributeError, OSError):
+        return None
+
+    def _seconds(ft: wintypes.FILETIME) -> float:
+        return ((ft.dwHighDateTime << 32) | ft.dwLowDateTime) / 1e7  # unità da 100 ns
+
+    return _seconds(times[3]), _seconds(times[2]), counters.PeakWorkingSetSize
+
+
+def sample_peak_rss(proc: subprocess.Popen) -> None:
+    """Campiona il picco RSS se il processo è tracciato (gli altri Popen sono ignorati)."""
+    if isinstance(proc, TrackedPopen):
+        proc.sample_rss()
+
+
+def _file_size(path: Path) -> int:
+    try:
+        return os.stat(path).st_size
+    except OSError:
+        return 0
+
+
+class JobTelemetry:
+    """Risorse di un job (un input, una o più uscite) sommate sui suoi processi FFmpeg.
+
+    I processi avviati dall'engine durante il job vi si registrano (attach); il record
+    viene chiuso da finish() con esito, percorso seguito e fallback tentati.
+    """
+
+    def __init__(self, input_path: Path, outputs: list[Path], formats: list[str]) -> None:
+        self.input_path = Path(input_path)
+        self.outputs = [Path(o) for o in outputs]
+        self.formats = formats
+        self.audio_seconds: float | None = None
+        self.path = PATH_ENCODE
+        self.fallbacks: list[str] = []
+        self.record: dict | None = None
+        self._procs: list[TrackedPopen] = []
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+
+    def attach(self, proc: subprocess.Popen) -> None:
+        if isinstance(proc, TrackedPopen):
+            with self._lock:
+                self._procs.append(proc)
+
+    def fallback(self, failed_path: str, next_path: str) -> None:
+        """Registra un percorso fallito e quello che lo sostituisce."""
+        self.fallbacks.append(failed_path)
+        self.path = next_path
+
+    def finish(self, ok: bool, error: str = "") -> dict:
+        """Chiude il job, scrive il record JSONL e lo ritorna."""
+        wall = time.monotonic() - self._started
+        with self._lock:
+            procs = list(self._procs)
+        cpu_user = cpu_system = 0.0
+        peak_rss = None
+        for proc in procs:
+            proc.collect()
+            cpu_user += proc.cpu_user or 0.0
+            cpu_system += proc.cpu_system or 0.0
+            if proc.peak_rss:
+                peak_rss = max(peak_rss or 0, proc.peak_rss)
+        audio = self.audio_seconds
+        self.record = {
+            "event": "job",
+            "ts": round(time.time(), 3),
+            "input": str(self.input_path),
+            "outputs": [str(o) for o in self.outputs],
+            "formats": self.formats,
+            "ok": ok,
+            "error": error,
+            "path": self.path,
+            "fallbacks": self.fallbacks,
+            "processes": len(procs),
+            "wall_sec": round(wall, 3),
+            "cpu_user_sec": round(cpu_user, 3),
+            "cpu_system_sec": round(cpu_system, 3),
+            "peak_rss_mb": round(peak_rss / (1024 * 1024), 1) if peak_rss else None,
+            "input_bytes": _file_size(self.input_path),
+            "output_bytes": sum(_file_size(o) for o in self.outputs) if ok else 0,
+            "audio_sec": round(audio, 3) if audio else None,
+            # Stessa unità di batch_planner.REALTIME_FACTOR: secondi di lavoro per s di audio
+            "realtime_factor": round(wall / audio, 5) if audio else None,
+        }
+        write_record(self.record)
+        return self.record
+
+
+class BatchTelemetry:
+    """Riepilogo di un batch: totali, CPU, byte, percorsi e file più lenti. Thread-safe."""
+
+    def __init__(self) -> None:
+        self._jobs: list[dict] = []
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+
+    def add(self, record: dict) -> None:
+        with self._lock:
+            self._jobs.append(record)
+
+    def summary(self) -> dict:
+        with self._lock:
+            jobs = list(self._jobs)
+        wall = time.monotonic() - self._started
+        cpu = sum(j["cpu_user_sec"] + j["cpu_system_sec"] for j in jobs)
+        audio = sum(j["audio_sec"] or 0 for j in jobs)
+        paths: dict[str, int] = {}
+        for j in jobs:
+            paths[j["path"]] = paths.get(j["path"], 0) + 1
+        timed = [j for j in jobs if j["realtime_factor"] is not None]
+        slowest = sorted(timed, key=lambda j: j["realtime_factor"], reverse=True)[:SLOWEST_JOBS]
+        peaks = [j["peak_rss_mb"] for j in jobs if j["peak_rss_mb"] is not None]
+        return {
+            "event": "batch",
+            "ts": round(time.time(), 3),
+            "jobs": len(jobs),
+            "failed": sum(1 for j in jobs if not j["ok"]),
+            "wall_sec": round(wall, 3),
+            "cpu_sec": round(cpu, 3),
+            # CPU / tempo: ~core occupati in media (basso = attesa su disco o pochi job)
+            "cpu_utilization": round(cpu / wall, 2) if wall > 0 else None,
+            "peak_rss_mb": max(peaks) if peaks else None,
+            "input_bytes": sum(j["input_bytes"] for j in jobs),
+            "output_bytes": sum(j["output_bytes"] for j in jobs),
+            "audio_sec": round(audio, 3) if audio else None,
+            "paths": paths,
+            "fallbacks": sum(len(j["fallbacks"]) for j in jobs),
+            "slowest": [
+                {"input": j["input"], "realtime_factor": j["realtime_factor"]} for j in slowest
+            ],
+        }
+
+    def finish(self) -> dict | None:
+        """Scrive il riepilogo (se il batch ha avuto job) e lo ritorna."""
+        summary = self.summary()
+        if not summary["jobs"]:
+            return None
+        write_record(summary)
+        logger.info(
+            "Batch: %d job (%d falliti) in %.1f s, CPU %.1f s (%.2f core), %s",
+            summary["jobs"],
+            summary["failed"],
+            summary["wall_sec"],
+            summary["cpu_sec"],
+            summary["cpu_utilization"] or 0,
+            ", ".join(f"{k} {v}" for k, v in summary["paths"].items()),
+        )
+        return summary
+
+
+def write_record(record: dict) -> None:
+    """Una riga JSON nel log telemetria (nessun effetto se il log non è configurato)."""
+    if not telemetry_log.isEnabledFor(logging.INFO):
+        return
+    try:
+        telemetry_log.info(json.dumps(record, ensure_ascii=False))
+    except (TypeError, ValueError) as e:
+        logger.debug("Record telemetria non serializzabile: %s", e)
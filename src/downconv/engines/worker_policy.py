@@ -0,0 +1,154 @@
+"""Dimensionamento adattivo del pool di conversione (CPU, costo codec, throughput disco)."""
+
+import logging
+import os
+import threading
+import time
+
+try:
+    import resource  # Solo Unix: CPU dei processi figli (FFmpeg) già terminati
+except ImportError:  # pragma: no cover - Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+# Costo CPU relativo per job FFmpeg (1.0 = un core pieno, MP3/LAME). I formati leggeri
+# (WAV) sono limitati dal disco: partono con meno worker e crescono solo se il throughput sale
+FORMAT_CPU_COST: dict[str, float] = {
+    "wav": 0.25,
+    "flac": 0.6,
+    "m4a": 0.7,
+    "alac": 0.7,
+    "mp3": 1.0,
+}
+DEFAULT_CPU_COST = 1.0
+
+# Limite assoluto worker (oltre: solo contesa su disco e scheduler)
+MAX_WORKERS_CAP = 64
+
+# Finestra di osservazione prima di ogni adattamento
+_ADJUST_INTERVAL_SEC = 2.0
+_ADJUST_MIN_JOBS = 2
+
+# Soglie utilizzo CPU (frazione dei core) e guadagno minimo di throughput per crescere ancora
+_CPU_SATURATED = 0.9
+_CPU_IDLE = 0.6
+_MIN_THROUGHPUT_GAIN = 1.05
+
+
+def _children_cpu_seconds() -> float | None:
+    """CPU (user+system) totale dei processi figli terminati. None se non misurabile."""
+    if resource is None:
+        return None
+    ru = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return ru.ru_utime + ru.ru_stime
+
+
+def _system_load_ratio(cpu_count: int) -> float | None:
+    """Load average 1 min / core (include processi esterni all'app). None se non disponibile."""
+    try:
+        return os.getloadavg()[0] / cpu_count
+    except (AttributeError, OSError):
+        return None
+
+
+class AdaptiveWorkerPolicy:
+    """Numero di worker per convert_batch, adattato durante il batch.
+
+    Parte da core × costo del codec (MP3 → un worker per core, WAV → meno, limitato dal
+    disco), poi ogni ~2 s confronta utilizzo CPU dei figli FFmpeg e throughput (byte letti/s):
+    cresce finché la CPU non è satura e il throughput aumenta, arretra se il disco non
+    scala o la macchina è già carica. fixed_workers (override utente) disattiva l'adattamento.
+    """
+
+    def __init__(
+        self,
+        output_format: str,
+        cpu_count: int | None = None,
+        fixed_workers: int | None = None,
+        max_workers: int | None = None,
+    ) -> None:
+        self._cpu_count = max(1, cpu_count or os.cpu_count() or 1)
+        cost = FORMAT_CPU_COST.get(output_format.strip().lower(), DEFAULT_CPU_COST)
+        self._fixed = fixed_workers if fixed_workers and fixed_workers > 0 else None
+        if self._fixed:
+            self.max_workers = self._fixed
+            self._workers = self._fixed
+        else:
+            # Con CPU libera e disco che scala si può superare il numero di core; tetto 2x
+            self.max_workers = min(MAX_WORKERS_CAP, max_workers or 2 * self._cpu_count)
+            self._workers = max(1, min(round(self._cpu_count * cost), self.max_workers))
+        self._lock = threading.Lock()
+        self._window_start = time.monotonic()
+        self._window_cpu = _children_cpu_seconds()
+        self._window_bytes = 0
+        self._window_jobs = 0
+        self._last_throughput: float | None = None
+        self._last_change = 0  # +1 cresciuto, -1 ridotto, 0 invariato
+        self._disk_bound = False
+
+    @property
+    def workers(self) -> int:
+        """Numero di job da tenere in esecuzione ora."""
+        with self._lock:
+            return self._workers
+
+    def job_done(self, bytes_read: int) -> None:
+        """Registra un job completato e adatta il numero di worker a fine finestra."""
+        if self._fixed:
+            return
+        with self._lock:
+            self._window_bytes += max(0, bytes_read)
+            self._window_jobs += 1
+            now = time.monotonic()
+            elapsed = now - self._window_start
+            if elapsed < _ADJUST_INTERVAL_SEC or self._window_jobs < _ADJUST_MIN_JOBS:
+                return
+            cpu_now = _children_cpu_seconds()
+            utilization = None
+            if cpu_now is not None and self._window_cpu is not None:
+                utilization = (cpu_now - self._window_cpu) / (elapsed * self._cpu_count)
+            throughput = self._window_bytes / elapsed
+            self._adjust(utilization, throughput, _system_load_ratio(self._cpu_count))
+            self._last_throughput = throughput
+            self._window_start = now
+            self._window_cpu = cpu_now
+            self._window_bytes = 0
+            self._window_jobs = 0
+
+    def _adjust(
+        self, utilization: float | None, throughput: float, load_ratio: float | None
+    ) -> None:
+        """Decide +1 / -1 / invariato. Lock già acquisito."""
+        previous = self._workers
+        gained = (
+            self._last_throughput is None
+            or throughput >= self._last_throughput * _MIN_THROUGHPUT_GAIN
+        )
+        if self._last_change > 0 and not gained:
+            # Più worker senza più throughput: collo di bottiglia disco, torna indietro
+            self._workers = max(1, self._workers - 1)
+            self._disk_bound = True
+        elif (utilization is not None and utilization >= _CPU_SATURATED) or (
+            load_ratio is not None and load_ratio > 1.0
+        ):
+            # CPU satura (o macchina carica da altri processi): mai oltre i core
+            if self._workers > self._cpu_count:
+                self._workers -= 1
+        elif (
+            utilization is not None
+            and utilization < _CPU_IDLE
+            and not self._disk_bound
+            and self._workers < self.max_workers
+        ):
+            self._workers += 1
+        delta = self._workers - previous
+        self._last_change = (delta > 0) - (delta < 0)
+        if delta:
+            logger.debug(
+                "Worker conversione %d → %d (cpu=%s, %.1f MB/s)",
+                previous,
+                self._workers,
+                f"{utilization:.0%}" if utilization is not None else "n/d",
+                throughput / 1e6,
+            )
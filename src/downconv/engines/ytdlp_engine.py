@@ -3,10 +3,19 @@
 import errno
 import logging
 import shutil
-from collections.abc import Callable
+import threading
+import time
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from functools import lru_cache, partial
 from pathlib import Path
 
-from ..utils.disk_check import MSG_DISK_FULL, is_disk_full_error
+from ..utils.disk_check import MSG_DISK_FULL, DiskBudget, is_disk_full_error
+from .batch_planner import SIZE_ESTIMATE_MARGIN, estimate_output_size
+from .download_scheduler import DEFAULT_MAX_PARALLEL, DEFAULT_PER_HOST, DownloadScheduler
+from .ffmpeg_engine import FfmpegEngine
+from .playlist_feed import FEED_POLL_SEC, PlaylistFeed
+from .ytdlp_session import YdlSessionPool, select_format
 
 logger = logging.getLogger(__name__)
 
@@ -14,6 +23,36 @@ logger = logging.getLogger(__name__)
 CONCURRENT_FRAGMENTS = 8
 HTTP_CHUNK_SIZE = 10485760  # 10 MB
 
+# Download → encoder in streaming: blocchi letti dalla risposta e scritti su stdin FFmpeg
+PIPE_READ_SIZE = 256 * 1024
+# Attesa prima di riprendere lo streaming dopo un errore di rete (× numero del tentativo)
+HTTP_RETRY_BACKOFF_SEC = 1.0
+# Protocolli e container leggibili da FFmpeg senza seek (MP4/M4A solo se frammentati/DASH)
+_PIPE_PROTOCOLS = ("http", "https")
+_PIPE_SOURCE_EXTS = frozenset(
+    {"webm", "mkv", "mka", "ogg", "oga", "opus", "mp3", "aac", "flac", "wav"}
+)
+_PIPE_FRAGMENTED_EXTS = ("mp4", "m4a")
+
+MSG_CANCELLED = "Annullato."
+
+# Livelli di playlist annidate espanse (canale → schede Video/Shorts/Live → video)
+MAX_PLAYLIST_DEPTH = 2
+_PLAYLIST_TYPES = ("playlist", "multi_video")
+_URL_TYPES = ("url", "url_transparent")
+
+# Scelte "Ottimale" del tab Download: formato risolto al momento del download
+FORMAT_OPTIMAL_AUDIO = "best"
+FORMAT_OPTIMAL_VIDEO = "best_video"
+# Qualità video 1-3 (config.DOWNLOAD_VIDEO_QUALITIES): 1080p, 720p, 4K
+_VIDEO_QUALITY_FORMATS = (
+    "bv*[height<=1080]+ba/best",
+    "bv*[height<=720]+ba/best",
+    "bv*[height<=2160]+ba/best",
+)
+# Formati audio 1-5 (config.DOWNLOAD_AUDIO_FORMATS): codec ed eventuale bitrate MP3
+_AUDIO_EXTRACT = (("flac", None), ("wav", None), ("m4a", None), ("mp3", "320"), ("mp3", "192"))
+
 # Messaggi utente per eccezioni
 EXCEPTION_MESSAGES = {
     "UnavailableVideoError": "Video non disponibile (privato, eliminato o rimosso)",
@@ -36,16 +75,291 @@ def _get_user_message(exc: Exception) -> str:
     return EXCEPTION_MESSAGES.get(exc_name, str(exc))
 
 
+def pipe_target(postprocessors: list | None) -> tuple[str, str] | None:
+    """(formato, qualità) FfmpegEngine equivalenti ai postprocessor, se codificabili in streaming.
+
+    Solo un FFmpegExtractAudio verso FLAC, WAV o MP3. M4A escluso: per yt-dlp è AAC, per
+    l'engine ALAC (uscite diverse dal download classico).
+    """
+    if not postprocessors or len(postprocessors) != 1:
+        return None
+    pp = postprocessors[0]
+    if pp.get("key") != "FFmpegExtractAudio":
+        return None
+    codec = pp.get("preferredcodec")
+    if codec in ("flac", "wav"):
+        return codec, "lossless"
+    if codec == "mp3":
+        return "mp3", f"{pp.get('preferredquality') or '192'}k"
+    return None
+
+
+def is_pipe_streamable(info: dict | None, target_format: str) -> bool:
+    """True se il formato scelto da yt-dlp si può scaricare direttamente su stdin FFmpeg.
+
+    Serve un solo formato (niente merge video+audio) via HTTP(S) diretto, in un container
+    leggibile in sequenza, e diverso dal formato target (altrimenti yt-dlp lo copia e basta).
+    """
+    if not info or info.get("requested_formats") or info.get("_type", "video") != "video":
+        return False
+    if info.get("protocol") not in _PIPE_PROTOCOLS or not info.get("url"):
+        return False
+    ext = (info.get("ext") or "").lower()
+    if ext == target_format:
+        return False
+    if ext in _PIPE_FRAGMENTED_EXTS:
+        # MP4 classico ha il moov in coda: serve seek, FFmpeg da pipe non lo legge
+        return "dash" in (info.get("container") or "")
+    return ext in _PIPE_SOURCE_EXTS
+
+
+def estimate_download_size(info: dict | None, postprocessors: list | None = None) -> int:
+    """Byte previsti su disco per un download, da filesize/filesize_approx di yt-dlp.
+
+    Formati da unire (video+audio): parti e file unito coesistono fino al merge, quindi
+    il doppio. Conversione audio: si aggiunge l'uscita (la sorgente viene rimossa dopo).
+    Formati senza dimensione: stima da bitrate (tbr) × durata, altrimenti 0.
+    """
+    if not info:
+        return 0
+    duration = info.get("duration") or 0
+    parts = info.get("requested_formats") or [info]
+    size = 0.0
+    for f in parts:
+        nbytes = f.get("filesize") or f.get("filesize_approx")
+        if not nbytes and f.get("tbr") and duration:
+            nbytes = duration * f["tbr"] * 1000 / 8
+        size += nbytes or 0
+    if len(parts) > 1:
+        size *= 2
+    size *= SIZE_ESTIMATE_MARGIN
+    for pp in postprocessors or []:
+        if pp.get("key") == "FFmpegExtractAudio" and duration:
+            codec = pp.get("preferredcodec")
+            quality = f"{pp.get('preferredquality') or '192'}k"
+            # AAC/Opus/altri lossy: stimati come MP3 alla stessa qualità
+            fmt = codec if codec in ("wav", "flac") else "mp3"
+            size += estimate_output_size(duration, fmt, quality)
+    return int(size)
+
+
+def _progress_dict(downloaded: int, total: int | None, started: float, status: str) -> dict:
+    """Dict di avanzamento con le stesse chiavi dei progress_hooks di yt-dlp."""
+    from yt_dlp.utils import format_bytes, formatSeconds
+
+    elapsed = max(time.monotonic() - started, 1e-6)
+    speed = downloaded / elapsed
+    d: dict = {
+        "status": status,
+        "downloaded_bytes": downloaded,
+        "total_bytes": total,
+        "elapsed": elapsed,
+        "speed": speed,
+        "_speed_str": f"{format_bytes(speed)}/s",
+    }
+    if total:
+        d["_percent_str"] = f"{min(100.0, 100 * downloaded / total):5.1f}%"
+        if speed > 0:
+            d["eta"] = int(max(0, total - downloaded) / speed)
+            d["_eta_str"] = formatSeconds(d["eta"])
+    return d
+
+
+def _is_retryable(exc: Exception) -> bool:
+    """Errore di rete transitorio: connessione caduta, timeout, 5xx o 429."""
+    from yt_dlp.networking.exceptions import HTTPError, TransportError
+
+    if isinstance(exc, HTTPError):
+        return exc.status >= 500 or exc.status == 429
+    return isinstance(exc, TransportError | TimeoutError | ConnectionError)
+
+
+def _iter_http_chunks(
+    ydl,
+    info: dict,
+    progress_callback: Callable[[dict], None] | None = None,
+) -> Iterator[bytes]:
+    """Blocchi del formato scelto, a richieste Range di HTTP_CHUNK_SIZE come yt-dlp.
+
+    Se il server ignora il Range (200 invece di 206) il corpo viene letto tutto di seguito.
+    Errori di rete transitori: fino a ydl.params["retries"] tentativi consecutivi, ripresi
+    dall'ultimo byte ricevuto (senza Range si scarta quanto già inviato a FFmpeg).
+    """
+    from yt_dlp.networking import Request
+    from yt_dlp.networking.exceptions import HTTPError
+
+    headers = dict(info.get("http_headers") or {})
+    url = info["url"]
+    total = info.get("filesize") or info.get("filesize_approx")
+    retries = ydl.params.get("retries", 0)
+    failures = 0
+    started = time.monotonic()
+    downloaded = 0
+    while True:
+        end = downloaded + HTTP_CHUNK_SIZE - 1
+        req = Request(url, headers={**headers, "Range": f"bytes={downloaded}-{end}"})
+        ranged = False
+        received = 0
+        try:
+            resp = ydl.urlopen(req)
+            try:
+                ranged = resp.status == 206
+                content_range = resp.headers.get("Content-Range") or ""
+                if ranged and "/" in content_range and content_range.rsplit("/", 1)[1].isdigit():
+                    total = int(content_range.rsplit("/", 1)[1])
+                elif not ranged:
+                    total = int(resp.headers.get("Content-Length") or 0) or total
+                skip = 0 if ranged else downloaded  # Già inviati prima dell'interruzione
+                while block := resp.read(PIPE_READ_SIZE):
+                    if skip:
+                        dropped = min(skip, len(block))
+                        skip -= dropped
+                        block = block[dropped:]
+                        if not block:
+                            continue
+                    received += len(block)
+                    downloaded += len(block)
+                    failures = 0
+                    yield block
+                    if progress_callback:
+                        progress_callback(_progress_dict(downloaded, total, started, "downloading"))
+            finally:
+                resp.close()
+        except Exception as e:
+            if isinstance(e, HTTPError) and e.status == 416 and downloaded:
+                break  # Range oltre la fine: dimensione ignota, file già completo
+            if not _is_retryable(e) or failures >= retries:
+                raise
+            failures += 1
+            logger.info(
+                "Streaming interrotto a %d byte (%s): tentativo %d di %s",
+                downloaded,
+                e,
+                failures,
+                retries,
+            )
+            time.sleep(min(HTTP_RETRY_BACKOFF_SEC * failures, 5.0))
+            continue
+        if not ranged or not received or (total and downloaded >= total):
+            break
+    if progress_callback:
+        progress_callback(_progress_dict(downloaded, total or downloaded, started, "finished"))
+
+
+def format_selection(video: bool, index: int) -> tuple[str, list | None]:
+    """(format, postprocessors) per la scelta del tab Download (Tipo + indice qualità o
+    formato, come in config.DOWNLOAD_VIDEO_QUALITIES e DOWNLOAD_AUDIO_FORMATS)."""
+    if video:
+        if index <= 0:
+            return FORMAT_OPTIMAL_VIDEO, None
+        return _VIDEO_QUALITY_FORMATS[min(index, len(_VIDEO_QUALITY_FORMATS)) - 1], None
+    if index <= 0:
+        return FORMAT_OPTIMAL_AUDIO, None
+    if index > len(_AUDIO_EXTRACT):
+        return "bestaudio/best", None  # Nativo (webm/m4a)
+    codec, kbps = _AUDIO_EXTRACT[index - 1]
+    post = {"key": "FFmpegExtractAudio", "preferredcodec": codec}
+    if kbps:
+        post["preferredquality"] = kbps
+    return "bestaudio/best", [post]
+
+
+def is_optimal_format(format: str) -> bool:
+    """Scelta Ottimale: il formato si decide in download() dall'estrattore dell'URL."""
+    return format in (FORMAT_OPTIMAL_AUDIO, FORMAT_OPTIMAL_VIDEO)
+
+
+@lru_cache(maxsize=64)
+def _optimal_for_extractor(extractor: str, video: bool) -> str:
+    """Formato Ottimale per estrattore (memorizzato: stessa decisione per ogni URL del sito)."""
+    if video:
+        # YouTube, Vimeo e altri: best video+audio disponibile
+        return "bestvideo+bestaudio/best"
+    # YouTube, SoundCloud, Vimeo: Nativo (no transcodifica), sorgente già lossy
+    if extractor.startswith("youtu") or "soundcloud" in extractor or "vimeo" in extractor:
+        return "bestaudio/best"
+    # Bandcamp e altri: preferisce lossless nativi se disponibili (Bandcamp spesso FLAC)
+    return "bestaudio[ext=flac]/bestaudio[ext=wav]/bestaudio[ext=m4a]/bestaudio/best"
+
+
+def optimal_format(info: dict | None, video: bool) -> str:
+    """Formato Ottimale dall'info estratta (anche non processata, process=False)."""
+    if not info:
+        return "bestvideo+bestaudio/best" if video else "bestaudio/best"
+    extractor = (info.get("extractor") or info.get("extractor_key") or "").lower()
+    return _optimal_for_extractor(extractor, video)
+
+
+def _lazy_entries(entries) -> Iterable:
+    """Elementi di una playlist non processata senza materializzarli: generatori e LazyList
+    così come sono, PagedList pagina per pagina."""
+    from yt_dlp.utils import PagedList
+
+    if entries is None:
+        return ()
+    if isinstance(entries, PagedList):
+        return entries._getslice(0, None)
+    return entries
+
+
+def _is_collection(url: str | None, ie_key: str | None) -> bool:
+    """L'URL (o l'elemento flat con ie_key) è a sua volta una playlist per l'estrattore;
+    tipo non dichiarato: trattato come video (niente estrazione per ogni elemento)."""
+    from .extractor_index import extractor_return_type, match_extractor
+
+    if not url:
+        return False
+    key = ie_key or match_extractor(url)
+    return key is not None and extractor_return_type(key) in ("playlist", "any")
+
+
 class YtdlpEngine:
-    """Wrapper yt-dlp per download video/audio. Thread-safe."""
+    """Wrapper yt-dlp per download video/audio. Thread-safe.
+
+    Le istanze YoutubeDL restano aperte tra un URL e l'altro (YdlSessionPool, una per
+    profilo di opzioni): connessioni, cookie e cache degli estrattori sono riusati per
+    tutta la vita dell'engine. close() a fine coda.
+    """
 
-    def __init__(self, overwrite: bool = False) -> None:
+    def __init__(
+        self,
+        overwrite: bool = False,
+        stream_encode: bool = True,
+        sessions: YdlSessionPool | None = None,
+        ffmpeg: FfmpegEngine | None = None,
+    ) -> None:
+        """stream_encode: conversioni audio (FLAC/WAV/MP3) codificate durante il download,
+        senza file intermedio, se il formato lo consente; altrimenti download classico.
+        sessions: pool condiviso tra più engine (chiuso da chi lo crea), default uno proprio.
+        ffmpeg: FfmpegEngine delle codifiche in streaming (priorità e cancel() di chi lo
+        crea, es. la coda), default uno proprio a priorità normale creato al primo uso."""
         self.overwrite = overwrite
+        self.stream_encode = stream_encode
+        self._owns_sessions = sessions is None
+        self._sessions = sessions if sessions is not None else YdlSessionPool()
+        self._ffmpeg = ffmpeg
+        self._ffmpeg_lock = threading.Lock()
+
+    @property
+    def ffmpeg(self) -> FfmpegEngine:
+        """FfmpegEngine delle codifiche in streaming."""
+        with self._ffmpeg_lock:
+            if self._ffmpeg is None:
+                self._ffmpeg = FfmpegEngine()
+            return self._ffmpeg
+
+    def cancel(self) -> None:
+        """Termina subito le codifiche in streaming in corso (i download si fermano con
+        stop_check). Le successive ritornano MSG_CANCELLED."""
+        self.ffmpeg.cancel()
+
+    def close(self) -> None:
+        """Chiude le sessioni yt-dlp del proprio pool (connessioni, cookie)."""
+        if self._owns_sessions:
+            self._sessions.close()
 
     def extract_info(self, url: str, download: bool = False) -> dict | None:
         """Estrae metadata senza download. Ritorna None su errore."""
-        from yt_dlp import YoutubeDL
-
         opts = {
             "quiet": True,
             "no_warnings": True,
@@ -53,42 +367,87 @@ class YtdlpEngine:
             "socket_timeout": 30,
         }
         try:
-            with YoutubeDL(opts) as ydl:
+            with self._sessions.session(opts) as ydl:
                 return ydl.extract_info(url, download=download)
         except Exception as e:
             logger.exception("Errore extract_info: %s", e)
             return None
 
+    def iter_entries(
+        self, url: str, stop_check: Callable[[], bool] | None = None
+    ) -> Iterator[tuple[str, str]]:
+        """Elementi da scaricare di una playlist o di un canale: (url, chiave per dedupe).
+
+        Estrazione flat senza processare (extract_flat="in_playlist", process=False): le
+        pagine dell'elenco vengono richieste man mano che il generatore è consumato, nessun
+        info dict completo in memoria. URL di un singolo video: solo se stesso, senza rete
+        se l'estrattore restituisce sempre video. Playlist annidate (schede di un canale)
+        espanse fino a MAX_PLAYLIST_DEPTH livelli. Eccezioni di yt-dlp propagate.
+        """
+        from .extractor_index import extractor_return_type, match_extractor, media_key
+
+        ie_key = match_extractor(url)
+        if ie_key is None or extractor_return_type(ie_key) == "video":
+            yield url, media_key(url, ie_key)
+            return
+        opts = {
+            "quiet": True,
+            "no_warnings": True,
+            "extract_flat": "in_playlist",
+            "noplaylist": True,  # watch?v=X&list=Y resta il singolo video, come in download()
+            "socket_timeout": 30,
+        }
+        with self._sessions.session(opts) as ydl:
+            info = ydl.extract_info(url, download=False, process=False, ie_key=ie_key)
+            yield from self._walk_entries(ydl, info, url, 0, stop_check)
+
+    def _walk_entries(
+        self, ydl, info: dict | None, url: str, depth: int, stop_check: Callable[[], bool] | None
+    ) -> Iterator[tuple[str, str]]:
+        from .extractor_index import media_key
+
+        if not info:
+            return
+        kind = info.get("_type", "video")
+        if kind in _URL_TYPES:
+            # Rimando (es. @canale → scheda Video, watch?list= con noplaylist → video)
+            target, ie_key = info.get("url"), info.get("ie_key")
+            if depth < MAX_PLAYLIST_DEPTH and _is_collection(target, ie_key):
+                nested = ydl.extract_info(target, download=False, process=False, ie_key=ie_key)
+                yield from self._walk_entries(ydl, nested, target, depth + 1, stop_check)
+            elif target:
+                yield target, media_key(target, ie_key, info.get("id"))
+            return
+        if kind not in _PLAYLIST_TYPES:
+            yield url, media_key(url, info.get("extractor_key"), info.get("id"))
+            return
+        for entry in _lazy_entries(info.get("entries")):
+            if stop_check and stop_check():
+                return
+            if not entry:
+                continue
+            entry_kind = entry.get("_type", "video")
+            if entry_kind in _PLAYLIST_TYPES:
+                if depth < MAX_PLAYLIST_DEPTH:
+                    entry_url = entry.get("webpage_url") or url
+                    yield from self._walk_entries(ydl, entry, entry_url, depth + 1, stop_check)
+            elif entry_kind in _URL_TYPES:
+                yield from self._walk_entries(ydl, entry, url, depth, stop_check)
+            else:
+                entry_url = entry.get("webpage_url") or entry.get("original_url")
+                if entry_url:
+                    key = media_key(entry_url, entry.get("extractor_key"), entry.get("id"))
+                    yield entry_url, key
+
     def get_best_format_for_url(self, url: str) -> tuple[str, list | None]:
         """Configurazione ottimale per URL: analizza sorgente e sceglie formato migliore.
-        Ritorna (format_string, postprocessors)."""
-        info = self.extract_info(url, download=False)
-        if not info:
-            return "bestaudio/best", None
-        extractor = (info.get("extractor") or info.get("extractor_key") or "").lower()
-        # YouTube ecc.: Nativo (no transcodifica) — sorgente già lossy
-        if extractor.startswith("youtube") or extractor.startswith("youtu"):
-            return "bestaudio/best", None
-        # Bandcamp: preferisce FLAC se disponibile (spesso lossless)
-        if "bandcamp" in extractor:
-            return "bestaudio[ext=flac]/bestaudio[ext=wav]/bestaudio[ext=m4a]/bestaudio/best", None
-        # SoundCloud, Vimeo, altri: Nativo (best senza transcodifica)
-        if "soundcloud" in extractor or "vimeo" in extractor:
-            return "bestaudio/best", None
-        # Default: preferisce lossless nativi se disponibili
-        return "bestaudio[ext=flac]/bestaudio[ext=wav]/bestaudio[ext=m4a]/bestaudio/best", None
+        Ritorna (format_string, postprocessors). Per scaricare basta download() con
+        FORMAT_OPTIMAL_AUDIO, che decide dalla stessa estrazione del download."""
+        return optimal_format(self.extract_info(url, download=False), video=False), None
 
     def get_best_video_format_for_url(self, url: str) -> tuple[str, list | None]:
         """Configurazione ottimale per URL video: analizza sorgente, ritorna formato migliore."""
-        info = self.extract_info(url, download=False)
-        if not info:
-            return "bestvideo+bestaudio/best", None
-        extractor = (info.get("extractor") or info.get("extractor_key") or "").lower()
-        # YouTube, Vimeo, ecc.: best video+audio disponibile
-        if extractor.startswith("youtube") or "vimeo" in extractor:
-            return "bestvideo+bestaudio/best", None
-        # Default: migliore disponibile
-        return "bestvideo+bestaudio/best", None
+        return optimal_format(self.extract_info(url, download=False), video=True), None
 
     def download(
         self,
@@ -99,17 +458,29 @@ class YtdlpEngine:
         overwrite: bool | None = None,
         postprocessors: list | None = None,
         merge_format: str = "mp4",
+        disk_budget: DiskBudget | None = None,
+        pause_callback: Callable[[str], None] | None = None,
+        stop_check: Callable[[], bool] | None = None,
     ) -> tuple[bool, str]:
-        """Download. Ritorna (success, error_message). postprocessors per conversione audio."""
+        """Download. Ritorna (success, error_message). postprocessors per conversione audio.
+
+        disk_budget: ammissione su disco con la dimensione stimata da yt-dlp (vedi
+        estimate_download_size); se lo spazio non basta il download attende in pausa
+        (pause_callback come DiskBudget.wait_reserve) invece di fallire a metà.
+        stop_check interrompe l'attesa e il download in corso (ritorna MSG_CANCELLED).
+        format FORMAT_OPTIMAL_AUDIO / FORMAT_OPTIMAL_VIDEO: formato scelto dall'estrattore
+        (optimal_format) sulla stessa estrazione usata per il download, una sola per URL.
+        """
         overwrite = overwrite if overwrite is not None else self.overwrite
         output_dir = Path(output_dir)
         output_dir.mkdir(parents=True, exist_ok=True)
 
         outtmpl = str(output_dir / "%(title)s.%(ext)s")
-        needs_merge = "+" in format
+        optimal = is_optimal_format(format)
+        needs_merge = "+" in format or format == FORMAT_OPTIMAL_VIDEO
         opts: dict = {
             "outtmpl": outtmpl,
-            "format": format,
+            "format": optimal_format(None, format == FORMAT_OPTIMAL_VIDEO) if optimal else format,
             "merge_output_format": merge_format.lower(),
             "noplaylist": True,  # Scarica solo il singolo video, non la playlist
             "quiet": True,
@@ -130,27 +501,54 @@ class YtdlpEngine:
         if postprocessors:
             opts["postprocessors"] = postprocessors
 
-        if progress_callback:
+        from yt_dlp.utils import DownloadCancelled, PostProcessingError
 
-            def hook(d: dict) -> None:
+        def hook(d: dict) -> None:
+            # Annulla: interrompe il download in corso (yt-dlp propaga l'eccezione dell'hook)
+            if stop_check and stop_check():
+                raise DownloadCancelled(MSG_CANCELLED)
+            if progress_callback:
                 progress_callback(d)
 
-            opts["progress_hooks"] = [hook]
-
-        from yt_dlp import YoutubeDL
-        from yt_dlp.utils import PostProcessingError
-
+        target = pipe_target(postprocessors) if self.stream_encode else None
         try:
-            with YoutubeDL(opts) as ydl:
-                ydl.download([url])
-            return True, ""
+            with self._sessions.session(opts, hook) as ydl:
+                if target is None and disk_budget is None and not optimal:
+                    ydl.download([url])
+                    return True, ""
+                # Estrazione una sola volta: formato Ottimale, stima spazio e streaming, poi
+                # download dall'info
+                if optimal:
+                    info = ydl.extract_info(url, download=False, process=False)
+                    select_format(ydl, optimal_format(info, format == FORMAT_OPTIMAL_VIDEO))
+                    info = ydl.process_ie_result(info, download=False)
+                else:
+                    info = ydl.extract_info(url, download=False)
+                size = estimate_download_size(info, postprocessors)
+                if disk_budget is not None and not disk_budget.wait_reserve(
+                    output_dir, size, stop_check, pause_callback
+                ):
+                    return False, MSG_CANCELLED
+                try:
+                    if target and is_pipe_streamable(info, target[0]):
+                        result = self._download_streamed(ydl, info, target, hook, overwrite)
+                        if result is not None:
+                            return result
+                    ydl.process_ie_result(info, download=True)
+                    return True, ""
+                finally:
+                    if disk_budget is not None:
+                        disk_budget.release(output_dir, size)
+        except DownloadCancelled:
+            logger.info("Download annullato: %s", url[:60])
+            return False, MSG_CANCELLED
         except PostProcessingError as e:
             if needs_merge:
-                logger.warning("Merge fallito con %s, retry con best: %s", format, e)
+                logger.warning("Merge fallito con %s, retry con best: %s", opts["format"], e)
                 opts["format"] = "best"
                 opts["merge_output_format"] = merge_format.lower()
                 try:
-                    with YoutubeDL(opts) as ydl:
+                    with self._sessions.session(opts, hook) as ydl:
                         ydl.download([url])
                     return True, ""
                 except Exception as retry_e:
@@ -173,15 +571,185 @@ class YtdlpEngine:
             logger.exception("Download fallito: %s", e)
             return False, msg
 
+    def iter_download(
+        self,
+        urls: Iterable[str],
+        output_dir: Path,
+        format: str = "bestvideo+bestaudio/best",
+        progress_callback: Callable[[str, dict], None] | None = None,
+        overwrite: bool | None = None,
+        postprocessors: list | None = None,
+        merge_format: str = "mp4",
+        max_parallel: int = DEFAULT_MAX_PARALLEL,
+        per_host: int = DEFAULT_PER_HOST,
+        site_limits: dict[str, int] | None = None,
+        disk_budget: DiskBudget | None = None,
+        pause_callback: Callable[[str], None] | None = None,
+        stop_check: Callable[[], bool] | None = None,
+        on_start: Callable[[str], None] | None = None,
+        expand_playlists: bool = False,
+        on_discover: Callable[[str, str], None] | None = None,
+        on_expanded: Callable[[str, int, str], None] | None = None,
+    ) -> Iterator[tuple[str, bool, str]]:
+        """Coda di download in parallelo: genera (url, ok, errore) man mano che finiscono.
+
+        Fino a max_parallel download contemporanei, al massimo per_host verso lo stesso
+        host e site_limits per sito (vedi DownloadScheduler). progress_callback riceve
+        (url, dict hook yt-dlp) dai thread di download; on_start(url) è chiamata nel
+        thread del chiamante quando un URL parte. Gli altri parametri come download(),
+        con un unico DiskBudget condiviso. Dopo stop_check() nessun nuovo URL viene
+        avviato: si attendono quelli in corso (le loro attese di spazio si interrompono).
+
+        expand_playlists: playlist e canali diventano i loro elementi (iter_entries, letti
+        in un thread da PlaylistFeed mentre i primi scaricano), ogni video una sola volta
+        anche se compare in più URL. on_discover(url ingresso, elemento) per ogni elemento
+        accodato (per un URL singolo elemento == url ingresso), on_expanded(url ingresso,
+        elementi nuovi, errore) a fine elenco; gli esiti sono degli elementi, più
+        (url ingresso, False, errore) per un elenco illeggibile o vuoto. Callback nel
+        thread del chiamante.
+        """
+        scheduler = DownloadScheduler(
+            [] if expand_playlists else list(urls),
+            max_parallel,
+            per_host=per_host,
+            site_limits=site_limits,
+        )
+        budget = disk_budget if disk_budget is not None else DiskBudget()
+        feed = None
+        if expand_playlists:
+            feed = PlaylistFeed(
+                urls,
+                self.iter_entries,
+                lambda: scheduler.pending,
+                stop_check=stop_check,
+                error_message=_get_user_message,
+            )
+
+        def _download(url: str) -> tuple[bool, str]:
+            return self.download(
+                url,
+                output_dir,
+                format=format,
+                progress_callback=partial(progress_callback, url) if progress_callback else None,
+                overwrite=overwrite,
+                postprocessors=postprocessors,
+                merge_format=merge_format,
+                disk_budget=budget,
+                pause_callback=pause_callback,
+                stop_check=stop_check,
+            )
+
+        def _feed_events() -> Iterator[tuple[str, bool, str]]:
+            """Elementi scoperti in coda; elenchi illeggibili o vuoti come esiti."""
+            if feed is None:
+                return
+            for event in feed.drain():
+                if event.url is not None:
+                    if on_discover:
+                        on_discover(event.source, event.url)
+                    scheduler.add([event.url])
+                    continue
+                if on_expanded:
+                    on_expanded(event.source, event.count, event.error)
+                if event.error:
+                    yield event.source, False, event.error
+
+        with ThreadPoolExecutor(max_workers=scheduler.max_parallel) as executor:
+            futures = {}
+
+            def _top_up() -> None:
+                if stop_check and stop_check():
+                    return
+                for url in scheduler.take_ready():
+                    if on_start:
+                        on_start(url)
+                    futures[executor.submit(_download, url)] = url
+
+            try:
+                if feed is not None:
+                    feed.start()
+                    feed.wait()
+                yield from _feed_events()
+                _top_up()
+                while futures or (feed is not None and feed.active):
+                    if futures:
+                        # Con elenchi in lettura: controlla anche i nuovi elementi
+                        timeout = FEED_POLL_SEC if feed is not None and feed.active else None
+                        done, _ = wait(futures, timeout=timeout, return_when=FIRST_COMPLETED)
+                    else:
+                        feed.wait()
+                        done = ()
+                    for fut in done:
+                        url = futures.pop(fut)
+                        scheduler.finish(url)
+                        try:
+                            ok, err = fut.result()
+                        except Exception as e:
+                            logger.exception("Errore download %s: %s", url[:60], e)
+                            ok, err = False, _get_user_message(e)
+                        yield url, ok, err
+                    yield from _feed_events()
+                    _top_up()
+            finally:
+                if feed is not None:
+                    feed.close()
+
+    def _download_streamed(
+        self,
+        ydl,
+        info: dict,
+        target: tuple[str, str],
+        progress_callback: Callable[[dict], None] | None,
+        overwrite: bool,
+    ) -> tuple[bool, str] | None:
+        """Download del formato scelto (info già estratta) direttamente su stdin FFmpeg.
+
+        Nessun file intermedio. Ritorna None se lo streaming fallisce: il chiamante ripiega
+        sul download classico dalla stessa info.
+        """
+        from yt_dlp.utils import DownloadCancelled
+
+        fmt, quality = target
+        url = info.get("webpage_url") or info["url"]
+        final = Path(ydl.prepare_filename(info)).with_suffix(f".{fmt}")
+        if final.exists() and not overwrite:
+            logger.info("Già scaricato: %s", final.name)
+            return True, ""
+        try:
+            ok, err = self.ffmpeg.encode_stream(
+                _iter_http_chunks(ydl, info, progress_callback),
+                final,
+                fmt,
+                quality,
+                overwrite=True,
+                duration=info.get("duration"),
+            )
+        except DownloadCancelled:
+            raise
+        except OSError as e:
+            if e.errno == errno.ENOSPC or is_disk_full_error(e):
+                return False, MSG_DISK_FULL
+            logger.warning("Streaming fallito (%s), download classico: %s", url[:60], e)
+            return None
+        except Exception as e:
+            logger.warning("Streaming fallito (%s), download classico: %s", url[:60], e)
+            return None
+        if ok:
+            return True, ""
+        if err == MSG_DISK_FULL:
+            return False, err
+        if self.ffmpeg.cancelled:
+            return False, MSG_CANCELLED  # cancel(): nessun ripiego sul download classico
+        logger.warning("Codifica in streaming fallita (%s), download classico: %s", url[:60], err)
+        return None
+
 
 def is_url_supported(url: str) -> bool:
-    """Verifica se l'URL è supportato da yt-dlp."""
-    try:
-        from yt_dlp.extractor import gen_extractor_classes
+    """Verifica se l'URL è supportato da yt-dlp (estrattore specifico, non il generico)."""
+    from .extractor_index import match_extractor
 
-        for ie in gen_extractor_classes():
-            if ie.suitable(url) and ie.IE_NAME != "generic":
-                return True
-        return False
+    try:
+        return match_extractor(url) is not None
     except Exception:
+        logger.exception("Verifica URL fallita: %s", url[:60])
         return False
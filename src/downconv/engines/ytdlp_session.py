@@ -0,0 +1,160 @@
+"""Sessioni YoutubeDL riusate tra URL con le stesse opzioni (pool per profilo).
+
+Un YoutubeDL nuovo per URL ricrea ogni volta handler HTTP e connessioni (TLS), cookie,
+istanze degli estrattori con le loro cache (es. player JS di YouTube) e postprocessor.
+Il pool tiene istanze "calde" per profilo di opzioni: dal secondo URL dello stesso sito
+si salta il setup e si riusano le connessioni aperte.
+
+Regole di riuso:
+- un'istanza è usata da un solo thread alla volta (checkout esclusivo);
+- stesso profilo = stesse opzioni, tranne formato (reimpostato a ogni uso) e hook di
+  avanzamento (uno per uso, tramite un dispatcher registrato alla creazione);
+- dopo un'eccezione (errore, annullamento, disco pieno) l'istanza viene chiusa, mai
+  riusata: lo stato interno di yt-dlp potrebbe essere a metà;
+- chiusa dopo SESSION_MAX_USES usi o SESSION_IDLE_TTL secondi inattiva (cookie e token
+  non restano vecchi, cache degli estrattori non crescono senza limite).
+"""
+
+import json
+import logging
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import ExitStack, contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Usi massimi di una stessa istanza prima di ricrearla
+SESSION_MAX_USES = 50
+# Secondi di inattività dopo cui un'istanza viene chiusa invece che riusata
+SESSION_IDLE_TTL = 300.0
+# Istanze inattive tenute per profilo (download in parallelo massimi in Impostazioni)
+SESSION_MAX_IDLE = 8
+
+# Opzioni impostate per uso, escluse dal profilo
+_PER_USE_OPTS = ("format", "progress_hooks")
+
+
+def select_format(ydl, format: str) -> None:
+    """Imposta il formato di un YoutubeDL già creato (prima di process_ie_result)."""
+    ydl.params["format"] = format
+    ydl.format_selector = ydl.build_format_selector(format)
+
+
+def profile_key(opts: dict) -> str:
+    """Chiave del profilo: opzioni YoutubeDL senza formato e hook, in forma canonica."""
+    profile = {k: v for k, v in opts.items() if k not in _PER_USE_OPTS}
+    return json.dumps(profile, sort_keys=True, default=repr)
+
+
+class _Session:
+    """YoutubeDL aperto con hook di avanzamento sostituibile a ogni uso."""
+
+    def __init__(self, opts: dict) -> None:
+        from yt_dlp import YoutubeDL
+
+        self.hook: Callable[[dict], None] | None = None
+        self.uses = 0
+        self.last_used = time.monotonic()
+        self._stack = ExitStack()
+        self.ydl = self._stack.enter_context(
+            YoutubeDL({**opts, "progress_hooks": [self._dispatch]})
+        )
+
+    def _dispatch(self, d: dict) -> None:
+        if self.hook is not None:
+            self.hook(d)
+
+    def close(self) -> None:
+        try:
+            self._stack.close()
+        except Exception as e:
+            logger.warning("Chiusura sessione yt-dlp fallita: %s", e)
+
+
+class YdlSessionPool:
+    """Istanze YoutubeDL riusabili per profilo di opzioni. Thread-safe.
+
+    Vita del pool = vita del proprietario (una coda di download, un YtdlpEngine):
+    close() chiude le istanze inattive, quelle in uso si chiudono al rilascio.
+    """
+
+    def __init__(
+        self,
+        max_uses: int = SESSION_MAX_USES,
+        idle_ttl: float = SESSION_IDLE_TTL,
+        max_idle: int = SESSION_MAX_IDLE,
+    ) -> None:
+        self._max_uses = max(1, max_uses)
+        self._idle_ttl = idle_ttl
+        self._max_idle = max(0, max_idle)
+        self._idle: dict[str, list[_Session]] = {}
+        self._lock = threading.Lock()
+        self._closed = False
+        self.created = 0
+        self.reused = 0
+
+    def _acquire(self, key: str) -> _Session | None:
+        """Istanza inattiva più recente del profilo (connessioni ancora aperte)."""
+        expired: list[_Session] = []
+        session = None
+        now = time.monotonic()
+        with self._lock:
+            idle = self._idle.get(key, [])
+            while idle:
+                candidate = idle.pop()
+                if now - candidate.last_used > self._idle_ttl:
+                    expired.append(candidate)
+                    continue
+                session = candidate
+                self.reused += 1
+                break
+        for old in expired:
+            old.close()
+        return session
+
+    def _release(self, key: str, session: _Session, reusable: bool) -> None:
+        session.hook = None
+        session.uses += 1
+        session.last_used = time.monotonic()
+        if reusable and session.uses < self._max_uses:
+            with self._lock:
+                idle = self._idle.setdefault(key, [])
+                if not self._closed and len(idle) < self._max_idle:
+                    idle.append(session)
+                    return
+        session.close()
+
+    @contextmanager
+    def session(self, opts: dict, hook: Callable[[dict], None] | None = None) -> Iterator:
+        """YoutubeDL per opts (riusato se possibile) con hook di avanzamento per questo uso.
+
+        Il formato di opts viene reimpostato sulle istanze riusate. Un'eccezione nel
+        blocco chiude l'istanza invece di restituirla al pool.
+        """
+        key = profile_key(opts)
+        session = self._acquire(key)
+        if session is None:
+            session = _Session(opts)
+            with self._lock:
+                self.created += 1
+        elif "format" in opts and session.ydl.params.get("format") != opts["format"]:
+            select_format(session.ydl, opts["format"])
+        session.hook = hook
+        reusable = False
+        try:
+            yield session.ydl
+            reusable = True
+        finally:
+            self._release(key, session, reusable)
+
+    def close(self) -> None:
+        """Chiude le istanze inattive; quelle in uso saranno chiuse al rilascio."""
+        with self._lock:
+            self._closed = True
+            sessions = [s for idle in self._idle.values() for s in idle]
+            self._idle.clear()
+        for session in sessions:
+            session.close()
+        if self.created:
+            logger.debug("Sessioni yt-dlp: %d create, %d riusi", self.created, self.reused)
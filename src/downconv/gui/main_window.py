@@ -2,19 +2,23 @@
 
 from __future__ import annotations
 
+import time
 from typing import TYPE_CHECKING
 
 from PySide6.QtCore import QThread, QTimer
-from PySide6.QtGui import QColor, QIcon
-from PySide6.QtWidgets import QMainWindow, QMessageBox, QTabWidget, QVBoxLayout, QWidget
+from PySide6.QtGui import QCloseEvent, QColor, QIcon
+from PySide6.QtWidgets import QLabel, QMainWindow, QMessageBox, QTabWidget, QVBoxLayout, QWidget
 
 from .. import __version__
+from ..utils.config import get_settings
+from ..utils.job_journal import BATCH_CONVERT, get_job_journal
 from ..utils.paths import get_app_icon_path
 from ..utils.update_check import UpdateCheckWorker, UpdateResult
 from .tabs.aiuto_tab import AiutoTab
 from .tabs.download_tab import DownloadTab
 
 if TYPE_CHECKING:
+    from ..services.watch_folder_service import WatchFolderWorker
     from .tabs.convert_tab import ConvertTab
     from .tabs.settings_tab import SettingsTab
 
@@ -27,13 +31,17 @@ TAB_HIGHLIGHT_COLOR = QColor("#e0a020")  # Amber per "aggiornamento disponibile"
 
 
 class _PreloadWorker(QThread):
-    """Preload yt-dlp e moduli tab in background; al termine i tab sono pronti al click."""
+    """Preload yt-dlp, indice estrattori e moduli tab in background; al termine i tab sono
+    pronti al click."""
 
     def run(self) -> None:
         import yt_dlp  # noqa: F401 - carica per primo (più lento)
 
+        from downconv.engines.extractor_index import get_extractor_index
         from downconv.gui.tabs import convert_tab, settings_tab  # noqa: F401
 
+        get_extractor_index()  # Verifica URL immediata nel tab Download
+
 
 class MainWindow(QMainWindow):
     """Finestra principale con tab Download, Converter, Impostazioni e Aiuto."""
@@ -75,6 +83,16 @@ class MainWindow(QMainWindow):
         QTimer.singleShot(800, self._start_update_check)
         # Preload in background: yt-dlp + moduli tab così al click non c’è ritardo
         QTimer.singleShot(100, self._start_preload)
+        # Dopo il preload: proposta di ripresa dei batch interrotti (crash, chiusura forzata)
+        QTimer.singleShot(1500, self._offer_resume)
+
+        # Cartella monitorata (Impostazioni): stato nella barra in basso quando attiva
+        self._watch_worker: WatchFolderWorker | None = None
+        self._watch_config: tuple | None = None
+        self._watch_label = QLabel()
+        self.statusBar().addWidget(self._watch_label, 1)
+        self.statusBar().hide()
+        QTimer.singleShot(2000, self._apply_watch_settings)
 
     def _start_preload(self) -> None:
         """Avvia preload yt-dlp e moduli tab in background; sostituisce i placeholder."""
@@ -123,6 +141,116 @@ class MainWindow(QMainWindow):
             self._tabs.insertTab(SETTINGS_TAB_INDEX, self._settings_tab, "Impostazioni")
             self._tabs.setCurrentIndex(SETTINGS_TAB_INDEX)
 
+    def _offer_resume(self) -> None:
+        """Propone ogni batch interrotto, dal più recente: Riprendi, Scarta o Più tardi.
+
+        Per tipo si riprende un batch alla volta (un worker per tab): gli altri dello stesso
+        tipo si possono scartare o lasciare nel journal per il prossimo avvio.
+        """
+        journal = get_job_journal()
+        records = journal.unfinished_batches()[::-1]
+        resumed: set[str] = set()
+        for n, record in enumerate(records, 1):
+            is_convert = record.kind == BATCH_CONVERT
+            what = "conversione" if is_convert else "download"
+            started = time.strftime("%d/%m/%Y %H:%M", time.localtime(record.created_at))
+            box = QMessageBox(self)
+            box.setIcon(QMessageBox.Icon.Question)
+            title = "Batch interrotto"
+            box.setWindowTitle(f"{title} ({n} di {len(records)})" if len(records) > 1 else title)
+            text = (
+                f"Un batch di {what} avviato il {started} non è stato completato.\n\n"
+                f"Elementi da completare: {record.remaining} di {record.total}.\n"
+            )
+            resume_btn = None
+            if record.kind in resumed:
+                text += (
+                    f"Un altro batch di {what} è già stato ripreso: questo si può scartare "
+                    "(le uscite parziali vengono rimosse) o riprendere al prossimo avvio."
+                )
+            else:
+                text += "Riprendere? (le uscite parziali vengono rimosse)"
+                resume_btn = box.addButton("Riprendi", QMessageBox.ButtonRole.AcceptRole)
+            box.setText(text)
+            discard_btn = box.addButton("Scarta", QMessageBox.ButtonRole.DestructiveRole)
+            box.addButton("Più tardi", QMessageBox.ButtonRole.RejectRole)
+            box.exec()
+            clicked = box.clickedButton()
+            if clicked == discard_btn:
+                journal.discard_batch(record.id)
+                continue
+            if resume_btn is None or clicked != resume_btn:
+                continue  # Resta nel journal: riproposto al prossimo avvio
+            items = [item for item, _ in journal.remaining_items(record.id)]
+            if is_convert:
+                self._tabs.setCurrentIndex(CONVERT_TAB_INDEX)  # Crea il tab se necessario
+                started_ok = self._convert_tab is not None and self._convert_tab.resume_batch(
+                    record, items
+                )
+            else:
+                self._tabs.setCurrentIndex(self._tabs.indexOf(self._download_tab))
+                started_ok = self._download_tab.resume_batch(record, items)
+            if started_ok:
+                resumed.add(record.kind)
+            else:
+                QMessageBox.warning(
+                    self,
+                    "Batch interrotto",
+                    f"Impossibile riprendere il batch di {what}: nessun elemento disponibile "
+                    "o operazione già in corso.",
+                )
+
+    def _apply_watch_settings(self) -> None:
+        """Avvia, riavvia o ferma la cartella monitorata secondo le impostazioni."""
+        s = get_settings()
+        config = None
+        if s.get("watch_enabled") and s.get("watch_folder"):
+            config = (
+                s["watch_folder"],
+                s.get("watch_output_dir") or s["output_dir_convert"],
+                s.get("watch_preset", "mp3_320"),
+                float(s.get("watch_settle_sec", 5)),
+                s.get("convert_max_workers", 0) or None,
+                s.get("convert_priority", "normal"),
+            )
+        running = self._watch_worker is not None and self._watch_worker.isRunning()
+        if config == self._watch_config and (running or config is None):
+            return
+        self._stop_watch()
+        self._watch_config = config
+        if config is None:
+            self.statusBar().hide()
+            return
+        from ..services.watch_folder_service import WatchFolderWorker, preset_targets
+
+        folder, output_dir, preset, settle, workers, priority = config
+        worker = WatchFolderWorker(
+            folder, output_dir, preset_targets(preset), settle, workers, priority
+        )
+        worker.status.connect(self._watch_label.setText)
+        worker.finished.connect(lambda ok, msg, w=worker: self._on_watch_finished(w, ok, msg))
+        self._watch_worker = worker
+        self._watch_label.setText(f"Cartella monitorata: avvio su {folder}...")
+        self.statusBar().show()
+        worker.start()
+
+    def _on_watch_finished(self, worker: WatchFolderWorker, ok: bool, msg: str) -> None:
+        if worker is not self._watch_worker:
+            return  # Worker sostituito dopo un cambio di impostazioni
+        if not ok:
+            self._watch_label.setText(f"Cartella monitorata non attiva: {msg}")
+
+    def _stop_watch(self) -> None:
+        """Ferma la cartella monitorata (conversioni in corso annullate, riprese al riavvio)."""
+        worker, self._watch_worker = self._watch_worker, None
+        if worker is not None and worker.isRunning():
+            worker.stop()
+            worker.wait()
+
+    def closeEvent(self, event: QCloseEvent) -> None:
+        self._stop_watch()
+        super().closeEvent(event)
+
     def _start_update_check(self) -> None:
         if self._update_worker is not None and self._update_worker.isRunning():
             return
@@ -155,6 +283,7 @@ class MainWindow(QMainWindow):
 
     def refresh_from_config(self) -> None:
         """Ricarica tab da config (es. dopo onboarding o salvataggio impostazioni)."""
+        self._apply_watch_settings()
         self._download_tab.refresh_from_config()
         if self._convert_tab is not None:
             self._convert_tab.refresh_from_config()
@@ -12,6 +12,7 @@ from PySide6.QtWidgets import (
     QHBoxLayout,
     QLabel,
     QListWidget,
+    QListWidgetItem,
     QMessageBox,
     QProgressBar,
     QPushButton,
@@ -19,11 +20,49 @@ from PySide6.QtWidgets import (
     QWidget,
 )
 
-from ...engines.ffmpeg_engine import check_ffmpeg_available
+from ...engines.ffmpeg_engine import SCHEDULE_LPT, check_ffmpeg_available
 from ...gui.dialogs.onboarding_ffmpeg_step import OnboardingFfmpegStep
 from ...services.conversion_service import ConversionWorker
-from ...utils.config import CONVERT_FORMATS, CONVERT_QUALITY_OPTIONS, get_settings
+from ...services.folder_scan_service import FolderScanWorker
+from ...utils.config import (
+    AUDIO_EXTENSIONS,
+    CONVERT_FORMATS,
+    CONVERT_PRIORITY_LABELS,
+    CONVERT_PRIORITY_MODES,
+    CONVERT_QUALITY_OPTIONS,
+    MEDIA_EXTENSIONS,
+    VIDEO_EXTENSIONS,
+    get_settings,
+)
 from ...utils.ffmpeg_provider import can_extract_from_bundle
+from ...utils.job_journal import BatchRecord
+from ...utils.probe_cache import ProbeInfo, get_probe_cache
+
+
+def _format_estimate(seconds: float) -> str:
+    """Durata stimata leggibile: "~40 s", "~12 min", "~1 h 25 min"."""
+    if seconds < 60:
+        return f"~{max(1, round(seconds))} s"
+    minutes = round(seconds / 60)
+    if minutes < 60:
+        return f"~{minutes} min"
+    return f"~{minutes // 60} h {minutes % 60} min"
+
+
+def _format_probe_tooltip(info: ProbeInfo) -> str:
+    """Testo tooltip con metadata audio (durata, codec, sample rate, bitrate)."""
+    parts = []
+    if info.duration:
+        mins, secs = divmod(int(info.duration), 60)
+        hours, mins = divmod(mins, 60)
+        parts.append(f"{hours}:{mins:02d}:{secs:02d}" if hours else f"{mins}:{secs:02d}")
+    if info.codec:
+        parts.append(info.codec.upper())
+    if info.sample_rate:
+        parts.append(f"{info.sample_rate / 1000:g} kHz")
+    if info.bit_rate:
+        parts.append(f"{info.bit_rate // 1000} kbps")
+    return " · ".join(parts)
 
 
 class ConvertTab(QWidget):
@@ -34,11 +73,16 @@ class ConvertTab(QWidget):
     def __init__(self, parent: QWidget | None = None) -> None:
         super().__init__(parent)
         self._worker: ConversionWorker | None = None
+        self._scan_worker: FolderScanWorker | None = None
+        self._estimate_text = ""
+        self._cancel_requested = False
         s = get_settings()
         self._output_dir = Path(s.get("output_dir_convert", str(Path.home() / "Downloads")))
         self._default_format = s.get("convert_format", "mp3")
         self._default_quality = s.get("convert_quality", "320k")
         self._default_overwrite = s.get("overwrite_convert", True)
+        self._default_incremental = s.get("incremental_convert", False)
+        self._default_priority = s.get("convert_priority", "normal")
         self._setup_ui()
         self.setAcceptDrops(True)
 
@@ -89,6 +133,10 @@ class ConvertTab(QWidget):
         self._add_btn = QPushButton("Aggiungi file...")
         self._add_btn.setObjectName("fileActionBtn")
         self._add_btn.clicked.connect(self._add_files)
+        self._add_folder_btn = QPushButton("Aggiungi cartella...")
+        self._add_folder_btn.setObjectName("fileActionBtn")
+        self._add_folder_btn.clicked.connect(self._add_folder)
+        self._add_folder_btn.setToolTip("Aggiunge tutti i file audio e video della cartella")
         self._remove_btn = QPushButton("Rimuovi")
         self._remove_btn.setObjectName("fileActionBtn")
         self._remove_btn.clicked.connect(self._remove_selected)
@@ -99,6 +147,7 @@ class ConvertTab(QWidget):
         self._clear_btn.clicked.connect(self._clear_list)
         self._clear_btn.setEnabled(False)
         btn_row.addWidget(self._add_btn)
+        btn_row.addWidget(self._add_folder_btn)
         btn_row.addWidget(self._remove_btn)
         btn_row.addWidget(self._clear_btn)
         layout.addLayout(btn_row)
@@ -129,6 +178,13 @@ class ConvertTab(QWidget):
         self._quality_combo = QComboBox()
         self._quality_combo.addItems(list(CONVERT_QUALITY_OPTIONS))
         opt_layout.addWidget(self._quality_combo)
+        opt_layout.addWidget(QLabel("Priorità:"))
+        self._priority_combo = QComboBox()
+        self._priority_combo.addItems(list(CONVERT_PRIORITY_LABELS))
+        self._priority_combo.setToolTip(
+            "In background: PC reattivo durante la conversione. Turbo: massima velocità"
+        )
+        opt_layout.addWidget(self._priority_combo)
         self._format_combo.currentIndexChanged.connect(self._on_format_changed)
         layout.addLayout(opt_layout)
         self._apply_convert_defaults()
@@ -144,6 +200,11 @@ class ConvertTab(QWidget):
         self._overwrite_cb = QCheckBox("Sovrascrivi file esistenti")
         self._overwrite_cb.setChecked(self._default_overwrite)
         layout.addWidget(self._overwrite_cb)
+        self._incremental_cb = QCheckBox(
+            "Solo file nuovi o modificati (salta quelli già convertiti)"
+        )
+        self._incremental_cb.setChecked(self._default_incremental)
+        layout.addWidget(self._incremental_cb)
 
         layout.addWidget(self._make_separator())
 
@@ -186,18 +247,21 @@ class ConvertTab(QWidget):
     def _setup_tab_order(self) -> None:
         """Tab order per accessibilità."""
         QWidget.setTabOrder(self._list, self._add_btn)
-        QWidget.setTabOrder(self._add_btn, self._remove_btn)
+        QWidget.setTabOrder(self._add_btn, self._add_folder_btn)
+        QWidget.setTabOrder(self._add_folder_btn, self._remove_btn)
         QWidget.setTabOrder(self._remove_btn, self._clear_btn)
         QWidget.setTabOrder(self._clear_btn, self._browse_btn)
         QWidget.setTabOrder(self._browse_btn, self._format_combo)
         QWidget.setTabOrder(self._format_combo, self._quality_combo)
-        QWidget.setTabOrder(self._quality_combo, self._same_folder_cb)
+        QWidget.setTabOrder(self._quality_combo, self._priority_combo)
+        QWidget.setTabOrder(self._priority_combo, self._same_folder_cb)
         QWidget.setTabOrder(self._same_folder_cb, self._overwrite_cb)
-        QWidget.setTabOrder(self._overwrite_cb, self._convert_btn)
+        QWidget.setTabOrder(self._overwrite_cb, self._incremental_cb)
+        QWidget.setTabOrder(self._incremental_cb, self._convert_btn)
         QWidget.setTabOrder(self._convert_btn, self._cancel_btn)
 
     def _apply_convert_defaults(self) -> None:
-        """Applica formato, qualità e overwrite da config."""
+        """Applica formato, qualità e priorità da config."""
         fmt = self._default_format
         fmt_lower = (fmt or "mp3").lower()
         if fmt_lower in (f.lower() for f in CONVERT_FORMATS):
@@ -205,6 +269,10 @@ class ConvertTab(QWidget):
             self._format_combo.setCurrentIndex(idx)
         if self._default_quality in CONVERT_QUALITY_OPTIONS:
             self._quality_combo.setCurrentText(self._default_quality)
+        if self._default_priority in CONVERT_PRIORITY_MODES:
+            self._priority_combo.setCurrentIndex(
+                CONVERT_PRIORITY_MODES.index(self._default_priority)
+            )
 
     def _on_format_changed(self) -> None:
         """Nasconde qualità per FLAC/WAV/M4A (sempre lossless). Solo MP3 mostra bitrate."""
@@ -230,18 +298,82 @@ class ConvertTab(QWidget):
             self._list.takeItem(row)
 
     def _add_files(self) -> None:
+        def _patterns(exts: tuple[str, ...]) -> str:
+            return " ".join(f"*{e}" for e in exts)
+
         filters = (
-            "Audio e video (*.flac *.mp3 *.m4a *.ogg *.wav *.aac *.mp4 *.mkv *.avi "
-            "*.mov *.webm *.wmv *.m4v);;"
-            "Video (*.mp4 *.mkv *.avi *.mov *.webm *.wmv *.m4v);;"
-            "Audio (*.flac *.mp3 *.m4a *.ogg *.wav *.aac);;"
+            f"Audio e video ({_patterns(MEDIA_EXTENSIONS)});;"
+            f"Video ({_patterns(VIDEO_EXTENSIONS)});;"
+            f"Audio ({_patterns(AUDIO_EXTENSIONS)});;"
             "Tutti (*.*)"
         )
         paths, _ = QFileDialog.getOpenFileNames(
             self, "Seleziona file audio o video", str(Path.home()), filters
         )
-        for p in paths:
-            self._list.addItem(p)
+        self._add_paths(paths)
+
+    def _add_paths(self, paths: list[str]) -> None:
+        """Aggiunge file alla lista; tooltip con metadata se già in cache probe (no ffprobe)."""
+        cache = get_probe_cache()
+        self._add_items([(p, cache.get(Path(p), touch=False)) for p in paths])
+
+    def _add_items(self, items: list[tuple[str, ProbeInfo | None]]) -> None:
+        """Aggiunge (path, metadata) alla lista in un solo aggiornamento."""
+        self._list.setUpdatesEnabled(False)
+        try:
+            for p, info in items:
+                item = QListWidgetItem(p)
+                if info is not None:
+                    item.setToolTip(_format_probe_tooltip(info))
+                self._list.addItem(item)
+        finally:
+            self._list.setUpdatesEnabled(True)
+
+    def _add_folder(self) -> None:
+        path = QFileDialog.getExistingDirectory(self, "Seleziona cartella", str(Path.home()))
+        if path:
+            self._scan_folders([path])
+
+    def _scan_folders(self, folders: list[str]) -> None:
+        """Scansione cartelle in background: i file arrivano nella lista a blocchi."""
+        if self._scan_worker and self._scan_worker.isRunning():
+            QMessageBox.information(
+                self, "Attenzione", "Scansione cartella già in corso. Attendi o annulla."
+            )
+            return
+        if self._worker and self._worker.isRunning():
+            QMessageBox.information(
+                self, "Attenzione", "Conversione in corso. Aggiungi la cartella al termine."
+            )
+            return
+        self._convert_btn.setEnabled(False)
+        self._add_folder_btn.setEnabled(False)
+        self._cancel_btn.setEnabled(True)
+        self._status_label.setText("Ricerca file nella cartella...")
+        self._scan_worker = FolderScanWorker(
+            folders, verify_probe=get_settings().get("scan_verify_probe", False)
+        )
+        self._scan_worker.files_found.connect(self._add_items)
+        self._scan_worker.count_changed.connect(self._on_scan_count)
+        self._scan_worker.finished.connect(self._on_scan_finished)
+        self._scan_worker.start()
+
+    @Slot(int)
+    def _on_scan_count(self, count: int) -> None:
+        self._status_label.setText(f"Ricerca file nella cartella... {count} trovati")
+
+    @Slot(int, bool)
+    def _on_scan_finished(self, count: int, cancelled: bool) -> None:
+        self._scan_worker = None
+        self._convert_btn.setEnabled(True)
+        self._add_folder_btn.setEnabled(True)
+        self._cancel_btn.setEnabled(False)
+        if cancelled:
+            self._status_label.setText(f"Ricerca annullata: {count} file aggiunti.")
+        elif count:
+            self._status_label.setText(f"{count} file aggiunti dalla cartella.")
+        else:
+            self._status_label.setText("Nessun file audio o video nella cartella.")
 
     def _update_ffmpeg_banner(self) -> None:
         """Mostra banner solo se FFmpeg assente. CTA Installa se bundle disponibile."""
@@ -270,8 +402,11 @@ class ConvertTab(QWidget):
         self._default_format = s.get("convert_format", "mp3")
         self._default_quality = s.get("convert_quality", "320k")
         self._default_overwrite = s.get("overwrite_convert", True)
+        self._default_incremental = s.get("incremental_convert", False)
+        self._default_priority = s.get("convert_priority", "normal")
         self._apply_convert_defaults()
         self._overwrite_cb.setChecked(self._default_overwrite)
+        self._incremental_cb.setChecked(self._default_incremental)
         self._on_format_changed()
 
     def _browse_output(self) -> None:
@@ -297,30 +432,67 @@ class ConvertTab(QWidget):
             QMessageBox.warning(self, "Attenzione", "Aggiungi almeno un file.")
             return
 
-        self._convert_btn.setEnabled(False)
-        self._cancel_btn.setEnabled(True)
-        self._progress_bar.setRange(0, 100)
-        self._progress_bar.setValue(0)
-        self._status_label.setText("Avvio conversione...")
-
         fmt = self._format_combo.currentText().strip().lower()
         quality = "lossless" if fmt in ("flac", "wav", "m4a") else self._quality_combo.currentText()
 
         same_folder = self._same_folder_cb.isChecked()
         output_dir = Path(files[0]).parent if same_folder else self._output_dir
-        self._last_output_dir = output_dir
-        self._last_format = fmt
-        self._last_files = files
-
-        self._worker = ConversionWorker(
+        settings = get_settings()
+        worker = ConversionWorker(
             files,
             output_dir,
             output_format=fmt,
             quality=quality,
             overwrite=self._overwrite_cb.isChecked(),
             same_folder_as_input=same_folder,
+            max_workers=settings.get("convert_max_workers") or None,
+            schedule=SCHEDULE_LPT,
+            incremental=self._incremental_cb.isChecked(),
+            verify_hash=settings.get("incremental_convert_hash", False),
+            priority=CONVERT_PRIORITY_MODES[self._priority_combo.currentIndex()],
         )
+        self._run_worker(worker, files, output_dir, fmt)
+
+    def resume_batch(self, record: BatchRecord, files: list[str]) -> bool:
+        """Riprende un batch interrotto (journal) con i file non completati.
+
+        False se una conversione o una scansione cartella è in corso (la scansione
+        riempirebbe la lista e riattiverebbe Converti a metà batch).
+        """
+        files = [f for f in files if Path(f).is_file()]  # Sorgenti rimosse nel frattempo
+        if (self._worker and self._worker.isRunning()) or not files:
+            return False
+        if self._scan_worker and self._scan_worker.isRunning():
+            return False
+        if not check_ffmpeg_available():
+            return False
+        self._list.clear()
+        self._add_paths(files)
+        params = record.params
+        output_dir = Path(files[0]).parent if params["same_folder"] else Path(params["output_dir"])
+        worker = ConversionWorker.from_journal(record, files)
+        self._run_worker(worker, files, output_dir, params["output_format"])
+        return True
+
+    def _run_worker(
+        self, worker: ConversionWorker, files: list[str], output_dir: Path, fmt: str
+    ) -> None:
+        """Avvia il worker di conversione e collega i segnali all'interfaccia."""
+        self._convert_btn.setEnabled(False)
+        self._cancel_btn.setEnabled(True)
+        self._progress_bar.setRange(0, 100)
+        self._progress_bar.setValue(0)
+        self._status_label.setText("Avvio conversione...")
+        self._estimate_text = ""
+        self._cancel_requested = False
+        self._last_output_dir = output_dir
+        self._last_format = fmt
+        self._last_files = files
+
+        self._worker = worker
         self._worker.progress.connect(self._on_progress)
+        self._worker.planned.connect(self._on_planned)
+        self._worker.paused.connect(self._on_paused)
         self._worker.finished.connect(self._on_finished)
         self._worker.start()
 
@@ -328,7 +500,19 @@ class ConvertTab(QWidget):
     def _on_progress(self, current: int, total: int, filename: str) -> None:
         pct = int(100 * current / total) if total > 0 else 0
         self._progress_bar.setValue(pct)
-        self._status_label.setText(f"{current}/{total} - {filename}")
+        status = f"{current}/{total} - {filename}"
+        if self._estimate_text:
+            status += f" (durata stimata {self._estimate_text})"
+        self._status_label.setText(status)
+
+    @Slot(float)
+    def _on_planned(self, seconds: float) -> None:
+        self._estimate_text = _format_estimate(seconds)
+        self._status_label.setText(f"Avvio conversione... durata stimata {self._estimate_text}")
+
+    @Slot(str)
+    def _on_paused(self, msg: str) -> None:
+        self._status_label.setText(msg or "Spazio disponibile, conversione ripresa...")
 
     @Slot(bool, str)
     def _on_finished(self, success: bool, msg: str) -> None:
@@ -338,14 +522,19 @@ class ConvertTab(QWidget):
         self._progress_bar.setRange(0, 100)
         self._progress_bar.setValue(100 if success else 0)
         out_dir = getattr(self, "_last_output_dir", None)
+        if self._cancel_requested and not success:
+            # Annullato dall'utente: esito in status, nessun dialog d'errore
+            self._status_label.setText(msg)
+            return
         if success:
-            self._status_label.setText("Conversione completata!")
+            self._status_label.setText(f"Conversione completata! {msg}".strip())
             self._list.clear()
             if out_dir:
                 box = QMessageBox(self)
                 box.setIcon(QMessageBox.Icon.Information)
                 box.setWindowTitle("Conversione completata")
-                box.setText(f"I file sono stati salvati in:\n{out_dir}")
+                text = f"I file sono stati salvati in:\n{out_dir}"
+                box.setText(f"{text}\n\n{msg}" if msg else text)
                 open_btn = box.addButton("Apri cartella", QMessageBox.ButtonRole.ActionRole)
                 box.addButton(QMessageBox.StandardButton.Ok)
                 box.exec()
@@ -366,9 +555,15 @@ class ConvertTab(QWidget):
             subprocess.run(["xdg-open", str(path)])
 
     def _cancel_convert(self) -> None:
+        if self._scan_worker and self._scan_worker.isRunning():
+            self._scan_worker.cancel()
+            self._cancel_btn.setEnabled(False)
+            return
         if self._worker and self._worker.isRunning():
-            self._worker.requestInterruption()
+            self._cancel_requested = True
+            self._worker.cancel()
             self._cancel_btn.setEnabled(False)
+            self._status_label.setText("Annullamento...")
 
     def _set_drag_highlight(self, on: bool) -> None:
         """Feedback visivo durante drag-drop."""
@@ -394,8 +589,9 @@ class ConvertTab(QWidget):
 
     def dropEvent(self, event) -> None:
         self._set_drag_highlight(False)
-        for url in event.mimeData().urls():
-            path = url.toLocalFile()
-            if path:
-                self._list.addItem(path)
+        paths = [p for url in event.mimeData().urls() if (p := url.toLocalFile())]
+        folders = [p for p in paths if Path(p).is_dir()]
+        self._add_paths([p for p in paths if p not in folders])
+        if folders:
+            self._scan_folders(folders)
         event.acceptProposedAction()
@@ -1,9 +1,9 @@
 """Tab Download video/audio da URL (yt-dlp)."""
 
 import os
-import re
 import subprocess
 import sys
+from functools import partial
 from pathlib import Path
 
 from PySide6.QtCore import Slot
@@ -16,6 +16,7 @@ from PySide6.QtWidgets import (
     QLabel,
     QLineEdit,
     QListWidget,
+    QListWidgetItem,
     QMessageBox,
     QProgressBar,
     QPushButton,
@@ -23,14 +24,17 @@ from PySide6.QtWidgets import (
     QWidget,
 )
 
-from ...engines.ytdlp_engine import is_url_supported
+from ...engines.download_scheduler import DEFAULT_MAX_PARALLEL
+from ...engines.ytdlp_engine import format_selection
 from ...services.download_queue_service import DownloadQueueWorker
+from ...services.url_check_service import UrlCheckWorker
 from ...utils.config import (
     DOWNLOAD_AUDIO_FORMATS,
     DOWNLOAD_VIDEO_FORMATS,
     DOWNLOAD_VIDEO_QUALITIES,
     get_settings,
 )
+from ...utils.job_journal import BatchRecord
 
 
 class DownloadTab(QWidget):
@@ -39,8 +43,10 @@ class DownloadTab(QWidget):
     def __init__(self, parent: QWidget | None = None) -> None:
         super().__init__(parent)
         self._worker: DownloadQueueWorker | None = None
+        self._check_worker: UrlCheckWorker | None = None
         s = get_settings()
         self._output_dir = Path(s.get("output_dir_download", str(Path.home() / "Downloads")))
+        self._last_output_dir = self._output_dir
         self._default_type = "video" if s.get("download_type", "video") == "video" else "audio"
         self._default_video_quality = min(
             s.get("download_video_quality_index", 0), len(DOWNLOAD_VIDEO_QUALITIES) - 1
@@ -185,37 +191,68 @@ class DownloadTab(QWidget):
         self._audio_format_combo.setVisible(not is_video)
 
     def _add_urls(self) -> None:
-        """Aggiunge URL dalla linea (supporta più URL separati da newline). Deduplica e valida."""
+        """Aggiunge URL dalla linea (supporta più URL separati da newline). Deduplica e valida
+        in background."""
         text = self._url_edit.text().strip()
         if not text:
             return
         existing = {self._url_list.item(i).text() for i in range(self._url_list.count())}
-        supported: list[str] = []
-        unsupported: list[str] = []
+        urls = []
         for line in text.splitlines():
             url = line.strip()
             if not url or not url.startswith(("http://", "https://")):
                 continue
             if url in existing:
                 continue
-            try:
-                if is_url_supported(url):
-                    supported.append(url)
-                else:
-                    unsupported.append(url[:80] + ("..." if len(url) > 80 else ""))
-            except Exception:
-                unsupported.append(url[:80] + ("..." if len(url) > 80 else ""))
-        for url in supported:
-            self._url_list.addItem(url)
+            urls.append(url)
             existing.add(url)
         self._url_edit.clear()
-        if unsupported:
+        self._check_urls(urls, dropped=False)
+
+    def _check_urls(self, urls: list[str], dropped: bool) -> None:
+        """Verifica gli URL in background (UrlCheckWorker); i supportati entrano in lista."""
+        if not urls:
+            return
+        if self._check_worker and self._check_worker.isRunning():
+            QMessageBox.information(self, "Attenzione", "Verifica URL in corso. Attendi.")
+            return
+        self._add_url_btn.setEnabled(False)
+        self._download_btn.setEnabled(False)
+        self._status_label.setText(f"Verifica di {len(urls)} URL...")
+        self._check_worker = UrlCheckWorker(urls)
+        self._check_worker.finished.connect(partial(self._on_urls_checked, dropped))
+        self._check_worker.start()
+
+    def _on_urls_checked(self, dropped: bool, supported: list, unsupported: list) -> None:
+        self._check_worker = None
+        self._add_url_btn.setEnabled(True)
+        if not (self._worker and self._worker.isRunning()):
+            self._download_btn.setEnabled(True)
+        existing = {self._url_list.item(i).text() for i in range(self._url_list.count())}
+        for url, extractor in supported:
+            if url in existing:
+                continue
+            item = QListWidgetItem(url)
+            item.setToolTip(f"{url}\nEstrattore: {extractor}")
+            self._url_list.addItem(item)
+        self._status_label.setText(f"{len(supported)} URL aggiunti." if supported else "")
+        if not unsupported:
+            return
+        if dropped:
             QMessageBox.warning(
                 self,
                 "Attenzione",
-                f"{len(unsupported)} URL non supportati e non aggiunti.\n"
-                "Es: YouTube, SoundCloud, Vimeo.\n\n" + "\n".join(unsupported[:3]),
+                f"{len(unsupported)} URL non supportati (drag-drop).\n"
+                "Es: YouTube, SoundCloud, Vimeo.",
             )
+            return
+        shown = [u[:80] + ("..." if len(u) > 80 else "") for u in unsupported[:3]]
+        QMessageBox.warning(
+            self,
+            "Attenzione",
+            f"{len(unsupported)} URL non supportati e non aggiunti.\n"
+            "Es: YouTube, SoundCloud, Vimeo.\n\n" + "\n".join(shown),
+        )
 
     def _remove_selected_url(self) -> None:
         """Rimuove l'URL selezionato dalla lista."""
@@ -275,36 +312,9 @@ class DownloadTab(QWidget):
 
     def _get_format_and_postprocessors(self) -> tuple[str, list | None]:
         """Ritorna (format_string, postprocessors) da Tipo + Qualità/Formato."""
-        is_video = self._type_combo.currentIndex() == 0
-        if is_video:
-            q = self._video_quality_combo.currentIndex()
-            if q == 0:
-                return "best_video", None  # Worker risolve per-URL
-            fmts = (
-                "bv*[height<=1080]+ba/best",
-                "bv*[height<=720]+ba/best",
-                "bv*[height<=2160]+ba/best",  # 4K
-            )
-            return fmts[q - 1], None
-        # Audio: 0=Ottimale, 1=FLAC, 2=WAV, 3=M4A, 4=MP3 320k, 5=MP3 192k, 6=Nativo
-        idx = self._audio_format_combo.currentIndex()
-        if idx == 0:
-            return "best", None  # Worker risolve per-URL con extract_info
-        if idx == 1:
-            return "bestaudio/best", [{"key": "FFmpegExtractAudio", "preferredcodec": "flac"}]
-        if idx == 2:
-            return "bestaudio/best", [{"key": "FFmpegExtractAudio", "preferredcodec": "wav"}]
-        if idx == 3:
-            return "bestaudio/best", [{"key": "FFmpegExtractAudio", "preferredcodec": "m4a"}]
-        if idx == 4:
-            return "bestaudio/best", [
-                {"key": "FFmpegExtractAudio", "preferredcodec": "mp3", "preferredquality": "320"}
-            ]
-        if idx == 5:
-            return "bestaudio/best", [
-                {"key": "FFmpegExtractAudio", "preferredcodec": "mp3", "preferredquality": "192"}
-            ]
-        return "bestaudio/best", None
+        if self._type_combo.currentIndex() == 0:
+            return format_selection(True, self._video_quality_combo.currentIndex())
+        return format_selection(False, self._audio_format_combo.currentIndex())
 
     def _start_download(self) -> None:
         urls = []
@@ -315,53 +325,60 @@ class DownloadTab(QWidget):
         if not urls:
             QMessageBox.warning(self, "Attenzione", "Aggiungi almeno un URL.")
             return
-        try:
-            bad = [u for u in urls if not is_url_supported(u)]
-            if bad:
-                QMessageBox.warning(
-                    self,
-                    "Attenzione",
-                    f"URL non supportati ({len(bad)}): verifica i link.\n"
-                    "Es: YouTube, SoundCloud, Vimeo, ecc.",
-                )
-                return
-        except Exception as e:
-            QMessageBox.critical(
-                self, "Errore", f"Verifica URL fallita: {e}\nProva con link validi."
-            )
-            return
-
-        self._download_btn.setEnabled(False)
-        self._cancel_btn.setEnabled(True)
-        self._progress_bar.setRange(0, 100)
-        self._progress_bar.setValue(0)
-        self._status_label.setText("Avvio download...")
+        # URL già verificati all'inserimento (UrlCheckWorker) o da una coda già avviata
 
         fmt, post = self._get_format_and_postprocessors()
         s = get_settings()
         vfmt_idx = min(s.get("download_video_format_index", 0), len(DOWNLOAD_VIDEO_FORMATS) - 1)
         merge_fmt = DOWNLOAD_VIDEO_FORMATS[vfmt_idx].lower()
-        self._worker = DownloadQueueWorker(
+        worker = DownloadQueueWorker(
             urls,
             self._output_dir,
             format=fmt,
             overwrite=self._overwrite_cb.isChecked(),
             postprocessors=post,
             merge_format=merge_fmt,
+            stream_encode=s.get("download_stream_encode", True),
+            max_parallel=s.get("download_max_parallel", DEFAULT_MAX_PARALLEL),
+            expand_playlists=s.get("download_expand_playlists", True),
+            priority=s.get("convert_priority", "normal"),
         )
+        self._run_worker(worker, self._output_dir)
+
+    def resume_batch(self, record: BatchRecord, urls: list[str]) -> bool:
+        """Riprende una coda interrotta (journal) con gli URL non completati.
+
+        False se un download o una verifica URL è in corso (la verifica aggiungerebbe URL
+        alla lista della coda ripresa).
+        """
+        if (self._worker and self._worker.isRunning()) or not urls:
+            return False
+        if self._check_worker and self._check_worker.isRunning():
+            return False
+        self._url_list.clear()
+        for u in urls:
+            self._url_list.addItem(u)
+        worker = DownloadQueueWorker.from_journal(record, urls)
+        self._run_worker(worker, Path(record.params["output_dir"]))
+        return True
+
+    def _run_worker(self, worker: DownloadQueueWorker, output_dir: Path) -> None:
+        """Avvia la coda di download e collega i segnali all'interfaccia."""
+        self._download_btn.setEnabled(False)
+        self._cancel_btn.setEnabled(True)
+        self._progress_bar.setRange(0, 100)
+        self._progress_bar.setValue(0)
+        self._status_label.setText("Avvio download...")
+        self._last_output_dir = output_dir
+        self._worker = worker
         self._worker.progress.connect(self._on_progress)
         self._worker.finished.connect(self._on_finished)
         self._worker.start()
 
-    @Slot(int, int, str)
-    def _on_progress(self, current: int, total: int, status_str: str) -> None:
-        pct = int(100 * current / total) if total > 0 else 0
-        match = re.search(r"(\d+(?:\.\d+)?)\s*%", status_str)
-        if match and total > 0:
-            frac = float(match.group(1)) / 100.0
-            pct = min(99, int(100 * (current + frac) / total))
-        elif "Analisi" in status_str:
-            pct = max(1, pct)  # Mostra 1% durante analisi URL
+    @Slot(float, int, str)
+    def _on_progress(self, current: float, total: int, status_str: str) -> None:
+        # current include la frazione dei download in corso: 100% solo a coda finita
+        pct = min(99, int(100 * current / total)) if total > 0 else 0
         self._progress_bar.setValue(pct)
         self._status_label.setText(status_str)
 
@@ -378,12 +395,12 @@ class DownloadTab(QWidget):
             box = QMessageBox(self)
             box.setIcon(QMessageBox.Icon.Information)
             box.setWindowTitle("Download completato")
-            box.setText(f"I file sono stati salvati in:\n{self._output_dir}")
+            box.setText(f"I file sono stati salvati in:\n{self._last_output_dir}")
             open_btn = box.addButton("Apri cartella", QMessageBox.ButtonRole.ActionRole)
             box.addButton(QMessageBox.StandardButton.Ok)
             box.exec()
             if box.clickedButton() == open_btn:
-                self._open_folder(self._output_dir)
+                self._open_folder(self._last_output_dir)
         else:
             self._status_label.setText(f"Errore: {msg}")
             box = QMessageBox(self)
@@ -417,7 +434,7 @@ class DownloadTab(QWidget):
 
     def _cancel_download(self) -> None:
         if self._worker and self._worker.isRunning():
-            self._worker.requestInterruption()
+            self._worker.cancel()
             self._cancel_btn.setEnabled(False)
 
     def _set_drag_highlight(self, on: bool) -> None:
@@ -445,8 +462,7 @@ class DownloadTab(QWidget):
     def dropEvent(self, event) -> None:
         self._set_drag_highlight(False)
         existing = {self._url_list.item(i).text() for i in range(self._url_list.count())}
-        supported: list[str] = []
-        unsupported: list[str] = []
+        urls = []
         for url in event.mimeData().urls():
             path = url.toLocalFile()
             if path:
@@ -454,20 +470,7 @@ class DownloadTab(QWidget):
             url_str = url.toString()
             if not url_str.startswith(("http://", "https://")) or url_str in existing:
                 continue
-            try:
-                if is_url_supported(url_str):
-                    supported.append(url_str)
-                else:
-                    unsupported.append(url_str[:80] + ("..." if len(url_str) > 80 else ""))
-            except Exception:
-                unsupported.append(url_str[:80] + ("..." if len(url_str) > 80 else ""))
-        for url in supported:
-            self._url_list.addItem(url)
-        if unsupported:
-            QMessageBox.warning(
-                self,
-                "Attenzione",
-                f"{len(unsupported)} URL non supportati (drag-drop).\n"
-                "Es: YouTube, SoundCloud, Vimeo.",
-            )
+            urls.append(url_str)
+            existing.add(url_str)
+        self._check_urls(urls, dropped=True)
         event.acceptProposedAction()
@@ -19,13 +19,19 @@ from PySide6.QtWidgets import (
     QWidget,
 )
 
+from ...services.watch_folder_service import check_watch_folders
 from ...utils.config import (
     CONVERT_FORMATS,
+    CONVERT_PRIORITY_LABELS,
+    CONVERT_PRIORITY_MODES,
     CONVERT_QUALITY_OPTIONS,
+    CONVERT_WORKER_OPTIONS,
     DEFAULT_SETTINGS,
     DOWNLOAD_AUDIO_FORMATS,
+    DOWNLOAD_PARALLEL_OPTIONS,
     DOWNLOAD_VIDEO_FORMATS,
     DOWNLOAD_VIDEO_QUALITIES,
+    WATCH_PRESETS,
     get_settings,
     save_settings,
 )
@@ -51,6 +57,7 @@ class SettingsTab(QWidget):
         layout.addWidget(self._build_output_section())
         layout.addWidget(self._build_download_section())
         layout.addWidget(self._build_conversion_section())
+        layout.addWidget(self._build_watch_section())
 
         layout.addWidget(self._make_separator())
 
@@ -131,6 +138,28 @@ class SettingsTab(QWidget):
         self._overwrite_download_cb = QCheckBox("Sovrascrivi file esistenti")
         form.addRow("", self._overwrite_download_cb)
 
+        self._stream_encode_cb = QCheckBox("Audio: converti durante il download")
+        self._stream_encode_cb.setToolTip(
+            "FLAC, WAV e MP3 vengono codificati mentre il file arriva, senza file "
+            "intermedio. Se la sorgente non lo consente si usa il download classico."
+        )
+        form.addRow("", self._stream_encode_cb)
+
+        self._expand_playlists_cb = QCheckBox("Playlist e canali: scarica tutti gli elementi")
+        self._expand_playlists_cb.setToolTip(
+            "Un link a playlist, album o canale diventa un download per ogni video. L'elenco "
+            "viene letto mentre i primi scaricano; i video ripetuti si scaricano una volta."
+        )
+        form.addRow("", self._expand_playlists_cb)
+
+        self._download_parallel_combo = QComboBox()
+        self._download_parallel_combo.addItems([str(n) for n in DOWNLOAD_PARALLEL_OPTIONS])
+        self._download_parallel_combo.setToolTip(
+            "URL scaricati insieme. Verso lo stesso sito (es. YouTube) ne partono al massimo "
+            "2-3 alla volta per non essere rallentati"
+        )
+        form.addRow("Download in parallelo:", self._download_parallel_combo)
+
         return group
 
     def _build_conversion_section(self) -> QGroupBox:
@@ -151,6 +180,35 @@ class SettingsTab(QWidget):
         self._overwrite_convert_cb = QCheckBox("Sovrascrivi file esistenti")
         form.addRow("", self._overwrite_convert_cb)
 
+        self._incremental_convert_cb = QCheckBox("Solo file nuovi o modificati")
+        form.addRow("", self._incremental_convert_cb)
+        self._incremental_hash_cb = QCheckBox("Confronta il contenuto se cambia solo la data")
+        self._incremental_hash_cb.setToolTip(
+            "Più lento: rilegge i file copiati o sincronizzati per capire se sono cambiati"
+        )
+        form.addRow("", self._incremental_hash_cb)
+        self._scan_probe_cb = QCheckBox("Cartelle: aggiungi solo file con traccia audio")
+        self._scan_probe_cb.setToolTip("Più lento: analizza ogni file trovato con ffprobe")
+        form.addRow("", self._scan_probe_cb)
+
+        self._workers_combo = QComboBox()
+        self._workers_combo.addItems(
+            ["Automatico" if n == 0 else str(n) for n in CONVERT_WORKER_OPTIONS]
+        )
+        self._workers_combo.setToolTip(
+            "Automatico: in base a core CPU, formato e velocità del disco"
+        )
+        form.addRow("Conversioni in parallelo:", self._workers_combo)
+
+        self._priority_combo = QComboBox()
+        self._priority_combo.addItems(list(CONVERT_PRIORITY_LABELS))
+        self._priority_combo.setToolTip(
+            "In background: FFmpeg a priorità CPU e disco più bassa, una conversione in meno.\n"
+            "Turbo: precedenza alla conversione (per esecuzioni senza usare il PC; "
+            "priorità CPU più alta solo se consentita dal sistema)"
+        )
+        form.addRow("Priorità conversione:", self._priority_combo)
+
         # Pulsante Installa FFmpeg (se non presente e bundle disponibile)
         self._ffmpeg_btn = QPushButton("Installa FFmpeg per conversione audio")
         self._ffmpeg_btn.clicked.connect(self._on_install_ffmpeg)
@@ -158,6 +216,43 @@ class SettingsTab(QWidget):
 
         return group
 
+    def _build_watch_section(self) -> QGroupBox:
+        """Sezione Cartella monitorata: conversione automatica dei file aggiunti."""
+        group = QGroupBox("Cartella monitorata")
+        form = QFormLayout(group)
+
+        self._watch_enabled_cb = QCheckBox("Converti automaticamente i file aggiunti")
+        self._watch_enabled_cb.setToolTip(
+            "I file vengono convertiti quando la copia è terminata; quelli già elaborati "
+            "non vengono ripetuti, nemmeno dopo un riavvio."
+        )
+        form.addRow("", self._watch_enabled_cb)
+
+        watch_row = QHBoxLayout()
+        self._watch_edit = QLineEdit()
+        self._watch_edit.setPlaceholderText("Cartella da monitorare")
+        watch_row.addWidget(self._watch_edit)
+        browse_watch = QPushButton("Sfoglia...")
+        browse_watch.clicked.connect(lambda: self._browse_dir(self._watch_edit))
+        watch_row.addWidget(browse_watch)
+        form.addRow("Cartella:", watch_row)
+
+        watch_out_row = QHBoxLayout()
+        self._watch_output_edit = QLineEdit()
+        self._watch_output_edit.setPlaceholderText("Vuoto = cartella Converter")
+        watch_out_row.addWidget(self._watch_output_edit)
+        browse_watch_out = QPushButton("Sfoglia...")
+        browse_watch_out.clicked.connect(lambda: self._browse_dir(self._watch_output_edit))
+        watch_out_row.addWidget(browse_watch_out)
+        form.addRow("Output:", watch_out_row)
+
+        self._watch_preset_combo = QComboBox()
+        for key, (label, _) in WATCH_PRESETS.items():
+            self._watch_preset_combo.addItem(label, key)
+        form.addRow("Preset:", self._watch_preset_combo)
+
+        return group
+
     def _update_ffmpeg_button_visibility(self) -> None:
         """Mostra pulsante Installa FFmpeg solo se FFmpeg assente e bundle disponibile."""
         show = not check_ffmpeg_available() and can_extract_from_bundle()
@@ -204,6 +299,14 @@ class SettingsTab(QWidget):
             min(s.get("download_audio_format_index", 0), len(DOWNLOAD_AUDIO_FORMATS) - 1)
         )
         self._overwrite_download_cb.setChecked(s.get("overwrite_download", False))
+        self._stream_encode_cb.setChecked(s.get("download_stream_encode", True))
+        self._expand_playlists_cb.setChecked(s.get("download_expand_playlists", True))
+        parallel = s.get("download_max_parallel", DEFAULT_SETTINGS["download_max_parallel"])
+        self._download_parallel_combo.setCurrentIndex(
+            DOWNLOAD_PARALLEL_OPTIONS.index(parallel)
+            if parallel in DOWNLOAD_PARALLEL_OPTIONS
+            else DOWNLOAD_PARALLEL_OPTIONS.index(DEFAULT_SETTINGS["download_max_parallel"])
+        )
         fmt = s.get("convert_format", "mp3")
         self._format_combo.setCurrentText(fmt.upper())
         q = s.get("convert_quality", "320k")
@@ -212,6 +315,23 @@ class SettingsTab(QWidget):
         self._quality_combo.setCurrentText(q)
         self._on_format_changed()  # nasconde qualità se formato lossless
         self._overwrite_convert_cb.setChecked(s.get("overwrite_convert", True))
+        self._incremental_convert_cb.setChecked(s.get("incremental_convert", False))
+        self._incremental_hash_cb.setChecked(s.get("incremental_convert_hash", False))
+        self._scan_probe_cb.setChecked(s.get("scan_verify_probe", False))
+        workers = s.get("convert_max_workers", 0)
+        self._workers_combo.setCurrentIndex(
+            CONVERT_WORKER_OPTIONS.index(workers) if workers in CONVERT_WORKER_OPTIONS else 0
+        )
+        priority = s.get("convert_priority", "normal")
+        self._priority_combo.setCurrentIndex(
+            CONVERT_PRIORITY_MODES.index(priority) if priority in CONVERT_PRIORITY_MODES else 0
+        )
+        self._watch_enabled_cb.setChecked(s.get("watch_enabled", False))
+        self._watch_edit.setText(s.get("watch_folder", ""))
+        self._watch_output_edit.setText(s.get("watch_output_dir", ""))
+        self._watch_preset_combo.setCurrentIndex(
+            max(0, self._watch_preset_combo.findData(s.get("watch_preset", "mp3_320")))
+        )
 
     def _restore_defaults(self) -> None:
         self._download_edit.setText(DEFAULT_SETTINGS["output_dir_download"])
@@ -229,10 +349,30 @@ class SettingsTab(QWidget):
             DEFAULT_SETTINGS["download_audio_format_index"]
         )
         self._overwrite_download_cb.setChecked(DEFAULT_SETTINGS["overwrite_download"])
+        self._stream_encode_cb.setChecked(DEFAULT_SETTINGS["download_stream_encode"])
+        self._expand_playlists_cb.setChecked(DEFAULT_SETTINGS["download_expand_playlists"])
+        self._download_parallel_combo.setCurrentIndex(
+            DOWNLOAD_PARALLEL_OPTIONS.index(DEFAULT_SETTINGS["download_max_parallel"])
+        )
         self._format_combo.setCurrentText("MP3")
         self._quality_combo.setCurrentText("320k")
         self._on_format_changed()
         self._overwrite_convert_cb.setChecked(DEFAULT_SETTINGS["overwrite_convert"])
+        self._incremental_convert_cb.setChecked(DEFAULT_SETTINGS["incremental_convert"])
+        self._incremental_hash_cb.setChecked(DEFAULT_SETTINGS["incremental_convert_hash"])
+        self._scan_probe_cb.setChecked(DEFAULT_SETTINGS["scan_verify_probe"])
+        self._workers_combo.setCurrentIndex(
+            CONVERT_WORKER_OPTIONS.index(DEFAULT_SETTINGS["convert_max_workers"])
+        )
+        self._priority_combo.setCurrentIndex(
+            CONVERT_PRIORITY_MODES.index(DEFAULT_SETTINGS["convert_priority"])
+        )
+        self._watch_enabled_cb.setChecked(DEFAULT_SETTINGS["watch_enabled"])
+        self._watch_edit.setText(DEFAULT_SETTINGS["watch_folder"])
+        self._watch_output_edit.setText(DEFAULT_SETTINGS["watch_output_dir"])
+        self._watch_preset_combo.setCurrentIndex(
+            self._watch_preset_combo.findData(DEFAULT_SETTINGS["watch_preset"])
+        )
 
     def _save(self) -> None:
         download = self._download_edit.text().strip()
@@ -247,6 +387,15 @@ class SettingsTab(QWidget):
                 self, "Attenzione", "La cartella Converter non esiste. Scegline una valida."
             )
             return
+        watch_folder = self._watch_edit.text().strip()
+        watch_output = self._watch_output_edit.text().strip()
+        if self._watch_enabled_cb.isChecked():
+            ok, msg = check_watch_folders(
+                watch_folder, watch_output or convert or DEFAULT_SETTINGS["output_dir_convert"]
+            )
+            if not ok:
+                QMessageBox.warning(self, "Attenzione", msg)
+                return
         updates = {
             "output_dir_download": download or DEFAULT_SETTINGS["output_dir_download"],
             "output_dir_convert": convert or DEFAULT_SETTINGS["output_dir_convert"],
@@ -257,6 +406,11 @@ class SettingsTab(QWidget):
             "download_video_format_index": self._download_video_format_combo.currentIndex(),
             "download_audio_format_index": self._download_audio_format_combo.currentIndex(),
             "overwrite_download": self._overwrite_download_cb.isChecked(),
+            "download_stream_encode": self._stream_encode_cb.isChecked(),
+            "download_expand_playlists": self._expand_playlists_cb.isChecked(),
+            "download_max_parallel": DOWNLOAD_PARALLEL_OPTIONS[
+                self._download_parallel_combo.currentIndex()
+            ],
             "convert_format": self._format_combo.currentText().strip().lower(),
             "convert_quality": (
                 self._quality_combo.currentText()
@@ -264,6 +418,15 @@ class SettingsTab(QWidget):
                 else "320k"
             ),
             "overwrite_convert": self._overwrite_convert_cb.isChecked(),
+            "incremental_convert": self._incremental_convert_cb.isChecked(),
+            "incremental_convert_hash": self._incremental_hash_cb.isChecked(),
+            "scan_verify_probe": self._scan_probe_cb.isChecked(),
+            "convert_max_workers": CONVERT_WORKER_OPTIONS[self._workers_combo.currentIndex()],
+            "convert_priority": CONVERT_PRIORITY_MODES[self._priority_combo.currentIndex()],
+            "watch_enabled": self._watch_enabled_cb.isChecked(),
+            "watch_folder": watch_folder,
+            "watch_output_dir": watch_output,
+            "watch_preset": self._watch_preset_combo.currentData(),
         }
         if save_settings(updates):
             self.settings_saved.emit()
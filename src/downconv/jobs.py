@@ -0,0 +1,459 @@
+"""Job headless di conversione e download, condivisi da CLI e job server (senza Qt).
+
+Un job è descritto da ConvertSpec / DownloadSpec (costruibili da argomenti o da JSON) ed
+eseguito da run_convert / run_download sugli stessi engine di ConversionWorker e
+DownloadQueueWorker; l'avanzamento va a un EventSink come eventi (start, progress,
+paused, file, done, error).
+"""
+
+import abc
+import logging
+import threading
+import time
+from collections.abc import Callable
+from functools import partial
+from pathlib import Path
+from typing import NamedTuple
+
+logger = logging.getLogger(__name__)
+
+# Eventi progress: al massimo uno ogni PROGRESS_INTERVAL_SEC per elemento (le percentuali
+# di FFmpeg e yt-dlp arrivano molte volte al secondo)
+PROGRESS_INTERVAL_SEC = 0.5
+
+CONVERT_FORMATS = ("flac", "wav", "m4a", "mp3")
+# Scelte audio/video nell'ordine di config.DOWNLOAD_AUDIO_FORMATS/DOWNLOAD_VIDEO_QUALITIES
+AUDIO_CHOICES = ("best", "flac", "wav", "m4a", "mp3-320", "mp3-192", "native")
+VIDEO_CHOICES = ("best", "1080p", "720p", "4k")
+CONTAINER_CHOICES = ("mp4", "mkv")
+PRIORITY_CHOICES = ("normal", "background", "turbo")  # process_priority.PRIORITY_MODES
+
+MSG_NO_MEDIA = "Nessun file media da convertire."
+MSG_NO_URLS = "Nessun URL da scaricare."
+MSG_NOT_FOUND = "Percorso non trovato"
+
+
+class JobSetupError(Exception):
+    """Job non avviabile: niente da fare, FFmpeg mancante, cartella o spazio insufficienti."""
+
+
+class EventSink(abc.ABC):
+    """Destinazione degli eventi di un job. Thread-safe: i progress arrivano dai thread
+    di conversione. Le sottoclassi implementano _write."""
+
+    def __init__(self, progress: bool = True) -> None:
+        self._progress = progress
+        self._lock = threading.Lock()
+        self._last_progress: dict[str, float] = {}
+
+    @abc.abstractmethod
+    def _write(self, event: dict) -> None:
+        """Scrive un evento (già completo del campo "event")."""
+
+    def emit(self, event: str, **fields) -> None:
+        self._write({"event": event, **fields})
+
+    def progress(self, item: str, percent: float, **fields) -> None:
+        """Evento progress limitato a uno ogni PROGRESS_INTERVAL_SEC per item (100% sempre)."""
+        if not self._progress:
+            return
+        now = time.monotonic()
+        with self._lock:
+            last = self._last_progress.get(item)
+            if percent < 100 and last is not None and now - last < PROGRESS_INTERVAL_SEC:
+                return
+            self._last_progress[item] = now
+        self.emit("progress", item=item, percent=round(percent, 1), **fields)
+
+
+def _check_choice(name: str, value, choices: tuple) -> None:
+    if value not in choices:
+        raise ValueError(f"{name} non valido: {value} (ammessi: {', '.join(choices)})")
+
+
+_TYPE_NAMES = {bool: "true o false", str: "una stringa"}
+
+
+def _check_types(data: dict, types: dict[str, type], optional: tuple[str, ...] = ()) -> None:
+    """ValueError se un campo presente nel JSON non ha il tipo atteso ("false" è vero per
+    Python, true è un int). int = intero positivo; i campi in optional ammettono null."""
+    for name, kind in types.items():
+        if name not in data or (data[name] is None and name in optional):
+            continue
+        value = data[name]
+        if kind is int:
+            if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+                raise ValueError(f"{name} deve essere un intero positivo")
+        elif not isinstance(value, kind):
+            raise ValueError(f"{name}: atteso {_TYPE_NAMES[kind]}")
+
+
+def _string_list(name: str, value) -> list[str]:
+    if isinstance(value, str):
+        value = [value]
+    if not isinstance(value, list | tuple) or not all(isinstance(v, str) for v in value):
+        raise ValueError(f"{name}: attesa una lista di stringhe")
+    return [v for v in value if v.strip()]
+
+
+# Tipi dei campi scalari nel JSON del job server (liste controllate da _string_list)
+_CONVERT_TYPES = {
+    "quality": str,
+    "output_dir": str,
+    "jobs": int,
+    "overwrite": bool,
+    "incremental": bool,
+    "verify_hash": bool,
+    "priority": str,
+}
+_DOWNLOAD_TYPES = {
+    "audio": str,
+    "video": str,
+    "container": str,
+    "overwrite": bool,
+    "stream_encode": bool,
+    "parallel": int,
+    "expand_playlists": bool,
+    "priority": str,
+}
+
+
+def parse_target(spec: str, default_quality: str = "320k") -> tuple[str, str]:
+    """Formato e qualità da "mp3:192k"; la qualità conta solo per MP3 (lossless altrimenti).
+    ValueError se il formato non è supportato."""
+    fmt, _, quality = spec.lower().partition(":")
+    _check_choice("formato", fmt, CONVERT_FORMATS)
+    if fmt != "mp3":
+        return fmt, "lossless"
+    return fmt, quality or default_quality
+
+
+class ConvertSpec(NamedTuple):
+    """Job di conversione: input (file o cartelle ricorsive) e uscite."""
+
+    inputs: list[str]
+    format: str
+    quality: str = "320k"
+    also: tuple[str, ...] = ()  # Uscite aggiuntive "fmt[:qualità]" dallo stesso decode
+    output_dir: str | None = None  # None = accanto a ogni file
+    jobs: int | None = None  # None = worker adattivi
+    overwrite: bool = True
+    incremental: bool = False
+    verify_hash: bool = False
+    priority: str = "normal"
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ConvertSpec":
+        """Spec da JSON (job server). ValueError con il motivo se non valida."""
+        if not isinstance(data, dict):
+            raise ValueError("Job: atteso un oggetto JSON")
+        unknown = set(data) - set(cls._fields)
+        if unknown:
+            raise ValueError(f"Campi sconosciuti: {', '.join(sorted(unknown))}")
+        if not isinstance(data.get("format"), str):
+            raise ValueError("format obbligatorio")
+        _check_types(data, _CONVERT_TYPES, optional=("output_dir", "jobs"))
+        spec = cls(
+            **{
+                **data,
+                "inputs": _string_list("inputs", data.get("inputs", [])),
+                "also": tuple(_string_list("also", data.get("also", []))),
+            }
+        )
+        spec.targets()
+        _check_choice("priority", spec.priority, PRIORITY_CHOICES)
+        return spec
+
+    def targets(self) -> list[tuple[str, str]]:
+        """(formato, qualità) delle uscite, la prima è quella principale."""
+        return [parse_target(s, self.quality) for s in (self.format, *self.also)]
+
+
+class DownloadSpec(NamedTuple):
+    """Job di download: URL e scelta formato come nel tab Download."""
+
+    urls: list[str]
+    output_dir: str
+    audio: str = "best"
+    video: str | None = None  # Impostato = download video con questa qualità
+    container: str = "mp4"
+    overwrite: bool = False
+    stream_encode: bool = True
+    parallel: int = 4  # Download contemporanei (DEFAULT_MAX_PARALLEL)
+    expand_playlists: bool = True  # Playlist e canali: un download per elemento
+    priority: str = "normal"  # Processi FFmpeg delle codifiche in streaming
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "DownloadSpec":
+        """Spec da JSON (job server). ValueError con il motivo se non valida."""
+        if not isinstance(data, dict):
+            raise ValueError("Job: atteso un oggetto JSON")
+        unknown = set(data) - set(cls._fields)
+        if unknown:
+            raise ValueError(f"Campi sconosciuti: {', '.join(sorted(unknown))}")
+        if not isinstance(data.get("output_dir"), str) or not data["output_dir"].strip():
+            raise ValueError("output_dir obbligatorio")
+        _check_types(data, _DOWNLOAD_TYPES, optional=("video",))
+        spec = cls(**{**data, "urls": _string_list("urls", data.get("urls", []))})
+        _check_choice("audio", spec.audio, AUDIO_CHOICES)
+        if spec.video is not None:
+            _check_choice("video", spec.video, VIDEO_CHOICES)
+        _check_choice("container", spec.container, CONTAINER_CHOICES)
+        _check_choice("priority", spec.priority, PRIORITY_CHOICES)
+        return spec
+
+    def ytdlp_format(self) -> tuple[str, list | None]:
+        """(format, postprocessors) da passare a YtdlpEngine.download."""
+        from .engines.ytdlp_engine import format_selection
+
+        if self.video is not None:
+            return format_selection(True, VIDEO_CHOICES.index(self.video))
+        return format_selection(False, AUDIO_CHOICES.index(self.audio))
+
+
+def collect_inputs(
+    paths: list[str], output_dir: Path | None
+) -> tuple[list[tuple[Path, Path]], list[str]]:
+    """(input, cartella di output) per file e cartelle (ricorsive) e percorsi non trovati.
+
+    Con output_dir le sottocartelle di una cartella in input sono riprodotte nell'output,
+    senza l'uscita va accanto a ogni file.
+    """
+    from .utils.media_scan import iter_media_files
+
+    items: list[tuple[Path, Path]] = []
+    missing: list[str] = []
+    seen: set[Path] = set()
+    for raw in paths:
+        path = Path(raw).expanduser()
+        if path.is_dir():
+            found = [(f, f.parent.relative_to(path)) for f in iter_media_files(path)]
+        elif path.is_file():
+            found = [(path, Path())]
+        else:
+            missing.append(raw)
+            continue
+        for f, rel in found:
+            key = f.resolve()
+            if key in seen:
+                continue
+            seen.add(key)
+            items.append((f, output_dir / rel if output_dir else f.parent))
+    return items, missing
+
+
+def _elapsed(started: float) -> float:
+    return round(time.monotonic() - started, 2)
+
+
+def run_convert(
+    spec: ConvertSpec,
+    events: EventSink,
+    engine=None,
+    stop_check: Callable[[], bool] | None = None,
+) -> dict[str, int]:
+    """Esegue il job con FfmpegEngine.iter_convert e ritorna i conteggi (ok, failed,
+    skipped). engine: FfmpegEngine da usare (cancel() dall'esterno annulla il job).
+
+    JobSetupError se il job non può partire; i percorsi non trovati contano come falliti.
+    KeyboardInterrupt termina i processi FFmpeg e viene rilanciata dopo l'evento done.
+    """
+    from .engines.ffmpeg_engine import (
+        SKIPPED_UP_TO_DATE,
+        FfmpegEngine,
+        OutputTarget,
+        check_ffmpeg_available,
+    )
+    from .engines.process_priority import worker_cpu_count
+    from .utils.disk_check import check_disk_space_for, check_output_writable
+
+    targets = [OutputTarget(fmt, quality) for fmt, quality in spec.targets()]
+    output_dir = Path(spec.output_dir).expanduser() if spec.output_dir else None
+    items, missing = collect_inputs(spec.inputs, output_dir)
+    if not items:
+        raise JobSetupError(MSG_NO_MEDIA)
+    if not check_ffmpeg_available():
+        raise JobSetupError("FFmpeg non disponibile.")
+
+    engine = engine if engine is not None else FfmpegEngine(priority=spec.priority)
+    files = [f for f, _ in items]
+    out_dirs = [d for _, d in items]
+    for out_dir in dict.fromkeys(out_dirs):
+        ok, msg = check_output_writable(out_dir)
+        if not ok:
+            raise JobSetupError(f"{out_dir}: {msg}")
+    needs = engine.estimate_output_bytes(
+        files,
+        out_dirs[0],
+        targets[0].format,
+        targets[0].quality,
+        targets,
+        out_dirs,
+        overwrite=spec.overwrite,
+        incremental=spec.incremental,
+    )
+    ok, msg = check_disk_space_for(needs)
+    if not ok:
+        raise JobSetupError(msg)
+
+    total = len(items) + len(missing)
+    events.emit(
+        "start",
+        command="convert",
+        total=total,
+        outputs=[f"{t.format}:{t.quality}" for t in targets],
+    )
+    started = time.monotonic()
+    counts = {"ok": 0, "failed": 0, "skipped": 0}
+
+    def file_event(inp: str, errors: list[str], skipped: bool = False) -> None:
+        counts["failed" if errors else "skipped" if skipped else "ok"] += 1
+        events.emit(
+            "file",
+            input=inp,
+            ok=not errors,
+            skipped=skipped,
+            error="; ".join(errors),
+            done=sum(counts.values()),
+            total=total,
+        )
+
+    for raw in missing:
+        file_event(raw, [f"{MSG_NOT_FOUND}: {raw}"])
+    # Con più uscite (also) un file è concluso all'ultimo esito
+    outcomes: dict[Path, list[tuple[bool, str]]] = {}
+
+    def on_progress(inp: Path, pct: float) -> None:
+        events.progress(str(inp), pct)
+
+    results = engine.iter_convert(
+        items,
+        out_dirs[0],
+        targets[0].format,
+        targets[0].quality,
+        max_workers=spec.jobs,
+        overwrite=spec.overwrite,
+        stop_check=stop_check,
+        targets=targets,
+        incremental=spec.incremental,
+        verify_hash=spec.verify_hash,
+        file_progress_callback=on_progress,
+        pause_callback=lambda msg: events.emit("paused", message=msg),
+        # Un solo file: senza segmenti userebbe un core solo
+        segment_workers=(spec.jobs or worker_cpu_count(spec.priority)) if len(items) == 1 else None,
+    )
+    try:
+        for inp, out_ok, err in results:
+            done = outcomes.setdefault(inp, [])
+            done.append((out_ok, err))
+            if len(done) < len(targets):
+                continue
+            del outcomes[inp]
+            errors = [e for ok, e in done if not ok]
+            skipped = not errors and all(e == SKIPPED_UP_TO_DATE for _, e in done)
+            file_event(str(inp), errors, skipped)
+    except KeyboardInterrupt:
+        engine.cancel()
+        results.close()
+        events.emit("done", interrupted=True, **counts, elapsed=_elapsed(started))
+        raise
+    cancelled = engine.cancelled or bool(stop_check and stop_check())
+    events.emit("done", **counts, elapsed=_elapsed(started), **_cancelled(cancelled))
+    return counts
+
+
+def _cancelled(cancelled: bool) -> dict:
+    return {"cancelled": True} if cancelled else {}
+
+
+def run_download(
+    spec: DownloadSpec,
+    events: EventSink,
+    stop_check: Callable[[], bool] | None = None,
+    sessions=None,
+    ffmpeg=None,
+) -> dict[str, int]:
+    """Scarica gli URL in parallelo con YtdlpEngine.iter_download (spec.parallel alla
+    volta, limiti per host e per sito) e ritorna i conteggi (ok, failed). Playlist e
+    canali espansi mentre si scarica (evento "playlist" a fine elenco, total cresce
+    negli eventi "file"). stop_check
+    annulla i download in corso e non ne avvia altri. JobSetupError se il job non può partire.
+    sessions: YdlSessionPool condiviso tra job (server), default uno per job.
+    ffmpeg: FfmpegEngine delle codifiche in streaming (cancel() dall'esterno le termina),
+    default uno con spec.priority."""
+    from .engines.ytdlp_engine import YtdlpEngine
+    from .utils.disk_check import DiskBudget, check_disk_space, check_output_writable
+
+    urls = list(dict.fromkeys(u.strip() for u in spec.urls if u.strip()))
+    if not urls:
+        raise JobSetupError(MSG_NO_URLS)
+    output_dir = Path(spec.output_dir).expanduser()
+    for check in (check_output_writable, check_disk_space):
+        ok, msg = check(output_dir)
+        if not ok:
+            raise JobSetupError(msg)
+
+    fmt, post = spec.ytdlp_format()
+    if ffmpeg is None:
+        from .engines.ffmpeg_engine import FfmpegEngine
+
+        ffmpeg = FfmpegEngine(priority=spec.priority)
+    engine = YtdlpEngine(stream_encode=spec.stream_encode, sessions=sessions, ffmpeg=ffmpeg)
+    total = len(urls)
+    events.emit("start", command="download", total=total, format=fmt)
+    started = time.monotonic()
+    counts = {"ok": 0, "failed": 0}
+    # Ctrl+C arriva solo al thread principale: ferma anche i download nei thread
+    interrupted = threading.Event()
+
+    def stopped() -> bool:
+        return interrupted.is_set() or bool(stop_check and stop_check())
+
+    def on_expanded(source: str, count: int, error: str) -> None:
+        nonlocal total
+        # Il posto dell'URL passa ai suoi elementi (più l'esito di un elenco fallito)
+        total += count - 1 + bool(error)
+        fields = {"error": error} if error else {}
+        events.emit("playlist", input=source, entries=count, **fields)
+
+    results = engine.iter_download(
+        urls,
+        output_dir,
+        format=fmt,
+        progress_callback=partial(_download_progress, events),
+        overwrite=spec.overwrite,
+        postprocessors=post,
+        merge_format=spec.container,
+        max_parallel=spec.parallel,
+        disk_budget=DiskBudget(),
+        pause_callback=lambda msg: events.emit("paused", message=msg),
+        stop_check=stopped,
+        expand_playlists=spec.expand_playlists,
+        on_expanded=on_expanded,
+    )
+    try:
+        for url, ok, err in results:
+            if not ok and stopped():
+                continue  # Annullato: né riuscito né fallito
+            counts["ok" if ok else "failed"] += 1
+            events.emit("file", input=url, ok=ok, error=err, done=sum(counts.values()), total=total)
+    except KeyboardInterrupt:
+        interrupted.set()
+        results.close()  # Attende i download in corso, ora annullati
+        events.emit("done", interrupted=True, **counts, elapsed=_elapsed(started))
+        raise
+    finally:
+        engine.close()
+    cancelled = stopped() and sum(counts.values()) < total
+    events.emit("done", **counts, elapsed=_elapsed(started), **_cancelled(cancelled))
+    return counts
+
+
+def _download_progress(events: EventSink, url: str, d: dict) -> None:
+    """Hook yt-dlp → eventi progress (byte scaricati, velocità in byte/s)."""
+    if d.get("status") not in ("downloading", "finished"):
+        return
+    done = d.get("downloaded_bytes") or 0
+    total = d.get("total_bytes") or d.get("total_bytes_estimate") or 0
+    pct = 100.0 if d.get("status") == "finished" else (done * 100 / total if total else 0)
+    events.progress(url, pct, bytes=done, total_bytes=total, speed=d.get("speed"))
@@ -0,0 +1,464 @@
+"""Job server locale: API JSON su HTTP (solo localhost) per accodare conversioni e download.
+
+Un processo lungo (`downconv serve`) esegue i job sugli stessi engine della GUI, con una
+coda per tipo (conversioni e download procedono in parallelo tra loro, in ordine di
+arrivo dentro ogni coda): import di yt-dlp ed estrattori vengono pagati una sola volta.
+
+    POST   /jobs              {"kind": "convert"|"download", ...spec} → 202 {"id": N, ...}
+    GET    /jobs              stato della coda (tutti i job)
+    GET    /jobs/<id>         stato di un job
+    DELETE /jobs/<id>         annulla (in coda: subito; in corso: processi FFmpeg terminati)
+    GET    /events?since=S    eventi JSON (una riga ciascuno) in streaming; &job=N filtra,
+                              &follow=0 ritorna solo quelli già presenti
+    GET    /health            versione e conteggio job per stato
+
+Ogni evento dei job (vedi jobs.py) porta "seq" (crescente) e "job"; si aggiungono
+"queued", "state" (cambio di stato del job) e, ogni HEARTBEAT_SEC senza eventi, "heartbeat".
+"""
+
+import json
+import logging
+import threading
+import time
+from collections import deque
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from . import __version__
+from .jobs import (
+    ConvertSpec,
+    DownloadSpec,
+    EventSink,
+    JobSetupError,
+    run_convert,
+    run_download,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+# Eventi tenuti in memoria per /events?since= (i più vecchi vengono scartati)
+EVENT_BUFFER_SIZE = 10_000
+# Job conclusi tenuti in /jobs (i più vecchi vengono dimenticati)
+FINISHED_JOBS_KEPT = 1_000
+HEARTBEAT_SEC = 15.0
+MAX_BODY_BYTES = 1024 * 1024
+
+KIND_CONVERT = "convert"
+KIND_DOWNLOAD = "download"
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"  # Completato, anche con elementi falliti (vedi counts)
+JOB_FAILED = "failed"  # Non avviabile o errore imprevisto (vedi error)
+JOB_CANCELLED = "cancelled"
+_FINAL_STATES = (JOB_DONE, JOB_FAILED, JOB_CANCELLED)
+
+_LOCAL_HOSTS = ("127.0.0.1", "localhost", "[::1]", "::1")
+
+
+class EventBus:
+    """Eventi numerati in un buffer circolare; i lettori attendono quelli nuovi."""
+
+    def __init__(self, size: int = EVENT_BUFFER_SIZE) -> None:
+        self._events: deque[dict] = deque(maxlen=size)
+        self._seq = 0
+        self._cond = threading.Condition()
+
+    def publish(self, event: dict) -> None:
+        with self._cond:
+            self._seq += 1
+            self._events.append({"seq": self._seq, "time": round(time.time(), 3), **event})
+            self._cond.notify_all()
+
+    def since(self, seq: int, timeout: float = 0) -> list[dict]:
+        """Eventi con numero > seq; se non ce ne sono attende al massimo timeout secondi."""
+        with self._cond:
+            if self._seq <= seq and timeout > 0:
+                self._cond.wait_for(lambda: self._seq > seq, timeout)
+            if self._seq <= seq:
+                return []
+            # Gli eventi sono consecutivi: salta quelli già visti senza scorrere il buffer
+            skip = max(0, len(self._events) - (self._seq - seq))
+            return list(self._events)[skip:]
+
+
+class _JobEvents(EventSink):
+    """Eventi di un job verso il bus (con l'id del job); aggiornano avanzamento e conteggi."""
+
+    def __init__(self, bus: EventBus, job: "Job") -> None:
+        super().__init__()
+        self._bus = bus
+        self._job = job
+
+    def _write(self, event: dict) -> None:
+        kind = event["event"]
+        if kind == "start":
+            self._job.total = event["total"]
+        elif kind == "file":
+            self._job.done = event["done"]
+        elif kind == "done":
+            self._job.counts = {k: event[k] for k in ("ok", "failed", "skipped") if k in event}
+        self._bus.publish({"job": self._job.id, **event})
+
+
+class Job:
+    """Job accodato: spec, stato e conteggi aggiornati dagli eventi del job."""
+
+    def __init__(self, job_id: int, kind: str, spec: ConvertSpec | DownloadSpec) -> None:
+        self.id = job_id
+        self.kind = kind
+        self.spec = spec
+        self.state = JOB_QUEUED
+        self.error = ""
+        self.total = 0
+        self.done = 0  # Elementi conclusi (ok, falliti o saltati)
+        self.counts: dict[str, int] = {}
+        self.created_at = time.time()
+        self.started_at: float | None = None
+        self.finished_at: float | None = None
+        self.stop_event = threading.Event()
+        self.engine = None  # FfmpegEngine del job in corso, anche download (cancel())
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "state": self.state,
+            "error": self.error,
+            "total": self.total,
+            "done": self.done,
+            "counts": dict(self.counts),
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "spec": self.spec._asdict(),
+        }
+
+
+class JobQueue:
+    """Code di job per tipo, ognuna con un thread esecutore. Thread-safe."""
+
+    def __init__(self, bus: EventBus | None = None) -> None:
+        self.bus = bus if bus is not None else EventBus()
+        self._lock = threading.Lock()
+        self._jobs: dict[int, Job] = {}
+        self._next_id = 1
+        self._pending = {KIND_CONVERT: deque(), KIND_DOWNLOAD: deque()}
+        self._wakeup = threading.Condition(self._lock)
+        self._closed = False
+        self._threads: list[threading.Thread] = []
+        # Sessioni yt-dlp condivise dai job di download per tutta la vita del server
+        self._sessions = None
+
+    def start(self) -> None:
+        for kind in self._pending:
+            t = threading.Thread(target=self._runner, args=(kind,), name=f"jobs-{kind}")
+            t.daemon = True
+            t.start()
+            self._threads.append(t)
+
+    def close(self, timeout: float | None = None) -> None:
+        """Ferma gli esecutori: job in corso annullati, quelli in coda restano non eseguiti."""
+        with self._lock:
+            self._closed = True
+            running = [j for j in self._jobs.values() if j.state == JOB_RUNNING]
+            self._wakeup.notify_all()
+        for job in running:
+            self._stop(job)
+        for t in self._threads:
+            t.join(timeout)
+        if self._sessions is not None:
+            self._sessions.close()
+
+    def submit(self, data: dict) -> Job:
+        """Accoda un job da JSON ({"kind": ..., campi della spec}). ValueError se non valido."""
+        if not isinstance(data, dict):
+            raise ValueError("Job: atteso un oggetto JSON")
+        fields = {k: v for k, v in data.items() if k != "kind"}
+        kind = data.get("kind")
+        if kind == KIND_CONVERT:
+            spec = ConvertSpec.from_dict(fields)
+        elif kind == KIND_DOWNLOAD:
+            spec = DownloadSpec.from_dict(fields)
+        else:
+            raise ValueError(f"kind deve essere {KIND_CONVERT} o {KIND_DOWNLOAD}")
+        with self._lock:
+            if self._closed:
+                raise ValueError("Server in chiusura")
+            job = Job(self._next_id, kind, spec)
+            self._next_id += 1
+            self._jobs[job.id] = job
+            self._pending[kind].append(job)
+            self._forget_old()
+            self.bus.publish({"job": job.id, "event": "queued", "kind": kind})
+            self._wakeup.notify_all()
+        return job
+
+    def get(self, job_id: int) -> dict | None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return job.to_dict() if job else None
+
+    def snapshot(self) -> dict:
+        """Stato della coda: job in ordine di arrivo e numero di job per stato."""
+        with self._lock:
+            jobs = [j.to_dict() for j in self._jobs.values()]
+        states: dict[str, int] = {}
+        for j in jobs:
+            states[j["state"]] = states.get(j["state"], 0) + 1
+        return {"jobs": jobs, "states": states}
+
+    def cancel(self, job_id: int) -> bool:
+        """Annulla un job in coda o in corso. False se non esiste o è già concluso."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.state in _FINAL_STATES:
+                return False
+            if job.state == JOB_QUEUED:
+                self._pending[job.kind].remove(job)
+                self._set_state(job, JOB_CANCELLED)
+                return True
+        self._stop(job)
+        return True
+
+    def _stop(self, job: Job) -> None:
+        job.stop_event.set()
+        if job.engine is not None:
+            job.engine.cancel()
+
+    def _forget_old(self) -> None:
+        """Dimentica i job conclusi oltre FINISHED_JOBS_KEPT (chiamata con il lock)."""
+        finished = [j.id for j in self._jobs.values() if j.state in _FINAL_STATES]
+        for job_id in finished[: max(0, len(finished) - FINISHED_JOBS_KEPT)]:
+            del self._jobs[job_id]
+
+    def _set_state(self, job: Job, state: str, error: str = "") -> None:
+        job.state = state
+        job.error = error
+        if state == JOB_RUNNING:
+            job.started_at = time.time()
+        elif state in _FINAL_STATES:
+            job.finished_at = time.time()
+        fields = {"error": error} if error else {}
+        self.bus.publish({"job": job.id, "event": "state", "state": state, **fields})
+
+    def _runner(self, kind: str) -> None:
+        pending = self._pending[kind]
+        while True:
+            with self._lock:
+                self._wakeup.wait_for(lambda: pending or self._closed)
+                if self._closed:
+                    return
+                job = pending.popleft()
+                self._set_state(job, JOB_RUNNING)
+            self._run(job)
+
+    def _run(self, job: Job) -> None:
+        events = _JobEvents(self.bus, job)
+        try:
+            from .engines.ffmpeg_engine import FfmpegEngine
+
+            job.engine = FfmpegEngine(priority=job.spec.priority)
+            if job.stop_event.is_set():  # Annullato mentre partiva
+                job.engine.cancel()
+            if job.kind == KIND_CONVERT:
+                run_convert(job.spec, events, job.engine, job.stop_event.is_set)
+            else:
+                if self._sessions is None:
+                    from .engines.ytdlp_session import YdlSessionPool
+
+                    self._sessions = YdlSessionPool()
+                run_download(job.spec, events, job.stop_event.is_set, self._sessions, job.engine)
+        except JobSetupError as e:
+            events.emit("error", message=str(e))
+            with self._lock:
+                self._set_state(job, JOB_FAILED, str(e))
+            return
+        except Exception as e:
+            logger.exception("Job %d fallito: %s", job.id, e)
+            with self._lock:
+                self._set_state(job, JOB_FAILED, str(e))
+            return
+        finally:
+            job.engine = None
+        with self._lock:
+            self._set_state(job, JOB_CANCELLED if job.stop_event.is_set() else JOB_DONE)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Richieste HTTP verso JobQueue (server.queue)."""
+
+    server: "JobServer"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format: str, *args) -> None:
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+    def _send_json(self, status: HTTPStatus, body: dict | list) -> None:
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _error(self, status: HTTPStatus, message: str) -> None:
+        self._send_json(status, {"error": message})
+
+    def _allowed(self) -> bool:
+        """Solo client locali, token se configurato. Host non locale (DNS rebinding da un
+        browser) rifiutato."""
+        host = (self.headers.get("Host") or "").rsplit(":", 1)[0]
+        if host not in _LOCAL_HOSTS and host != self.server.server_address[0]:
+            self._error(HTTPStatus.FORBIDDEN, "Host non consentito")
+            return False
+        token = self.server.token
+        if token and self.headers.get("Authorization") != f"Bearer {token}":
+            self._error(HTTPStatus.UNAUTHORIZED, "Token mancante o errato")
+            return False
+        return True
+
+    def _job_id(self, path: str) -> int | None:
+        try:
+            return int(path.removeprefix("/jobs/"))
+        except ValueError:
+            return None
+
+    def do_GET(self) -> None:
+        if not self._allowed():
+            return
+        url = urlsplit(self.path)
+        queue = self.server.queue
+        if url.path == "/health":
+            self._send_json(
+                HTTPStatus.OK, {"version": __version__, "states": queue.snapshot()["states"]}
+            )
+        elif url.path == "/jobs":
+            self._send_json(HTTPStatus.OK, queue.snapshot())
+        elif url.path.startswith("/jobs/"):
+            job = queue.get(self._job_id(url.path) or 0)
+            if job is None:
+                self._error(HTTPStatus.NOT_FOUND, "Job non trovato")
+            else:
+                self._send_json(HTTPStatus.OK, job)
+        elif url.path == "/events":
+            self._stream_events(parse_qs(url.query))
+        else:
+            self._error(HTTPStatus.NOT_FOUND, "Risorsa non trovata")
+
+    def do_POST(self) -> None:
+        if not self._allowed():
+            return
+        if urlsplit(self.path).path != "/jobs":
+            self._error(HTTPStatus.NOT_FOUND, "Risorsa non trovata")
+            return
+        # Solo application/json: un form di una pagina web non può inviare job senza CORS
+        if not (self.headers.get("Content-Type") or "").startswith("application/json"):
+            self._error(HTTPStatus.UNSUPPORTED_MEDIA_TYPE, "Richiesto application/json")
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY_BYTES:
+            self._error(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Richiesta troppo grande")
+            return
+        try:
+            job = self.server.queue.submit(json.loads(self.rfile.read(length) or b"null"))
+        except (ValueError, TypeError) as e:
+            self._error(HTTPStatus.BAD_REQUEST, str(e))
+            return
+        self._send_json(HTTPStatus.ACCEPTED, job.to_dict())
+
+    def do_DELETE(self) -> None:
+        if not self._allowed():
+            return
+        path = urlsplit(self.path).path
+        job_id = self._job_id(path) if path.startswith("/jobs/") else None
+        if job_id is None or self.server.queue.get(job_id) is None:
+            self._error(HTTPStatus.NOT_FOUND, "Job non trovato")
+        elif not self.server.queue.cancel(job_id):
+            self._error(HTTPStatus.CONFLICT, "Job già concluso")
+        else:
+            self._send_json(HTTPStatus.OK, self.server.queue.get(job_id))
+
+    def _stream_events(self, query: dict[str, list[str]]) -> None:
+        """Eventi come righe JSON (chunked) finché il client resta connesso."""
+        try:
+            seq = int(query.get("since", ["0"])[0])
+            job = int(query["job"][0]) if "job" in query else None
+        except ValueError:
+            self._error(HTTPStatus.BAD_REQUEST, "since e job devono essere interi")
+            return
+        follow = query.get("follow", ["1"])[0] != "0"
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        bus = self.server.queue.bus
+        try:
+            while True:
+                events = bus.since(seq, HEARTBEAT_SEC if follow else 0)
+                if events:
+                    seq = events[-1]["seq"]
+                    lines = [e for e in events if job is None or e.get("job") == job]
+                elif follow:
+                    lines = [{"event": "heartbeat", "seq": seq}]
+                else:
+                    lines = []
+                if lines:
+                    self._write_chunk(
+                        "".join(json.dumps(e, ensure_ascii=False) + "\n" for e in lines)
+                    )
+                if not follow or self.server.closing:
+                    break
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            logger.debug("Client eventi disconnesso")
+
+    def _write_chunk(self, text: str) -> None:
+        data = text.encode("utf-8")
+        self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+
+class JobServer(ThreadingHTTPServer):
+    """Server HTTP del job server (un thread per richiesta, stream eventi compresi)."""
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        host: str = DEFAULT_HOST,
+        port: int = DEFAULT_PORT,
+        queue: JobQueue | None = None,
+        token: str | None = None,
+    ) -> None:
+        super().__init__((host, port), _Handler)
+        self.queue = queue if queue is not None else JobQueue()
+        self.token = token
+        self.closing = False
+
+    def serve(self) -> None:
+        """Avvia le code e serve fino a shutdown() (o KeyboardInterrupt)."""
+        self.queue.start()
+        try:
+            self.serve_forever()
+        finally:
+            self.closing = True
+            self.queue.close(timeout=10)
+            self.server_close()
+
+
+def warm_up() -> None:
+    """Importa yt-dlp in background: il primo job di download non paga l'avvio."""
+
+    def _import() -> None:
+        try:
+            import yt_dlp  # noqa: F401
+        except ImportError as e:
+            logger.warning("yt-dlp non disponibile: %s", e)
+
+    threading.Thread(target=_import, name="warm-up", daemon=True).start()
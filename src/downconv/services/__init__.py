@@ -2,5 +2,6 @@
 
 from .conversion_service import ConversionWorker
 from .download_service import DownloadWorker
+from .folder_scan_service import FolderScanWorker
 
-__all__ = ["DownloadWorker", "ConversionWorker"]
+__all__ = ["DownloadWorker", "ConversionWorker", "FolderScanWorker"]
@@ -5,16 +5,32 @@ from pathlib import Path
 
 from PySide6.QtCore import QThread, Signal
 
-from ..engines.ffmpeg_engine import FfmpegEngine
-from ..utils.disk_check import check_disk_space, check_output_writable
+from ..engines.ffmpeg_engine import (
+    MSG_CANCELLED,
+    SCHEDULE_FIFO,
+    SKIPPED_UP_TO_DATE,
+    FfmpegEngine,
+    OutputTarget,
+)
+from ..engines.process_priority import PRIORITY_NORMAL
+from ..utils.disk_check import check_disk_space_for, check_output_writable
+from ..utils.job_journal import (
+    BATCH_CANCELLED,
+    BATCH_CONVERT,
+    BATCH_DONE,
+    BatchRecord,
+    get_job_journal,
+)
 
 logger = logging.getLogger(__name__)
 
 
 class ConversionWorker(QThread):
-    """Worker per conversione batch. Controlla isInterruptionRequested tra file."""
+    """Worker per conversione batch. cancel() termina subito le conversioni in corso."""
 
     progress = Signal(int, int, str)
+    planned = Signal(float)  # durata stimata batch in secondi (solo schedule LPT)
+    paused = Signal(str)  # coda in pausa per spazio disco (messaggio), "" = ripresa
     finished = Signal(bool, str)
 
     def __init__(
@@ -25,7 +41,26 @@ class ConversionWorker(QThread):
         quality: str = "lossless",
         overwrite: bool = True,
         same_folder_as_input: bool = False,
+        targets: list[OutputTarget] | None = None,
+        max_workers: int | None = None,
+        schedule: str = SCHEDULE_FIFO,
+        incremental: bool = False,
+        verify_hash: bool = False,
+        priority: str = PRIORITY_NORMAL,
+        resume_batch: int | None = None,
     ) -> None:
+        """targets: più formati per file (es. FLAC + MP3 320k) con un solo decode.
+
+        Se indicato ha precedenza su output_format/quality.
+        max_workers: None = numero di conversioni parallele adattivo.
+        schedule: SCHEDULE_LPT = file più lunghi per primi, con stima durata via planned.
+        incremental: converte solo input nuovi/modificati (manifest); a fine batch il
+        messaggio di finished riporta quanti file sono stati saltati.
+        priority: PRIORITY_BACKGROUND lascia PC e interfaccia reattivi, PRIORITY_TURBO dà
+        precedenza alla conversione (vedi engines.process_priority).
+        resume_batch: id del batch interrotto da riprendere (vedi from_journal); altrimenti
+        il batch viene registrato come nuovo nel journal.
+        """
         super().__init__()
         self._files = [Path(f) for f in files]
         self._output_dir = Path(output_dir) if output_dir else None
@@ -33,6 +68,56 @@ class ConversionWorker(QThread):
         self._quality = quality
         self._overwrite = overwrite
         self._same_folder = same_folder_as_input
+        self._targets = targets
+        self._max_workers = max_workers
+        self._schedule = schedule
+        self._incremental = incremental
+        self._verify_hash = verify_hash
+        self._priority = priority
+        self._resume_batch = resume_batch
+        self._engine = FfmpegEngine(priority=priority)
+
+    @classmethod
+    def from_journal(cls, record: BatchRecord, files: list[str]) -> "ConversionWorker":
+        """Worker che riprende un batch interrotto con i soli file non completati."""
+        p = record.params
+        targets = [OutputTarget(fmt, q) for fmt, q in p["targets"]] if p.get("targets") else None
+        return cls(
+            files,
+            p["output_dir"],
+            p["output_format"],
+            quality=p["quality"],
+            overwrite=p["overwrite"],
+            same_folder_as_input=p["same_folder"],
+            targets=targets,
+            max_workers=p.get("max_workers"),
+            schedule=p.get("schedule", SCHEDULE_FIFO),
+            incremental=p.get("incremental", False),
+            verify_hash=p.get("verify_hash", False),
+            priority=p.get("priority", PRIORITY_NORMAL),
+            resume_batch=record.id,
+        )
+
+    def _journal_params(self) -> dict:
+        """Parametri per riprendere il batch (stessi argomenti del costruttore)."""
+        return {
+            "output_dir": str(self._output_dir) if self._output_dir else "",
+            "output_format": self._output_format,
+            "quality": self._quality,
+            "overwrite": self._overwrite,
+            "same_folder": self._same_folder,
+            "targets": [[t.format, t.quality] for t in self._targets] if self._targets else None,
+            "max_workers": self._max_workers,
+            "schedule": self._schedule,
+            "incremental": self._incremental,
+            "verify_hash": self._verify_hash,
+            "priority": self._priority,
+        }
+
+    def cancel(self) -> None:
+        """Annulla dal thread GUI: niente nuovi file, processi FFmpeg terminati subito."""
+        self.requestInterruption()
+        self._engine.cancel()
 
     def run(self) -> None:
         """Eseguito in QThread."""
@@ -42,12 +127,29 @@ class ConversionWorker(QThread):
         if not ok:
             self.finished.emit(False, msg)
             return
-        ok, msg = check_disk_space(output_dir)
+        # Ammissione: dimensione stimata delle uscite contro lo spazio di ogni filesystem
+        needs = self._engine.estimate_output_bytes(
+            self._files,
+            output_dir,
+            self._output_format,
+            self._quality,
+            targets=self._targets,
+            output_dirs=output_dirs,
+            overwrite=self._overwrite,
+            incremental=self._incremental,
+        )
+        ok, msg = check_disk_space_for(needs)
         if not ok:
             self.finished.emit(False, msg)
             return
 
-        engine = FfmpegEngine()
+        engine = self._engine
+        journal = get_job_journal()
+        if self._resume_batch is not None:
+            batch = journal.resume_batch(self._resume_batch)
+        else:
+            items = [(str(f), str(f.parent) if self._same_folder else None) for f in self._files]
+            batch = journal.begin_batch(BATCH_CONVERT, self._journal_params(), items)
 
         def on_progress(current: int, total: int, path: Path) -> None:
             if self.isInterruptionRequested():
@@ -59,18 +161,42 @@ class ConversionWorker(QThread):
             output_dir,
             self._output_format,
             quality=self._quality,
-            max_workers=4,
+            max_workers=self._max_workers,
             progress_callback=on_progress,
             overwrite=self._overwrite,
             output_dirs=output_dirs,
             stop_check=lambda: self.isInterruptionRequested(),
+            targets=self._targets,
+            schedule=self._schedule,
+            plan_callback=self.planned.emit,
+            incremental=self._incremental,
+            verify_hash=self._verify_hash,
+            pause_callback=self.paused.emit,
+            journal=batch,
         )
+        if batch:
+            batch.finish(BATCH_CANCELLED if self.isInterruptionRequested() else BATCH_DONE)
+        if self.isInterruptionRequested():
+            done = sum(1 for _, ok, _ in results if ok)
+            self.finished.emit(False, f"{MSG_CANCELLED} ({done} file completati).")
+            return
         failed = [(p, err) for p, ok, err in results if not ok]
         if failed:
             msg = self._format_error_msg(failed)
             self.finished.emit(False, msg)
         else:
-            self.finished.emit(True, "")
+            skipped = sum(1 for _, ok, err in results if ok and err == SKIPPED_UP_TO_DATE)
+            self.finished.emit(True, self._format_skipped_msg(skipped, len(results)))
+
+    def _format_skipped_msg(self, skipped: int, total: int) -> str:
+        """Riepilogo modalità incrementale ("" se nulla è stato saltato)."""
+        if not skipped:
+            return ""
+        if skipped == total:
+            return "Tutti i file erano già aggiornati."
+        if skipped == 1:
+            return "1 file già aggiornato, saltato."
+        return f"{skipped} file già aggiornati, saltati."
 
     def _format_error_msg(self, failed: list[tuple[Path, str]]) -> str:
         """Costruisce messaggio errore con file e cause."""
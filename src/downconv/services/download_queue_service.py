@@ -1,20 +1,38 @@
-"""DownloadQueueWorker: coda download URL sequenziali."""
+"""DownloadQueueWorker: coda download URL in parallelo."""
 
 import logging
+import threading
+import time
 from pathlib import Path
 
 from PySide6.QtCore import QThread, Signal
 
+from ..engines.download_scheduler import DEFAULT_MAX_PARALLEL
+from ..engines.ffmpeg_engine import FfmpegEngine
+from ..engines.process_priority import PRIORITY_NORMAL
 from ..engines.ytdlp_engine import YtdlpEngine
-from ..utils.disk_check import check_disk_space, check_output_writable
+from ..utils.disk_check import DiskBudget, check_disk_space, check_output_writable, format_size
+from ..utils.job_journal import (
+    BATCH_CANCELLED,
+    BATCH_DONE,
+    BATCH_DOWNLOAD,
+    BatchRecord,
+    get_job_journal,
+)
 
 logger = logging.getLogger(__name__)
 
+# Aggiornamenti di avanzamento inviati alla UI al massimo ogni PROGRESS_EMIT_INTERVAL_SEC
+PROGRESS_EMIT_INTERVAL_SEC = 0.2
+
 
 class DownloadQueueWorker(QThread):
-    """Worker per download multipli in coda. Uno alla volta, controlla isInterruptionRequested."""
+    """Worker per download multipli in coda: fino a max_parallel in contemporanea, con limiti
+    per host e per sito (YtdlpEngine.iter_download). Controlla isInterruptionRequested;
+    cancel() termina anche le codifiche in streaming in corso."""
 
-    progress = Signal(int, int, str)  # current, total, status_str
+    # Elementi completati (con la frazione di quelli in corso, es. 12.4), totale, stato
+    progress = Signal(float, int, str)
     finished = Signal(bool, str, list)  # success, msg, failed_urls (per retry)
 
     def __init__(
@@ -25,7 +43,16 @@ class DownloadQueueWorker(QThread):
         overwrite: bool = False,
         postprocessors: list | None = None,
         merge_format: str = "mp4",
+        stream_encode: bool = True,
+        resume_batch: int | None = None,
+        max_parallel: int = DEFAULT_MAX_PARALLEL,
+        expand_playlists: bool = False,
+        priority: str = PRIORITY_NORMAL,
     ) -> None:
+        """resume_batch: id del batch interrotto da riprendere (vedi from_journal).
+        expand_playlists: playlist e canali scaricati elemento per elemento nella coda
+        (elenco letto mentre i primi scaricano); il totale cresce man mano.
+        priority: priorità dei processi FFmpeg delle codifiche in streaming."""
         super().__init__()
         self._urls = [u.strip() for u in urls if u.strip()]
         self._output_dir = Path(output_dir)
@@ -33,9 +60,54 @@ class DownloadQueueWorker(QThread):
         self._overwrite = overwrite
         self._postprocessors = postprocessors
         self._merge_format = merge_format
+        self._stream_encode = stream_encode
+        self._resume_batch = resume_batch
+        self._max_parallel = max_parallel
+        self._expand_playlists = expand_playlists
+        # FfmpegEngine della coda: priorità scelta e cancel() sulle codifiche in streaming
+        self._ffmpeg = FfmpegEngine(priority=priority)
+        self._priority = priority
+
+    @classmethod
+    def from_journal(cls, record: BatchRecord, urls: list[str]) -> "DownloadQueueWorker":
+        """Worker che riprende una coda interrotta con i soli URL non completati."""
+        p = record.params
+        return cls(
+            urls,
+            p["output_dir"],
+            format=p["format"],
+            overwrite=p["overwrite"],
+            postprocessors=p.get("postprocessors"),
+            merge_format=p.get("merge_format", "mp4"),
+            stream_encode=p.get("stream_encode", True),
+            resume_batch=record.id,
+            max_parallel=p.get("max_parallel", DEFAULT_MAX_PARALLEL),
+            expand_playlists=p.get("expand_playlists", False),
+            priority=p.get("priority", PRIORITY_NORMAL),
+        )
+
+    def _journal_params(self) -> dict:
+        """Parametri per riprendere la coda (stessi argomenti del costruttore)."""
+        return {
+            "output_dir": str(self._output_dir),
+            "format": self._format,
+            "overwrite": self._overwrite,
+            "postprocessors": self._postprocessors,
+            "merge_format": self._merge_format,
+            "stream_encode": self._stream_encode,
+            "max_parallel": self._max_parallel,
+            "expand_playlists": self._expand_playlists,
+            "priority": self._priority,
+        }
+
+    def cancel(self) -> None:
+        """Annulla la coda (dal thread GUI): nessun nuovo download, quelli in corso si
+        interrompono e i processi FFmpeg delle codifiche in streaming vengono terminati."""
+        self.requestInterruption()
+        self._ffmpeg.cancel()
 
     def run(self) -> None:
-        """Esegue download sequenziali."""
+        """Esegue la coda di download."""
         total = len(self._urls)
         if total == 0:
             self.finished.emit(True, "", [])
@@ -50,61 +122,171 @@ class DownloadQueueWorker(QThread):
             self.finished.emit(False, msg, [])
             return
 
-        engine = YtdlpEngine(overwrite=self._overwrite)
-        failed: list[tuple[str, str]] = []  # (full_url, error_msg)
+        engine = YtdlpEngine(
+            overwrite=self._overwrite, stream_encode=self._stream_encode, ffmpeg=self._ffmpeg
+        )
+        # Ogni URL è ammesso con la dimensione stimata da yt-dlp: senza spazio la coda va in
+        # pausa (stato mostrato nella barra) invece di fallire a metà
+        budget = DiskBudget()
+        journal = get_job_journal()
+        if self._resume_batch is not None:
+            batch = journal.resume_batch(self._resume_batch)
+        else:
+            out = str(self._output_dir)
+            batch = journal.begin_batch(
+                BATCH_DOWNLOAD, self._journal_params(), [(u, out) for u in self._urls]
+            )
+        # Avanzamento per URL in corso (frazione 0-1, byte/s): progresso complessivo e
+        # velocità aggregata della coda. Aggiornato dai thread di download
+        active: dict[str, tuple[float, float]] = {}
+        lock = threading.Lock()
+        done = 0
+        paused = ""
+        # Playlist espanse: il journal resta per URL inserito, chiuso quando l'elenco è
+        # letto e tutti i suoi elementi sono conclusi
+        source_of: dict[str, str] = {}  # elemento → URL inserito
+        left: dict[str, int] = {}  # URL inserito → elementi non conclusi
+        errors: dict[str, str] = {}  # URL inserito → primo errore
+        expanded: set[str] = set()
+        started: set[str] = set()
+
+        def emit_progress() -> None:
+            with lock:
+                fractions = [f for f, _ in active.values()]
+                speed = sum(v for _, v in active.values())
+                current = done + sum(fractions)
+                status = paused or self._status(done, total, len(active), current, speed)
+            self.progress.emit(current, total, status)
+
+        last_emit = 0.0
 
-        for i, url in enumerate(self._urls):
+        def on_progress(url: str, d: dict) -> None:
+            nonlocal paused, last_emit
             if self.isInterruptionRequested():
-                self.finished.emit(False, "Annullato.", [])
                 return
+            got = d.get("downloaded_bytes") or 0
+            size = d.get("total_bytes") or d.get("total_bytes_estimate") or 0
+            if d.get("status") == "finished":
+                frac = 1.0
+            else:
+                frac = min(1.0, got / size) if size else 0.0
+            with lock:
+                if url not in active:
+                    return
+                active[url] = (frac, d.get("speed") or 0.0)
+                paused = ""
+                # Gli hook arrivano da ogni download molte volte al secondo
+                now = time.monotonic()
+                if now - last_emit < PROGRESS_EMIT_INTERVAL_SEC:
+                    return
+                last_emit = now
+            emit_progress()
 
-            def _make_progress_cb(idx: int, tot: int) -> object:
-                def _cb(d: dict) -> None:
-                    # Solo ASCII: evita quadrati/glifi mancanti su alcuni font
-                    n, t = idx + 1, tot
-                    parts = [f"{n} di {t}"]
-                    pct = d.get("_percent_str")
-                    if pct:
-                        parts.append(str(pct).strip())
-                    speed = d.get("_speed_str")
-                    if speed:
-                        parts.append(str(speed).strip())
-                    eta = d.get("_eta_str")
-                    if eta:
-                        parts.append(f"fine tra {eta.strip()}")
-                    self.progress.emit(idx, tot, " | ".join(parts))
-
-                return _cb
-
-            self.progress.emit(i, total, f"Scaricando {i + 1} di {total}...")
-
-            fmt = self._format
-            post = self._postprocessors
-            if fmt == "best":
-                fmt, post = "bestaudio/best", None
-            elif fmt == "best_video":
-                fmt, post = "bestvideo+bestaudio/best", None
-
-            ok, msg = engine.download(
-                url,
-                self._output_dir,
-                format=fmt,
-                progress_callback=_make_progress_cb(i, total),
-                overwrite=self._overwrite,
-                postprocessors=post,
-                merge_format=self._merge_format,
-            )
+        def on_pause(msg: str) -> None:
+            nonlocal paused
+            with lock:
+                paused = msg
+            emit_progress()
+
+        def on_start(url: str) -> None:
+            with lock:
+                active[url] = (0.0, 0.0)
+            source = source_of.get(url, url)
+            if batch and source not in started:
+                started.add(source)
+                batch.job_started(source)
+            emit_progress()
+
+        def on_discover(source: str, url: str) -> None:
+            source_of[url] = source
+            left[source] = left.get(source, 0) + 1
+
+        def on_expanded(source: str, count: int, error: str) -> None:
+            nonlocal total
+            expanded.add(source)
+            if error:
+                errors.setdefault(source, error)
+            # Il posto dell'URL inserito passa ai suoi elementi (ed eventuale errore)
+            with lock:
+                total += count - 1 + bool(error)
+            if not left.get(source):
+                source_finished(source)
 
-            if not ok:
-                failed.append((url, msg))
-                logger.warning("Download fallito %s: %s", url[:50], msg)
+        def source_finished(source: str) -> None:
+            if batch:
+                error = errors.get(source, "")
+                batch.job_finished(source, not error, error)
 
+        self.progress.emit(0.0, total, f"Scaricando 1 di {total}...")
+        failed: dict[str, str] = {}  # full_url → error_msg
+        results = engine.iter_download(
+            self._urls,
+            self._output_dir,
+            format=self._format,
+            progress_callback=on_progress,
+            overwrite=self._overwrite,
+            postprocessors=self._postprocessors,
+            merge_format=self._merge_format,
+            max_parallel=self._max_parallel,
+            disk_budget=budget,
+            pause_callback=on_pause,
+            stop_check=self.isInterruptionRequested,
+            on_start=on_start,
+            expand_playlists=self._expand_playlists,
+            on_discover=on_discover,
+            on_expanded=on_expanded,
+        )
+        try:
+            for url, ok, msg in results:
+                with lock:
+                    active.pop(url, None)
+                    done += 1
+                source = source_of.get(url)
+                if source is not None:
+                    left[source] -= 1
+                    if not ok:
+                        errors.setdefault(source, msg)
+                    if source in expanded and not left[source]:
+                        source_finished(source)
+                elif batch and url not in expanded:
+                    batch.job_finished(url, ok, msg)
+                if not ok:
+                    failed[url] = msg
+                    logger.warning("Download fallito %s: %s", url[:50], msg)
+                emit_progress()
+        finally:
+            engine.close()  # Sessioni yt-dlp riusate per tutta la coda
+
+        if self.isInterruptionRequested():
+            if batch:
+                batch.finish(BATCH_CANCELLED)
+            self.finished.emit(False, "Annullato.", [])
+            return
+        if batch:
+            batch.finish(BATCH_DONE)
         if failed:
-            err_msg = self._format_errors(failed)
-            self.finished.emit(False, err_msg, [u for u, _ in failed])
+            # Ordine della coda (i download paralleli finiscono in ordine sparso); elementi di
+            # una playlist nella posizione della playlist
+            position = {u: i for i, u in enumerate(dict.fromkeys(self._urls))}
+            ordered = sorted(
+                failed.items(), key=lambda f: position.get(source_of.get(f[0], f[0]), 0)
+            )
+            err_msg = self._format_errors(ordered)
+            self.finished.emit(False, err_msg, [u for u, _ in ordered])
         else:
             self.finished.emit(True, "", [])
 
+    @staticmethod
+    def _status(done: int, total: int, running: int, current: float, speed: float) -> str:
+        """Stato della coda, solo ASCII (evita quadrati/glifi mancanti su alcuni font)."""
+        parts = [f"{done} di {total} completati"]
+        if running:
+            parts.append(f"{running} in corso")
+        parts.append(f"{100 * current / max(total, 1):.1f}%")
+        if speed:
+            parts.append(f"{format_size(int(speed))}/s")
+        return " | ".join(parts)
+
     def _format_errors(self, failed: list[tuple[str, str]]) -> str:
         """Messaggio errore per download falliti. failed: (full_url, error_msg)."""
         n = len(failed)
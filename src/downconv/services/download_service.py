@@ -23,6 +23,7 @@ class DownloadWorker(QThread):
         format: str = "bestvideo+bestaudio/best",
         overwrite: bool = False,
         postprocessors: list | None = None,
+        stream_encode: bool = True,
     ) -> None:
         super().__init__()
         self._url = url
@@ -30,23 +31,27 @@ class DownloadWorker(QThread):
         self._format = format
         self._overwrite = overwrite
         self._postprocessors = postprocessors
+        self._stream_encode = stream_encode
 
     def run(self) -> None:
         """Eseguito in QThread."""
         try:
-            engine = YtdlpEngine(overwrite=self._overwrite)
+            engine = YtdlpEngine(overwrite=self._overwrite, stream_encode=self._stream_encode)
 
             def on_progress(d: dict) -> None:
                 self.progress.emit(d)
 
-            ok, msg = engine.download(
-                self._url,
-                self._output_dir,
-                format=self._format,
-                progress_callback=on_progress,
-                overwrite=self._overwrite,
-                postprocessors=self._postprocessors,
-            )
+            try:
+                ok, msg = engine.download(
+                    self._url,
+                    self._output_dir,
+                    format=self._format,
+                    progress_callback=on_progress,
+                    overwrite=self._overwrite,
+                    postprocessors=self._postprocessors,
+                )
+            finally:
+                engine.close()
             self.finished.emit(ok, msg)
         except Exception as e:
             logger.exception("DownloadWorker crash: %s", e)
@@ -0,0 +1,79 @@
+"""FolderScanWorker: scansione ricorsiva cartelle (os.scandir) in QThread per il Converter."""
+
+import logging
+import threading
+import time
+from pathlib import Path
+
+from PySide6.QtCore import QThread, Signal
+
+from ..engines.ffmpeg_engine import FfmpegEngine
+from ..utils.media_scan import iter_media_files
+from ..utils.probe_cache import ProbeInfo, get_probe_cache
+
+logger = logging.getLogger(__name__)
+
+# File inviati alla UI per blocco (o prima, dopo SCAN_BATCH_INTERVAL_SEC): pochi segnali
+# anche con decine di migliaia di file, lista che si riempie mentre la scansione prosegue
+SCAN_BATCH_SIZE = 500
+SCAN_BATCH_INTERVAL_SEC = 0.25
+
+
+class FolderScanWorker(QThread):
+    """Cerca file media in una o più cartelle senza bloccare la UI.
+
+    files_found: blocchi di (path, ProbeInfo | None) già letti dalla cache probe (tooltip).
+    count_changed: totale file trovati finora. finished: (totale, annullato).
+    Con verify_probe i file vengono analizzati con ffprobe e tenuti solo se hanno audio.
+    """
+
+    files_found = Signal(list)
+    count_changed = Signal(int)
+    finished = Signal(int, bool)
+
+    def __init__(
+        self,
+        folders: list[str] | list[Path],
+        verify_probe: bool = False,
+    ) -> None:
+        super().__init__()
+        self._folders = [Path(f) for f in folders]
+        self._verify_probe = verify_probe
+        # Evento Python invece di isInterruptionRequested: controllato a ogni file
+        self._cancel_event = threading.Event()
+
+    def cancel(self) -> None:
+        """Interrompe la scansione (dal thread GUI); i file già trovati restano in lista."""
+        self._cancel_event.set()
+
+    def run(self) -> None:
+        """Eseguito in QThread."""
+        cache = get_probe_cache()
+        engine = None
+        if self._verify_probe:
+            engine = FfmpegEngine()
+            if not engine.ffprobe_path:
+                engine = None  # Senza ffprobe si filtra solo per estensione
+        stop = self._cancel_event.is_set
+        batch: list[tuple[str, ProbeInfo | None]] = []
+        count = 0
+        last_emit = time.monotonic()
+        for folder in self._folders:
+            for path in iter_media_files(folder, stop_check=stop):
+                if stop():
+                    break
+                info = engine.probe(path) if engine else cache.get(path, touch=False)
+                if engine and info is None:
+                    continue  # Nessuno stream audio (o file illeggibile)
+                batch.append((str(path), info))
+                count += 1
+                now = time.monotonic()
+                if len(batch) >= SCAN_BATCH_SIZE or now - last_emit >= SCAN_BATCH_INTERVAL_SEC:
+                    self.files_found.emit(batch)
+                    self.count_changed.emit(count)
+                    batch = []
+                    last_emit = now
+        if batch:
+            self.files_found.emit(batch)
+            self.count_changed.emit(count)
+        self.finished.emit(count, stop())
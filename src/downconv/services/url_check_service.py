@@ -0,0 +1,41 @@
+"""UrlCheckWorker: verifica URL supportati da yt-dlp in QThread per il tab Download."""
+
+import logging
+
+from PySide6.QtCore import QThread, Signal
+
+from ..engines.extractor_index import match_extractor
+
+logger = logging.getLogger(__name__)
+
+
+class UrlCheckWorker(QThread):
+    """Riconosce l'estrattore yt-dlp di ogni URL senza bloccare la UI.
+
+    Indice precompilato (engines/extractor_index.py): ~0,1-0,2 ms per URL (circa 2 s per
+    10000 URL); al primo uso può attendere il caricamento o la costruzione dell'indice
+    (~0,7-1 s) avviati all'apertura della finestra.
+    finished: ([(url, estrattore)], [url non supportati]) nell'ordine ricevuto.
+    """
+
+    finished = Signal(list, list)
+
+    def __init__(self, urls: list[str]) -> None:
+        super().__init__()
+        self._urls = urls
+
+    def run(self) -> None:
+        """Eseguito in QThread."""
+        supported: list[tuple[str, str]] = []
+        unsupported: list[str] = []
+        for url in self._urls:
+            try:
+                extractor = match_extractor(url)
+            except Exception as e:
+                logger.warning("Verifica URL fallita (%s): %s", url[:60], e)
+                extractor = None
+            if extractor is None:
+                unsupported.append(url)
+            else:
+                supported.append((url, extractor))
+        self.finished.emit(supported, unsupported)
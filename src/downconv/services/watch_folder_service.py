@@ -0,0 +1,188 @@
+"""WatchFolderWorker: cartella monitorata, converte in QThread i file che vi vengono aggiunti."""
+
+import logging
+import threading
+from collections import deque
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+
+from PySide6.QtCore import QThread, Signal
+
+from ..engines.ffmpeg_engine import FfmpegEngine, OutputTarget, check_ffmpeg_available
+from ..engines.process_priority import PRIORITY_NORMAL
+from ..utils.config import MEDIA_EXTENSIONS, WATCH_PRESETS
+from ..utils.disk_check import check_output_writable
+from ..utils.fs_watch import DEFAULT_SETTLE_SEC, SettleTracker, create_watcher
+from ..utils.media_scan import iter_media_files
+from ..utils.watch_index import WatchIndex, get_watch_index
+
+logger = logging.getLogger(__name__)
+
+# Senza conversioni in corso si attendono eventi al massimo per questo tempo (poi
+# ricontrollo dei file in attesa); con conversioni in corso la finestra del pool viene
+# riempita con i file pronti ogni WATCH_POLL_SEC
+WATCH_IDLE_WAIT_SEC = 1.0
+WATCH_POLL_SEC = 1.0
+
+_MEDIA_EXTS = frozenset(e.lower() for e in MEDIA_EXTENSIONS)
+
+
+def preset_targets(preset: str) -> list[OutputTarget]:
+    """Uscite del preset (sconosciuto = primo preset)."""
+    _, targets = WATCH_PRESETS.get(preset) or next(iter(WATCH_PRESETS.values()))
+    return [OutputTarget(fmt, quality) for fmt, quality in targets]
+
+
+def check_watch_folders(folder: Path | str, output_dir: Path | str) -> tuple[bool, str]:
+    """Cartella monitorata esistente e cartella di output scrivibile e fuori da essa
+    (le uscite verrebbero viste come nuovi file da convertire)."""
+    if not str(folder).strip() or not Path(folder).is_dir():
+        return False, "La cartella monitorata non esiste."
+    root = Path(folder).resolve()
+    out = Path(output_dir).resolve()
+    if out == root or root in out.parents:
+        return False, "La cartella di output non può essere dentro la cartella monitorata."
+    return check_output_writable(out)
+
+
+class WatchFolderWorker(QThread):
+    """Converte con il preset i file media aggiunti alla cartella monitorata.
+
+    Eventi inotify (o scansione periodica) → attesa che il file smetta di crescere →
+    pool di conversione (FfmpegEngine.iter_convert, stessa finestra adattiva dei batch).
+    L'indice (utils.watch_index) registra i file elaborati con la loro identità: dopo un
+    riavvio vengono saltati, una nuova copia con lo stesso nome viene riconvertita.
+    Le sottocartelle sono riprodotte nella cartella di output.
+    """
+
+    status = Signal(str)
+    file_done = Signal(str, bool, str)  # input, ok, errore
+    finished = Signal(bool, str)
+
+    def __init__(
+        self,
+        folder: str | Path,
+        output_dir: str | Path,
+        targets: list[OutputTarget],
+        settle_sec: float = DEFAULT_SETTLE_SEC,
+        max_workers: int | None = None,
+        priority: str = PRIORITY_NORMAL,
+        index: WatchIndex | None = None,
+    ) -> None:
+        super().__init__()
+        self._folder = Path(folder)
+        self._output_dir = Path(output_dir)
+        self._targets = targets
+        self._settle = settle_sec
+        self._max_workers = max_workers
+        self._index = index
+        self._stop_event = threading.Event()
+        self._engine = FfmpegEngine(priority=priority)
+
+    def stop(self) -> None:
+        """Ferma il monitoraggio (dal thread GUI); le conversioni in corso sono annullate e
+        i loro file riconvertiti al prossimo avvio."""
+        self._stop_event.set()
+        self._engine.cancel()
+
+    def _is_candidate(self, path: Path) -> bool:
+        """File media non nascosto (nemmeno in una sottocartella nascosta)."""
+        if path.suffix.lower() not in _MEDIA_EXTS:
+            return False
+        try:
+            rel = path.relative_to(self._folder)
+        except ValueError:
+            return False
+        return not any(part.startswith(".") for part in rel.parts)
+
+    def run(self) -> None:
+        """Eseguito in QThread."""
+        ok, msg = check_watch_folders(self._folder, self._output_dir)
+        if not ok:
+            self.finished.emit(False, msg)
+            return
+        if not check_ffmpeg_available():
+            self.finished.emit(False, "FFmpeg non disponibile: installalo dalle Impostazioni.")
+            return
+        self._folder = self._folder.resolve()
+        index = self._index if self._index is not None else get_watch_index()
+        stopped = self._stop_event.is_set
+        watcher = create_watcher(self._folder)
+        logger.info("Cartella monitorata %s (%s)", self._folder, watcher.kind)
+        self.status.emit(f"In ascolto: {self._folder}")
+
+        tracker = SettleTracker(self._settle)
+        known: dict[Path, tuple[int, int]] = {}  # Già elaborati (niente query ripetute)
+        queued: dict[Path, tuple[int, int]] = {}  # Nel pool: identità quando accodati
+        ready: deque[Path] = deque()
+
+        def consider(paths: Iterable[Path]) -> None:
+            candidates = []
+            for path in paths:
+                if path in queued or not self._is_candidate(path):
+                    continue
+                if path not in tracker:
+                    try:
+                        st = path.stat()
+                    except OSError:
+                        continue
+                    identity = (st.st_size, st.st_mtime_ns)
+                    if known.get(path) == identity:
+                        continue
+                    if index.is_processed(path, identity):
+                        known[path] = identity
+                        continue
+                candidates.append(path)
+            tracker.add(candidates)
+
+        def inputs() -> Iterator[tuple[Path, Path] | None]:
+            while not stopped():
+                changed = watcher.wait(0 if queued else WATCH_IDLE_WAIT_SEC)
+                if changed is None:
+                    changed = iter_media_files(self._folder, stop_check=stopped)
+                consider(changed)
+                for path, identity in tracker.pop_ready():
+                    queued[path] = identity
+                    ready.append(path)
+                if ready:
+                    path = ready.popleft()
+                    yield path, self._output_dir / path.parent.relative_to(self._folder)
+                elif queued:
+                    yield None  # Niente di pronto: la finestra resta com'è
+
+        converted = failed = 0
+        # Esiti per input: con più uscite (es. FLAC + MP3) il file è concluso all'ultima
+        outcomes: dict[Path, list[tuple[bool, str]]] = {}
+        try:
+            for inp, out_ok, err in self._engine.iter_convert(
+                inputs(),
+                self._output_dir,
+                self._targets[0].format,
+                self._targets[0].quality,
+                max_workers=self._max_workers,
+                overwrite=True,
+                stop_check=stopped,
+                targets=self._targets,
+                poll_interval=WATCH_POLL_SEC,
+            ):
+                results = outcomes.setdefault(inp, [])
+                results.append((out_ok, err))
+                if len(results) < len(self._targets):
+                    continue
+                del outcomes[inp]
+                errors = [e for ok, e in results if not ok]
+                error = errors[0] if errors else ""
+                identity = queued.pop(inp)
+                index.record(inp, identity, not errors, error)
+                known[inp] = identity
+                if errors:
+                    failed += 1
+                    logger.warning("Cartella monitorata: conversione fallita %s: %s", inp, error)
+                else:
+                    converted += 1
+                self.file_done.emit(str(inp), not errors, error)
+                summary = f"{converted} convertiti" + (f", {failed} falliti" if failed else "")
+                self.status.emit(f"In ascolto: {self._folder} — {summary} (ultimo: {inp.name})")
+        finally:
+            watcher.close()
+        self.finished.emit(True, "")
@@ -33,6 +33,36 @@ CONVERT_FORMATS: tuple[str, ...] = ("FLAC", "WAV", "M4A", "MP3")
 # Qualità MP3 in Converter — solo bitrate (128k rimosso: qualità datata)
 CONVERT_QUALITY_OPTIONS: tuple[str, ...] = ("320k", "192k")
 
+# Estensioni file accettate dal Converter (dialog, drop, scansione cartelle)
+AUDIO_EXTENSIONS: tuple[str, ...] = (".flac", ".mp3", ".m4a", ".ogg", ".wav", ".aac")
+VIDEO_EXTENSIONS: tuple[str, ...] = (".mp4", ".mkv", ".avi", ".mov", ".webm", ".wmv", ".m4v")
+MEDIA_EXTENSIONS: tuple[str, ...] = AUDIO_EXTENSIONS + VIDEO_EXTENSIONS
+
+# Conversioni in parallelo (Impostazioni) — 0 = Automatico (adattivo su CPU, codec e disco)
+CONVERT_WORKER_OPTIONS: tuple[int, ...] = (0, 1, 2, 4, 8, 16, 32)
+
+# Download contemporanei nella coda (1 = sequenziale); limiti per host e sito in
+# engines.download_scheduler
+DOWNLOAD_PARALLEL_OPTIONS: tuple[int, ...] = (1, 2, 4, 6, 8)
+
+# Priorità processi FFmpeg (Impostazioni e Converter) — valori di engines.process_priority
+CONVERT_PRIORITY_MODES: tuple[str, ...] = ("normal", "background", "turbo")
+CONVERT_PRIORITY_LABELS: tuple[str, ...] = (
+    "Normale",
+    "In background (PC reattivo)",
+    "Turbo (esecuzioni non presidiate)",
+)
+
+# Preset cartella monitorata: chiave → (etichetta, uscite (formato, qualità))
+WATCH_PRESETS: dict[str, tuple[str, tuple[tuple[str, str], ...]]] = {
+    "mp3_320": ("MP3 (320k)", (("mp3", "320k"),)),
+    "mp3_192": ("MP3 (192k)", (("mp3", "192k"),)),
+    "flac": ("FLAC", (("flac", "lossless"),)),
+    "wav": ("WAV", (("wav", "lossless"),)),
+    "m4a": ("M4A", (("m4a", "lossless"),)),
+    "flac_mp3_320": ("FLAC + MP3 (320k)", (("flac", "lossless"), ("mp3", "320k"))),
+}
+
 # Schema impostazioni con default (estensibile per Fase 2, 3)
 DEFAULT_SETTINGS = {
     "output_dir_download": str(Path.home() / "Downloads"),
@@ -42,11 +72,24 @@ DEFAULT_SETTINGS = {
     "convert_format": "mp3",
     "convert_quality": "320k",
     "overwrite_convert": True,
+    "convert_max_workers": 0,  # 0 = Automatico, altrimenti valore in CONVERT_WORKER_OPTIONS
+    "convert_priority": "normal",  # Valore in CONVERT_PRIORITY_MODES
+    "incremental_convert": False,  # Solo input nuovi/modificati (manifest conversioni)
+    "incremental_convert_hash": False,  # Se cambia solo mtime confronta il contenuto
+    "scan_verify_probe": False,  # Cartelle: tieni solo file con audio (ffprobe, più lento)
     "overwrite_download": False,
     "download_type": "video",  # "video" | "audio"
     "download_video_quality_index": 0,  # 0=Ottimale, 1=1080p, 2=720p, 3=4K
     "download_video_format_index": 0,  # 0=MP4, 1=MKV
     "download_audio_format_index": 0,  # 0-6: vedi DOWNLOAD_AUDIO_FORMATS
+    "download_stream_encode": True,  # Audio FLAC/WAV/MP3 codificato durante il download
+    "download_max_parallel": 4,  # Valore in DOWNLOAD_PARALLEL_OPTIONS
+    "download_expand_playlists": True,  # Playlist/canali: un download per elemento
+    "watch_enabled": False,  # Converte automaticamente i file aggiunti a watch_folder
+    "watch_folder": "",
+    "watch_output_dir": "",  # "" = output_dir_convert
+    "watch_preset": "mp3_320",  # Chiave in WATCH_PRESETS
+    "watch_settle_sec": 5,  # File pronto quando non cresce da questi secondi
 }
 
 
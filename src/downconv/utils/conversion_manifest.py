@@ -0,0 +1,207 @@
+"""Manifest conversioni incrementali (SQLite): quali uscite sono già aggiornate."""
+
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from .paths import get_data_dir
+
+logger = logging.getLogger(__name__)
+
+# Stato di un'uscita rispetto al manifest
+OUTPUT_FRESH = "fresh"  # input, impostazioni e FFmpeg invariati, file di uscita intatto
+OUTPUT_STALE = "stale"  # prodotta da noi ma da rifare (input o impostazioni cambiati)
+OUTPUT_UNKNOWN = "unknown"  # mai registrata (o uscita cancellata/modificata a mano)
+
+_HASH_CHUNK = 1024 * 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outputs (
+    output_path TEXT PRIMARY KEY,
+    output_size INTEGER NOT NULL,
+    output_mtime_ns INTEGER NOT NULL,
+    input_path TEXT NOT NULL,
+    input_size INTEGER NOT NULL,
+    input_mtime_ns INTEGER NOT NULL,
+    input_hash TEXT,
+    settings TEXT NOT NULL,
+    ffmpeg_version TEXT NOT NULL,
+    converted_at REAL NOT NULL
+);
+"""
+
+
+def get_manifest_file() -> Path:
+    """File SQLite del manifest conversioni."""
+    return get_data_dir() / "conversion_manifest.sqlite3"
+
+
+def hash_file(path: Path) -> str | None:
+    """BLAKE2b del contenuto (a blocchi, memoria costante). None se il file non è leggibile."""
+    h = hashlib.blake2b(digest_size=20)
+    try:
+        with open(path, "rb") as f:
+            while chunk := f.read(_HASH_CHUNK):
+                h.update(chunk)
+    except OSError:
+        return None
+    return h.hexdigest()
+
+
+def _stat(path: Path) -> tuple[int, int] | None:
+    """(size, mtime_ns) oppure None se il file non esiste."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+
+def _key(path: Path) -> str:
+    return str(Path(path).resolve())
+
+
+class ConversionManifest:
+    """Registro uscita → (identità input, impostazioni encoder, versione FFmpeg). Thread-safe.
+
+    Un'uscita è aggiornata se il file esiste com'era alla registrazione, l'input ha stessa
+    size e mtime (o, con verify_hash, stesso contenuto) e impostazioni/FFmpeg coincidono.
+    """
+
+    def __init__(self, db_path: Path | None = None) -> None:
+        self._db_path = Path(db_path) if db_path else get_manifest_file()
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+
+    def _connect(self) -> sqlite3.Connection | None:
+        """Apre la connessione al primo uso. None se il DB non è utilizzabile."""
+        if self._conn is not None:
+            return self._conn
+        try:
+            self._db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self._db_path), timeout=5, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        except sqlite3.Error as e:
+            logger.warning("Manifest conversioni non disponibile (%s): %s", self._db_path, e)
+            return None
+        return self._conn
+
+    def status(
+        self,
+        input_path: Path,
+        output_path: Path,
+        settings: str,
+        ffmpeg_version: str,
+        verify_hash: bool = False,
+    ) -> str:
+        """OUTPUT_FRESH, OUTPUT_STALE o OUTPUT_UNKNOWN per l'uscita indicata."""
+        out_stat = _stat(output_path)
+        in_stat = _stat(input_path)
+        if out_stat is None or in_stat is None:
+            return OUTPUT_UNKNOWN
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return OUTPUT_UNKNOWN
+            try:
+                row = conn.execute(
+                    "SELECT output_size, output_mtime_ns, input_path, input_size, "
+                    "input_mtime_ns, input_hash, settings, ffmpeg_version "
+                    "FROM outputs WHERE output_path = ?",
+                    (_key(output_path),),
+                ).fetchone()
+            except sqlite3.Error as e:
+                logger.warning("Lettura manifest fallita: %s", e)
+                return OUTPUT_UNKNOWN
+        if row is None or (row[0], row[1]) != out_stat:
+            # Uscita non nostra o modificata a mano: decide il flag "Sovrascrivi"
+            return OUTPUT_UNKNOWN
+        if row[2] != _key(input_path) or row[6] != settings or row[7] != ffmpeg_version:
+            return OUTPUT_STALE
+        if (row[3], row[4]) == in_stat:
+            return OUTPUT_FRESH
+        # mtime cambiato ma stessa size (copia, touch, sync): con hash si verifica il contenuto
+        if verify_hash and row[5] and row[3] == in_stat[0] and hash_file(input_path) == row[5]:
+            self._refresh_input_mtime(output_path, in_stat[1])
+            return OUTPUT_FRESH
+        return OUTPUT_STALE
+
+    def _refresh_input_mtime(self, output_path: Path, mtime_ns: int) -> None:
+        """Aggiorna mtime input dopo verifica hash (il prossimo controllo non rilegge il file)."""
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return
+            try:
+                conn.execute(
+                    "UPDATE outputs SET input_mtime_ns = ? WHERE output_path = ?",
+                    (mtime_ns, _key(output_path)),
+                )
+                conn.commit()
+            except sqlite3.Error as e:
+                logger.warning("Scrittura manifest fallita: %s", e)
+
+    def record(
+        self,
+        input_path: Path,
+        output_path: Path,
+        settings: str,
+        ffmpeg_version: str,
+        with_hash: bool = False,
+    ) -> None:
+        """Registra un'uscita appena prodotta."""
+        out_stat = _stat(output_path)
+        in_stat = _stat(input_path)
+        if out_stat is None or in_stat is None:
+            return
+        digest = hash_file(input_path) if with_hash else None
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return
+            try:
+                conn.execute(
+                    "INSERT OR REPLACE INTO outputs (output_path, output_size, output_mtime_ns, "
+                    "input_path, input_size, input_mtime_ns, input_hash, settings, "
+                    "ffmpeg_version, converted_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        _key(output_path),
+                        *out_stat,
+                        _key(input_path),
+                        *in_stat,
+                        digest,
+                        settings,
+                        ffmpeg_version,
+                        time.time(),
+                    ),
+                )
+                conn.commit()
+            except sqlite3.Error as e:
+                logger.warning("Scrittura manifest fallita: %s", e)
+
+    def close(self) -> None:
+        """Chiude la connessione (riaperta al prossimo uso)."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_default_manifest: ConversionManifest | None = None
+_default_manifest_lock = threading.Lock()
+
+
+def get_conversion_manifest() -> ConversionManifest:
+    """Manifest condiviso dall'app (uno per processo)."""
+    global _default_manifest
+    with _default_manifest_lock:
+        if _default_manifest is None:
+            _default_manifest = ConversionManifest()
+        return _default_manifest
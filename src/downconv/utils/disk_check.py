@@ -2,8 +2,12 @@
 
 import errno
 import logging
+import os
 import shutil
 import tempfile
+import threading
+import time
+from collections.abc import Callable, Mapping
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
@@ -11,8 +15,12 @@ logger = logging.getLogger(__name__)
 # Minimo spazio libero consigliato (50 MB) per evitare fallimenti durante scrittura
 MIN_FREE_BYTES = 50 * 1024 * 1024
 
+# Coda in pausa per spazio insufficiente: intervallo tra due controlli dello spazio libero
+DISK_PAUSE_POLL_SEC = 5.0
+
 MSG_DISK_FULL = "Spazio disco esaurito. Libera spazio nella cartella output."
 MSG_PERMISSION_DENIED = "Impossibile scrivere nella cartella. Verifica i permessi."
+MSG_DISK_PAUSED = "In pausa: spazio disco insufficiente. Libera spazio per continuare."
 
 
 def check_output_writable(path: Path | str) -> tuple[bool, str]:
@@ -69,6 +77,139 @@ def check_disk_space(path: Path | str, min_free: int = MIN_FREE_BYTES) -> tuple[
         return True, ""  # In caso di errore check, procedi (evita blocchi)
 
 
+def format_size(nbytes: int) -> str:
+    """Dimensione leggibile (MB sotto 1 GB, altrimenti GB con un decimale)."""
+    if nbytes < 1024**3:
+        return f"{nbytes // (1024 * 1024)} MB"
+    return f"{nbytes / 1024**3:.1f} GB"
+
+
+def _existing_dir(path: Path | str) -> Path | None:
+    """Prima cartella esistente risalendo da path (le uscite possono non esistere ancora)."""
+    p = Path(path)
+    for candidate in (p, *p.parents):
+        if candidate.is_dir():
+            return candidate
+    return None
+
+
+def _filesystem(path: Path | str) -> tuple[int, Path] | None:
+    """(device, cartella esistente) del filesystem che conterrà path. None se non valido."""
+    existing = _existing_dir(path)
+    if existing is None:
+        return None
+    try:
+        return os.stat(existing).st_dev, existing
+    except OSError:
+        return None
+
+
+def check_disk_space_for(
+    needs: Mapping[Path, int], min_free: int = MIN_FREE_BYTES
+) -> tuple[bool, str]:
+    """Ammissione di un batch: byte stimati per cartella di output, sommati per filesystem.
+
+    Args:
+        needs: Cartella output → byte che il batch prevede di scriverci.
+        min_free: Spazio da lasciare libero oltre alla stima (default 50 MB).
+
+    Returns:
+        (ok, msg): ok=False con spazio necessario e disponibile se un filesystem non basta.
+    """
+    totals: dict[int, list] = {}
+    for path, nbytes in needs.items():
+        fs = _filesystem(path)
+        if fs is None:
+            continue  # Path non valido, lascia fallire altrove
+        entry = totals.setdefault(fs[0], [fs[1], 0])
+        entry[1] += nbytes
+    for check_path, nbytes in totals.values():
+        try:
+            free = shutil.disk_usage(check_path).free
+        except OSError as e:
+            logger.warning("Impossibile verificare spazio disco %s: %s", check_path, e)
+            continue
+        if free < nbytes + min_free:
+            return False, (
+                f"{MSG_DISK_FULL} Servono circa {format_size(nbytes + min_free)} "
+                f"in {check_path}, liberi {format_size(free)}."
+            )
+    return True, ""
+
+
+class DiskBudget:
+    """Spazio previsto per filesystem durante un batch. Thread-safe.
+
+    Ogni job prenota la propria stima prima di partire e la rilascia alla fine: un job
+    viene ammesso solo se lo spazio libero, tolte le prenotazioni dei job in corso, basta
+    per la sua uscita. Prudente: i byte già scritti dai job in corso contano due volte
+    (nello spazio occupato e nella prenotazione) finché non terminano.
+    """
+
+    def __init__(self, min_free: int = MIN_FREE_BYTES) -> None:
+        self.min_free = min_free
+        self._reserved: dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    def reserve(self, path: Path | str, nbytes: int) -> bool:
+        """Prenota nbytes sul filesystem di path. False se non c'è spazio (nessuna prenotazione)."""
+        fs = _filesystem(path)
+        if fs is None:
+            return True
+        dev, check_path = fs
+        try:
+            free = shutil.disk_usage(check_path).free
+        except OSError as e:
+            logger.warning("Impossibile verificare spazio disco %s: %s", check_path, e)
+            return True  # In caso di errore check, procedi (evita blocchi)
+        with self._lock:
+            reserved = self._reserved.get(dev, 0)
+            if free - reserved - nbytes < self.min_free:
+                return False
+            self._reserved[dev] = reserved + nbytes
+        return True
+
+    def release(self, path: Path | str, nbytes: int) -> None:
+        """Rilascia una prenotazione (job terminato: la sua uscita è ora spazio occupato)."""
+        fs = _filesystem(path)
+        if fs is None:
+            return
+        with self._lock:
+            self._reserved[fs[0]] = max(0, self._reserved.get(fs[0], 0) - nbytes)
+
+    def wait_reserve(
+        self,
+        path: Path | str,
+        nbytes: int,
+        stop_check: Callable[[], bool] | None = None,
+        pause_callback: Callable[[str], None] | None = None,
+    ) -> bool:
+        """Prenota nbytes attendendo (coda in pausa) che si liberi spazio invece di fallire.
+
+        pause_callback riceve MSG_DISK_PAUSED all'inizio della pausa e "" alla ripresa.
+        Ritorna False se stop_check() diventa vero durante l'attesa.
+        """
+        paused = False
+        while not self.reserve(path, nbytes):
+            if not paused:
+                paused = True
+                logger.warning(
+                    "Spazio insufficiente in %s per %s: coda in pausa", path, format_size(nbytes)
+                )
+                if pause_callback:
+                    pause_callback(MSG_DISK_PAUSED)
+            deadline = time.monotonic() + DISK_PAUSE_POLL_SEC
+            while time.monotonic() < deadline:
+                if stop_check and stop_check():
+                    return False
+                time.sleep(0.2)
+        if paused:
+            logger.info("Spazio disponibile in %s: coda ripresa", path)
+            if pause_callback:
+                pause_callback("")
+        return True
+
+
 def is_disk_full_error(exc: BaseException) -> bool:
     """Verifica se l'eccezione indica spazio disco esaurito."""
     if isinstance(exc, OSError) and exc.errno == errno.ENOSPC:
@@ -0,0 +1,274 @@
+"""Monitoraggio cartelle: inotify (Linux) con ripiego su scansione periodica.
+
+Il watcher segnala quali file sono cambiati (o che serve una scansione completa);
+SettleTracker decide quando un file ha smesso di crescere ed è pronto da elaborare.
+"""
+
+import ctypes
+import errno
+import logging
+import os
+import select
+import struct
+import sys
+import time
+from collections.abc import Iterable
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Scansione completa: intervallo senza inotify (cartelle di rete, Windows, macOS) e,
+# con inotify, controllo di sicurezza per eventi persi
+POLL_INTERVAL_SEC = 5.0
+INOTIFY_RESCAN_SEC = 300.0
+
+# Un file è pronto quando size e mtime restano invariati per questo tempo
+DEFAULT_SETTLE_SEC = 5.0
+
+# File system di rete: inotify vede solo le modifiche fatte da questa macchina
+_NETWORK_FS = frozenset(
+    {"cifs", "smb3", "smbfs", "nfs", "nfs4", "9p", "afs", "ceph", "fuse.sshfs", "fuse.rclone"}
+)
+
+# inotify (linux/inotify.h)
+_IN_MODIFY = 0x00000002
+_IN_ATTRIB = 0x00000004
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE_SELF = 0x00000400
+_IN_MOVE_SELF = 0x00000800
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ONLYDIR = 0x01000000
+_IN_ISDIR = 0x40000000
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_WATCH_MASK = (
+    _IN_MODIFY
+    | _IN_ATTRIB
+    | _IN_CLOSE_WRITE
+    | _IN_MOVED_TO
+    | _IN_CREATE
+    | _IN_DELETE_SELF
+    | _IN_MOVE_SELF
+    | _IN_ONLYDIR
+)
+_EVENT_HEADER = struct.Struct("iIII")  # wd, mask, cookie, len
+_READ_SIZE = 64 * 1024
+
+
+def _stat(path: Path) -> tuple[int, int] | None:
+    """(size, mtime_ns) oppure None se il file non esiste."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+
+def is_network_fs(path: Path) -> bool:
+    """True se path sta su un file system di rete (Linux, da /proc/mounts)."""
+    try:
+        mounts = Path("/proc/mounts").read_text(encoding="utf-8", errors="replace")
+    except OSError:
+        return False
+    target = str(Path(path).resolve())
+    best, fstype = "", ""
+    for line in mounts.splitlines():
+        fields = line.split()
+        if len(fields) < 3:
+            continue
+        # Spazi nei mount point codificati in ottale (\040)
+        mount_point = fields[1].replace("\\040", " ")
+        inside = target == mount_point or target.startswith(mount_point.rstrip("/") + "/")
+        if inside and len(mount_point) > len(best):
+            best, fstype = mount_point, fields[2]
+    return fstype in _NETWORK_FS
+
+
+class PollingWatcher:
+    """Watcher di ripiego: chiede una scansione completa ogni interval secondi."""
+
+    kind = "polling"
+
+    def __init__(self, root: Path, interval: float = POLL_INTERVAL_SEC) -> None:
+        self.root = Path(root)
+        self._interval = interval
+        self._next_scan = 0.0  # Prima chiamata: scansione subito
+
+    def wait(self, timeout: float) -> set[Path] | None:
+        """Attende al massimo timeout secondi. None = scansione completa dovuta,
+        altrimenti i file cambiati (qui sempre vuoto)."""
+        remaining = self._next_scan - time.monotonic()
+        if remaining > 0:
+            if timeout <= 0:
+                return set()
+            time.sleep(min(timeout, remaining))
+            if time.monotonic() < self._next_scan:
+                return set()
+        self._next_scan = time.monotonic() + self._interval
+        return None
+
+    def close(self) -> None:
+        pass
+
+
+class InotifyWatcher(PollingWatcher):
+    """Watcher inotify ricorsivo (Linux). Eventi di modifica, creazione e spostamento in
+    arrivo diventano i file cambiati; coda piena o cartella rimossa → scansione completa."""
+
+    kind = "inotify"
+
+    def __init__(self, root: Path, rescan_interval: float = INOTIFY_RESCAN_SEC) -> None:
+        super().__init__(root, rescan_interval)
+        self._libc = ctypes.CDLL(None, use_errno=True)
+        fd = self._libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 fallita")
+        self._fd = fd
+        self._dirs: dict[int, Path] = {}
+        try:
+            self._watch_tree(self.root)
+        except OSError:
+            self.close()
+            raise
+
+    def _add_watch(self, folder: Path) -> None:
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(folder), _WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            if err == errno.ENOSPC:  # Limite max_user_watches raggiunto
+                raise OSError(err, f"Limite watch inotify raggiunto ({folder})")
+            logger.debug("Watch inotify non aggiunto %s: %s", folder, os.strerror(err))
+            return
+        self._dirs[wd] = folder
+
+    def _watch_tree(self, root: Path) -> None:
+        """Watch su root e sottocartelle (non nascoste, senza seguire i link)."""
+        stack = [root]
+        while stack:
+            folder = stack.pop()
+            self._add_watch(folder)
+            try:
+                with os.scandir(folder) as it:
+                    for entry in it:
+                        if not entry.name.startswith(".") and entry.is_dir(follow_symlinks=False):
+                            stack.append(Path(entry.path))
+            except OSError as e:
+                logger.debug("Cartella non leggibile %s: %s", folder, e)
+
+    def wait(self, timeout: float) -> set[Path] | None:
+        if time.monotonic() >= self._next_scan:
+            self._next_scan = time.monotonic() + self._interval
+            return None
+        timeout = max(0.0, min(timeout, self._next_scan - time.monotonic()))
+        try:
+            readable, _, _ = select.select([self._fd], [], [], timeout)
+        except InterruptedError:
+            return set()
+        if not readable:
+            return set()
+        try:
+            data = os.read(self._fd, _READ_SIZE)
+        except BlockingIOError:
+            return set()
+        changed: set[Path] = set()
+        rescan = False
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+            name_bytes = data[offset + _EVENT_HEADER.size : offset + _EVENT_HEADER.size + length]
+            offset += _EVENT_HEADER.size + length
+            if mask & _IN_Q_OVERFLOW:
+                rescan = True
+                continue
+            folder = self._dirs.get(wd)
+            if mask & _IN_IGNORED:
+                self._dirs.pop(wd, None)
+                continue
+            if folder is None:
+                continue
+            if mask & (_IN_DELETE_SELF | _IN_MOVE_SELF):
+                rescan = rescan or folder == self.root
+                continue
+            name = os.fsdecode(name_bytes.rstrip(b"\0"))
+            if not name or name.startswith("."):
+                continue
+            path = folder / name
+            if mask & _IN_ISDIR:
+                if mask & (_IN_CREATE | _IN_MOVED_TO):
+                    # Cartella nuova: watch e file già presenti (creati prima del watch)
+                    try:
+                        self._watch_tree(path)
+                    except OSError as e:
+                        logger.warning("%s: nuova scansione completa", e)
+                        rescan = True
+                    changed.update(p for p in path.rglob("*") if p.is_file())
+                continue
+            changed.add(path)
+        if rescan:
+            self._next_scan = time.monotonic() + self._interval
+            return None
+        return changed
+
+    def close(self) -> None:
+        if getattr(self, "_fd", -1) >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+def create_watcher(root: Path) -> PollingWatcher:
+    """inotify dove disponibile e affidabile, altrimenti scansione periodica."""
+    if sys.platform.startswith("linux") and not is_network_fs(root):
+        try:
+            return InotifyWatcher(root)
+        except (OSError, AttributeError) as e:
+            logger.info("inotify non disponibile per %s (%s): scansione periodica", root, e)
+    return PollingWatcher(root)
+
+
+class SettleTracker:
+    """File candidati in attesa che smettano di crescere (size e mtime stabili)."""
+
+    def __init__(self, settle_sec: float = DEFAULT_SETTLE_SEC) -> None:
+        self._settle = settle_sec
+        # path → (size, mtime_ns, istante dell'ultima modifica osservata)
+        self._files: dict[Path, tuple[int, int, float]] = {}
+
+    def __len__(self) -> int:
+        return len(self._files)
+
+    def __contains__(self, path: Path) -> bool:
+        return path in self._files
+
+    def add(self, paths: Iterable[Path], now: float | None = None) -> None:
+        """Aggiunge file candidati; per quelli già seguiti l'attesa riparte solo se size o
+        mtime sono cambiati (le scansioni periodiche ripetute non la azzerano)."""
+        now = time.monotonic() if now is None else now
+        for path in paths:
+            st = _stat(path)
+            if st is None:
+                continue
+            known = self._files.get(path)
+            if known is None or known[:2] != st:
+                self._files[path] = (*st, now)
+
+    def pop_ready(self, now: float | None = None) -> list[tuple[Path, tuple[int, int]]]:
+        """File stabili da almeno settle_sec, con la loro identità (size, mtime_ns).
+
+        Ogni file viene ricontrollato: se size o mtime sono cambiati l'attesa riparte,
+        se è sparito (spostato, rinominato a fine copia) viene dimenticato.
+        """
+        now = time.monotonic() if now is None else now
+        ready = []
+        for path, (size, mtime_ns, since) in list(self._files.items()):
+            st = _stat(path)
+            if st is None:
+                del self._files[path]
+            elif st != (size, mtime_ns):
+                self._files[path] = (*st, now)
+            elif now - since >= self._settle:
+                del self._files[path]
+                ready.append((path, st))
+        return ready
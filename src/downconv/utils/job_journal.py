@@ -0,0 +1,341 @@
+"""Journal dei batch (SQLite, WAL): stato di ogni job per riprendere dopo crash o riavvio.
+
+Ogni batch di conversione o download registra parametri e lista degli elementi; ogni job
+passa da pending a running a done/failed con un commit per transizione. Un batch rimasto
+"running" con il processo che lo eseguiva terminato è interrotto: all'avvio l'app propone
+di riprenderlo (solo elementi non completati) dopo aver rimosso le uscite parziali.
+"""
+
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import sys
+import threading
+import time
+from collections.abc import Iterable
+from pathlib import Path
+from typing import NamedTuple
+
+from .paths import get_data_dir
+
+logger = logging.getLogger(__name__)
+
+# Tipi di batch
+BATCH_CONVERT = "convert"
+BATCH_DOWNLOAD = "download"
+
+# Stato batch
+BATCH_RUNNING = "running"
+BATCH_DONE = "done"  # Terminato (anche con errori): niente da riprendere
+BATCH_CANCELLED = "cancelled"  # Annullato dall'utente
+BATCH_DISCARDED = "discarded"  # Interrotto, ripresa rifiutata
+
+# Stato job
+JOB_PENDING = "pending"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+# Batch conclusi conservati per questo tempo, poi rimossi
+JOURNAL_RETENTION_DAYS = 30
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS batches (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    params TEXT NOT NULL,
+    pid INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    finished_at REAL
+);
+CREATE TABLE IF NOT EXISTS jobs (
+    batch_id INTEGER NOT NULL REFERENCES batches(id) ON DELETE CASCADE,
+    item TEXT NOT NULL,
+    output_dir TEXT,
+    state TEXT NOT NULL,
+    outputs TEXT,
+    error TEXT,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (batch_id, item)
+);
+"""
+
+
+class BatchRecord(NamedTuple):
+    """Batch interrotto, come letto dal journal."""
+
+    id: int
+    kind: str
+    params: dict
+    created_at: float
+    total: int
+    remaining: int
+
+
+def get_journal_file() -> Path:
+    """File SQLite del journal batch."""
+    return get_data_dir() / "job_journal.sqlite3"
+
+
+def _pid_alive(pid: int) -> bool:
+    """True se il processo esiste ancora (batch in esecuzione altrove, es. un'altra istanza)."""
+    if pid == os.getpid():
+        return True
+    if sys.platform == "win32":
+        import ctypes
+
+        process_query_limited_information = 0x1000
+        still_active = 259
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(process_query_limited_information, False, pid)
+        if not handle:
+            return False
+        try:
+            code = ctypes.c_ulong()
+            ok = kernel32.GetExitCodeProcess(handle, ctypes.byref(code))
+            return bool(ok) and code.value == still_active
+        finally:
+            kernel32.CloseHandle(handle)
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    except OSError:
+        return False
+    return True
+
+
+def _remove_temp_leftovers(output: Path) -> int:
+    """Rimuove i temporanei dell'engine accanto a output (segmenti, pipe, stesso file)."""
+    removed = 0
+    parent = output.parent
+    if not parent.is_dir():
+        return 0
+    # Prefissi usati da FfmpegEngine: .{stem}_seg_*, .{stem}_pipe_* (cartelle), .{stem}_*
+    for leftover in parent.glob(f".{output.stem}_*"):
+        try:
+            if leftover.is_dir():
+                shutil.rmtree(leftover)
+            else:
+                leftover.unlink()
+            removed += 1
+        except OSError as e:
+            logger.debug("Temporaneo non rimosso %s: %s", leftover, e)
+    return removed
+
+
+class JobJournal:
+    """Journal persistente dei batch. Thread-safe; errori SQLite registrati e ignorati
+    (il journal non deve mai far fallire una conversione o un download)."""
+
+    def __init__(self, db_path: Path | None = None) -> None:
+        self._db_path = Path(db_path) if db_path else get_journal_file()
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+
+    def _connect(self) -> sqlite3.Connection | None:
+        """Apre la connessione al primo uso. None se il DB non è utilizzabile."""
+        if self._conn is not None:
+            return self._conn
+        try:
+            self._db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self._db_path), timeout=5, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        except sqlite3.Error as e:
+            logger.warning("Journal batch non disponibile (%s): %s", self._db_path, e)
+            return None
+        return self._conn
+
+    def _execute(self, sql: str, args: tuple = ()) -> list[tuple]:
+        """Esegue e committa. [] se il DB non è disponibile o la query fallisce."""
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return []
+            try:
+                rows = conn.execute(sql, args).fetchall()
+                conn.commit()
+                return rows
+            except sqlite3.Error as e:
+                logger.warning("Journal batch: query fallita: %s", e)
+                return []
+
+    def begin_batch(
+        self, kind: str, params: dict, items: Iterable[tuple[str, str | None]]
+    ) -> "JournalBatch | None":
+        """Registra un nuovo batch con i suoi elementi (item, cartella output o None)."""
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return None
+            try:
+                with conn:
+                    conn.execute(
+                        "DELETE FROM batches WHERE status != ? AND finished_at < ?",
+                        (BATCH_RUNNING, now - JOURNAL_RETENTION_DAYS * 86400),
+                    )
+                    cur = conn.execute(
+                        "INSERT INTO batches (kind, params, pid, status, created_at) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        (kind, json.dumps(params), os.getpid(), BATCH_RUNNING, now),
+                    )
+                    batch_id = cur.lastrowid
+                    conn.executemany(
+                        "INSERT OR IGNORE INTO jobs (batch_id, item, output_dir, state, "
+                        "updated_at) VALUES (?, ?, ?, ?, ?)",
+                        ((batch_id, item, out, JOB_PENDING, now) for item, out in items),
+                    )
+            except sqlite3.Error as e:
+                logger.warning("Journal batch: registrazione fallita: %s", e)
+                return None
+        return JournalBatch(self, batch_id)
+
+    def resume_batch(self, batch_id: int) -> "JournalBatch":
+        """Riprende un batch interrotto in questo processo: rimuove i parziali dei job
+        interrotti e rimette pending tutti i job non completati."""
+        self.cleanup_orphans(batch_id)
+        self._execute("UPDATE batches SET pid = ? WHERE id = ?", (os.getpid(), batch_id))
+        self._execute(
+            "UPDATE jobs SET state = ? WHERE batch_id = ? AND state != ?",
+            (JOB_PENDING, batch_id, JOB_DONE),
+        )
+        return JournalBatch(self, batch_id)
+
+    def set_job_state(
+        self,
+        batch_id: int,
+        item: str,
+        state: str,
+        outputs: list[Path] | None = None,
+        error: str = "",
+    ) -> None:
+        """Transizione di un job; outputs (uscite previste) sostituisce quelle registrate."""
+        if outputs is None:
+            self._execute(
+                "UPDATE jobs SET state = ?, error = ?, updated_at = ? "
+                "WHERE batch_id = ? AND item = ?",
+                (state, error, time.time(), batch_id, item),
+            )
+        else:
+            self._execute(
+                "UPDATE jobs SET state = ?, outputs = ?, error = ?, updated_at = ? "
+                "WHERE batch_id = ? AND item = ?",
+                (state, json.dumps([str(o) for o in outputs]), error, time.time(), batch_id, item),
+            )
+
+    def finish_batch(self, batch_id: int, status: str = BATCH_DONE) -> None:
+        self._execute(
+            "UPDATE batches SET status = ?, finished_at = ? WHERE id = ?",
+            (status, time.time(), batch_id),
+        )
+
+    def unfinished_batches(self) -> list[BatchRecord]:
+        """Batch interrotti (ancora running, processo terminato) con elementi da completare."""
+        rows = self._execute(
+            "SELECT b.id, b.kind, b.params, b.pid, b.created_at, COUNT(j.item), "
+            "SUM(j.state != ?) FROM batches b JOIN jobs j ON j.batch_id = b.id "
+            "WHERE b.status = ? GROUP BY b.id ORDER BY b.created_at",
+            (JOB_DONE, BATCH_RUNNING),
+        )
+        batches = []
+        for batch_id, kind, params, pid, created, total, remaining in rows:
+            if _pid_alive(pid):
+                continue
+            if not remaining:
+                self.finish_batch(batch_id)  # Crash dopo l'ultimo job: solo da chiudere
+                continue
+            batches.append(
+                BatchRecord(batch_id, kind, json.loads(params), created, total, remaining)
+            )
+        return batches
+
+    def remaining_items(self, batch_id: int) -> list[tuple[str, str | None]]:
+        """Elementi non completati (item, cartella output), nell'ordine originale."""
+        rows = self._execute(
+            "SELECT item, output_dir FROM jobs WHERE batch_id = ? AND state != ? ORDER BY rowid",
+            (batch_id, JOB_DONE),
+        )
+        return [(item, out) for item, out in rows]
+
+    def cleanup_orphans(self, batch_id: int) -> int:
+        """Rimuove uscite parziali e temporanei dei job interrotti a metà. Ritorna i file rimossi.
+
+        Le uscite dei job "running" al momento del crash sono incomplete (FFmpeg scriveva
+        direttamente sul file finale). I .part di yt-dlp restano: il download li riprende.
+        """
+        rows = self._execute(
+            "SELECT outputs, output_dir FROM jobs WHERE batch_id = ? AND state = ?",
+            (batch_id, JOB_RUNNING),
+        )
+        removed = 0
+        for outputs, output_dir in rows:
+            for out in json.loads(outputs) if outputs else []:
+                out = Path(out)
+                try:
+                    out.unlink()
+                    removed += 1
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    logger.warning("Uscita parziale non rimossa %s: %s", out, e)
+                removed += _remove_temp_leftovers(out)
+            if not outputs and output_dir and Path(output_dir).is_dir():
+                # Download: nome finale ignoto, restano i temporanei della codifica in pipe
+                for leftover in Path(output_dir).glob(".*_pipe_*"):
+                    shutil.rmtree(leftover, ignore_errors=True)
+                    removed += 1
+        if removed:
+            logger.info("Batch %d: rimossi %d file parziali o temporanei", batch_id, removed)
+        return removed
+
+    def discard_batch(self, batch_id: int) -> None:
+        """Ripresa rifiutata: pulisce i parziali e chiude il batch."""
+        self.cleanup_orphans(batch_id)
+        self.finish_batch(batch_id, BATCH_DISCARDED)
+
+    def close(self) -> None:
+        """Chiude la connessione (riaperta al prossimo uso)."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class JournalBatch:
+    """Batch attivo nel journal: i worker registrano qui le transizioni dei job."""
+
+    def __init__(self, journal: JobJournal, batch_id: int) -> None:
+        self.journal = journal
+        self.id = batch_id
+
+    def job_started(self, item: str, outputs: list[Path] | None = None) -> None:
+        self.journal.set_job_state(self.id, item, JOB_RUNNING, outputs or [])
+
+    def job_finished(self, item: str, ok: bool, error: str = "") -> None:
+        self.journal.set_job_state(self.id, item, JOB_DONE if ok else JOB_FAILED, error=error)
+
+    def finish(self, status: str = BATCH_DONE) -> None:
+        self.journal.finish_batch(self.id, status)
+
+
+_default_journal: JobJournal | None = None
+_default_journal_lock = threading.Lock()
+
+
+def get_job_journal() -> JobJournal:
+    """Journal condiviso dall'app (uno per processo)."""
+    global _default_journal
+    with _default_journal_lock:
+        if _default_journal is None:
+            _default_journal = JobJournal()
+        return _default_journal
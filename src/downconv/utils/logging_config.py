@@ -2,10 +2,13 @@
 
 import logging
 import os
-from logging.handlers import RotatingFileHandler
 
 from .paths import ensure_dirs, get_log_dir
 
+# Logger dei record di telemetria conversioni (una riga JSON per record, file dedicato)
+TELEMETRY_LOGGER = "downconv.telemetry"
+TELEMETRY_LOG_FILE = "telemetry.jsonl"
+
 
 def setup_logging(level: str | None = None) -> None:
     """Configura logging con RotatingFileHandler e console."""
@@ -15,10 +18,14 @@ def setup_logging(level: str | None = None) -> None:
 
     log_dir = get_log_dir()
     log_file = log_dir / "downconv.log"
+    # Import locale: logging.handlers (socket, pickle) non serve a chi non configura i log
+    from logging.handlers import RotatingFileHandler
+
     log_format = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
 
     root = logging.getLogger()
     root.setLevel(log_level)
+    setup_telemetry_logging()
 
     if root.handlers:
         return
@@ -39,3 +46,23 @@ def setup_logging(level: str | None = None) -> None:
     console.setLevel(log_level)
     console.setFormatter(logging.Formatter(log_format))
     root.addHandler(console)
+
+
+def setup_telemetry_logging() -> None:
+    """Log telemetria JSONL con rotazione accanto a downconv.log (non propaga al root)."""
+    telemetry = logging.getLogger(TELEMETRY_LOGGER)
+    if telemetry.handlers:
+        return
+    ensure_dirs()
+    from logging.handlers import RotatingFileHandler
+
+    handler = RotatingFileHandler(
+        get_log_dir() / TELEMETRY_LOG_FILE,
+        maxBytes=10 * 1024 * 1024,  # 10 MB
+        backupCount=3,
+        encoding="utf-8",
+    )
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    telemetry.addHandler(handler)
+    telemetry.setLevel(logging.INFO)
+    telemetry.propagate = False
@@ -0,0 +1,47 @@
+"""Scansione ricorsiva dei file media (os.scandir), senza dipendenze Qt (GUI e CLI)."""
+
+import logging
+import os
+from collections.abc import Callable, Iterable, Iterator
+from pathlib import Path
+
+from .config import MEDIA_EXTENSIONS
+
+logger = logging.getLogger(__name__)
+
+
+def iter_media_files(
+    root: Path,
+    extensions: Iterable[str] = MEDIA_EXTENSIONS,
+    stop_check: Callable[[], bool] | None = None,
+) -> Iterator[Path]:
+    """File media sotto root (ricorsivo, ordine alfabetico per cartella).
+
+    Visita iterativa con os.scandir (nessun limite di ricorsione, tipo dal dirent senza
+    stat aggiuntive). Salta file e cartelle nascosti (".", es. "._traccia.mp3" di macOS)
+    e non segue i link simbolici alle cartelle (evita cicli).
+    """
+    exts = {e.lower() for e in extensions}
+    stack = [Path(root)]
+    while stack:
+        if stop_check and stop_check():
+            return
+        folder = stack.pop()
+        try:
+            with os.scandir(folder) as it:
+                entries = sorted(it, key=lambda e: e.name.lower())
+        except OSError as e:
+            logger.debug("Cartella non leggibile %s: %s", folder, e)
+            continue
+        subdirs = []
+        for entry in entries:
+            if entry.name.startswith("."):
+                continue
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(Path(entry.path))
+                elif os.path.splitext(entry.name)[1].lower() in exts and entry.is_file():
+                    yield Path(entry.path)
+            except OSError:
+                continue
+        stack.extend(reversed(subdirs))
@@ -0,0 +1,246 @@
+"""Cache persistente metadata ffprobe (SQLite, LRU con limite dimensione)."""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import NamedTuple
+
+from .paths import get_data_dir
+
+logger = logging.getLogger(__name__)
+
+# Numero massimo voci in cache (oltre: eviction LRU delle meno usate)
+PROBE_CACHE_MAX_ENTRIES = 200_000
+# Secondi minimi tra due aggiornamenti di last_used della stessa voce (ordine LRU):
+# un hit non scrive sul DB a ogni lettura
+PROBE_TOUCH_INTERVAL_SEC = 3600.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS probe (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    duration REAL,
+    codec TEXT,
+    sample_rate INTEGER,
+    channels INTEGER,
+    bit_rate INTEGER,
+    format_name TEXT,
+    has_video INTEGER NOT NULL DEFAULT 0,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS probe_last_used ON probe(last_used);
+CREATE TABLE IF NOT EXISTS probe_failed (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS probe_failed_last_used ON probe_failed(last_used);
+"""
+
+
+class ProbeInfo(NamedTuple):
+    """Metadata audio di un file (primo stream audio + container)."""
+
+    duration: float | None
+    codec: str | None
+    sample_rate: int | None
+    channels: int | None
+    bit_rate: int | None
+    format_name: str | None = None
+    has_video: bool = False
+
+
+def get_probe_cache_file() -> Path:
+    """File SQLite della cache probe."""
+    return get_data_dir() / "probe_cache.sqlite3"
+
+
+def _file_key(path: Path) -> tuple[str, int, int] | None:
+    """Chiave (path assoluto, size, mtime_ns). None se il file non esiste."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return str(Path(path).resolve()), st.st_size, st.st_mtime_ns
+
+
+class ProbeCache:
+    """Cache (path, size, mtime_ns) → ProbeInfo su disco. Thread-safe.
+
+    Un file modificato (size o mtime diversi) invalida la voce. Le voci meno
+    usate di recente vengono rimosse quando si supera max_entries. Anche i probe
+    falliti (file senza audio o illeggibili) sono ricordati, con la stessa chiave:
+    is_known_failure() evita di rilanciare ffprobe su un file non cambiato.
+    """
+
+    def __init__(
+        self, db_path: Path | None = None, max_entries: int = PROBE_CACHE_MAX_ENTRIES
+    ) -> None:
+        self._db_path = Path(db_path) if db_path else get_probe_cache_file()
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+        self._puts_since_evict = 0
+
+    def _connect(self) -> sqlite3.Connection | None:
+        """Apre la connessione al primo uso. None se il DB non è utilizzabile."""
+        if self._conn is not None:
+            return self._conn
+        try:
+            self._db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self._db_path), timeout=5, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        except sqlite3.Error as e:
+            logger.warning("Cache probe non disponibile (%s): %s", self._db_path, e)
+            return None
+        return self._conn
+
+    def get(self, path: Path, touch: bool = True) -> ProbeInfo | None:
+        """ProbeInfo in cache se il file non è cambiato, altrimenti None.
+
+        touch=False: sola lettura (non aggiorna l'ordine LRU), per lookup dalla UI.
+        Con touch l'ordine LRU si aggiorna al più ogni PROBE_TOUCH_INTERVAL_SEC.
+        """
+        key = _file_key(path)
+        if key is None:
+            return None
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return None
+            try:
+                row = conn.execute(
+                    "SELECT size, mtime_ns, duration, codec, sample_rate, channels, bit_rate, "
+                    "format_name, has_video, last_used FROM probe WHERE path = ?",
+                    (key[0],),
+                ).fetchone()
+                if row is None or (row[0], row[1]) != key[1:]:
+                    return None
+                if touch and time.time() - row[9] >= PROBE_TOUCH_INTERVAL_SEC:
+                    conn.execute(
+                        "UPDATE probe SET last_used = ? WHERE path = ?", (time.time(), key[0])
+                    )
+                    conn.commit()
+            except sqlite3.Error as e:
+                logger.warning("Lettura cache probe fallita: %s", e)
+                return None
+        return ProbeInfo(
+            duration=row[2],
+            codec=row[3],
+            sample_rate=row[4],
+            channels=row[5],
+            bit_rate=row[6],
+            format_name=row[7],
+            has_video=bool(row[8]),
+        )
+
+    def is_known_failure(self, path: Path) -> bool:
+        """True se il probe del file, così com'è ora, è già fallito (put_failure)."""
+        key = _file_key(path)
+        if key is None:
+            return False
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return False
+            try:
+                row = conn.execute(
+                    "SELECT size, mtime_ns FROM probe_failed WHERE path = ?", (key[0],)
+                ).fetchone()
+            except sqlite3.Error as e:
+                logger.warning("Lettura cache probe fallita: %s", e)
+                return False
+        return row is not None and tuple(row) == key[1:]
+
+    def put(self, path: Path, info: ProbeInfo) -> None:
+        """Salva ProbeInfo per lo stato attuale del file."""
+        key = _file_key(path)
+        if key is None:
+            return
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return
+            try:
+                conn.execute("DELETE FROM probe_failed WHERE path = ?", (key[0],))
+                conn.execute(
+                    "INSERT OR REPLACE INTO probe (path, size, mtime_ns, duration, codec, "
+                    "sample_rate, channels, bit_rate, format_name, has_video, last_used) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (*key, *info[:6], int(info.has_video), time.time()),
+                )
+                conn.commit()
+                self._puts_since_evict += 1
+                # Eviction a blocchi: evita COUNT(*) a ogni inserimento
+                if self._puts_since_evict >= 256:
+                    self._puts_since_evict = 0
+                    self._evict(conn)
+            except sqlite3.Error as e:
+                logger.warning("Scrittura cache probe fallita: %s", e)
+
+    def put_failure(self, path: Path) -> None:
+        """Ricorda che il probe dello stato attuale del file è fallito (nessun audio)."""
+        key = _file_key(path)
+        if key is None:
+            return
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return
+            try:
+                conn.execute("DELETE FROM probe WHERE path = ?", (key[0],))
+                conn.execute(
+                    "INSERT OR REPLACE INTO probe_failed (path, size, mtime_ns, last_used) "
+                    "VALUES (?, ?, ?, ?)",
+                    (*key, time.time()),
+                )
+                conn.commit()
+                self._puts_since_evict += 1
+                if self._puts_since_evict >= 256:
+                    self._puts_since_evict = 0
+                    self._evict(conn)
+            except sqlite3.Error as e:
+                logger.warning("Scrittura cache probe fallita: %s", e)
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        """Rimuove le voci usate meno di recente oltre max_entries. Lock già acquisito."""
+        for table in ("probe", "probe_failed"):
+            (count,) = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()
+            excess = count - self._max_entries
+            if excess <= 0:
+                continue
+            conn.execute(
+                f"DELETE FROM {table} WHERE path IN "
+                f"(SELECT path FROM {table} ORDER BY last_used ASC LIMIT ?)",
+                (excess,),
+            )
+            conn.commit()
+            logger.debug("Cache probe: rimosse %d voci da %s (LRU)", excess, table)
+
+    def close(self) -> None:
+        """Chiude la connessione (riaperta al prossimo uso)."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_default_cache: ProbeCache | None = None
+_default_cache_lock = threading.Lock()
+
+
+def get_probe_cache() -> ProbeCache:
+    """Cache probe condivisa dall'app (una per processo)."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ProbeCache()
+        return _default_cache
@@ -0,0 +1,111 @@
+"""Indice dei file già elaborati dalla cartella monitorata (SQLite)."""
+
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from .paths import get_data_dir
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS processed (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    ok INTEGER NOT NULL,
+    error TEXT,
+    processed_at REAL NOT NULL
+);
+"""
+
+
+def get_watch_index_file() -> Path:
+    """File SQLite dell'indice cartella monitorata."""
+    return get_data_dir() / "watch_index.sqlite3"
+
+
+def _key(path: Path) -> str:
+    return str(Path(path).resolve())
+
+
+class WatchIndex:
+    """File elaborati con la loro identità (size, mtime_ns). Thread-safe.
+
+    Un file è già elaborato se è registrato con la stessa identità, anche se la
+    conversione è fallita: non viene ritentato finché non cambia (nuova copia).
+    """
+
+    def __init__(self, db_path: Path | None = None) -> None:
+        self._db_path = Path(db_path) if db_path else get_watch_index_file()
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+
+    def _connect(self) -> sqlite3.Connection | None:
+        """Apre la connessione al primo uso. None se il DB non è utilizzabile."""
+        if self._conn is not None:
+            return self._conn
+        try:
+            self._db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self._db_path), timeout=5, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        except sqlite3.Error as e:
+            logger.warning("Indice cartella monitorata non disponibile (%s): %s", self._db_path, e)
+            return None
+        return self._conn
+
+    def is_processed(self, path: Path, identity: tuple[int, int]) -> bool:
+        """True se path è già stato elaborato con questa identità (size, mtime_ns)."""
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return False
+            try:
+                row = conn.execute(
+                    "SELECT size, mtime_ns FROM processed WHERE path = ?", (_key(path),)
+                ).fetchone()
+            except sqlite3.Error as e:
+                logger.warning("Lettura indice cartella monitorata fallita: %s", e)
+                return False
+        return row is not None and tuple(row) == tuple(identity)
+
+    def record(self, path: Path, identity: tuple[int, int], ok: bool, error: str = "") -> None:
+        """Registra l'esito di un file (identità al momento in cui è stato accodato)."""
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return
+            try:
+                conn.execute(
+                    "INSERT OR REPLACE INTO processed (path, size, mtime_ns, ok, error, "
+                    "processed_at) VALUES (?, ?, ?, ?, ?, ?)",
+                    (_key(path), *identity, int(ok), error, time.time()),
+                )
+                conn.commit()
+            except sqlite3.Error as e:
+                logger.warning("Scrittura indice cartella monitorata fallita: %s", e)
+
+    def close(self) -> None:
+        """Chiude la connessione (riaperta al prossimo uso)."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_default_index: WatchIndex | None = None
+_default_index_lock = threading.Lock()
+
+
+def get_watch_index() -> WatchIndex:
+    """Indice condiviso dall'app (uno per processo)."""
+    global _default_index
+    with _default_index_lock:
+        if _default_index is None:
+            _default_index = WatchIndex()
+        return _default_index
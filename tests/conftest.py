@@ -0,0 +1,32 @@
+"""Fixture comuni: i test non scrivono nelle cartelle dati dell'utente."""
+
+from pathlib import Path
+
+import pytest
+
+from downconv.utils import conversion_manifest, job_journal, paths, probe_cache, watch_index
+
+
+@pytest.fixture(autouse=True)
+def isolated_app_dirs(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """Dati, configurazione e log dell'app in tmp_path (anche per i processi figli).
+
+    Cache ffprobe, manifest, journal, indice cartella monitorata e indice estrattori
+    finiscono qui invece che in ~/.local/share/DownConv; le istanze condivise sono
+    ricreate per ogni test.
+    """
+    app_dirs = tmp_path / "app-dirs"
+    for func, env in (
+        ("user_data_dir", "XDG_DATA_HOME"),
+        ("user_config_dir", "XDG_CONFIG_HOME"),
+        ("user_log_dir", "XDG_STATE_HOME"),
+    ):
+        target = app_dirs / env.lower()
+        monkeypatch.setattr(paths, func, lambda *_a, _t=target, **_k: str(_t))
+        monkeypatch.setenv(env, str(target))
+    monkeypatch.setenv("XDG_CACHE_HOME", str(app_dirs / "xdg_cache_home"))
+    monkeypatch.setattr(probe_cache, "_default_cache", None)
+    monkeypatch.setattr(job_journal, "_default_journal", None)
+    monkeypatch.setattr(conversion_manifest, "_default_manifest", None)
+    monkeypatch.setattr(watch_index, "_default_index", None)
+    return app_dirs / "xdg_data_home"
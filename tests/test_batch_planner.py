@@ -0,0 +1,128 @@
+"""Test pianificazione batch LPT (ordinamento e makespan stimato)."""
+
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+from downconv.engines.batch_planner import estimate_cost, plan_lpt, simulate_makespan
+from downconv.engines.ffmpeg_engine import SCHEDULE_LPT, FfmpegEngine, OutputTarget
+from downconv.utils.probe_cache import ProbeCache, ProbeInfo
+
+
+def test_lpt_puts_longest_job_first_and_shortens_makespan() -> None:
+    """Un file lungo in coda lascia worker fermi: LPT lo anticipa e riduce il makespan."""
+    costs = [1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 6.0]
+    ordered, makespan = plan_lpt(costs, lambda c: c, workers=2)
+    assert ordered[0] == 6.0
+    assert makespan == 6.0
+    assert simulate_makespan(costs, 2) == 9.0
+
+
+def test_estimate_cost_sums_encoders_and_discounts_stream_copy() -> None:
+    """Più formati sommano i costi encoder; il remux costa quasi solo I/O."""
+    assert estimate_cost(100, ["flac", "mp3"]) > estimate_cost(100, ["mp3"])
+    assert estimate_cost(100, ["mp3"], stream_copy=True) < estimate_cost(100, ["wav"])
+
+
+def test_convert_batch_lpt_submits_longest_first() -> None:
+    """schedule=LPT: ordine di conversione per durata probe, stima riportata prima dell'avvio."""
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = ProbeCache(Path(tmp) / "cache.sqlite3")
+        files = []
+        for name, duration in (("short", 60.0), ("set", 10800.0), ("mid", 300.0)):
+            f = Path(tmp) / f"{name}.wav"
+            f.write_bytes(b"x")
+            cache.put(f, ProbeInfo(duration, "pcm_s16le", 44100, 2, 1411200, "wav"))
+            files.append(f)
+        engine = FfmpegEngine(ffmpeg_path="ffmpeg", probe_cache=cache)
+        order: list[str] = []
+        estimates: list[float] = []
+
+        def fake_multi(inp, outputs, progress_callback=None, overwrite=True, **_kwargs):
+            order.append(Path(inp).stem)
+            return [(out, True, "") for out, _ in outputs]
+
+        with patch.object(engine, "convert_multi", side_effect=fake_multi):
+            results = engine.convert_batch(
+                files,
+                Path(tmp) / "out",
+                "mp3",
+                quality="320k",
+                max_workers=1,
+                schedule=SCHEDULE_LPT,
+                plan_callback=estimates.append,
+            )
+        assert order == ["set", "mid", "short"]
+        assert len(results) == 3 and all(ok for _, ok, _ in results)
+        assert len(estimates) == 1 and estimates[0] > 0
+
+
+def test_lpt_plan_uses_sizes_without_probing_uncached_files(tmp_path: Path) -> None:
+    """File non in cache: ordine dalla dimensione, nessun ffprobe durante la pianificazione."""
+    cache = ProbeCache(tmp_path / "cache.sqlite3")
+    files = []
+    for name, size in (("small", 1_000), ("big", 900_000), ("mid", 50_000)):
+        f = tmp_path / f"{name}.wav"
+        f.write_bytes(b"x" * size)
+        files.append(f)
+    engine = FfmpegEngine(ffmpeg_path="ffmpeg", probe_cache=cache)
+    with patch.object(engine, "probe", side_effect=AssertionError("probe in pianificazione")):
+        ordered, makespan = engine._plan_lpt(files, [OutputTarget("mp3", "320k")], 1)
+    assert [f.stem for f in ordered] == ["big", "mid", "small"]
+    assert makespan > 0
+
+
+def test_estimate_output_size_by_format_and_admission_per_filesystem(tmp_path: Path) -> None:
+    """Stima uscite da durata e formato; l'ammissione somma le stime sullo stesso disco."""
+    from downconv.engines.batch_planner import SIZE_ESTIMATE_MARGIN, estimate_output_size
+    from downconv.utils.disk_check import check_disk_space_for
+
+    assert estimate_output_size(60, "mp3", "320k") == int(60 * 40_000 * SIZE_ESTIMATE_MARGIN)
+    info = ProbeInfo(60.0, "pcm_s16le", 48000, 1, None)
+    assert estimate_output_size(60, "wav", info=info) == int(60 * 96_000 * SIZE_ESTIMATE_MARGIN)
+    assert estimate_output_size(60, "flac") < estimate_output_size(60, "wav")
+    assert estimate_output_size(60, "flac", input_size=1000, stream_copy=True) == 1100
+
+    usage = type("Usage", (), {"free": 300 * 1024 * 1024})()
+    needs = {tmp_path / "a": 150 * 1024 * 1024, tmp_path / "b" / "new": 150 * 1024 * 1024}
+    with patch("downconv.utils.disk_check.shutil.disk_usage", return_value=usage):
+        ok, msg = check_disk_space_for(needs)
+        assert not ok and "Servono circa" in msg
+        assert check_disk_space_for({tmp_path: 100 * 1024 * 1024})[0]
+
+
+def test_iter_convert_pauses_on_disk_headroom_instead_of_failing(tmp_path: Path) -> None:
+    """Spazio previsto esaurito: la coda va in pausa e riparte quando si libera spazio."""
+    from downconv.utils import disk_check
+
+    files = []
+    for i in range(3):
+        f = tmp_path / f"{i}.wav"
+        f.write_bytes(b"x" * 1000)
+        files.append(f)
+    free = {"bytes": 0}
+    events: list[str] = []
+
+    def on_pause(msg: str) -> None:
+        events.append(msg)
+        free["bytes"] = 10 * 1024**3  # L'utente libera spazio
+
+    def fake_usage(_path):
+        return type("Usage", (), {"free": free["bytes"]})()
+
+    def fake_multi(inp, outputs, progress_callback=None, overwrite=True, **_kwargs):
+        return [(out, True, "") for out, _ in outputs]
+
+    engine = FfmpegEngine("ffmpeg", probe_cache=ProbeCache(tmp_path / "cache.sqlite3"))
+    with (
+        patch.object(disk_check, "DISK_PAUSE_POLL_SEC", 0.01),
+        patch.object(disk_check.shutil, "disk_usage", side_effect=fake_usage),
+        patch.object(engine, "convert_multi", side_effect=fake_multi),
+    ):
+        results = list(
+            engine.iter_convert(
+                files, tmp_path / "out", "wav", max_workers=2, pause_callback=on_pause
+            )
+        )
+    assert events == [disk_check.MSG_DISK_PAUSED, ""]
+    assert len(results) == 3 and all(ok for _, ok, _ in results)
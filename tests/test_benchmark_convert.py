@@ -0,0 +1,32 @@
+"""Test confronto baseline di scripts/benchmark_convert.py."""
+
+import importlib.util
+from pathlib import Path
+
+_SCRIPT = Path(__file__).resolve().parent.parent / "scripts" / "benchmark_convert.py"
+
+
+def _load_benchmark():
+    spec = importlib.util.spec_from_file_location("benchmark_convert", _SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_compare_results_flags_only_regressions_beyond_threshold() -> None:
+    """Throughput in calo o RSS in crescita oltre soglia = regressione; casi nuovi ignorati."""
+    bench = _load_benchmark()
+    baseline = {
+        "batch/flac/w2": {"files_per_sec": 10.0, "audio_sec_per_sec": 300.0, "peak_rss_mb": 50},
+        "batch/mp3/w2": {"files_per_sec": 4.0, "audio_sec_per_sec": 120.0, "peak_rss_mb": 50},
+    }
+    current = {
+        "batch/flac/w2": {"files_per_sec": 9.0, "audio_sec_per_sec": 330.0, "peak_rss_mb": 70},
+        "batch/mp3/w2": {"files_per_sec": 3.0, "audio_sec_per_sec": 90.0, "peak_rss_mb": 50},
+        "batch/m4a/w2": {"files_per_sec": 0.1, "audio_sec_per_sec": 1.0, "peak_rss_mb": 999},
+    }
+    regressions = bench.compare_results(baseline, current, threshold=0.15)
+    assert len(regressions) == 3
+    assert any(r.startswith("batch/flac/w2: peak_rss_mb") for r in regressions)
+    assert sum(r.startswith("batch/mp3/w2") for r in regressions) == 2
+    assert not any("m4a" in r for r in regressions)
@@ -0,0 +1,60 @@
+"""Test CLI headless: niente Qt né yt-dlp all'avvio, eventi JSON e codici di uscita."""
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+from downconv.cli import EXIT_FAILED, EXIT_SETUP, main
+
+
+def test_convert_path_does_not_import_qt_or_ytdlp() -> None:
+    """Import della CLI e dei moduli della conversione senza PySide6 e yt_dlp."""
+    code = (
+        "import sys, downconv.cli, downconv.engines.ffmpeg_engine, downconv.utils.media_scan\n"
+        "print([m for m in sys.modules if m.startswith(('PySide6', 'yt_dlp'))])"
+    )
+    src = Path(__file__).resolve().parent.parent / "src"
+    out = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+        env={**os.environ, "PYTHONPATH": str(src)},
+    )
+    assert out.stdout.strip() == "[]"
+
+
+def test_convert_emits_json_lines_and_exit_code(tmp_path: Path, capsys) -> None:
+    """Cartella in input: sottocartelle riprodotte, un evento file per input, exit 1 se fallisce."""
+    src = tmp_path / "in"
+    (src / "album").mkdir(parents=True)
+    (src / "a.wav").write_bytes(b"a")
+    (src / "album" / "b.wav").write_bytes(b"b")
+    out = tmp_path / "out"
+
+    def fake_multi(inp, outputs, progress_callback=None, overwrite=True, **_kwargs):
+        return [(o, inp.stem == "a", "" if inp.stem == "a" else "errore") for o, _ in outputs]
+
+    with (
+        patch("downconv.engines.ffmpeg_engine.check_ffmpeg_available", return_value=True),
+        patch("downconv.engines.ffmpeg_engine.FfmpegEngine.convert_multi", side_effect=fake_multi),
+    ):
+        code = main(["convert", "-f", "flac", "--also", "mp3:192k", "-o", str(out), str(src)])
+    events = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert code == EXIT_FAILED
+    assert events[0] == {
+        "event": "start",
+        "command": "convert",
+        "total": 2,
+        "outputs": ["flac:lossless", "mp3:192k"],
+    }
+    files = {Path(e["input"]).name: e for e in events if e["event"] == "file"}
+    assert files["a.wav"]["ok"] is True and files["b.wav"]["ok"] is False
+    assert "errore" in files["b.wav"]["error"]
+    assert events[-1]["event"] == "done" and (events[-1]["ok"], events[-1]["failed"]) == (1, 1)
+    assert (out / "album").is_dir()
+
+    assert main(["convert", "-f", "flac", str(tmp_path / "missing")]) == EXIT_SETUP
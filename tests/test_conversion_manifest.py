@@ -0,0 +1,113 @@
+"""Test manifest conversioni incrementali e convert_batch(incremental=True)."""
+
+import os
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+from downconv.engines.ffmpeg_engine import (
+    SKIPPED_UP_TO_DATE,
+    FfmpegEngine,
+    OutputTarget,
+    _settings_key,
+)
+from downconv.utils.conversion_manifest import (
+    OUTPUT_FRESH,
+    OUTPUT_STALE,
+    OUTPUT_UNKNOWN,
+    ConversionManifest,
+)
+from downconv.utils.probe_cache import ProbeCache
+
+
+def test_status_tracks_input_settings_and_version() -> None:
+    """Aggiornata finché input, impostazioni e FFmpeg non cambiano."""
+    with tempfile.TemporaryDirectory() as tmp:
+        inp, out = Path(tmp) / "a.wav", Path(tmp) / "a.mp3"
+        inp.write_bytes(b"x" * 10)
+        out.write_bytes(b"y")
+        manifest = ConversionManifest(Path(tmp) / "m.sqlite3")
+        assert manifest.status(inp, out, "mp3|320k", "v7") == OUTPUT_UNKNOWN
+        manifest.record(inp, out, "mp3|320k", "v7")
+        assert manifest.status(inp, out, "mp3|320k", "v7") == OUTPUT_FRESH
+        assert manifest.status(inp, out, "mp3|192k", "v7") == OUTPUT_STALE
+        assert manifest.status(inp, out, "mp3|320k", "v8") == OUTPUT_STALE
+        inp.write_bytes(b"z" * 12)
+        assert manifest.status(inp, out, "mp3|320k", "v7") == OUTPUT_STALE
+
+
+def test_hash_keeps_touched_input_fresh() -> None:
+    """Con verify_hash un input solo "toccato" (mtime diverso, stesso contenuto) resta valido."""
+    with tempfile.TemporaryDirectory() as tmp:
+        inp, out = Path(tmp) / "a.wav", Path(tmp) / "a.flac"
+        inp.write_bytes(b"x" * 10)
+        out.write_bytes(b"y")
+        manifest = ConversionManifest(Path(tmp) / "m.sqlite3")
+        manifest.record(inp, out, "flac", "v7", with_hash=True)
+        os.utime(inp, ns=(1_000_000_000, 1_000_000_000))
+        assert manifest.status(inp, out, "flac", "v7") == OUTPUT_STALE
+        assert manifest.status(inp, out, "flac", "v7", verify_hash=True) == OUTPUT_FRESH
+
+
+def test_convert_batch_incremental_skips_up_to_date() -> None:
+    """Secondo run incrementale: nessuna conversione, esiti ok con SKIPPED_UP_TO_DATE."""
+    with tempfile.TemporaryDirectory() as tmp:
+        files = []
+        for name in ("a", "b"):
+            f = Path(tmp) / f"{name}.wav"
+            f.write_bytes(b"x")
+            files.append(f)
+        engine = FfmpegEngine(ffmpeg_path="ffmpeg", probe_cache=ProbeCache(Path(tmp) / "p.db"))
+        manifest = ConversionManifest(Path(tmp) / "m.sqlite3")
+        calls: list[Path] = []
+
+        def fake_multi(inp, outputs, progress_callback=None, overwrite=True, **_kwargs):
+            calls.append(Path(inp))
+            for out, _ in outputs:
+                Path(out).write_bytes(b"encoded")
+            return [(out, True, "") for out, _ in outputs]
+
+        def run() -> list[tuple[Path, bool, str]]:
+            return engine.convert_batch(
+                files, Path(tmp) / "out", "flac", incremental=True, manifest=manifest
+            )
+
+        with (
+            patch.object(engine, "convert_multi", side_effect=fake_multi),
+            patch.object(engine, "ffmpeg_version", return_value="ffmpeg version 7.0"),
+        ):
+            first = run()
+            second = run()
+            files[1].write_bytes(b"changed")
+            third = run()
+        assert [err for _, _, err in first] == ["", ""]
+        assert all(ok and err == SKIPPED_UP_TO_DATE for _, ok, err in second)
+        assert sorted(calls[:2]) == sorted(files)
+        assert len(calls) == 3 and calls[2] == files[1]
+        assert sum(err == SKIPPED_UP_TO_DATE for _, _, err in third) == 1
+
+
+def test_estimate_skips_fresh_outputs_and_nets_overwritten_files(tmp_path: Path) -> None:
+    """Stima spazio: uscite aggiornate a zero, sovrascritte solo per la differenza."""
+    inp = tmp_path / "a.wav"
+    inp.write_bytes(b"x" * 100_000)
+    out_dir = tmp_path / "out"
+    out_dir.mkdir()
+    out = out_dir / "a.flac"
+    engine = FfmpegEngine(ffmpeg_path="ffmpeg", probe_cache=ProbeCache(tmp_path / "p.db"))
+    manifest = ConversionManifest(tmp_path / "m.sqlite3")
+
+    def estimate(**kwargs) -> int:
+        with patch.object(engine, "ffmpeg_version", return_value="ffmpeg version 7.0"):
+            needs = engine.estimate_output_bytes(
+                [inp], out_dir, "flac", manifest=manifest, **kwargs
+            )
+        return needs[out_dir]
+
+    full = estimate()
+    assert full > 0
+    out.write_bytes(b"y" * 30_000)
+    assert estimate() == full - 30_000  # Sovrascritta: conta solo la crescita
+    assert estimate(overwrite=False) == 0  # Esistente e non sovrascritta
+    manifest.record(inp, out, _settings_key(OutputTarget("flac")), "ffmpeg version 7.0")
+    assert estimate(incremental=True) == 0  # Run incrementale senza nulla da fare
@@ -1,12 +1,15 @@
 """Test DownloadQueueWorker con mock."""
 
 import tempfile
+from functools import partial
 from pathlib import Path
 from unittest.mock import MagicMock, patch
 
 from PySide6.QtCore import QCoreApplication, QEventLoop
 
+from downconv.engines.ytdlp_engine import YtdlpEngine
 from downconv.services.download_queue_service import DownloadQueueWorker
+from downconv.utils.job_journal import JobJournal
 
 
 def _ensure_app() -> QCoreApplication:
@@ -17,6 +20,21 @@ def _ensure_app() -> QCoreApplication:
     return app
 
 
+def _tmp_journal(tmp: str):
+    """Journal del worker nella cartella temporanea del test (mai quello dell'utente)."""
+    journal = JobJournal(Path(tmp) / "job_journal.sqlite3")
+    return journal, patch(
+        "downconv.services.download_queue_service.get_job_journal", return_value=journal
+    )
+
+
+def _mock_engine() -> MagicMock:
+    """Engine finto: download simulato, coda parallela vera (iter_download)."""
+    instance = MagicMock()
+    instance.iter_download = partial(YtdlpEngine.iter_download, instance)
+    return instance
+
+
 @patch("downconv.services.download_queue_service.check_output_writable")
 @patch("downconv.services.download_queue_service.check_disk_space")
 @patch("downconv.services.download_queue_service.YtdlpEngine")
@@ -29,11 +47,12 @@ def test_worker_success(
     _ensure_app()
     mock_writable.return_value = (True, "")
     mock_disk.return_value = (True, "")
-    instance = MagicMock()
+    instance = _mock_engine()
     instance.download.return_value = (True, "")
     mock_engine_class.return_value = instance
 
     with tempfile.TemporaryDirectory() as tmp:
+        journal, journal_patch = _tmp_journal(tmp)
         worker = DownloadQueueWorker(["https://youtube.com/watch?v=x"], Path(tmp))
         result: list[tuple] = []
         loop = QEventLoop()
@@ -42,9 +61,13 @@ def test_worker_success(
             result.append((s, m, f))
             loop.quit()
 
-        worker.finished.connect(on_fin)
-        worker.start()
-        loop.exec()
+        with journal_patch:
+            worker.finished.connect(on_fin)
+            worker.start()
+            loop.exec()
+            worker.wait()
+        assert journal.unfinished_batches() == []
+        journal.close()
 
     assert len(result) == 1
     assert result[0][0] is True
@@ -67,6 +90,7 @@ def test_worker_disk_error(
     mock_engine_class.download = MagicMock()  # non chiamato
 
     with tempfile.TemporaryDirectory() as tmp:
+        journal, journal_patch = _tmp_journal(tmp)
         worker = DownloadQueueWorker(["https://youtube.com/watch?v=x"], Path(tmp))
         result: list[tuple] = []
         loop = QEventLoop()
@@ -75,9 +99,12 @@ def test_worker_disk_error(
             result.append((s, m, f))
             loop.quit()
 
-        worker.finished.connect(on_fin)
-        worker.start()
-        loop.exec()
+        with journal_patch:
+            worker.finished.connect(on_fin)
+            worker.start()
+            loop.exec()
+            worker.wait()
+        journal.close()
 
     assert len(result) == 1
     assert result[0][0] is False
@@ -98,14 +125,15 @@ def test_worker_partial_failure(
     _ensure_app()
     mock_writable.return_value = (True, "")
     mock_disk.return_value = (True, "")
-    instance = MagicMock()
-    instance.download.side_effect = [
-        (True, ""),
-        (False, "Video non disponibile"),
-    ]
+    instance = _mock_engine()
+    # Per URL: in parallelo l'ordine delle chiamate non è quello della coda
+    instance.download.side_effect = lambda url, *_a, **_k: (
+        (False, "Video non disponibile") if url.endswith("fail") else (True, "")
+    )
     mock_engine_class.return_value = instance
 
     with tempfile.TemporaryDirectory() as tmp:
+        journal, journal_patch = _tmp_journal(tmp)
         worker = DownloadQueueWorker(
             ["https://youtube.com/watch?v=ok", "https://youtube.com/watch?v=fail"],
             Path(tmp),
@@ -117,11 +145,63 @@ def test_worker_partial_failure(
             result.append((s, m, f))
             loop.quit()
 
-        worker.finished.connect(on_fin)
-        worker.start()
-        loop.exec()
+        with journal_patch:
+            worker.finished.connect(on_fin)
+            worker.start()
+            loop.exec()
+            worker.wait()
+        assert journal.unfinished_batches() == []
+        journal.close()
 
     assert len(result) == 1
     assert result[0][0] is False
     assert "Video non disponibile" in result[0][1]
     assert result[0][2] == ["https://youtube.com/watch?v=fail"]
+
+
+@patch("downconv.services.download_queue_service.get_job_journal")
+@patch("downconv.services.download_queue_service.check_output_writable")
+@patch("downconv.services.download_queue_service.check_disk_space")
+@patch("downconv.services.download_queue_service.YtdlpEngine")
+def test_worker_expands_playlist(
+    mock_engine_class: MagicMock,
+    mock_disk: MagicMock,
+    mock_writable: MagicMock,
+    mock_journal: MagicMock,
+) -> None:
+    """Playlist: un download per elemento, totale aggiornato, journal per URL inserito."""
+    _ensure_app()
+    mock_writable.return_value = (True, "")
+    mock_disk.return_value = (True, "")
+    playlist = "https://www.youtube.com/playlist?list=PL1"
+    entries = [f"https://www.youtube.com/watch?v={i}" for i in range(3)]
+    instance = _mock_engine()
+    instance.iter_entries.side_effect = lambda url, stop_check=None: iter(
+        [(u, u) for u in entries] if url == playlist else [(url, url)]
+    )
+    instance.download.side_effect = lambda url, *_a, **_k: (
+        (False, "Video non disponibile") if url == entries[1] else (True, "")
+    )
+    mock_engine_class.return_value = instance
+    batch = mock_journal.return_value.begin_batch.return_value
+
+    with tempfile.TemporaryDirectory() as tmp:
+        worker = DownloadQueueWorker([playlist], Path(tmp), expand_playlists=True)
+        result: list[tuple] = []
+        totals: list[int] = []
+        loop = QEventLoop()
+
+        def on_fin(s: bool, m: str, f: list) -> None:
+            result.append((s, m, f))
+            loop.quit()
+
+        worker.progress.connect(lambda _c, total, _s: totals.append(total))
+        worker.finished.connect(on_fin)
+        worker.start()
+        loop.exec()
+        worker.wait()
+
+    assert result == [(False, "Video non disponibile", [entries[1]])]
+    assert totals[0] == 1 and totals[-1] == 3
+    batch.job_started.assert_called_once_with(playlist)
+    batch.job_finished.assert_called_once_with(playlist, False, "Video non disponibile")
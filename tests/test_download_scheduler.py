@@ -0,0 +1,86 @@
+"""Test coda download parallela: limiti globale, per host e per sito."""
+
+import threading
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+from downconv.engines.download_scheduler import DownloadScheduler, host_key, site_key
+from downconv.engines.ytdlp_engine import YtdlpEngine
+
+
+def test_site_key_groups_hosts_of_same_service() -> None:
+    """Sottodomini, alias e domini nazionali finiscono sullo stesso sito."""
+    assert site_key("https://www.youtube.com/watch?v=x") == "youtube"
+    assert site_key("https://youtu.be/x") == "youtube"
+    assert site_key("https://artista.bandcamp.com/album/y") == "bandcamp"
+    assert site_key("https://www.bbc.co.uk/sounds/play/z") == "bbc"
+    assert host_key("https://M.SoundCloud.com/a") == "m.soundcloud.com"
+    assert host_key("non un url") == ""
+
+
+def test_scheduler_caps_skip_to_other_sites() -> None:
+    """Sito al limite: i suoi URL aspettano, quelli di altri siti dietro partono."""
+    urls = [f"https://www.youtube.com/watch?v={i}" for i in range(4)] + [
+        "https://a.bandcamp.com/t/1",
+        "https://b.bandcamp.com/t/2",
+        "https://c.bandcamp.com/t/3",
+        "https://vimeo.com/1",
+    ]
+    sched = DownloadScheduler(urls, max_parallel=6, per_host=3, site_limits={"bandcamp": 2})
+    first = sched.take_ready()
+    assert first == urls[:3] + urls[4:6] + [urls[7]]
+    assert sched.take_ready() == []  # Globale pieno
+    sched.finish(urls[4])
+    assert sched.take_ready() == [urls[6]]  # Posto bandcamp libero, youtube ancora al limite
+    sched.finish(urls[0])
+    assert sched.take_ready() == [urls[3]]
+    assert sched.pending == 0 and sched.active == 6
+
+
+def test_iter_download_runs_in_parallel_within_limits(tmp_path: Path) -> None:
+    """Più URL contemporanei, mai oltre il limite per host; tutti i risultati restituiti."""
+    running: dict[str, int] = {}
+    peak: dict[str, int] = {}
+    lock = threading.Lock()
+
+    def fake_download(url, output_dir, **_kwargs):
+        host = host_key(url)
+        with lock:
+            running[host] = running.get(host, 0) + 1
+            peak[host] = max(peak.get(host, 0), running[host])
+        time.sleep(0.05)
+        with lock:
+            running[host] -= 1
+        return (not url.endswith("bad"), "errore" if url.endswith("bad") else "")
+
+    urls = [f"https://www.youtube.com/watch?v={i}" for i in range(6)]
+    urls += [f"https://soundcloud.com/a/{i}" for i in range(3)] + ["https://vimeo.com/bad"]
+    engine = YtdlpEngine()
+    with patch.object(engine, "download", side_effect=fake_download):
+        started = time.monotonic()
+        results = list(engine.iter_download(urls, tmp_path, max_parallel=5, per_host=2))
+        elapsed = time.monotonic() - started
+
+    assert sorted(u for u, _, _ in results) == sorted(urls)
+    assert [u for u, ok, _ in results if not ok] == ["https://vimeo.com/bad"]
+    assert peak["www.youtube.com"] == 2 and max(peak.values()) <= 2
+    assert elapsed < 0.05 * len(urls) * 0.8  # Ben sotto il tempo sequenziale
+
+
+def test_iter_download_stop_starts_nothing_new(tmp_path: Path) -> None:
+    """Dopo stop_check non partono altri URL; quelli in corso vengono attesi."""
+    stop = threading.Event()
+    calls: list[str] = []
+
+    def fake_download(url, output_dir, **_kwargs):
+        calls.append(url)
+        stop.set()
+        time.sleep(0.05)
+        return True, ""
+
+    urls = [f"https://example{i}.org/v" for i in range(8)]
+    engine = YtdlpEngine()
+    with patch.object(engine, "download", side_effect=fake_download):
+        results = list(engine.iter_download(urls, tmp_path, max_parallel=2, stop_check=stop.is_set))
+    assert len(results) == len(calls) <= 2
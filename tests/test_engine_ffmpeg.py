@@ -51,3 +51,214 @@ def test_convert_batch_nonexistent_fails() -> None:
         assert result[0][0] == Path("/nonexistent/input.flac")
         assert result[0][1] is False
         assert isinstance(result[0][2], str)
+
+
+def test_parse_probe_json_ignores_cover_art() -> None:
+    """Copertina (attached_pic) non conta come video; bitrate dallo stream audio."""
+    from downconv.engines.ffmpeg_engine import _parse_probe_json
+
+    data = {
+        "streams": [
+            {
+                "codec_type": "audio",
+                "codec_name": "mp3",
+                "sample_rate": "44100",
+                "channels": 2,
+                "bit_rate": "320000",
+            },
+            {"codec_type": "video", "codec_name": "mjpeg", "disposition": {"attached_pic": 1}},
+        ],
+        "format": {"duration": "12.5", "format_name": "mp3", "bit_rate": "330000"},
+    }
+    info = _parse_probe_json(data)
+    assert info is not None
+    assert info.codec == "mp3"
+    assert info.bit_rate == 320000
+    assert info.duration == 12.5
+    assert info.has_video is False
+
+
+def test_parse_progress_and_duration_lines() -> None:
+    """Righe -progress (µs) e header Duration convertite in secondi."""
+    from downconv.engines.ffmpeg_engine import _parse_duration_line, _parse_progress_time
+
+    assert _parse_progress_time("out_time_us", "1500000") == 1.5
+    assert _parse_progress_time("out_time_ms", "N/A") is None
+    assert _parse_progress_time("progress", "continue") is None
+    line = "  Duration: 01:02:03.50, start: 0.000000, bitrate: 1411 kb/s"
+    assert _parse_duration_line(line) == 3723.5
+    assert _parse_duration_line("Stream #0:0: Audio: pcm_s16le") is None
+
+
+def test_can_stream_copy_plans_remux_only_for_matching_codec() -> None:
+    """Stream copy solo se codec (e bitrate per MP3) coincidono col target."""
+    from downconv.engines.ffmpeg_engine import can_stream_copy
+    from downconv.utils.probe_cache import ProbeInfo
+
+    flac = ProbeInfo(10.0, "flac", 44100, 2, 900000, "flac")
+    alac_video = ProbeInfo(10.0, "alac", 48000, 2, 1200000, "mov,mp4,m4a", has_video=True)
+    mp3_320 = ProbeInfo(10.0, "mp3", 44100, 2, 320000, "mp3")
+    assert can_stream_copy(flac, "flac", "lossless")
+    assert not can_stream_copy(flac, "mp3", "320k")
+    assert can_stream_copy(alac_video, "m4a", "lossless")
+    assert can_stream_copy(mp3_320, "mp3", "320k")
+    assert not can_stream_copy(mp3_320, "mp3", "192k")
+    assert not can_stream_copy(None, "flac", "lossless")
+
+
+def test_convert_probes_only_when_remux_possible(tmp_path: Path) -> None:
+    """Input che non può contenere il codec target: un solo processo, niente ffprobe."""
+    from unittest.mock import patch
+
+    from downconv.engines.ffmpeg_engine import needs_probe
+    from downconv.utils.probe_cache import ProbeCache
+
+    assert needs_probe(Path("a.flac"), "flac")
+    assert needs_probe(Path("a.mkv"), "mp3")
+    assert needs_probe(Path("a.senza_estensione_nota"), "mp3")
+    assert not needs_probe(Path("a.wav"), "mp3")
+    assert not needs_probe(Path("a.ogg"), "m4a")
+    assert needs_probe(Path("a.wav"), "m4a", segment=True)
+
+    engine = FfmpegEngine("ffmpeg", probe_cache=ProbeCache(tmp_path / "p.db"))
+    src = tmp_path / "in.wav"
+    src.write_bytes(b"x")
+    with (
+        patch.object(engine, "probe") as probe,
+        patch("downconv.engines.ffmpeg_engine._run_ffmpeg_quiet", return_value=(0, "")) as run,
+    ):
+        ok, _ = engine.convert(src, tmp_path / "out.mp3", "mp3", "320k")
+    assert ok
+    probe.assert_not_called()
+    run.assert_called_once()
+
+
+def test_plan_segments_on_encoder_frame_boundaries() -> None:
+    """Segmenti contigui, multipli del frame ALAC, solo file lunghi e sorgenti adatte."""
+    from downconv.engines.ffmpeg_engine import can_segment, plan_segments
+    from downconv.utils.probe_cache import ProbeInfo
+
+    segments = plan_segments(1200.0, 44100, 4096, 4)
+    assert len(segments) == 4
+    assert segments[0][0] == 0 and segments[-1][1] is None
+    for (_, end), (start, _) in zip(segments, segments[1:], strict=False):
+        assert end == start and start % 4096 == 0
+    assert plan_segments(150.0, 44100, 4096, 8) == []
+    assert plan_segments(1200.0, 44100, 4096, 1) == []
+
+    long_wav = ProbeInfo(1800.0, "pcm_s16le", 44100, 2, 1411200, "wav")
+    assert can_segment(long_wav, "m4a")
+    assert can_segment(long_wav, "flac")
+    assert can_segment(long_wav, "mp3")
+    assert not can_segment(long_wav._replace(sample_rate=96000), "mp3")  # Ricampionato
+    assert not can_segment(long_wav._replace(codec="pcm_f32le"), "flac")
+    assert not can_segment(long_wav._replace(duration=60.0), "m4a")
+    assert not can_segment(ProbeInfo(1800.0, "mp3", 44100, 2, 320000, "mp3"), "m4a")
+
+
+def test_convert_multi_single_process_for_all_outputs(tmp_path: Path) -> None:
+    """Più formati: un solo processo FFmpeg con una uscita per formato."""
+    from unittest.mock import patch
+
+    from downconv.engines.ffmpeg_engine import OutputTarget
+
+    engine = FfmpegEngine("ffmpeg")
+    src = tmp_path / "in.wav"
+    src.write_bytes(b"")
+    outputs = [
+        (tmp_path / "in.flac", OutputTarget("flac")),
+        (tmp_path / "in.mp3", OutputTarget("mp3", "320k")),
+    ]
+    with (
+        patch.object(engine, "probe", return_value=None),
+        patch("downconv.engines.ffmpeg_engine._run_ffmpeg_quiet", return_value=(0, "")) as run,
+    ):
+        results = engine.convert_multi(src, outputs)
+    run.assert_called_once()
+    cmd = run.call_args[0][0]
+    assert cmd.count("-i") == 1
+    assert str(tmp_path / "in.flac") in cmd and str(tmp_path / "in.mp3") in cmd
+    assert [ok for _, ok, _ in results] == [True, True]
+
+
+@pytest.mark.skipif(__import__("sys").platform == "win32", reason="FFmpeg finto via script sh")
+def test_cancel_kills_running_ffmpeg_and_removes_partials(tmp_path: Path) -> None:
+    """cancel(): processi terminati subito, output parziali rimossi, nessun esito per i file."""
+    import threading
+    import time
+    from unittest.mock import patch
+
+    fake = tmp_path / "ffmpeg"
+    # FFmpeg finto: crea l'output (ultimo argomento) e resta appeso
+    fake.write_text('#!/bin/sh\nfor a; do out="$a"; done\necho partial > "$out"\nexec sleep 30\n')
+    fake.chmod(0o755)
+    files = []
+    for name in ("a", "b", "c"):
+        f = tmp_path / f"{name}.wav"
+        f.write_bytes(b"x")
+        files.append(f)
+    out_dir = tmp_path / "out"
+    engine = FfmpegEngine(str(fake))
+    results: list = []
+    with patch.object(engine, "probe", return_value=None):
+        t = threading.Thread(
+            target=lambda: results.extend(
+                engine.convert_batch(files, out_dir, "flac", max_workers=2)
+            )
+        )
+        t.start()
+        time.sleep(0.5)
+        start = time.monotonic()
+        engine.cancel()
+        t.join(timeout=5)
+    assert not t.is_alive()
+    assert time.monotonic() - start < 1.5
+    assert results == []
+    assert list(out_dir.iterdir()) == []
+
+
+def test_iter_convert_consumes_inputs_lazily(tmp_path: Path) -> None:
+    """Streaming: input letti solo per riempire la finestra, cartelle create al bisogno."""
+    from unittest.mock import patch
+
+    consumed: list[int] = []
+
+    def inputs():
+        for i in range(10_000):
+            consumed.append(i)
+            yield (tmp_path / f"{i}.wav", tmp_path / f"out{i}")
+
+    def fake_multi(inp, outputs, progress_callback=None, overwrite=True, **_kwargs):
+        return [(out, True, "") for out, _ in outputs]
+
+    engine = FfmpegEngine("ffmpeg")
+    with patch.object(engine, "convert_multi", side_effect=fake_multi):
+        gen = engine.iter_convert(inputs(), tmp_path, "flac", max_workers=2)
+        first = next(gen)
+        assert first[1] is True
+        assert len(consumed) <= 4
+        assert len(list(tmp_path.glob("out*"))) <= 4
+        gen.close()
+
+
+@pytest.mark.skipif(not __import__("shutil").which("ffmpeg"), reason="FFmpeg non in PATH")
+def test_encode_stream_writes_only_final_file(tmp_path: Path) -> None:
+    """encode_stream codifica i blocchi da stdin: in cartella resta solo l'uscita finale."""
+    import subprocess
+
+    engine = FfmpegEngine()
+    src = subprocess.run(
+        [engine.ffmpeg_path, "-loglevel", "error", "-f", "lavfi", "-i", "sine=d=2"]
+        + ["-c:a", "libopus", "-f", "ogg", "pipe:1"],
+        capture_output=True,
+        check=True,
+    ).stdout
+    out_dir = tmp_path / "out"
+    chunks = (src[i : i + 4096] for i in range(0, len(src), 4096))
+    ok, msg = engine.encode_stream(chunks, out_dir / "song", "flac")
+    assert ok, msg
+    assert [p.name for p in out_dir.iterdir()] == ["song.flac"]
+
+    ok, msg = engine.encode_stream(iter([b"not audio"]), out_dir / "bad", "mp3")
+    assert not ok and msg
+    assert [p.name for p in out_dir.iterdir()] == ["song.flac"]
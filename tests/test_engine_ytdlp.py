@@ -4,6 +4,8 @@ import tempfile
 from pathlib import Path
 from unittest.mock import MagicMock, patch
 
+import pytest
+
 from downconv.engines.ytdlp_engine import YtdlpEngine, is_url_supported
 
 
@@ -126,3 +128,154 @@ def test_get_best_video_format_returns_bestvideo() -> None:
     assert "bestvideo" in fmt
     assert "bestaudio" in fmt
     assert post is None
+
+
+def test_pipe_streaming_only_for_sequential_single_formats() -> None:
+    """Streaming download→encoder solo per FLAC/WAV/MP3 da container leggibili in sequenza."""
+    from downconv.engines.ytdlp_engine import is_pipe_streamable, pipe_target
+
+    mp3 = [{"key": "FFmpegExtractAudio", "preferredcodec": "mp3", "preferredquality": "320"}]
+    assert pipe_target(mp3) == ("mp3", "320k")
+    assert pipe_target([{"key": "FFmpegExtractAudio", "preferredcodec": "flac"}]) == (
+        "flac",
+        "lossless",
+    )
+    assert pipe_target([{"key": "FFmpegExtractAudio", "preferredcodec": "m4a"}]) is None
+    assert pipe_target(None) is None
+
+    base = {"url": "https://cdn.example/a", "protocol": "https"}
+    assert is_pipe_streamable({**base, "ext": "webm"}, "flac")
+    assert is_pipe_streamable({**base, "ext": "m4a", "container": "m4a_dash"}, "flac")
+    assert not is_pipe_streamable({**base, "ext": "mp4"}, "flac")  # moov in coda
+    assert not is_pipe_streamable({**base, "ext": "flac"}, "flac")
+    assert not is_pipe_streamable({**base, "ext": "webm", "protocol": "m3u8_native"}, "mp3")
+    assert not is_pipe_streamable({**base, "ext": "webm", "requested_formats": [{}]}, "mp3")
+
+
+def test_iter_http_chunks_follows_range_requests() -> None:
+    """Richieste Range consecutive fino al totale di Content-Range, progress in stile yt-dlp."""
+    from downconv.engines import ytdlp_engine
+
+    data = bytes(range(256)) * 10
+    ranges = []
+
+    def urlopen(req):
+        start, end = map(int, req.headers["Range"].removeprefix("bytes=").split("-"))
+        ranges.append(start)
+        body = data[start : end + 1]
+        resp = MagicMock(status=206, headers={"Content-Range": f"bytes {start}-/{len(data)}"})
+        blocks = [body[i : i + 100] for i in range(0, len(body), 100)] + [b""]
+        resp.read.side_effect = blocks
+        return resp
+
+    ydl = MagicMock()
+    ydl.urlopen.side_effect = urlopen
+    events = []
+    with patch.object(ytdlp_engine, "HTTP_CHUNK_SIZE", 1000):
+        chunks = list(
+            ytdlp_engine._iter_http_chunks(ydl, {"url": "https://x/a.webm"}, events.append)
+        )
+    assert b"".join(chunks) == data
+    assert ranges == [0, 1000, 2000]
+    assert events[-1]["status"] == "finished"
+    assert events[-2]["_percent_str"].strip() == "100.0%"
+
+
+def test_iter_http_chunks_resumes_after_network_error() -> None:
+    """Connessione caduta a metà: ripresa con Range dall'ultimo byte, entro retries."""
+    from yt_dlp.networking.exceptions import TransportError
+
+    from downconv.engines import ytdlp_engine
+
+    data = bytes(range(256)) * 8
+    ranges = []
+
+    def urlopen(req):
+        start = int(req.headers["Range"].removeprefix("bytes=").split("-")[0])
+        ranges.append(start)
+        resp = MagicMock(status=206, headers={"Content-Range": f"bytes {start}-/{len(data)}"})
+        body = data[start:]
+        if len(ranges) == 1:  # Primo tentativo: 300 byte poi errore di rete
+            resp.read.side_effect = [body[:300], TransportError("connection reset")]
+        else:
+            resp.read.side_effect = [body, b""]
+        return resp
+
+    ydl = MagicMock(params={"retries": 2})
+    ydl.urlopen.side_effect = urlopen
+    with patch.object(ytdlp_engine, "HTTP_RETRY_BACKOFF_SEC", 0):
+        chunks = list(ytdlp_engine._iter_http_chunks(ydl, {"url": "https://x/a.webm"}))
+        assert b"".join(chunks) == data
+        assert ranges == [0, 300]
+
+        ydl = MagicMock(params={"retries": 1})
+        ydl.urlopen.side_effect = TransportError("offline")
+        with pytest.raises(TransportError):
+            list(ytdlp_engine._iter_http_chunks(ydl, {"url": "https://x/a.webm"}))
+        assert ydl.urlopen.call_count == 2
+
+
+def test_streamed_download_uses_owner_engine_and_stops_on_cancel(tmp_path: Path) -> None:
+    """Codifica in streaming con l'FfmpegEngine passato: cancel() non ripiega sul classico."""
+    from downconv.engines.ffmpeg_engine import FfmpegEngine
+    from downconv.engines.ytdlp_engine import MSG_CANCELLED
+
+    ffmpeg = FfmpegEngine("ffmpeg")
+    engine = YtdlpEngine(ffmpeg=ffmpeg)
+    assert engine.ffmpeg is ffmpeg
+    ydl = MagicMock()
+    ydl.prepare_filename.return_value = str(tmp_path / "a.webm")
+    info = {"url": "https://cdn.example/a.webm"}
+
+    def encode(*_args, **_kwargs):
+        engine.cancel()
+        return False, MSG_CANCELLED
+
+    with patch.object(ffmpeg, "encode_stream", side_effect=encode) as encode_stream:
+        result = engine._download_streamed(ydl, info, ("flac", "lossless"), None, True)
+    encode_stream.assert_called_once()
+    assert result == (False, MSG_CANCELLED)
+    assert ffmpeg.cancelled
+
+
+@patch("yt_dlp.YoutubeDL")
+def test_download_falls_back_when_container_not_streamable(mock_ydl_class: MagicMock) -> None:
+    """MP4 non frammentato: nessuno streaming, download classico dalla stessa estrazione."""
+    info = {"url": "https://cdn.example/a.mp4", "protocol": "https", "ext": "mp4"}
+    mock_instance = MagicMock()
+    mock_instance.extract_info.return_value = info
+    mock_ydl_class.return_value.__enter__.return_value = mock_instance
+    post = [{"key": "FFmpegExtractAudio", "preferredcodec": "flac"}]
+
+    engine = YtdlpEngine()
+    with tempfile.TemporaryDirectory() as tmp:
+        ok, msg = engine.download("https://example.com/v", Path(tmp), postprocessors=post)
+    assert ok and msg == ""
+    mock_instance.extract_info.assert_called_once()
+    mock_instance.process_ie_result.assert_called_once_with(info, download=True)
+    assert mock_ydl_class.call_args_list[-1][0][0]["postprocessors"] == post
+
+
+@patch("yt_dlp.YoutubeDL")
+def test_download_optimal_extracts_once(mock_ydl_class: MagicMock) -> None:
+    """Ottimale: formato scelto dall'estrattore sulla stessa estrazione del download."""
+    from downconv.engines.ytdlp_engine import FORMAT_OPTIMAL_AUDIO
+
+    raw = {"_type": "video", "extractor": "bandcamp", "id": "x"}
+    processed = {**raw, "url": "https://cdn.example/a.flac", "ext": "flac"}
+    mock_instance = MagicMock(params={})
+    mock_instance.extract_info.return_value = raw
+    mock_instance.process_ie_result.side_effect = [processed, None]
+    mock_ydl_class.return_value.__enter__.return_value = mock_instance
+
+    engine = YtdlpEngine(stream_encode=False)
+    with tempfile.TemporaryDirectory() as tmp:
+        ok, msg = engine.download("https://a.bandcamp.com/track/x", Path(tmp), FORMAT_OPTIMAL_AUDIO)
+    assert ok and msg == ""
+    mock_instance.extract_info.assert_called_once_with(
+        "https://a.bandcamp.com/track/x", download=False, process=False
+    )
+    mock_instance.download.assert_not_called()
+    assert mock_instance.params["format"].startswith("bestaudio[ext=flac]")
+    mock_instance.build_format_selector.assert_called_once_with(mock_instance.params["format"])
+    assert mock_instance.process_ie_result.call_args_list[-1][0] == (processed,)
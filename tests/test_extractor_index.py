@@ -0,0 +1,88 @@
+"""Test indice estrattori yt-dlp (senza rete)."""
+
+from pathlib import Path
+from unittest.mock import patch
+
+from downconv.engines.extractor_index import (
+    ExtractorIndex,
+    _extractor_classes,
+    _required_literals,
+    get_extractor_index,
+)
+
+URLS = [
+    "https://www.youtube.com/watch?v=dQw4w9WgXcQ",
+    "https://youtu.be/dQw4w9WgXcQ",
+    "https://music.youtube.com/playlist?list=OLAK5uy_m4xAFdmMC5rX3Ji3g93pQe3hqLZw_9LhM",
+    "https://www.youtube.com/@channel/videos",
+    "https://soundcloud.com/artist/track-name",
+    "https://artist.bandcamp.com/album/some-album",
+    "https://vimeo.com/76979871",
+    "https://www.dailymotion.com/video/x5kesuj",
+    "https://www.twitch.tv/videos/6528877",
+    "https://example.com/not-a-video",
+    "https://www.bbc.co.uk/programmes/b039g8p7",
+]
+
+
+def _scan(extractors: list, url: str) -> str | None:
+    """Riconoscimento classico: primo suitable() su tutti gli estrattori."""
+    for ie in extractors:
+        if ie.suitable(url):
+            return ie.ie_key()
+    return None
+
+
+def test_required_literals_from_regex() -> None:
+    """Letterali obbligatori: il più lungo della sequenza, tutte le alternative di un ramo."""
+    import re._parser as sre_parse
+
+    def lits(pattern: str) -> set[str] | None:
+        return _required_literals(sre_parse.parse(pattern))
+
+    assert lits(r"https?://(?:www\.)?example\.com/v/(?P<id>\d+)") == {"example.com/v/"}
+    assert lits(r"https?://(?:foo\.tv|bar\.com)/(?P<id>\w+)") == {"foo.tv", "bar.com"}
+    assert lits(r"https?://[yY][oO][uU]tube\.com/") == {"://youtube.com/"}
+    assert lits(r"(?:https?://)?[^/]+/(?P<id>\w+)") is None  # Nessun letterale: sempre candidato
+
+
+def test_index_matches_full_extractor_scan(tmp_path: Path) -> None:
+    """Stesso estrattore della scansione completa; dopo salvataggio e ricarica pure."""
+    extractors = _extractor_classes()
+    index = ExtractorIndex.build(extractors)
+    expected = [_scan(extractors, u) for u in URLS]
+    assert expected[0] == "Youtube" and expected[-2] is None
+    assert [index.match(u) for u in URLS] == expected
+
+    path = tmp_path / "index.json"
+    index.save(path, "2026.01.01")
+    loaded = ExtractorIndex.load(path, extractors, "2026.01.01")
+    assert loaded is not None
+    assert [loaded.match(u) for u in URLS] == expected
+
+
+def test_index_rebuilt_when_ytdlp_changes(tmp_path: Path) -> None:
+    """Versione di yt-dlp o elenco estrattori diversi, file illeggibile: si ricostruisce."""
+    extractors = _extractor_classes()
+    path = tmp_path / "index.json"
+    ExtractorIndex.build(extractors).save(path, "2026.01.01")
+    assert ExtractorIndex.load(path, extractors, "2026.02.01") is None
+    assert ExtractorIndex.load(path, extractors[:-1], "2026.01.01") is None
+    path.write_text("{non json", encoding="utf-8")
+    assert ExtractorIndex.load(path, extractors, "2026.01.01") is None
+    assert ExtractorIndex.load(tmp_path / "missing.json", extractors, "2026.01.01") is None
+
+
+def test_without_regex_parser_falls_back_to_full_scan(tmp_path: Path) -> None:
+    """Senza re._parser: stesso esito della scansione completa, nessun indice salvato."""
+    extractors = _extractor_classes()
+    path = tmp_path / "index.json"
+    with (
+        patch("downconv.engines.extractor_index.sre_parse", None),
+        patch("downconv.engines.extractor_index._index", None),
+    ):
+        index = get_extractor_index(path)
+    assert not index.indexed
+    assert [index.match(u) for u in URLS] == [_scan(extractors, u) for u in URLS]
+    assert not path.exists()
+    assert ExtractorIndex.build(extractors).indexed
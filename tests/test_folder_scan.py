@@ -0,0 +1,54 @@
+"""Test scansione cartelle (iter_media_files, FolderScanWorker)."""
+
+from pathlib import Path
+
+from PySide6.QtCore import QCoreApplication, QEventLoop
+
+from downconv.services.folder_scan_service import FolderScanWorker
+from downconv.utils.media_scan import iter_media_files
+
+
+def _ensure_app() -> QCoreApplication:
+    """Garantisce QCoreApplication per QThread e slots."""
+    app = QCoreApplication.instance()
+    if app is None:
+        app = QCoreApplication([])
+    return app
+
+
+def _make_tree(root: Path) -> None:
+    (root / "Album" / "CD2").mkdir(parents=True)
+    (root / ".hidden").mkdir()
+    for rel in ("a.flac", "Album/01.MP3", "Album/cover.jpg", "Album/CD2/02.wav", "._x.mp3"):
+        (root / rel).write_bytes(b"x")
+    (root / ".hidden" / "b.flac").write_bytes(b"x")
+
+
+def test_iter_media_files_recursive_by_extension(tmp_path: Path) -> None:
+    """Ricorsivo, estensioni case-insensitive, nascosti e non media esclusi."""
+    _make_tree(tmp_path)
+    found = [p.relative_to(tmp_path).as_posix() for p in iter_media_files(tmp_path)]
+    assert found == ["a.flac", "Album/01.MP3", "Album/CD2/02.wav"]
+
+
+def test_folder_scan_worker_streams_batches(tmp_path: Path) -> None:
+    """Il worker invia i file a blocchi e a fine scansione il totale."""
+    _ensure_app()
+    _make_tree(tmp_path)
+    worker = FolderScanWorker([tmp_path])
+    found: list[str] = []
+    result: list[tuple[int, bool]] = []
+    loop = QEventLoop()
+
+    def on_fin(count: int, cancelled: bool) -> None:
+        result.append((count, cancelled))
+        loop.quit()
+
+    worker.files_found.connect(lambda batch: found.extend(p for p, _ in batch))
+    worker.finished.connect(on_fin)
+    worker.start()
+    loop.exec()
+    worker.wait()
+
+    assert result == [(3, False)]
+    assert len(found) == 3
@@ -0,0 +1,72 @@
+"""Test journal dei batch (ripresa dopo crash) e integrazione con iter_convert."""
+
+from pathlib import Path
+from unittest.mock import patch
+
+from downconv.engines.ffmpeg_engine import FfmpegEngine
+from downconv.utils.job_journal import (
+    BATCH_CONVERT,
+    BATCH_DONE,
+    BATCH_DOWNLOAD,
+    JobJournal,
+)
+
+
+def _crash(journal: JobJournal) -> None:
+    """Chiude il DB come alla terminazione del processo (connessione persa a metà batch)."""
+    journal.close()
+
+
+def test_interrupted_batch_resumes_only_unfinished_and_removes_partials(tmp_path: Path) -> None:
+    """Job completati saltati; uscita parziale e temporanei del job in corso rimossi."""
+    journal = JobJournal(tmp_path / "j.sqlite3")
+    items = [(str(tmp_path / f"{n}.wav"), None) for n in "abc"]
+    batch = journal.begin_batch(BATCH_CONVERT, {"output_format": "flac"}, items)
+    partial = tmp_path / "b.flac"
+    segments = tmp_path / ".b_seg_123"
+    batch.job_started(items[0][0], [tmp_path / "a.flac"])
+    (tmp_path / "a.flac").write_bytes(b"ok")
+    batch.job_finished(items[0][0], True)
+    batch.job_started(items[1][0], [partial])
+    partial.write_bytes(b"half")
+    segments.mkdir()
+    _crash(journal)
+
+    with patch("downconv.utils.job_journal._pid_alive", return_value=False):
+        pending = journal.unfinished_batches()
+    assert [(r.kind, r.total, r.remaining) for r in pending] == [(BATCH_CONVERT, 3, 2)]
+    assert pending[0].params == {"output_format": "flac"}
+    assert [i for i, _ in journal.remaining_items(pending[0].id)] == [items[1][0], items[2][0]]
+
+    journal.resume_batch(pending[0].id)
+    assert not partial.exists() and not segments.exists()
+    assert (tmp_path / "a.flac").exists()
+
+
+def test_running_or_completed_batches_are_not_offered(tmp_path: Path) -> None:
+    """Batch di un processo vivo o con tutti i job completati: niente da riprendere."""
+    journal = JobJournal(tmp_path / "j.sqlite3")
+    live = journal.begin_batch(BATCH_DOWNLOAD, {}, [("https://x/1", str(tmp_path))])
+    assert journal.unfinished_batches() == []  # Stesso processo: ancora in esecuzione
+    live.job_started("https://x/1")
+    live.job_finished("https://x/1", True)
+    with patch("downconv.utils.job_journal._pid_alive", return_value=False):
+        assert journal.unfinished_batches() == []
+    status = journal._execute("SELECT status FROM batches WHERE id = ?", (live.id,))
+    assert status == [(BATCH_DONE,)]
+
+
+def test_iter_convert_records_job_transitions(tmp_path: Path) -> None:
+    """iter_convert registra running/done per ogni input del batch."""
+    journal = JobJournal(tmp_path / "j.sqlite3")
+    inputs = [tmp_path / "a.wav", tmp_path / "b.wav"]
+    batch = journal.begin_batch(BATCH_CONVERT, {}, [(str(p), None) for p in inputs])
+
+    def fake_multi(inp, outputs, progress_callback=None, overwrite=True, **_kwargs):
+        return [(out, inp.stem == "a", "" if inp.stem == "a" else "errore") for out, _ in outputs]
+
+    engine = FfmpegEngine("ffmpeg")
+    with patch.object(engine, "convert_multi", side_effect=fake_multi):
+        list(engine.iter_convert(inputs, tmp_path / "out", "flac", max_workers=1, journal=batch))
+    rows = journal._execute("SELECT item, state, error FROM jobs ORDER BY rowid")
+    assert rows == [(str(inputs[0]), "done", ""), (str(inputs[1]), "failed", "errore")]
@@ -0,0 +1,136 @@
+"""Test job server: API JSON, stato coda, stream eventi, annullamento, controlli accesso."""
+
+import http.client
+import json
+import threading
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from downconv.server import JOB_CANCELLED, JOB_DONE, JOB_FAILED, JobServer
+
+
+@pytest.fixture
+def server():
+    """Server su porta libera con FFmpeg finto; convert_multi controllato dal test."""
+    release = threading.Event()
+    release.set()
+
+    def fake_multi(inp, outputs, progress_callback=None, overwrite=True, **_kwargs):
+        release.wait(5)
+        return [(o, True, "") for o, _ in outputs]
+
+    srv = JobServer("127.0.0.1", 0, token="segreto")
+    srv.release = release
+    thread = threading.Thread(target=srv.serve, daemon=True)
+    with (
+        patch("downconv.engines.ffmpeg_engine.check_ffmpeg_available", return_value=True),
+        patch("downconv.engines.ffmpeg_engine.FfmpegEngine.convert_multi", side_effect=fake_multi),
+    ):
+        thread.start()
+        yield srv
+        release.set()
+        srv.shutdown()
+        thread.join(10)
+
+
+def _request(srv, method, path, body=None, headers=None):
+    conn = http.client.HTTPConnection(*srv.server_address[:2], timeout=10)
+    hdrs = {"Authorization": "Bearer segreto", "Content-Type": "application/json"}
+    conn.request(
+        method, path, json.dumps(body) if body is not None else None, hdrs | (headers or {})
+    )
+    resp = conn.getresponse()
+    data = resp.read().decode()
+    conn.close()
+    return resp.status, data
+
+
+def _wait_state(srv, job_id, state):
+    """Segue /events finché il job non arriva nello stato indicato; ritorna gli eventi visti."""
+    conn = http.client.HTTPConnection(*srv.server_address[:2], timeout=10)
+    conn.request("GET", f"/events?job={job_id}", headers={"Authorization": "Bearer segreto"})
+    resp = conn.getresponse()
+    events = []
+    while True:
+        event = json.loads(resp.readline())
+        events.append(event)
+        if event["event"] == "state" and event["state"] == state:
+            conn.close()
+            return events
+
+
+def _media(tmp_path: Path, names) -> Path:
+    src = tmp_path / "in"
+    src.mkdir()
+    for name in names:
+        (src / name).write_bytes(b"x")
+    return src
+
+
+def test_submit_streams_events_and_exposes_queue_state(server, tmp_path: Path) -> None:
+    """Job di conversione via POST: eventi in streaming, stato e conteggi in /jobs."""
+    src = _media(tmp_path, ["a.wav", "b.flac"])
+    job = {"kind": "convert", "inputs": [str(src)], "format": "mp3", "output_dir": str(tmp_path)}
+    status, body = _request(server, "POST", "/jobs", job)
+    assert status == 202
+    job_id = json.loads(body)["id"]
+
+    events = _wait_state(server, job_id, JOB_DONE)
+    kinds = [e["event"] for e in events]
+    assert kinds[:3] == ["queued", "state", "start"] and kinds.count("file") == 2
+    assert [e["seq"] for e in events] == sorted(e["seq"] for e in events)
+    status, body = _request(server, "GET", f"/jobs/{job_id}")
+    state = json.loads(body)
+    assert (state["state"], state["total"], state["done"]) == (JOB_DONE, 2, 2)
+    assert state["counts"] == {"ok": 2, "failed": 0, "skipped": 0}
+
+    _, body = _request(
+        server, "POST", "/jobs", {"kind": "convert", "inputs": ["/x"], "format": "flac"}
+    )
+    _wait_state(server, json.loads(body)["id"], JOB_FAILED)  # Nessun file: non avviabile
+    _, body = _request(server, "GET", "/health")
+    assert json.loads(body)["states"] == {JOB_DONE: 1, JOB_FAILED: 1}
+
+
+def test_invalid_jobs_and_access_are_rejected(server) -> None:
+    """Spec non valide → 400; token, Host e Content-Type verificati."""
+    bad = {"kind": "convert", "inputs": ["/x"], "format": "ogg"}
+    assert _request(server, "POST", "/jobs", bad)[0] == 400
+    assert _request(server, "POST", "/jobs", {"kind": "encode"})[0] == 400
+    convert = {"kind": "convert", "inputs": ["/x"], "format": "mp3"}
+    download = {"kind": "download", "urls": ["https://x"], "output_dir": "/x"}
+    for base, fields in (
+        (convert, {"overwrite": "false"}),
+        (convert, {"incremental": "false"}),
+        (convert, {"quality": 5}),
+        (convert, {"output_dir": 5}),
+        (convert, {"jobs": True}),
+        (download, {"parallel": True}),
+        (download, {"stream_encode": 0}),
+        (download, {"video": 720}),
+    ):
+        assert _request(server, "POST", "/jobs", {**base, **fields})[0] == 400, fields
+    assert _request(server, "GET", "/jobs", headers={"Authorization": "Bearer no"})[0] == 401
+    assert _request(server, "GET", "/jobs", headers={"Host": "evil.example"})[0] == 403
+    form = {"Content-Type": "application/x-www-form-urlencoded"}
+    assert _request(server, "POST", "/jobs", {"kind": "convert"}, headers=form)[0] == 415
+
+
+def test_cancel_queued_and_running_jobs(server, tmp_path: Path) -> None:
+    """DELETE annulla un job in coda subito e uno in corso senza avviare altri file."""
+    server.release.clear()
+    src = _media(tmp_path, ["a.wav", "b.wav", "c.wav"])
+    job = {"kind": "convert", "inputs": [str(src)], "format": "flac", "jobs": 1}
+    first = json.loads(_request(server, "POST", "/jobs", job)[1])["id"]
+    second = json.loads(_request(server, "POST", "/jobs", job)[1])["id"]
+
+    status, body = _request(server, "DELETE", f"/jobs/{second}")
+    assert status == 200 and json.loads(body)["state"] == JOB_CANCELLED
+    _request(server, "DELETE", f"/jobs/{first}")
+    server.release.set()
+    _wait_state(server, first, JOB_CANCELLED)
+    state = json.loads(_request(server, "GET", f"/jobs/{first}")[1])
+    assert state["done"] < 3
+    assert _request(server, "DELETE", f"/jobs/{first}")[0] == 409
@@ -0,0 +1,114 @@
+"""Test espansione playlist e canali nella coda download (senza rete)."""
+
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from downconv.engines.playlist_feed import FEED_AHEAD, MSG_EMPTY_PLAYLIST
+from downconv.engines.ytdlp_engine import YtdlpEngine
+
+PLAYLIST = "https://www.youtube.com/playlist?list=PL1"
+
+
+def _video(i: int) -> dict:
+    return {
+        "_type": "url",
+        "ie_key": "Youtube",
+        "id": f"v{i:010d}",
+        "url": f"https://www.youtube.com/watch?v=v{i:010d}",
+    }
+
+
+def test_iter_entries_flat_lazy_and_nested(tmp_path: Path) -> None:
+    """Estrazione flat non processata, elementi letti su richiesta, schede del canale espanse."""
+    pulled = []
+
+    def entries(n: int):
+        for i in range(n):
+            pulled.append(i)
+            yield _video(i)
+
+    channel = {
+        "_type": "playlist",
+        "entries": iter([{"_type": "url", "ie_key": "YoutubeTab", "url": PLAYLIST}]),
+    }
+    ydl = MagicMock()
+    ydl.extract_info.side_effect = [channel, {"_type": "playlist", "entries": entries(5000)}]
+
+    @contextmanager
+    def session(opts, hook=None):
+        assert opts["extract_flat"] == "in_playlist"
+        yield ydl
+
+    engine = YtdlpEngine()
+    with patch.object(engine._sessions, "session", side_effect=session):
+        gen = engine.iter_entries("https://www.youtube.com/@canale")
+        first = [next(gen) for _ in range(3)]
+        gen.close()
+    assert first[0] == (_video(0)["url"], "Youtube:v0000000000")
+    assert len(pulled) == 3  # Nessun elenco da 5000 materializzato
+    assert [c.kwargs["process"] for c in ydl.extract_info.call_args_list] == [False, False]
+    assert ydl.extract_info.call_args_list[1].args == (PLAYLIST,)
+
+    # URL di un singolo video: nessuna estrazione
+    single = "https://youtu.be/dQw4w9WgXcQ"
+    assert list(engine.iter_entries(single)) == [(single, "Youtube:dQw4w9WgXcQ")]
+
+
+def test_iter_download_expands_while_downloading(tmp_path: Path) -> None:
+    """Download avviati mentre l'elenco è in lettura; duplicati scaricati una volta."""
+    total = 200
+    pulled = 0
+    started_at_pull: list[int] = []
+    lock = threading.Lock()
+
+    def fake_entries(url, stop_check=None):
+        nonlocal pulled
+        if url == PLAYLIST:
+            for i in range(total):
+                pulled += 1
+                yield _video(i)["url"], f"Youtube:{i}"
+        elif url.endswith("bad"):
+            raise RuntimeError("elenco illeggibile")
+        elif url.endswith("empty"):
+            return
+        else:
+            yield url, "Youtube:0"  # Già nella playlist
+
+    def fake_download(url, output_dir, **_kwargs):
+        with lock:
+            started_at_pull.append(pulled)
+        time.sleep(0.001)
+        return True, ""
+
+    sources = [PLAYLIST, "https://youtu.be/dup", "https://a.example/bad", "https://a.example/empty"]
+    discovered: list[tuple[str, str]] = []
+    expanded: list[tuple[str, int, str]] = []
+    engine = YtdlpEngine()
+    with (
+        patch.object(engine, "iter_entries", side_effect=fake_entries),
+        patch.object(engine, "download", side_effect=fake_download),
+    ):
+        results = list(
+            engine.iter_download(
+                sources,
+                tmp_path,
+                max_parallel=4,
+                per_host=4,
+                expand_playlists=True,
+                on_discover=lambda s, u: discovered.append((s, u)),
+                on_expanded=lambda s, n, e: expanded.append((s, n, e)),
+            )
+        )
+
+    ok = [u for u, good, _ in results if good]
+    assert sorted(ok) == sorted(_video(i)["url"] for i in range(total))
+    assert len(discovered) == total and {s for s, _ in discovered} == {PLAYLIST}
+    # Elenco letto solo poco avanti ai download (contropressione FEED_AHEAD)
+    assert max(p - k for k, p in enumerate(started_at_pull)) <= FEED_AHEAD + 4 + 2
+    assert [(s, n) for s, n, _ in expanded] == [(s, n) for s, n in zip(sources, [total, 0, 0, 0])]
+    failed = {u: err for u, good, err in results if not good}
+    assert set(failed) == {sources[2], sources[3]}
+    assert failed[sources[3]] == MSG_EMPTY_PLAYLIST
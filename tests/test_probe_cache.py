@@ -0,0 +1,107 @@
+"""Test ProbeCache (cache persistente metadata ffprobe)."""
+
+import os
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+from downconv.engines.ffmpeg_engine import probe_media
+from downconv.utils.probe_cache import ProbeCache, ProbeInfo
+
+_INFO = ProbeInfo(
+    duration=201.5,
+    codec="flac",
+    sample_rate=44100,
+    channels=2,
+    bit_rate=900000,
+    format_name="flac",
+)
+
+
+def test_put_get_roundtrip() -> None:
+    """Voce salvata viene riletta identica (anche da nuova istanza)."""
+    with tempfile.TemporaryDirectory() as tmp:
+        media = Path(tmp) / "a.flac"
+        media.write_bytes(b"x" * 10)
+        db = Path(tmp) / "cache.sqlite3"
+        cache = ProbeCache(db)
+        cache.put(media, _INFO)
+        cache.close()
+        assert ProbeCache(db).get(media) == _INFO
+
+
+def test_modified_file_invalidates_entry() -> None:
+    """File modificato (size/mtime diversi) → cache miss."""
+    with tempfile.TemporaryDirectory() as tmp:
+        media = Path(tmp) / "a.flac"
+        media.write_bytes(b"x" * 10)
+        cache = ProbeCache(Path(tmp) / "cache.sqlite3")
+        cache.put(media, _INFO)
+        media.write_bytes(b"x" * 20)
+        assert cache.get(media) is None
+
+
+def test_lru_eviction_keeps_recent_entries() -> None:
+    """Oltre max_entries vengono rimosse le voci usate meno di recente."""
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = ProbeCache(Path(tmp) / "cache.sqlite3", max_entries=10)
+        files = []
+        for i in range(300):
+            f = Path(tmp) / f"{i}.wav"
+            f.write_bytes(b"")
+            files.append(f)
+            cache.put(f, _INFO)
+        assert cache.get(files[0]) is None
+        assert cache.get(files[-1]) == _INFO
+
+
+def test_probe_media_cache_hit_skips_ffprobe() -> None:
+    """Con voce in cache probe_media non avvia ffprobe."""
+    with tempfile.TemporaryDirectory() as tmp:
+        media = Path(tmp) / "a.flac"
+        media.write_bytes(b"x")
+        os.utime(media, ns=(1_000_000_000, 1_000_000_000))
+        cache = ProbeCache(Path(tmp) / "cache.sqlite3")
+        cache.put(media, _INFO)
+        with patch("downconv.engines.ffmpeg_engine.subprocess.run") as mock_run:
+            assert probe_media(media, cache=cache) == _INFO
+        mock_run.assert_not_called()
+
+
+def test_hit_touches_lru_at_most_once_per_interval() -> None:
+    """Hit ripetuti: last_used aggiornato solo se più vecchio dell'intervallo."""
+    with tempfile.TemporaryDirectory() as tmp:
+        media = Path(tmp) / "a.flac"
+        media.write_bytes(b"x")
+        cache = ProbeCache(Path(tmp) / "cache.sqlite3")
+        cache.put(media, _INFO)
+        conn = cache._connect()
+        conn.execute("UPDATE probe SET last_used = 0")
+        conn.commit()
+        assert cache.get(media) == _INFO
+        (touched,) = conn.execute("SELECT last_used FROM probe").fetchone()
+        assert touched > 0
+        with patch("downconv.utils.probe_cache.time.time", return_value=touched + 1):
+            assert cache.get(media) == _INFO
+        assert conn.execute("SELECT last_used FROM probe").fetchone() == (touched,)
+
+
+def test_failed_probe_cached_until_file_changes() -> None:
+    """Probe fallito ricordato: niente secondo ffprobe finché il file non cambia."""
+    with tempfile.TemporaryDirectory() as tmp:
+        media = Path(tmp) / "cover.jpg"
+        media.write_bytes(b"x")
+        cache = ProbeCache(Path(tmp) / "cache.sqlite3")
+        with patch("downconv.engines.ffmpeg_engine.subprocess.run") as mock_run:
+            mock_run.return_value.returncode = 1
+            mock_run.return_value.stdout = ""
+            assert probe_media(media, ffprobe_path="ffprobe", cache=cache) is None
+            assert probe_media(media, ffprobe_path="ffprobe", cache=cache) is None
+            assert mock_run.call_count == 1
+            assert cache.is_known_failure(media)
+            media.write_bytes(b"xy")
+            assert not cache.is_known_failure(media)
+            assert probe_media(media, ffprobe_path="ffprobe", cache=cache) is None
+            assert mock_run.call_count == 2
+        cache.put(media, _INFO)
+        assert not cache.is_known_failure(media)
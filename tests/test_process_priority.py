@@ -0,0 +1,64 @@
+"""Test priorità processi FFmpeg (niceness, worker, modalità)."""
+
+import logging
+import os
+import sys
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from downconv.engines.ffmpeg_engine import FfmpegEngine
+from downconv.engines.process_priority import (
+    PRIORITY_BACKGROUND,
+    PRIORITY_NORMAL,
+    PRIORITY_TURBO,
+    apply_priority,
+    priority_for_mode,
+    worker_cpu_count,
+)
+
+
+def test_priority_modes() -> None:
+    """Background abbassa CPU e I/O, turbo li alza, normale non tocca nulla."""
+    background = priority_for_mode(PRIORITY_BACKGROUND)
+    turbo = priority_for_mode(PRIORITY_TURBO)
+    assert background.nice > 0 and background.io_level == 7
+    assert turbo.nice < 0 and turbo.io_level == 0
+    assert priority_for_mode(PRIORITY_NORMAL) == priority_for_mode("sconosciuta")
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count()
+    expected = cpus - 1 if cpus >= 4 else cpus
+    assert worker_cpu_count(PRIORITY_BACKGROUND) == expected
+    assert worker_cpu_count(PRIORITY_TURBO) == cpus
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="niceness Unix")
+def test_background_engine_lowers_child_niceness() -> None:
+    """I processi avviati dall'engine in background partono con niceness più alta."""
+    engine = FfmpegEngine("sleep", priority=PRIORITY_BACKGROUND)
+    expected = min(19, os.getpriority(os.PRIO_PROCESS, 0) + 10)
+    proc = engine._popen(["sleep", "5"])
+    try:
+        assert os.getpriority(os.PRIO_PROCESS, proc.pid) == expected
+    finally:
+        proc.kill()
+        proc.wait()
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="niceness Unix")
+def test_turbo_without_privileges_warns_once(caplog: pytest.LogCaptureFixture) -> None:
+    """Niceness negativa rifiutata: un solo avviso, nessun nuovo tentativo."""
+    from downconv.engines import process_priority
+
+    turbo = priority_for_mode(PRIORITY_TURBO)
+    denied = PermissionError(1, "Operation not permitted")
+    with (
+        patch.object(process_priority, "_raise_denied", threading.Event()),
+        patch.object(process_priority, "_ioprio_set", return_value=True),
+        patch("os.setpriority", side_effect=denied) as setpriority,
+        caplog.at_level(logging.WARNING, logger=process_priority.__name__),
+    ):
+        apply_priority(os.getpid(), turbo)
+        apply_priority(os.getpid(), turbo)
+    assert setpriority.call_count == 1
+    assert len([r for r in caplog.records if "Turbo" in r.getMessage()]) == 1
@@ -0,0 +1,248 @@
+"""Test unione dei segmenti FLAC e MP3 (stream sintetici, senza FFmpeg)."""
+
+import re
+import struct
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from downconv.engines.ffmpeg_engine import FfmpegEngine
+from downconv.engines.segment_join import join_flac, join_mp3
+from downconv.utils.probe_cache import ProbeCache, ProbeInfo
+
+BLOCK = 4608
+MP3_FRAME = 1152
+RATE = 44100
+MD5 = bytes(range(16))
+
+
+def _crc8(data: bytes) -> int:
+    crc = 0
+    for b in data:
+        crc ^= b
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x07 if crc & 0x80 else crc << 1) & 0xFF
+    return crc
+
+
+def _crc16_flac(data: bytes) -> int:
+    crc = 0
+    for b in data:
+        crc ^= b << 8
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x8005 if crc & 0x8000 else crc << 1) & 0xFFFF
+    return crc
+
+
+def _crc16_lame_byte(byte: int) -> int:
+    crc = byte
+    for _ in range(8):
+        crc = (crc >> 1) ^ 0xA001 if crc & 1 else crc >> 1
+    return crc
+
+
+_LAME_TABLE = [_crc16_lame_byte(b) for b in range(256)]
+
+
+def _crc16_lame(data: bytes) -> int:
+    crc = 0
+    for b in data:
+        crc = (crc >> 8) ^ _LAME_TABLE[(crc ^ b) & 0xFF]
+    return crc
+
+
+# --- FLAC ---------------------------------------------------------------------------
+
+
+def _flac_frame(number: int, g: int, samples: int) -> bytes:
+    """Frame con numero number e contenuto derivato dal frame globale g (con un falso
+    sincronismo nei dati, come può capitare nell'audio compresso)."""
+    code = {BLOCK: 5, 2304: 4}.get(samples, 7)
+    header = bytes((0xFF, 0xF8, (code << 4) | 0x09, 0x18)) + chr(number).encode("utf-8")
+    if code == 7:
+        header += (samples - 1).to_bytes(2, "big")
+    header += bytes((_crc8(header),))
+    body = g.to_bytes(4, "big") * (3 + g % 5) + b"\xff\xf8\x59\x18\x01\x00" + bytes(g % 7)
+    frame = header + body
+    return frame + _crc16_flac(frame).to_bytes(2, "big")
+
+
+def _flac_file(frames: list[bytes], total: int, md5: bytes, seektable: bool = False) -> bytes:
+    sizes = [len(f) for f in frames]
+    info = struct.pack(">HH", BLOCK, BLOCK) + min(sizes).to_bytes(3, "big")
+    info += max(sizes).to_bytes(3, "big")
+    info += ((RATE << 44) | (1 << 41) | (15 << 36) | total).to_bytes(8, "big") + md5
+    blocks = [(0, info)]
+    if seektable:
+        blocks.append((3, bytes(18)))
+    blocks += [(4, b"vorbis comment"), (1, bytes(16))]
+    out = b"fLaC"
+    for i, (kind, data) in enumerate(blocks):
+        out += bytes((kind | (0x80 if i == len(blocks) - 1 else 0),))
+        out += len(data).to_bytes(3, "big") + data
+    return out + b"".join(frames)
+
+
+def _flac_range(start: int, end: int, total: int) -> list[tuple[int, int]]:
+    """Frame globali (indice, campioni) che coprono [start, end)."""
+    return [(g, min(BLOCK, total - g * BLOCK)) for g in range(start // BLOCK, -(-end // BLOCK))]
+
+
+def test_join_flac_renumbers_frames_like_serial_encode(tmp_path: Path) -> None:
+    """Frame rinumerati (numeri oltre 127: header più lungo, CRC aggiornati), STREAMINFO
+    e metadati come la codifica seriale, SEEKTABLE del segmento omessa."""
+    total = 299 * BLOCK + 1000
+    frames = _flac_range(0, total, total)
+    serial = _flac_file([_flac_frame(g, g, n) for g, n in frames], total, MD5)
+    segs = []
+    for i, part in enumerate((frames[:100], frames[100:200], frames[200:])):
+        data = [_flac_frame(local, g, n) for local, (g, n) in enumerate(part)]
+        path = tmp_path / f"seg_{i}.flac"
+        path.write_bytes(_flac_file(data, sum(n for _, n in part), bytes(16), seektable=i == 0))
+        segs.append(path)
+
+    out = tmp_path / "joined.flac"
+    assert join_flac(segs, out, MD5, BLOCK) == total
+    assert out.read_bytes() == serial
+
+    with pytest.raises(ValueError):
+        join_flac(segs, out, MD5, 4096)
+
+
+# --- MP3 ----------------------------------------------------------------------------
+
+MP3_LEN = 417  # 128 kbps a 44,1 kHz senza padding
+DELAY = 576
+
+
+def _mp3_frame(g: int, main_data_begin: int = 0) -> bytes:
+    pad = g % 3 == 0
+    header = bytes((0xFF, 0xFB, 0x90 | (pad << 1), 0x00))
+    side = bytearray(32)
+    side[0], side[1] = main_data_begin >> 1, (main_data_begin & 1) << 7
+    payload = g.to_bytes(4, "big") * 20
+    return header + bytes(side) + payload + bytes(MP3_LEN + pad - 36 - len(payload))
+
+
+def _xing(frames: list[bytes], padding: int) -> bytes:
+    """Frame Info come lo scrive FFmpeg: byte del frame Xing inclusi, TOC, tag LAME."""
+    audio = b"".join(frames)
+    xing = bytearray(bytes((0xFF, 0xFB, 0x90, 0x00)) + bytes(MP3_LEN - 4))
+    xing[36:44] = b"Info" + (0x0F).to_bytes(4, "big")
+    xing[44:48] = len(frames).to_bytes(4, "big")
+    xing[48:52] = (len(audio) + MP3_LEN).to_bytes(4, "big")
+    xing[52:152] = bytes(range(100))
+    lame = 156
+    xing[lame : lame + 9] = b"Lavc60.31"
+    xing[lame + 21 : lame + 24] = ((DELAY << 12) | padding).to_bytes(3, "big")
+    xing[lame + 28 : lame + 32] = len(audio).to_bytes(4, "big")
+    xing[lame + 32 : lame + 34] = _crc16_lame(audio).to_bytes(2, "big")
+    xing[lame + 34 : lame + 36] = _crc16_lame(bytes(xing[:190])).to_bytes(2, "big")
+    return bytes(xing)
+
+
+ID3 = b"ID3\x03\x00\x00\x00\x00\x00\x05TIT2x"
+
+
+def _mp3_file(frames: list[bytes], padding: int) -> bytes:
+    return ID3 + _xing(frames, padding) + b"".join(frames)
+
+
+def test_join_mp3_drops_preroll_and_writes_one_lame_header(tmp_path: Path) -> None:
+    """Frame di pre-roll e coda scartati, un solo header Info con totali, ritardo, padding
+    dell'ultimo segmento e CRC ricalcolati."""
+    parts = [(0, 10, 8), (10, 10, 8), (20, 12, 0)]  # (primo frame, tenuti, coda)
+    segs, keep = [], []
+    for i, (first, count, tail) in enumerate(parts):
+        pre = list(range(first - 8, first)) if first else []
+        frames = [_mp3_frame(1000 + g) for g in pre]
+        frames += [_mp3_frame(g) for g in range(first, first + count)]
+        frames += [_mp3_frame(2000 + g) for g in range(tail)]
+        path = tmp_path / f"seg_{i}.mp3"
+        path.write_bytes(_mp3_file(frames, padding=700 + i))
+        segs.append(path)
+        keep.append((len(pre), count if tail else None))
+
+    out = tmp_path / "joined.mp3"
+    assert join_mp3(segs, out, keep) == 32
+    data = out.read_bytes()
+    audio = b"".join(_mp3_frame(g) for g in range(32))
+    assert data.startswith(ID3) and data.endswith(audio)
+    xing = data[len(ID3) : len(ID3) + MP3_LEN]
+    assert len(data) == len(ID3) + MP3_LEN + len(audio)
+    assert int.from_bytes(xing[44:48], "big") == 32
+    assert int.from_bytes(xing[48:52], "big") == len(audio) + MP3_LEN
+    toc = xing[52:152]
+    assert toc[0] == 0 and list(toc) == sorted(toc)
+    lame = 156
+    assert int.from_bytes(xing[lame + 21 : lame + 24], "big") == (DELAY << 12) | 702
+    assert int.from_bytes(xing[lame + 28 : lame + 32], "big") == len(audio)
+    assert int.from_bytes(xing[lame + 32 : lame + 34], "big") == _crc16_lame(audio)
+    assert int.from_bytes(xing[lame + 34 : lame + 36], "big") == _crc16_lame(xing[:190])
+
+    # Primo frame tenuto che usa byte dei frame scartati: non unibile
+    frames = [_mp3_frame(g) for g in range(8)] + [_mp3_frame(8, main_data_begin=100)]
+    segs[1].write_bytes(_mp3_file(frames, padding=0))
+    with pytest.raises(ValueError):
+        join_mp3(segs, out, keep)
+
+
+# --- Engine -------------------------------------------------------------------------
+
+
+def _fake_segment_ffmpeg(total: int, fmt: str):
+    """_run_ffmpeg_quiet finto: ogni segmento contiene i frame "seriali" del suo intervallo
+    (da -ss e atrim); il calcolo MD5 scrive un valore fisso."""
+
+    def run(cmd, creationflags, popen=None):
+        out = Path(cmd[-1])
+        if "md5" in cmd:
+            out.write_text(f"MD5={MD5.hex()}\n", encoding="ascii")
+            return 0, ""
+        seek = int(cmd[cmd.index("-ss") + 1]) * RATE
+        trim = cmd[cmd.index("-af") + 1]
+        start = seek + int(re.search(r"start_sample=(\d+)", trim).group(1))
+        end_match = re.search(r"end_sample=(\d+)", trim)
+        end = seek + int(end_match.group(1)) if end_match else total
+        if fmt == "flac":
+            part = _flac_range(start, end, total)
+            frames = [_flac_frame(local, g, n) for local, (g, n) in enumerate(part)]
+            out.write_bytes(_flac_file(frames, end - start, bytes(16)))
+        else:
+            assert "-reservoir" in cmd and start % MP3_FRAME == 0
+            count = -(-(end - start + DELAY) // MP3_FRAME)
+            frames = [_mp3_frame(start // MP3_FRAME + j) for j in range(count)]
+            out.write_bytes(_mp3_file(frames, padding=count * MP3_FRAME - DELAY - end + start))
+        return 0, ""
+
+    return run
+
+
+@pytest.mark.parametrize("fmt", ["flac", "mp3"])
+def test_convert_segmented_joins_flac_and_mp3(tmp_path: Path, fmt: str) -> None:
+    """File lungo a segmenti: FLAC identico alla codifica seriale, MP3 con i frame del
+    flusso continuo (pre-roll scartato) e padding finale corretto."""
+    duration = 960.0 if fmt == "flac" else 480.0  # Durata minima: controllata da can_segment
+    total = int(duration * RATE)
+    info = ProbeInfo(duration, "pcm_s16le", RATE, 2, 1411200, "wav")
+    engine = FfmpegEngine("ffmpeg", probe_cache=ProbeCache(tmp_path / "p.db"))
+    src = tmp_path / "in.wav"
+    src.write_bytes(b"x")
+    run = _fake_segment_ffmpeg(total, fmt)
+    with patch("downconv.engines.ffmpeg_engine._run_ffmpeg_quiet", side_effect=run) as mock:
+        ok, err = engine.convert_segmented(src, tmp_path / f"out.{fmt}", fmt, info, 4, None, "320k")
+    assert ok, err
+    data = (tmp_path / f"out.{fmt}").read_bytes()
+    if fmt == "flac":
+        assert mock.call_count == 5  # 4 segmenti + MD5
+        frames = _flac_range(0, total, total)
+        assert data == _flac_file([_flac_frame(g, g, n) for g, n in frames], total, MD5)
+    else:
+        count = -(-(total + DELAY) // MP3_FRAME)
+        assert data.endswith(b"".join(_mp3_frame(g) for g in range(count)))
+        lame = len(ID3) + 156
+        padding = count * MP3_FRAME - DELAY - total
+        assert int.from_bytes(data[lame + 21 : lame + 24], "big") == (DELAY << 12) | padding
+        assert mock.call_count == 4
+    assert not list(tmp_path.glob(".out_seg_*"))
@@ -0,0 +1,115 @@
+"""Test telemetria conversioni (risorse processi figli, record job e riepilogo batch)."""
+
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from downconv.engines.telemetry import (
+    PATH_ENCODE,
+    PATH_STREAM_COPY,
+    BatchTelemetry,
+    JobTelemetry,
+    TrackedPopen,
+)
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="rusage via os.wait4 (Unix)")
+def test_tracked_popen_records_child_cpu() -> None:
+    """CPU del solo figlio letta al reap, anche quando il reap avviene via poll()."""
+    busy = "import time\nt = time.process_time()\nwhile time.process_time() - t < 0.2: pass"
+    proc = TrackedPopen([sys.executable, "-c", busy], stdout=subprocess.DEVNULL)
+    while proc.poll() is None:
+        proc.sample_rss()
+    assert proc.returncode == 0
+    assert proc.cpu_user is not None and proc.cpu_user + proc.cpu_system >= 0.15
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="rusage via os.wait4 (Unix)")
+def test_tracked_popen_wait_and_communicate_keep_popen_semantics() -> None:
+    """wait() con timeout scaduto solleva TimeoutExpired; communicate() raccoglie rusage."""
+    proc = TrackedPopen([sys.executable, "-c", "import time; time.sleep(0.3)"])
+    with pytest.raises(subprocess.TimeoutExpired):
+        proc.wait(timeout=0.01)
+    assert proc.wait(timeout=5) == 0 and proc.cpu_user is not None
+
+    proc = TrackedPopen(
+        [sys.executable, "-c", "import sys; print('ok'); sys.exit(3)"],
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    out, _ = proc.communicate()
+    assert out.strip() == "ok" and proc.returncode == 3
+    assert proc.cpu_user is not None
+
+
+def test_job_records_fallback_and_batch_summary(tmp_path: Path) -> None:
+    """Record job con percorso/fallback e byte; riepilogo batch con somme e file più lenti."""
+    src = tmp_path / "in.wav"
+    src.write_bytes(b"x" * 1000)
+    out = tmp_path / "in.flac"
+    out.write_bytes(b"y" * 400)
+    job = JobTelemetry(src, [out], ["flac"])
+    job.audio_seconds = 10.0
+    job.path = PATH_STREAM_COPY
+    job.fallback(PATH_STREAM_COPY, PATH_ENCODE)
+    record = job.finish(True)
+    assert record["path"] == PATH_ENCODE and record["fallbacks"] == [PATH_STREAM_COPY]
+    assert record["input_bytes"] == 1000 and record["output_bytes"] == 400
+    assert record["realtime_factor"] is not None
+
+    failed = JobTelemetry(src, [tmp_path / "missing.mp3"], ["mp3"]).finish(False, "errore")
+    batch = BatchTelemetry()
+    batch.add(record)
+    batch.add(failed)
+    summary = batch.summary()
+    assert summary["jobs"] == 2 and summary["failed"] == 1
+    assert summary["paths"] == {PATH_ENCODE: 2}
+    assert summary["fallbacks"] == 1
+    assert summary["output_bytes"] == 400
+    assert [s["input"] for s in summary["slowest"]] == [str(src)]
+
+
+def test_concurrent_batches_on_one_engine_keep_separate_summaries(tmp_path: Path) -> None:
+    """Due convert_batch in parallelo sullo stesso engine: ogni riepilogo ha i suoi job."""
+    import threading
+    import time
+    from unittest.mock import patch
+
+    from downconv.engines import ffmpeg_engine
+    from downconv.engines.ffmpeg_engine import FfmpegEngine
+
+    batches: list[BatchTelemetry] = []
+
+    def _new_batch() -> BatchTelemetry:
+        batch = BatchTelemetry()
+        batches.append(batch)
+        return batch
+
+    def _slow_run(*_args, **_kwargs):
+        time.sleep(0.02)
+        return 0, ""
+
+    engine = FfmpegEngine("ffmpeg")
+    sizes = (3, 5)
+    inputs = []
+    for n, count in enumerate(sizes):
+        files = [tmp_path / f"{n}_{i}.wav" for i in range(count)]
+        for f in files:
+            f.write_bytes(b"x")
+        inputs.append(files)
+    with (
+        patch.object(ffmpeg_engine, "BatchTelemetry", side_effect=_new_batch),
+        patch.object(engine, "probe", return_value=None),
+        patch.object(ffmpeg_engine, "_run_ffmpeg_quiet", side_effect=_slow_run),
+    ):
+        threads = [
+            threading.Thread(target=engine.convert_batch, args=(files, tmp_path / "out", "mp3"))
+            for files in inputs
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(timeout=10)
+    assert sorted(b.summary()["jobs"] for b in batches) == list(sizes)
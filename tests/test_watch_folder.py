@@ -0,0 +1,85 @@
+"""Test cartella monitorata: attesa fine scrittura, indice elaborati, conversione."""
+
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+from PySide6.QtCore import QCoreApplication
+
+from downconv.engines.ffmpeg_engine import OutputTarget
+from downconv.services.watch_folder_service import WatchFolderWorker, check_watch_folders
+from downconv.utils.fs_watch import SettleTracker
+from downconv.utils.watch_index import WatchIndex
+
+
+def test_settle_tracker_waits_until_file_stops_growing(tmp_path: Path) -> None:
+    """Pronto solo dopo settle_sec senza cambi di size; le scansioni ripetute non azzerano."""
+    f = tmp_path / "a.wav"
+    f.write_bytes(b"x" * 10)
+    tracker = SettleTracker(settle_sec=5)
+    tracker.add([f], now=100)
+    assert tracker.pop_ready(now=103) == []
+    f.write_bytes(b"x" * 20)  # Ancora in copia
+    assert tracker.pop_ready(now=104) == []
+    tracker.add([f], now=108)  # Scansione periodica: stessa identità, attesa non azzerata
+    assert tracker.pop_ready(now=108.5) == []
+    ready = tracker.pop_ready(now=109.5)
+    assert [p for p, _ in ready] == [f] and ready[0][1][0] == 20
+    assert len(tracker) == 0
+
+
+def test_check_watch_folders_rejects_output_inside(tmp_path: Path) -> None:
+    """Uscite dentro la cartella monitorata verrebbero riconvertite: rifiutate."""
+    assert check_watch_folders(tmp_path, tmp_path / "out")[0] is False
+    assert check_watch_folders(tmp_path / "missing", tmp_path.parent / "out")[0] is False
+    assert check_watch_folders(tmp_path / "in", tmp_path / "out")[0] is False
+    (tmp_path / "in").mkdir()
+    assert check_watch_folders(tmp_path / "in", tmp_path / "out") == (True, "")
+
+
+def _run_watcher(
+    src: Path, out: Path, index: WatchIndex, calls: list, until, timeout: float = 10
+) -> None:
+    """Avvia il worker con conversione finta, attende until() (max timeout s) e lo ferma."""
+
+    def fake_multi(inp, outputs, progress_callback=None, overwrite=True, **_kwargs):
+        calls.append(inp)
+        for o, _ in outputs:
+            o.write_bytes(b"converted")
+        return [(o, True, "") for o, _ in outputs]
+
+    if QCoreApplication.instance() is None:
+        QCoreApplication([])
+    worker = WatchFolderWorker(src, out, [OutputTarget("mp3", "320k")], 0.3, 1, index=index)
+    with (
+        patch("downconv.services.watch_folder_service.check_ffmpeg_available", return_value=True),
+        patch.object(worker._engine, "convert_multi", side_effect=fake_multi),
+    ):
+        worker.start()
+        deadline = time.monotonic() + timeout
+        while not until() and time.monotonic() < deadline:
+            time.sleep(0.05)
+        worker.stop()
+        worker.wait()
+
+
+def test_watch_converts_new_files_once_across_restarts(tmp_path: Path) -> None:
+    """File aggiunti convertiti (anche in sottocartelle); dopo il riavvio non si rifanno."""
+    src, out = tmp_path / "in", tmp_path / "out"
+    (src / "album").mkdir(parents=True)
+    (src / "old.wav").write_bytes(b"w" * 100)
+    (src / ".hidden.wav").write_bytes(b"h")
+    index = WatchIndex(tmp_path / "watch.sqlite3")
+    calls: list[Path] = []
+    first = out / "old.mp3"
+    _run_watcher(src, out, index, calls, lambda: first.exists())
+    assert first.exists()
+
+    (src / "album" / "new.flac").write_bytes(b"f" * 100)
+    second = out / "album" / "new.mp3"
+    _run_watcher(src, out, index, calls, lambda: second.exists())
+    assert second.exists()
+    assert sorted(p.name for p in calls) == ["new.flac", "old.wav"]
+
+    _run_watcher(src, out, index, calls, lambda: len(calls) > 2, timeout=1.5)
+    assert len(calls) == 2
@@ -0,0 +1,40 @@
+"""Test AdaptiveWorkerPolicy (dimensionamento pool conversione)."""
+
+from downconv.engines.worker_policy import AdaptiveWorkerPolicy
+
+
+def test_initial_workers_follow_codec_cost() -> None:
+    """MP3 (CPU-bound) parte da un worker per core, WAV (I/O) da meno."""
+    assert AdaptiveWorkerPolicy("mp3", cpu_count=8).workers == 8
+    assert AdaptiveWorkerPolicy("wav", cpu_count=8).workers == 2
+    assert AdaptiveWorkerPolicy("wav", cpu_count=1).workers == 1
+
+
+def test_fixed_workers_override_disables_adaptation() -> None:
+    """Override utente: numero fisso, nessun adattamento."""
+    policy = AdaptiveWorkerPolicy("mp3", cpu_count=8, fixed_workers=3)
+    for _ in range(10):
+        policy.job_done(10**6)
+    assert policy.workers == 3
+    assert policy.max_workers == 3
+
+
+def test_grows_with_idle_cpu_and_backs_off_when_disk_bound() -> None:
+    """CPU libera → +1; se il throughput non cresce dopo l'aumento → -1 e stop."""
+    policy = AdaptiveWorkerPolicy("wav", cpu_count=8)
+    start = policy.workers
+    policy._adjust(utilization=0.2, throughput=100e6, load_ratio=0.2)
+    policy._last_throughput = 100e6
+    assert policy.workers == start + 1
+    policy._adjust(utilization=0.2, throughput=101e6, load_ratio=0.2)
+    assert policy.workers == start
+    policy._adjust(utilization=0.2, throughput=101e6, load_ratio=0.2)
+    assert policy.workers == start
+
+
+def test_saturated_cpu_never_exceeds_core_count() -> None:
+    """CPU satura: sopra il numero di core si riduce."""
+    policy = AdaptiveWorkerPolicy("flac", cpu_count=2, max_workers=4)
+    policy._workers = 4
+    policy._adjust(utilization=0.95, throughput=50e6, load_ratio=1.5)
+    assert policy.workers == 3
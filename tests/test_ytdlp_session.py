@@ -0,0 +1,72 @@
+"""Test sessioni YoutubeDL riusate (senza rete)."""
+
+import tempfile
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from downconv.engines.ytdlp_engine import YtdlpEngine
+from downconv.engines.ytdlp_session import YdlSessionPool
+
+OPTS = {"quiet": True, "no_warnings": True, "outtmpl": "/tmp/a/%(title)s.%(ext)s"}
+
+
+def test_pool_reuses_instance_per_profile() -> None:
+    """Stesso profilo: stessa istanza, formato reimpostato, hook del singolo uso."""
+    pool = YdlSessionPool()
+    seen: list[str] = []
+    with pool.session({**OPTS, "format": "bestaudio"}, lambda d: seen.append("a")) as first:
+        first._progress_hooks[0]({"status": "downloading"})
+    with pool.session({**OPTS, "format": "best"}, lambda d: seen.append("b")) as second:
+        second._progress_hooks[0]({"status": "downloading"})
+        assert second.params["format"] == "best"
+    with pool.session({**OPTS, "outtmpl": "/tmp/b/%(title)s.%(ext)s"}) as other:
+        pass
+    assert second is first and other is not first
+    assert seen == ["a", "b"]
+    assert (pool.created, pool.reused) == (2, 1)
+    pool.close()
+
+
+def test_pool_discards_after_error_limits_and_close() -> None:
+    """Eccezione, usi massimi, inattività e close(): l'istanza non torna nel pool."""
+    pool = YdlSessionPool(max_uses=2)
+    with pytest.raises(RuntimeError):
+        with pool.session(OPTS) as broken:
+            raise RuntimeError("errore a metà download")
+    with pool.session(OPTS) as ydl:
+        assert ydl is not broken
+    with pool.session(OPTS) as again:
+        assert again is ydl
+    with pool.session(OPTS) as fresh:  # Secondo uso: ricreata
+        assert fresh is not ydl
+
+    stale = YdlSessionPool(idle_ttl=0.0)
+    with stale.session(OPTS) as old:
+        pass
+    with stale.session(OPTS) as new:
+        assert new is not old
+
+    pool.close()
+    with pool.session(OPTS) as after_close:
+        pass
+    with pool.session(OPTS) as last:
+        assert last is not after_close
+
+
+@patch("yt_dlp.YoutubeDL")
+def test_engine_downloads_share_one_youtubedl(mock_ydl_class: MagicMock) -> None:
+    """URL consecutivi con le stesse opzioni: un solo YoutubeDL, chiuso da engine.close()."""
+    mock_instance = MagicMock(params={})
+    mock_ydl_class.return_value.__enter__.return_value = mock_instance
+
+    engine = YtdlpEngine(stream_encode=False)
+    with tempfile.TemporaryDirectory() as tmp:
+        for i in range(3):
+            ok, _ = engine.download(f"https://www.youtube.com/watch?v={i}", Path(tmp))
+            assert ok
+    engine.close()
+    assert mock_ydl_class.call_count == 1
+    assert mock_instance.download.call_count == 3
+    mock_ydl_class.return_value.__exit__.assert_called_once()